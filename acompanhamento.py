@@ -0,0 +1,159 @@
+# ============================================================================
+# ACOMPANHAMENTO AO VIVO DOS MONITORES (LEITURA INCREMENTAL)
+# ============================================================================
+# Em simulações quase-estáticas longas o OpenDSS vai acrescentando linhas aos
+# CSVs dos monitores. Reler o arquivo inteiro a cada atualização fica cada
+# vez mais caro; aqui cada arquivo guarda a posição (em bytes) até onde já
+# foi lido, e cada atualização interpreta só as linhas novas e completas,
+# acrescentando-as ao DataFrame em memória. Uma linha ainda sendo escrita
+# (sem "\n" no final) fica para a próxima leitura.
+#
+# O estado de cada arquivo é um dict simples, um por arquivo no processo
+# (caminho + inode): várias sessões acompanhando o mesmo monitor fazem uma
+# leitura por atualização e recebem o mesmo DataFrame, sem cópias. Cada
+# sessão guarda só a própria visão (quantas linhas já viu).
+#
+# As linhas novas passam pela mesma política de tipos (compactar_tipos, com a
+# verificação de tolerância): uma coluna float32 que deixa de caber volta a
+# float64 em vez de ser arredondada em silêncio.
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from compactacao import CHAVE_ATTRS, compactar_tipos, memoria_bytes
+from monitores import sanitize_columns
+
+# Intervalos de atualização oferecidos no dashboard (segundos)
+INTERVALOS_ATUALIZACAO = [1, 2, 5, 10, 30]
+
+# Maior bloco lido por atualização (o restante fica para a próxima)
+MAX_BYTES_POR_LEITURA = 64 * 1024**2
+
+# Arquivos acompanhados por processo (LRU); o excedente é relido do zero
+MAX_ARQUIVOS_ACOMPANHADOS = 64
+
+_ACOMPANHADOS = OrderedDict()  # (caminho, identidade) -> {"estado", "trava"}
+_TRAVA = threading.Lock()
+
+
+def novo_estado(caminho):
+    """Estado de leitura de um monitor ainda não lido."""
+    return {"caminho": caminho, "posicao": 0, "colunas": None, "df": None, "identidade": None, "linhas_novas": 0}
+
+
+def _identidade(info):
+    # Arquivo recriado (nova simulação) costuma ter outro inode
+    return (info.st_dev, info.st_ino)
+
+
+def ler_linhas_novas(estado):
+    """
+    Lê as linhas acrescentadas desde a última chamada e atualiza estado["df"].
+
+    Se o arquivo encolheu ou foi recriado (nova simulação), a leitura
+    recomeça do zero. Retorna o número de linhas novas (0 se nada mudou ou
+    se o arquivo ainda não existe).
+    """
+    estado["linhas_novas"] = 0
+    try:
+        info = os.stat(estado["caminho"])
+    except FileNotFoundError:
+        return 0
+
+    if info.st_size < estado["posicao"] or _identidade(info) != estado["identidade"]:
+        estado.update(novo_estado(estado["caminho"]))
+        estado["identidade"] = _identidade(info)
+    if info.st_size == estado["posicao"]:
+        return 0
+
+    with open(estado["caminho"], "rb") as f:
+        f.seek(estado["posicao"])
+        bloco = f.read(min(info.st_size - estado["posicao"], MAX_BYTES_POR_LEITURA))
+
+    # Só linhas completas; a última, se ainda estiver sendo escrita, fica para depois
+    fim = bloco.rfind(b"\n") + 1
+    if fim == 0:
+        return 0
+    linhas = bloco[:fim]
+    estado["posicao"] += fim
+
+    if estado["colunas"] is None:
+        quebra = linhas.find(b"\n") + 1
+        estado["colunas"] = sanitize_columns(linhas[:quebra].decode("utf-8").strip().split(","))
+        linhas = linhas[quebra:]
+    if not linhas.strip():
+        return 0
+
+    novas = compactar_tipos(pd.read_csv(io.BytesIO(linhas), header=None, names=estado["colunas"], skipinitialspace=True))
+    estado["df"] = novas if estado["df"] is None else _acrescentar(estado["df"], novas)
+    estado["linhas_novas"] = len(novas)
+    return len(novas)
+
+
+def _acrescentar(df, novas):
+    """
+    Junta o bloco novo (já compactado) ao DataFrame acumulado.
+
+    Se uma coluna float32 do acumulado veio float64 no bloco novo (fora da
+    tolerância), o concat promove a coluna inteira para float64, e o resumo
+    da compactação registra a coluna como mantida em float64.
+    """
+    junto = pd.concat([df, novas], ignore_index=True)
+    junto.attrs = dict(df.attrs)
+    resumo = df.attrs.get(CHAVE_ATTRS)
+    if resumo:
+        alargadas = [c for c in resumo["float32"] if junto[c].dtype != np.float32]
+        junto.attrs[CHAVE_ATTRS] = {
+            **resumo,
+            "float32": [c for c in resumo["float32"] if c not in alargadas],
+            "float64_mantidas": resumo["float64_mantidas"] + alargadas,
+            "bytes_antes": resumo["bytes_antes"] + novas.attrs[CHAVE_ATTRS]["bytes_antes"],
+            "bytes_depois": memoria_bytes(junto),
+        }
+    return junto
+
+
+def acompanhar(caminho, visao=None):
+    """
+    Atualiza o estado compartilhado do arquivo e retorna a visão da sessão.
+
+    visao: o retorno da chamada anterior desta sessão (None na primeira).
+    Retorna um dict com "df" (compartilhado entre as sessões: não alterar;
+    None antes das primeiras linhas), "linhas_novas" (desde a visão anterior
+    desta sessão) e "posicao" (bytes lidos do arquivo).
+    """
+    caminho = os.path.abspath(caminho)
+    try:
+        identidade = _identidade(os.stat(caminho))
+    except FileNotFoundError:
+        return {"df": None, "linhas": 0, "linhas_novas": 0, "posicao": 0, "chave": None}
+
+    chave = (caminho, identidade)
+    with _TRAVA:
+        for antiga in [c for c in _ACOMPANHADOS if c[0] == caminho and c != chave]:
+            del _ACOMPANHADOS[antiga]  # Arquivo recriado: o estado antigo não serve mais
+        registro = _ACOMPANHADOS.setdefault(chave, {"estado": novo_estado(caminho), "trava": threading.Lock()})
+        _ACOMPANHADOS.move_to_end(chave)
+        while len(_ACOMPANHADOS) > MAX_ARQUIVOS_ACOMPANHADOS:
+            _ACOMPANHADOS.popitem(last=False)
+
+    # Uma leitura por vez por arquivo; as outras sessões esperam e usam o resultado
+    with registro["trava"]:
+        estado = registro["estado"]
+        ler_linhas_novas(estado)
+        df = estado["df"]
+
+    linhas = 0 if df is None else len(df)
+    anteriores = visao["linhas"] if visao and visao["chave"] == chave else 0
+    return {
+        "df": df,
+        "linhas": linhas,
+        # Arquivo truncado (mesmo inode) recomeça: tudo o que há é novo
+        "linhas_novas": linhas - anteriores if linhas >= anteriores else linhas,
+        "posicao": estado["posicao"],
+        "chave": chave,
+    }
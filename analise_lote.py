@@ -0,0 +1,247 @@
+# ============================================================================
+# ANÁLISE EM LOTE DOS MONITORES (SEM STREAMLIT)
+# ============================================================================
+# Calcula, para cada monitor de tensão de um cenário, os indicadores que os
+# dashboards mostram: DRP/DRC sobre as janelas de 10 minutos do PRODIST
+# (indicadores_prodist, o mesmo motor dos dashboards), fator de desequilíbrio
+# (componentes_simetricas) e mínimo/máximo/percentis da tensão por fase.
+# Os monitores são processados em paralelo (um processo por núcleo) e o
+# resultado é uma tabela compacta, uma linha por barra.
+#
+# Usado pela linha de comando: python main.py relatorio <cenário>
+# e python main.py sequencias <cenário> (componentes simétricas de tensão e
+# corrente de todos os monitores, numa tabela longa).
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from componentes_simetricas import (
+    LIMITE_FD_PRODIST,
+    calcular_fator_desequilibrio,
+    calcular_sequencias_lote,
+    resumir_sequencias,
+)
+from fonte_resultados import ler_cabecalho_csv
+from indicadores_prodist import calcular_drp_drc_janelas, resumir_tensoes
+from monitores import carregar_monitor, eh_monitor_opendss, montar_topologia, sanitize_columns
+
+PERCENTIS_PADRAO = (1, 5, 50, 95, 99)
+FASES_TENSAO = ["V1", "V2", "V3"]
+FORMATOS_RELATORIO = (".csv", ".parquet", ".json")
+
+
+# =======================================================
+# TAREFAS (UM MONITOR POR TAREFA)
+# =======================================================
+
+def listar_tarefas(alvo, kv_base=None):
+    """
+    Monta a lista de monitores a analisar.
+
+    Parâmetros:
+        alvo: config_circuito.json (usa os arquivos de tensão de cada elemento)
+              ou pasta do cenário (todos os CSVs de monitor, recursivamente)
+        kv_base: tensão de linha (kV) para os CSVs achados na pasta; sem ela
+                 os resultados ficam em volts e DRP/DRC não são calculados
+    """
+    if os.path.isfile(alvo):
+        with open(alvo, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        topologia = montar_topologia(config, os.path.dirname(os.path.abspath(alvo)))
+        return [
+            {"elemento": item["nome"], "arquivo": item["arquivo_vi"], "kv_base": item["kv_base"]}
+            for item in topologia
+        ]
+
+    arquivos = sorted(glob.glob(os.path.join(alvo, "**", "*.csv"), recursive=True))
+    return [
+        {"elemento": os.path.splitext(os.path.basename(arquivo))[0], "arquivo": arquivo, "kv_base": kv_base}
+        for arquivo in arquivos
+    ]
+
+
+def _tem_tensoes(arquivo):
+    """Só monitores do OpenDSS com colunas de tensão (V1...) entram no relatório."""
+    colunas = ler_cabecalho_csv(arquivo)
+    return eh_monitor_opendss(colunas) and "V1" in sanitize_columns(colunas)
+
+
+def _tempo_monitor_s(df):
+    """
+    Início do intervalo de cada amostra do monitor em segundos.
+
+    O OpenDSS marca a amostra no fim do intervalo (hour * 3600 + t(sec); no
+    modo daily, hour 1 a 24): um passo é subtraído para que cada amostra caia
+    na janela de 10 minutos que ela representa.
+    """
+    segundos = df["hour"].to_numpy(dtype=float) * 3600
+    if "tsec" in df.columns:
+        segundos = segundos + df["tsec"].to_numpy(dtype=float)
+    passos = np.diff(segundos)
+    passos = passos[passos > 0]
+    return segundos - np.median(passos) if len(passos) else segundos
+
+
+def analisar_monitor(tarefa, percentis=PERCENTIS_PADRAO):
+    """
+    Indicadores de um monitor (uma linha do relatório).
+
+    Tensões ficam em pu da tensão de fase (kv_base / √3) quando kv_base é
+    conhecido; senão, em volts. DRP/DRC são calculados sobre as janelas de
+    10 minutos (valor eficaz da janela), como nos dashboards. Retorna None se
+    o arquivo não for um monitor de tensão.
+    """
+    linha = {"elemento": tarefa["elemento"], "arquivo": tarefa["arquivo"], "kv_base": tarefa["kv_base"]}
+    try:
+        if not _tem_tensoes(tarefa["arquivo"]):
+            return None
+        df = carregar_monitor(tarefa["arquivo"])
+    except (OSError, ValueError, pd.errors.ParserError) as erro:
+        linha["erro"] = str(erro)
+        return linha
+
+    vn = tarefa["kv_base"] * 1000 / np.sqrt(3) if tarefa["kv_base"] else None
+    linha["unidade"] = "pu" if vn else "V"
+    linha["amostras"] = len(df)
+
+    fases = [f for f in FASES_TENSAO if f in df.columns]
+    tensoes = df[fases].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    for j, fase in enumerate(fases):
+        for estatistica, valor in resumir_tensoes(tensoes[:, j] / (vn or 1), percentis).items():
+            linha[f"{fase}_{estatistica}"] = valor
+
+    if vn and fases:
+        # Todas as fases de uma vez, nas janelas de 10 min (mesmo motor do layout_drp_drc)
+        tempo_s = _tempo_monitor_s(df) if "hour" in df.columns else None
+        indicadores = calcular_drp_drc_janelas(tempo_s, tensoes, vn, fases)
+        linha["janelas"] = int(indicadores["janelas"].max())
+        for _, fase in indicadores.iterrows():
+            linha[f"{fase['fase']}_DRP (%)"] = fase["DRP (%)"]
+            linha[f"{fase['fase']}_DRC (%)"] = fase["DRC (%)"]
+        linha["DRP (%)"] = indicadores["DRP (%)"].max()
+        linha["DRC (%)"] = indicadores["DRC (%)"].max()
+
+    if "VAngle1" in df.columns:
+        fd = calcular_fator_desequilibrio(df)["FD (%)"].to_numpy()
+        linha["FD_max (%)"] = np.nanmax(fd) if len(fd) else np.nan
+        linha["FD_p95 (%)"] = np.nanpercentile(fd, 95) if len(fd) else np.nan
+        linha["FD_acima_limite (%)"] = (fd > LIMITE_FD_PRODIST).mean() * 100 if len(fd) else np.nan
+
+    return linha
+
+
+def _analisar_bloco(tarefas, percentis):
+    return [analisar_monitor(tarefa, percentis) for tarefa in tarefas]
+
+
+# =======================================================
+# EXECUÇÃO EM PARALELO E RELATÓRIO
+# =======================================================
+
+def processar_lote(tarefas, processos=None, percentis=PERCENTIS_PADRAO, ao_progredir=None):
+    """
+    Analisa todos os monitores, em paralelo quando processos != 1.
+
+    Os monitores são enviados em blocos para reduzir a troca de mensagens
+    entre processos (milhares de arquivos pequenos). ao_progredir(feitos, total)
+    é chamada a cada bloco concluído.
+
+    Retorna um DataFrame com uma linha por monitor de tensão.
+    """
+    processos = processos or os.cpu_count() or 1
+    tamanho_bloco = max(1, min(64, len(tarefas) // (processos * 4) or 1))
+    blocos = [tarefas[i:i + tamanho_bloco] for i in range(0, len(tarefas), tamanho_bloco)]
+
+    linhas, feitos = [], 0
+    if processos == 1 or len(blocos) == 1:
+        resultados = (_analisar_bloco(bloco, percentis) for bloco in blocos)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=processos)
+        resultados = executor.map(_analisar_bloco, blocos, [percentis] * len(blocos))
+    try:
+        for bloco, resultado in zip(blocos, resultados):
+            linhas.extend(linha for linha in resultado if linha is not None)
+            feitos += len(bloco)
+            if ao_progredir is not None:
+                ao_progredir(feitos, len(tarefas))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return pd.DataFrame(linhas)
+
+
+def validar_formato_relatorio(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao not in FORMATOS_RELATORIO:
+        raise ValueError(f"Formato não suportado: '{extensao}' (use {', '.join(FORMATOS_RELATORIO)})")
+    return extensao
+
+
+def gravar_relatorio(relatorio, caminho):
+    """Grava o relatório no formato indicado pela extensão (.csv, .parquet ou .json)."""
+    extensao = validar_formato_relatorio(caminho)
+
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(pasta, exist_ok=True)
+    if extensao == ".csv":
+        relatorio.to_csv(caminho, index=False)
+    elif extensao == ".parquet":
+        relatorio.to_parquet(caminho, index=False)
+    else:
+        relatorio.to_json(caminho, orient="records", indent=2, force_ascii=False)
+
+
+def gerar_relatorio(alvo, saida, kv_base=None, processos=None, percentis=PERCENTIS_PADRAO, ao_progredir=None):
+    """Lista, analisa e grava; retorna (relatório, segundos)."""
+    validar_formato_relatorio(saida)  # falha antes de processar, não depois
+    inicio = time.perf_counter()
+    tarefas = listar_tarefas(alvo, kv_base)
+    relatorio = processar_lote(tarefas, processos, percentis, ao_progredir)
+    gravar_relatorio(relatorio, saida)
+    return relatorio, time.perf_counter() - inicio
+
+
+# =======================================================
+# COMPONENTES SIMÉTRICAS DE TODOS OS MONITORES
+# =======================================================
+
+def gerar_sequencias(alvo, saida, kv_base=None, saida_resumo=None, ao_progredir=None):
+    """
+    Sequências de tensão e corrente (e os fatores de desequilíbrio) de todos
+    os monitores de tensão com ângulos, numa única chamada vetorizada.
+
+    Os monitores são lidos um a um e o cálculo roda sobre o bloco inteiro
+    (elementos × tempo × grandeza × fase), por isso todos ficam em memória.
+    saida recebe a tabela longa (uma linha por elemento e instante) e
+    saida_resumo, se informado, o resumo por elemento.
+
+    Retorna (tabela, resumo, segundos).
+    """
+    validar_formato_relatorio(saida)
+    if saida_resumo:
+        validar_formato_relatorio(saida_resumo)
+    inicio = time.perf_counter()
+
+    tarefas = listar_tarefas(alvo, kv_base)
+    dados = {}
+    for feitos, tarefa in enumerate(tarefas, start=1):
+        if _tem_tensoes(tarefa["arquivo"]):
+            df = carregar_monitor(tarefa["arquivo"])
+            if "VAngle1" in df.columns:  # Sem ângulos não há componentes simétricas
+                dados[tarefa["elemento"]] = df
+        if ao_progredir is not None:
+            ao_progredir(feitos, len(tarefas))
+
+    tabela = calcular_sequencias_lote(dados)
+    resumo = resumir_sequencias(tabela)
+    gravar_relatorio(tabela, saida)
+    if saida_resumo:
+        gravar_relatorio(resumo, saida_resumo)
+    return tabela, resumo, time.perf_counter() - inicio
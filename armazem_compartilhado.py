@@ -0,0 +1,352 @@
+# ============================================================================
+# ARMAZÉM COMPARTILHADO ENTRE SESSÕES (COLUNAS MAPEADAS EM MEMÓRIA)
+# ============================================================================
+# Cada sessão do Streamlit que abre o layout_basico.py ou envia um arquivo ao
+# layout_2.py acabava com a própria cópia dos DataFrames (o st.cache_data
+# devolve uma cópia por chamada). Com vários engenheiros no mesmo servidor a
+# RAM acaba rápido.
+#
+# Aqui cada conjunto de dados é guardado uma única vez, por processo, como
+# colunas .npy abertas com memmap (somente leitura), identificado pelo hash
+# do conteúdo. Todas as sessões recebem visões sem cópia das mesmas colunas;
+# o sistema operacional compartilha as páginas até entre processos.
+#
+# Cada sessão registra um "dono" (Sessao) guardado no st.session_state:
+# quando a sessão termina o dono é coletado e a referência cai sozinha.
+# Acima do limite de memória, os conjuntos sem sessões usando são
+# descartados do menos para o mais recentemente usado.
+#
+# A chave de um conjunto é o hash do conteúdo mais a identidade do leitor
+# (módulo, nome e versão da função que monta o DataFrame, e a versão da
+# compactação de tipos): o mesmo arquivo lido por leitores diferentes são
+# conjuntos diferentes, e mudar um leitor (incrementando a versão dele)
+# invalida o que ficou em disco. Pastas deixadas por processos anteriores e
+# sem uso há mais de IDADE_MAXIMA_ARMAZEM_H são apagadas no primeiro acesso
+# de cada processo. Os hashes lembrados
+# (arquivos e envios) também têm teto, e as travas por chave saem junto com
+# os conjuntos: nada cresce sem limite num servidor que fica no ar por meses.
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache_colunar import calcular_hash_arquivo
+from compactacao import VERSAO_COMPACTACAO
+
+# Pasta das colunas e limite de memória (podem vir do ambiente do servidor)
+PASTA_ARMAZEM = os.environ.get("TSDQ_ARMAZEM", os.path.join(tempfile.gettempdir(), "tsdq_armazem"))
+LIMITE_MEMORIA_MB = float(os.environ.get("TSDQ_ARMAZEM_MB", 2048))
+# Pastas de outros processos sem uso há mais que isto são apagadas
+IDADE_MAXIMA_ARMAZEM_H = float(os.environ.get("TSDQ_ARMAZEM_HORAS", 24))
+
+# Incrementar se o formato das entradas gravadas mudar
+VERSAO_ARMAZEM = 1
+
+# Hashes lembrados por tabela (LRU); esquecer um só custa recalcular o hash
+MAX_HASHES_LEMBRADOS = 4096
+
+_ENTRADAS = OrderedDict()        # chave -> entrada, da menos para a mais recente
+_HASHES_ARQUIVO = OrderedDict()  # (caminho, tamanho, mtime_ns) -> hash do conteúdo
+_HASHES_ENVIO = OrderedDict()    # identificador do envio -> hash do conteúdo
+_TRAVA = threading.RLock()
+_TRAVAS_CHAVE = {}               # chave -> trava da criação (só chaves em uso)
+_PASTA_VARRIDA = False
+
+# Chave do conjunto no df.attrs das visões (argumento de liberar)
+ATRIBUTO_CHAVE = "chave_armazem"
+
+
+class Sessao:
+    """Marca as referências de uma sessão; guarde uma por sessão no st.session_state."""
+
+
+# =======================================================
+# GRAVAÇÃO E ABERTURA DAS COLUNAS
+# =======================================================
+
+def _gravar_entrada(pasta, df):
+    """Grava as colunas em uma pasta temporária e a move para o lugar de uma vez."""
+    temporaria = tempfile.mkdtemp(prefix=".tmp_", dir=PASTA_ARMAZEM)
+    colunas = []
+    try:
+        for i, nome in enumerate(df.columns):
+            serie = df.iloc[:, i]
+            info = {"nome": nome, "arquivo": f"col_{i:05d}.npy"}
+            if isinstance(serie.dtype, pd.CategoricalDtype) and all(isinstance(c, str) for c in serie.cat.categories):
+                info.update(tipo="categoria", categorias=serie.cat.categories.tolist())
+                valores = serie.cat.codes.to_numpy()
+            elif isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "biufcmM":
+                info["tipo"] = "numerico"
+                valores = serie.to_numpy()
+            else:
+                # Textos e objetos ficam na memória do processo (uma cópia só)
+                info["tipo"] = "objeto"
+                colunas.append(info)
+                continue
+            np.save(os.path.join(temporaria, info["arquivo"]), valores, allow_pickle=False)
+            colunas.append(info)
+
+        meta = {"versao": VERSAO_ARMAZEM, "linhas": len(df), "colunas": colunas, "attrs": df.attrs}
+        with open(os.path.join(temporaria, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+        try:
+            os.replace(temporaria, pasta)
+        except OSError:
+            # Outro processo gravou a mesma chave primeiro: usa a dele
+            shutil.rmtree(temporaria, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+
+
+def _abrir_entrada(pasta, df_origem=None):
+    """Abre as colunas gravadas com memmap; retorna None se a pasta não for válida."""
+    try:
+        with open(os.path.join(pasta, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if meta.get("versao") != VERSAO_ARMAZEM:
+        return None
+
+    colunas, nbytes = {}, 0
+    for info in meta["colunas"]:
+        if info["tipo"] == "objeto":
+            if df_origem is None:
+                return None  # Colunas de objeto só existem no processo que leu o arquivo
+            valores = df_origem[info["nome"]].to_numpy(copy=True)
+            valores.flags.writeable = False
+        else:
+            valores = np.load(os.path.join(pasta, info["arquivo"]), mmap_mode="r")
+        nbytes += valores.nbytes
+        colunas[info["nome"]] = (info, valores)
+
+    # A data da pasta marca o último uso (varredura de pastas antigas)
+    try:
+        os.utime(pasta)
+    except OSError:
+        pass
+    return {"pasta": pasta, "meta": meta, "colunas": colunas, "bytes": nbytes, "donos": weakref.WeakSet()}
+
+
+def _montar_visao(entrada):
+    """DataFrame somente leitura apontando para as colunas da entrada (sem cópia)."""
+    dados = {}
+    for nome, (info, valores) in entrada["colunas"].items():
+        if info["tipo"] == "categoria":
+            valores = pd.Categorical.from_codes(valores, info["categorias"], validate=False)
+        dados[nome] = valores
+    visao = pd.DataFrame(dados, columns=list(entrada["colunas"]), copy=False)
+    visao.attrs = json.loads(json.dumps(entrada["meta"]["attrs"], default=str))
+    # Para liberar a referência quando a página trocar de arquivo
+    visao.attrs[ATRIBUTO_CHAVE] = os.path.basename(entrada["pasta"])
+    return visao
+
+
+# =======================================================
+# REFERÊNCIAS E DESCARTE (LRU)
+# =======================================================
+
+def _descartar_excedente(limite_bytes):
+    """Descarta entradas sem donos, da menos recente, até caber no limite."""
+    total = sum(e["bytes"] for e in _ENTRADAS.values())
+    for chave in list(_ENTRADAS):
+        if total <= limite_bytes:
+            break
+        entrada = _ENTRADAS[chave]
+        if len(entrada["donos"]):
+            continue
+        del _ENTRADAS[chave]
+        total -= entrada["bytes"]
+        # Visões ainda abertas continuam válidas: o memmap mantém o arquivo vivo
+        shutil.rmtree(entrada["pasta"], ignore_errors=True)
+    _descartar_travas()
+
+
+def _descartar_travas():
+    """
+    Remove as travas de chaves que não estão no armazém e que ninguém segura.
+
+    Uma sessão que pegou a trava e ainda não a travou pode acabar criando a
+    chave junto com outra; o resultado é o mesmo de dois processos
+    (_gravar_entrada fica com a primeira gravação).
+    """
+    for chave in [c for c, trava in _TRAVAS_CHAVE.items() if c not in _ENTRADAS and not trava.locked()]:
+        del _TRAVAS_CHAVE[chave]
+
+
+def _varrer_pasta():
+    """
+    Apaga, uma vez por processo, as pastas do armazém que nenhum conjunto
+    deste processo usa e que não são abertas há mais de IDADE_MAXIMA_ARMAZEM_H
+    (inclui gravações interrompidas). Visões abertas em outros processos
+    continuam válidas: o memmap mantém os arquivos vivos.
+    """
+    global _PASTA_VARRIDA
+    if _PASTA_VARRIDA:
+        return
+    _PASTA_VARRIDA = True
+    limite = time.time() - IDADE_MAXIMA_ARMAZEM_H * 3600
+    pastas_em_uso = {e["pasta"] for e in _ENTRADAS.values()}
+    try:
+        nomes = os.listdir(PASTA_ARMAZEM)
+    except OSError:
+        return
+    for nome in nomes:
+        pasta = os.path.join(PASTA_ARMAZEM, nome)
+        try:
+            antiga = os.path.getmtime(pasta) < limite
+        except OSError:
+            continue
+        if antiga and pasta not in pastas_em_uso and os.path.isdir(pasta):
+            shutil.rmtree(pasta, ignore_errors=True)
+
+
+def _lembrar(memoria, chave, valor):
+    """Guarda valor na memória LRU de hashes, esquecendo os mais antigos acima do teto."""
+    with _TRAVA:
+        memoria[chave] = valor
+        memoria.move_to_end(chave)
+        while len(memoria) > MAX_HASHES_LEMBRADOS:
+            memoria.popitem(last=False)
+    return valor
+
+
+def _lembrado(memoria, chave):
+    """Valor guardado (marcado como recente) ou None."""
+    with _TRAVA:
+        valor = memoria.get(chave)
+        if valor is not None:
+            memoria.move_to_end(chave)
+        return valor
+
+
+def obter(chave, criar, dono, limite_mb=None):
+    """
+    Visão somente leitura do conjunto 'chave', criando-o uma única vez.
+
+    Parâmetros:
+        chave: identificador do conteúdo (ex.: hash do arquivo + variante)
+        criar: função sem argumentos que monta o DataFrame (índice padrão)
+        dono: Sessao da sessão que vai usar a visão (conta como referência)
+        limite_mb: teto de memória do armazém (padrão: LIMITE_MEMORIA_MB)
+    """
+    with _TRAVA:
+        _varrer_pasta()
+        trava_chave = _TRAVAS_CHAVE.setdefault(chave, threading.Lock())
+
+    # Sessões pedindo a mesma chave esperam a primeira terminar de criar
+    with trava_chave:
+        with _TRAVA:
+            entrada = _ENTRADAS.get(chave)
+        if entrada is None:
+            os.makedirs(PASTA_ARMAZEM, exist_ok=True)
+            pasta = os.path.join(PASTA_ARMAZEM, chave)
+            # Pode já existir no disco (outro processo ou execução anterior)
+            entrada = _abrir_entrada(pasta)
+            if entrada is None:
+                df = criar().reset_index(drop=True)
+                shutil.rmtree(pasta, ignore_errors=True)
+                _gravar_entrada(pasta, df)
+                entrada = _abrir_entrada(pasta, df)
+
+        # Entrada e referência entram juntas: o descarte nunca vê uma sem a outra
+        with _TRAVA:
+            _ENTRADAS[chave] = entrada
+            _ENTRADAS.move_to_end(chave)
+            entrada["donos"].add(dono)
+            limite = LIMITE_MEMORIA_MB if limite_mb is None else limite_mb
+            _descartar_excedente(limite * 1024**2)
+    return _montar_visao(entrada)
+
+
+def liberar(chave, dono):
+    """Remove a referência da sessão (também acontece sozinho quando a sessão acaba)."""
+    with _TRAVA:
+        entrada = _ENTRADAS.get(chave)
+        if entrada is not None:
+            entrada["donos"].discard(dono)
+
+
+def hash_arquivo(caminho):
+    """Hash do conteúdo, recalculado só quando tamanho ou data de modificação mudam."""
+    info = os.stat(caminho)
+    chave = (os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+    digito = _lembrado(_HASHES_ARQUIVO, chave)
+    if digito is None:
+        digito = _lembrar(_HASHES_ARQUIVO, chave, calcular_hash_arquivo(caminho))
+    return digito
+
+
+def identidade_leitor(leitor, versao_leitor=1):
+    """
+    Trecho da chave que identifica quem montou o DataFrame.
+
+    Módulo e nome do leitor, a versão dele (incremente ao mudar o que ele
+    devolve) e a versão da compactação de tipos, resumidos em 12 dígitos.
+    """
+    nome = f"{leitor.__module__}.{leitor.__qualname__}:{versao_leitor}:{VERSAO_COMPACTACAO}"
+    return hashlib.blake2b(nome.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def obter_arquivo(caminho, leitor, dono, variante="", limite_mb=None, versao_leitor=1):
+    """Visão do arquivo lido por leitor(caminho), compartilhada por conteúdo e leitor."""
+    chave = f"{hash_arquivo(caminho)}_{identidade_leitor(leitor, versao_leitor)}{variante}"
+    return obter(chave, lambda: leitor(caminho), dono, limite_mb)
+
+
+def obter_envio(conteudo, leitor, dono, identificador=None, variante="", limite_mb=None, versao_leitor=1):
+    """
+    Visão de um arquivo enviado (bytes) lido por leitor(arquivo_em_memoria).
+
+    identificador: id estável do envio (ex.: file_id do Streamlit) para não
+                   recalcular o hash do conteúdo a cada rerun
+    """
+    digito = None if identificador is None else _lembrado(_HASHES_ENVIO, identificador)
+    if digito is None:
+        digito = hashlib.blake2b(conteudo).hexdigest()
+        if identificador is not None:
+            _lembrar(_HASHES_ENVIO, identificador, digito)
+
+    chave = f"envio_{digito}_{identidade_leitor(leitor, versao_leitor)}{variante}"
+    return obter(chave, lambda: leitor(io.BytesIO(conteudo)), dono, limite_mb)
+
+
+def selecionar_colunas(df, colunas):
+    """Subconjunto de colunas sem copiar os dados (df[lista] copiaria)."""
+    subconjunto = pd.DataFrame({c: df[c] for c in colunas}, columns=list(colunas), copy=False)
+    subconjunto.attrs = dict(df.attrs)
+    return subconjunto
+
+
+def estatisticas():
+    """Conjuntos, bytes mapeados, limite e sessões com referências ativas."""
+    with _TRAVA:
+        donos = set()
+        for entrada in _ENTRADAS.values():
+            donos.update(id(d) for d in entrada["donos"])
+        return {
+            "conjuntos": len(_ENTRADAS),
+            "bytes": sum(e["bytes"] for e in _ENTRADAS.values()),
+            "limite_bytes": int(LIMITE_MEMORIA_MB * 1024**2),
+            "sessoes": len(donos),
+        }
+
+
+def resumo_armazem():
+    """Texto curto para a lateral do dashboard."""
+    info = estatisticas()
+    return (
+        f"🗄️ Armazém compartilhado: {info['conjuntos']} conjuntos, "
+        f"{info['bytes'] / 1024**2:,.1f} de {info['limite_bytes'] / 1024**2:,.0f} MB, "
+        f"{info['sessoes']} sessões"
+    )
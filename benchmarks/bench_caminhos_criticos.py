@@ -0,0 +1,273 @@
+# ============================================================================
+# BENCHMARK: CAMINHOS CRÍTICOS DOS DASHBOARDS SOBRE UM CENÁRIO SINTÉTICO
+# ============================================================================
+# Gera (ou reaproveita) um cenário com dados_sinteticos.py e mede os trechos
+# que pesam em cada rerun:
+#
+#   leitura dos monitores  carregar_dados: CSV -> cache colunar -> armazém
+#   mapeamento de colunas  realizar_mapeamento_dinamico (índice compilado)
+#   desequilíbrio          calcular_fator_desequilibrio (uma barra e o lote) e as
+#                          sequências de tensão e corrente do lote
+#   DRP/DRC                janelas de 10 min de um medidor e o lote inteiro
+#   pu                     carregar_topologia com usar_pu (todas as barras) e a
+#                          conversão da matriz (barras × tempo) sozinha
+#   figuras                2D reamostrada, superfície 3D e serialização JSON
+#   EnergyMeters           EMout.txt de vários cenários (texto e memória)
+#
+# Cada execução é acrescentada como uma linha JSON ao arquivo de resultados
+# (commit, data, parâmetros e tempos) e comparada com a última execução com
+# os mesmos parâmetros.
+#
+# Uso:
+#   python benchmarks/bench_caminhos_criticos.py --barras 50 --passos 50000
+#   python benchmarks/bench_caminhos_criticos.py --pasta /tmp/cenario --resultados meus_resultados.jsonl
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# O armazém compartilhado lê a pasta do ambiente ao ser importado
+PASTA_ARMAZEM_BENCH = tempfile.mkdtemp(prefix="tsdq_bench_armazem_")
+os.environ["TSDQ_ARMAZEM"] = PASTA_ARMAZEM_BENCH
+
+import pandas as pd  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+
+import armazem_compartilhado  # noqa: E402
+import mapeamento_colunas  # noqa: E402
+from cache_colunar import PASTA_CACHE  # noqa: E402
+from componentes_simetricas import (  # noqa: E402
+    calcular_fator_desequilibrio,
+    calcular_fator_desequilibrio_lote,
+    calcular_sequencias_lote,
+)
+from dados_sinteticos import gerar_cenario, gerar_emout  # noqa: E402
+from grade_3d import reduzir_grade, traco_bordas  # noqa: E402
+from mapeamento_colunas import indexar_colunas  # noqa: E402
+from medidores import indicadores_medidor, ler_medicoes, processar_medidores  # noqa: E402
+import medidores_energia  # noqa: E402
+from monitores import carregar_monitor, montar_topologia  # noqa: E402
+from reamostragem import MAX_PONTOS_PADRAO, indices_reamostragem  # noqa: E402
+from por_unidade import converter_matriz_pu  # noqa: E402
+from topologia import carregar_topologia  # noqa: E402
+
+ARQUIVO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados.jsonl")
+N_CENARIOS_EMOUT = 200
+
+
+def cronometrar(funcao, repeticoes=3, preparar=None):
+    """Menor tempo e mediana (s) entre as repetições; preparar() roda antes de cada uma, fora do tempo."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), float(np.median(tempos))
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+# =======================================================
+# CASOS
+# =======================================================
+
+def casos_benchmark(cenario):
+    """Lista de (nome, função, preparar) sobre o cenário gerado."""
+    with open(cenario["config"], "r", encoding="utf-8") as f:
+        topologia = montar_topologia(json.load(f))
+    with open(os.path.join(RAIZ, "mapeamento.json"), "r", encoding="utf-8") as f:
+        config_mapeamento = json.load(f)
+
+    pasta_monitores = os.path.dirname(topologia[0]["arquivo_vi"])
+    monitor = topologia[-1]["arquivo_vi"]  # Ponta do alimentador (mais desequilíbrio)
+    dono = armazem_compartilhado.Sessao()
+    cabecalho = pd.read_csv(cenario["resultados"], nrows=0).columns
+
+    def limpar_cache_colunar():
+        shutil.rmtree(os.path.join(pasta_monitores, PASTA_CACHE), ignore_errors=True)
+
+    def limpar_armazem():
+        with armazem_compartilhado._TRAVA:
+            armazem_compartilhado._ENTRADAS.clear()
+            armazem_compartilhado._HASHES_ARQUIVO.clear()
+        shutil.rmtree(PASTA_ARMAZEM_BENCH, ignore_errors=True)
+
+    def carregar_dados(caminho):
+        # Mesmo caminho do layout_basico.carregar_dados
+        return armazem_compartilhado.obter_arquivo(caminho, carregar_monitor, dono)
+
+    df_monitor = carregar_monitor(monitor)
+    dados_lote = {item["nome"]: carregar_monitor(item["arquivo_vi"]) for item in topologia}
+    medicao = cenario["medicoes"][0]
+    df_medicao = ler_medicoes(medicao)
+
+    fases = [c for c in ("V1", "V2", "V3") if c in df_monitor.columns]
+    tempo = df_monitor["hour"].to_numpy(dtype=float) * 3600 + df_monitor["tsec"].to_numpy(dtype=float)
+    Z, eixo_tempo, nomes = carregar_topologia(topologia, "VI", ["V1", " V1"], "Tensão", True, 100.0, carregar_monitor)
+    Z_bruta, _, _ = carregar_topologia(topologia, "VI", ["V1", " V1"], "Tensão", False, 100.0, carregar_monitor)
+    kv_barras = [item["kv_base"] for item in topologia if item["nome"] in nomes]
+
+    def figura_2d():
+        fig = go.Figure()
+        for coluna in fases:
+            y = df_monitor[coluna].to_numpy(dtype=float)
+            indices = indices_reamostragem(tempo, y, MAX_PONTOS_PADRAO, "LTTB")
+            fig.add_trace(go.Scatter(x=tempo[indices], y=y[indices], mode="lines", name=coluna))
+        return fig
+
+    def figura_3d():
+        z, x, y, _ = reduzir_grade(Z, eixo_tempo, nomes)
+        posicoes = np.arange(len(y))
+        fig = go.Figure(go.Surface(z=z, x=x, y=posicoes))
+        fig.add_trace(traco_bordas(z, x, posicoes, y))
+        return fig
+
+    fig_2d, fig_3d = figura_2d(), figura_3d()
+
+    # EnergyMeters: um EMout por cenário, com todas as barras como medidores
+    pasta_emout = os.path.join(os.path.dirname(cenario["config"]), "energymeters")
+    if not os.path.isdir(pasta_emout):
+        gerar_emout(os.path.dirname(cenario["config"]), N_CENARIOS_EMOUT, len(topologia))
+
+    casos = [
+        ("carregar_dados (CSV, sem cache)", lambda: carregar_dados(monitor),
+         lambda: (limpar_cache_colunar(), limpar_armazem())),
+        ("carregar_dados (cache colunar)", lambda: carregar_dados(monitor), limpar_armazem),
+        ("carregar_dados (armazém, rerun)", lambda: carregar_dados(monitor), None),
+        ("mapeamento (1ª vez)", lambda: indexar_colunas(cabecalho, config_mapeamento), mapeamento_colunas._indices.clear),
+        ("mapeamento (rerun)", lambda: indexar_colunas(cabecalho, config_mapeamento), None),
+        ("DRP/DRC (1 medidor, com leitura)", lambda: indicadores_medidor(ler_medicoes(medicao), 220.0), None),
+        ("DRP/DRC (1 medidor, em memória)", lambda: indicadores_medidor(df_medicao, 220.0), None),
+        (f"DRP/DRC (lote, {len(cenario['medicoes'])} medidores)",
+         lambda: processar_medidores(cenario["medicoes"], 220.0), None),
+        (f"topologia em pu ({len(topologia)} barras)",
+         lambda: carregar_topologia(topologia, "VI", ["V1", " V1"], "Tensão", True, 100.0, carregar_monitor), None),
+        (f"conversão pu (matriz {Z_bruta.shape[0]}×{Z_bruta.shape[1]})",
+         lambda: converter_matriz_pu(Z_bruta, ["V1"], kv_barras, 100.0), None),
+        (f"figura 2D (LTTB, {len(fases)} fases)", figura_2d, None),
+        ("figura 3D (grade reduzida)", figura_3d, None),
+        ("serialização 2D (to_json)", fig_2d.to_json, None),
+        ("serialização 3D (to_json)", fig_3d.to_json, None),
+        (f"EMout ({N_CENARIOS_EMOUT} cenários, texto)", lambda: medidores_energia.carregar_emout_lote(pasta_emout),
+         medidores_energia._emout_em_memoria.cache_clear),
+        (f"EMout ({N_CENARIOS_EMOUT} cenários, em memória)", lambda: medidores_energia.carregar_emout_lote(pasta_emout),
+         None),
+    ]
+    if len(fases) == 3:
+        # O fator de desequilíbrio só existe para monitores trifásicos
+        casos[5:5] = [
+            ("fator de desequilíbrio (1 barra)", lambda: calcular_fator_desequilibrio(df_monitor), None),
+            (f"fator de desequilíbrio (lote, {len(dados_lote)} barras)",
+             lambda: calcular_fator_desequilibrio_lote(dados_lote), None),
+            (f"sequências V e I (lote, {len(dados_lote)} barras)",
+             lambda: calcular_sequencias_lote(dados_lote), None),
+        ]
+    return casos
+
+
+# =======================================================
+# REGISTRO E COMPARAÇÃO
+# =======================================================
+
+def ultima_execucao(caminho, parametros):
+    """Última linha do arquivo de resultados com os mesmos parâmetros (ou None)."""
+    if not os.path.isfile(caminho):
+        return None
+    anterior = None
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            if registro.get("parametros") == parametros:
+                anterior = registro
+    return anterior
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos críticos sobre um cenário sintético")
+    parser.add_argument("--barras", type=int, default=20)
+    parser.add_argument("--fases", type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument("--passos", type=int, default=20_000)
+    parser.add_argument("--passo-s", type=int, default=60)
+    parser.add_argument("--medidores", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pasta", default=None, help="pasta do cenário (mantida; gerada se estiver vazia)")
+    parser.add_argument("--resultados", default=ARQUIVO_RESULTADOS, help="arquivo JSON Lines dos resultados")
+    parser.add_argument("--filtro", default="", help="só os casos cujo nome contém este texto")
+    args = parser.parse_args()
+
+    parametros = {"barras": args.barras, "fases": args.fases, "passos": args.passos,
+                  "passo_s": args.passo_s, "medidores": args.medidores}
+    pasta = args.pasta or tempfile.mkdtemp(prefix="tsdq_bench_cenario_")
+    try:
+        inicio = time.perf_counter()
+        if glob.glob(os.path.join(pasta, "config_circuito.json")):
+            cenario = {
+                "config": os.path.join(pasta, "config_circuito.json"),
+                "resultados": os.path.join(pasta, "results.csv"),
+                "medicoes": sorted(glob.glob(os.path.join(pasta, "medicoes", "*.csv"))),
+            }
+            print(f"Cenário existente em {pasta}")
+        else:
+            cenario = gerar_cenario(pasta, args.barras, args.fases, args.passos, args.passo_s, args.medidores)
+            print(f"Cenário gerado em {pasta} ({time.perf_counter() - inicio:.1f} s)")
+
+        anterior = ultima_execucao(args.resultados, parametros)
+        tempos_anteriores = {r["caso"]: r["min_s"] for r in anterior["resultados"]} if anterior else {}
+
+        print(f"{args.barras} barras × {args.fases} fases × {args.passos:,} passos de {args.passo_s} s, "
+              f"{args.medidores} medidores")
+        print(f"{'caso':<44} {'mín (ms)':>10} {'mediana':>10}   anterior")
+        resultados = []
+        for nome, funcao, preparar in casos_benchmark(cenario):
+            if args.filtro and args.filtro not in nome:
+                continue
+            minimo, mediana = cronometrar(funcao, args.repeticoes, preparar)
+            resultados.append({"caso": nome, "min_s": minimo, "mediana_s": mediana})
+            comparacao = ""
+            if nome in tempos_anteriores and minimo > 0:
+                comparacao = f"{tempos_anteriores[nome] * 1000:10.1f} ({tempos_anteriores[nome] / minimo:.2f}x)"
+            print(f"{nome:<44} {minimo * 1000:10.1f} {mediana * 1000:10.1f}   {comparacao}")
+    finally:
+        shutil.rmtree(PASTA_ARMAZEM_BENCH, ignore_errors=True)
+        if args.pasta is None:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(),
+                    "cpus": os.cpu_count(), "pandas": pd.__version__, "numpy": np.__version__},
+        "parametros": parametros,
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+    with open(args.resultados, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    print(f"Resultados acrescentados a {args.resultados}")
+
+
+if __name__ == "__main__":
+    main()
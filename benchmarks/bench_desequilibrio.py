@@ -0,0 +1,90 @@
+# ============================================================================
+# BENCHMARK: FATOR DE DESEQUILÍBRIO (POR LINHA x VETORIZADO)
+# ============================================================================
+# Uso:
+#   python benchmarks/bench_desequilibrio.py --amostras 20000 --monitores 20
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from componentes_simetricas import (  # noqa: E402
+    calcular_componentes_simetricas,
+    calcular_fator_desequilibrio,
+    calcular_fator_desequilibrio_lote,
+)
+
+
+def gerar_monitor(n_amostras, semente=0):
+    """Monitor trifásico sintético no formato do OpenDSS (V1, VAngle1, ...)."""
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        "hour": np.arange(1, n_amostras + 1),
+        "V1": 8050 + rng.normal(0, 40, n_amostras), "VAngle1": -31 + rng.normal(0, 0.5, n_amostras),
+        "V2": 8100 + rng.normal(0, 40, n_amostras), "VAngle2": -150 + rng.normal(0, 0.5, n_amostras),
+        "V3": 8100 + rng.normal(0, 40, n_amostras), "VAngle3": 90 + rng.normal(0, 0.5, n_amostras),
+    })
+
+
+def fator_desequilibrio_por_linha(df):
+    """Implementação original (iterrows), mantida apenas como referência."""
+    resultados = []
+    for idx, row in df.iterrows():
+        componentes = calcular_componentes_simetricas(
+            row['V1'], row['VAngle1'], row['V2'], row['VAngle2'], row['V3'], row['VAngle3']
+        )
+        V_pos_mag, _ = componentes['positiva']
+        V_neg_mag, _ = componentes['negativa']
+        V_zero_mag, _ = componentes['zero']
+        resultados.append({
+            'hora': row['hour'],
+            'V_positiva': V_pos_mag,
+            'V_negativa': V_neg_mag,
+            'V_zero': V_zero_mag,
+            'FD (%)': (V_neg_mag / V_pos_mag) * 100 if V_pos_mag > 0 else 0,
+            'FD_limite': 3.0
+        })
+    return pd.DataFrame(resultados)
+
+
+def cronometrar(funcao, *args, repeticoes=3):
+    """Menor tempo (s) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do fator de desequilíbrio")
+    parser.add_argument("--amostras", type=int, default=20_000)
+    parser.add_argument("--monitores", type=int, default=20)
+    args = parser.parse_args()
+
+    df = gerar_monitor(args.amostras)
+
+    t_linha, ref = cronometrar(fator_desequilibrio_por_linha, df, repeticoes=1)
+    t_vetor, novo = cronometrar(calcular_fator_desequilibrio, df)
+
+    colunas = ['V_positiva', 'V_negativa', 'V_zero', 'FD (%)']
+    assert np.allclose(ref[colunas].to_numpy(), novo[colunas].to_numpy()), "Resultados divergentes!"
+
+    print(f"Amostras: {args.amostras}")
+    print(f"  Por linha (iterrows): {t_linha * 1000:10.1f} ms")
+    print(f"  Vetorizado:           {t_vetor * 1000:10.1f} ms  ({t_linha / t_vetor:.0f}x)")
+
+    dados = {f"Barra {i}": gerar_monitor(args.amostras, semente=i) for i in range(args.monitores)}
+    t_lote, _ = cronometrar(calcular_fator_desequilibrio_lote, dados)
+    print(f"Lote com {args.monitores} monitores: {t_lote * 1000:10.1f} ms "
+          f"(por linha estimado: {t_linha * args.monitores:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ============================================================================
+# BENCHMARK: PARTIDA A FRIO E LATÊNCIA DE RERUN DOS DASHBOARDS
+# ============================================================================
+# Cada página roda em um processo Python novo (como o primeiro acesso depois
+# de subir o servidor) pelo AppTest do Streamlit:
+#
+#   partida  importações da página + primeiro run completo
+#   rerun    mediana de reruns sem mudança (o que cada clique paga, no mínimo)
+#   interação  mediana de reruns trocando um widget da página
+#
+# Os tempos são comparados com as metas abaixo e acrescentados ao arquivo de
+# resultados (o mesmo do bench_caminhos_criticos.py), para acompanhar a
+# evolução entre versões.
+#
+# Uso:
+#   python benchmarks/bench_inicializacao.py
+#   python benchmarks/bench_inicializacao.py --paginas layout_basico.py --reruns 20
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados.jsonl")
+
+# Metas (s) na máquina de referência (1 núcleo): partida inclui importar pandas/streamlit
+META_PARTIDA_S = 3.0
+META_RERUN_S = 0.25
+META_INTERACAO_S = 0.6
+
+# Página -> (rótulo do widget trocado na interação, valor)
+PAGINAS = {
+    "layout_basico.py": ("Ir para:", "Topologia (3D)"),
+    "layout_2.py": None,
+    "comparador.py": ("Leitura dos arquivos:", "Em blocos (arquivos grandes no servidor)"),
+    "layout_drp_drc.py": None,
+    "layout_energia.py": None,
+}
+
+# Roda dentro do processo filho; imprime um JSON com os tempos
+_FILHO = r"""
+import json, statistics, sys, time
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+importacao_streamlit = time.perf_counter() - inicio
+
+pagina, reruns = sys.argv[1], int(sys.argv[2])
+rotulo, valor = json.loads(sys.argv[3]) or (None, None)
+
+t = time.perf_counter()
+at = AppTest.from_file(pagina, default_timeout=300).run()
+partida = time.perf_counter() - t
+if at.exception:
+    raise SystemExit(f"{pagina}: {at.exception[0].message}")
+
+tempos = []
+for _ in range(reruns):
+    t = time.perf_counter()
+    at.run()
+    tempos.append(time.perf_counter() - t)
+
+interacao = None
+if rotulo:
+    widget = next(w for w in at.radio if w.label == rotulo)
+    original = widget.value
+    tempos_interacao = []
+    for i in range(reruns):
+        widget = next(w for w in at.radio if w.label == rotulo)
+        t = time.perf_counter()
+        widget.set_value(valor if i % 2 == 0 else original).run()
+        tempos_interacao.append(time.perf_counter() - t)
+    interacao = statistics.median(tempos_interacao)
+
+print(json.dumps({
+    "importacao_streamlit_s": importacao_streamlit,
+    "partida_s": importacao_streamlit + partida,
+    "rerun_s": statistics.median(tempos),
+    "interacao_s": interacao,
+}))
+"""
+
+
+def medir_pagina(pagina, reruns):
+    processo = subprocess.run(
+        [sys.executable, "-c", _FILHO, pagina, str(reruns), json.dumps(PAGINAS.get(pagina))],
+        cwd=RAIZ, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": RAIZ}
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else pagina)
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _situacao(valor, meta):
+    if valor is None:
+        return f"{'-':>9}     "
+    return f"{valor * 1000:9.0f} {'ok ' if valor <= meta else 'ACIMA'}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partida a frio e latência de rerun dos dashboards")
+    parser.add_argument("--paginas", nargs="+", default=list(PAGINAS))
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--resultados", default=ARQUIVO_RESULTADOS, help="arquivo JSON Lines dos resultados")
+    args = parser.parse_args()
+
+    print(f"Metas: partida {META_PARTIDA_S * 1000:.0f} ms | rerun {META_RERUN_S * 1000:.0f} ms | "
+          f"interação {META_INTERACAO_S * 1000:.0f} ms")
+    print(f"{'página':<20} {'partida (ms)':>15} {'rerun (ms)':>15} {'interação (ms)':>15}")
+    resultados, dentro_das_metas = [], True
+    for pagina in args.paginas:
+        tempos = medir_pagina(pagina, args.reruns)
+        resultados.append({"pagina": pagina, **tempos})
+        dentro_das_metas &= tempos["partida_s"] <= META_PARTIDA_S and tempos["rerun_s"] <= META_RERUN_S
+        dentro_das_metas &= tempos["interacao_s"] is None or tempos["interacao_s"] <= META_INTERACAO_S
+        print(f"{pagina:<20} {_situacao(tempos['partida_s'], META_PARTIDA_S):>15} "
+              f"{_situacao(tempos['rerun_s'], META_RERUN_S):>15} {_situacao(tempos['interacao_s'], META_INTERACAO_S):>15}")
+
+    registro = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(), "cpus": os.cpu_count()},
+        "parametros": {"suite": "inicializacao", "reruns": args.reruns},
+        "metas": {"partida_s": META_PARTIDA_S, "rerun_s": META_RERUN_S, "interacao_s": META_INTERACAO_S},
+        "resultados": resultados,
+    }
+    with open(args.resultados, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    print(f"Resultados acrescentados a {args.resultados}")
+    sys.exit(0 if dentro_das_metas else 1)
+
+
+if __name__ == "__main__":
+    main()
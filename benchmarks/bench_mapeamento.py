@@ -0,0 +1,90 @@
+# ============================================================================
+# BENCHMARK: MAPEAMENTO DINÂMICO DE COLUNAS (REGEX POR PAR x ÍNDICE COMPILADO)
+# ============================================================================
+# Uso:
+#   python benchmarks/bench_mapeamento.py --colunas 100000
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import mapeamento_colunas  # noqa: E402
+from mapeamento_colunas import indexar_colunas  # noqa: E402
+
+
+def gerar_cabecalho(n_colunas):
+    """Cabeçalho sintético no formato exportado (barras, linhas, reguladores, gerador)."""
+    colunas = ["date"]
+    i = 0
+    while len(colunas) < n_colunas:
+        colunas += [f"Bus-B{i:06d}-V{f}_pu" for f in (1, 2, 3)]
+        colunas += [f"Line-L{i:06d}-I{f}_A" for f in (1, 2, 3)]
+        colunas += [f"Line-L{i:06d}-I{f}_ang" for f in (1, 2, 3)]
+        if i % 50 == 0:
+            colunas += [f"RegControl-R{i:06d}-tap", f"Generator-G{i:06d}-P_MW", f"Grid-0.0-B{i:06d}-Q_Mvar"]
+        i += 1
+    return colunas[:n_colunas]
+
+
+def mapeamento_original(colunas, config):
+    """Implementação original (uma busca por coluna x grandeza), mantida como referência."""
+    mapas = {grandeza: {} for grandeza in config.keys()}
+    padroes = {
+        grandeza: re.compile(dados["regex"])
+        for grandeza, dados in config.items()
+            if not grandeza.startswith("_")
+    }
+    for col in colunas:
+        for grandeza, dados in config.items():
+            if grandeza.startswith("_"):
+                continue
+            match = padroes[grandeza].search(col)
+            if match:
+                elemento = match.group(1)
+                if dados["tem_fase"]:
+                    fase_num = match.group(2)
+                    fase = f"{dados['prefixo']}{fase_num}" if fase_num else dados["prefixo"]
+                else:
+                    fase = dados["prefixo"]
+                if elemento not in mapas[grandeza]:
+                    mapas[grandeza][elemento] = {}
+                mapas[grandeza][elemento][fase] = col
+                break
+    return mapas
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do mapeamento dinâmico de colunas")
+    parser.add_argument("--colunas", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with open(os.path.join(RAIZ, "mapeamento.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    colunas = gerar_cabecalho(args.colunas)
+
+    t_original, ref = cronometrar(mapeamento_original, colunas, config)
+    mapeamento_colunas._indices.clear()
+    t_primeira, novo = cronometrar(indexar_colunas, colunas, config)
+    t_memorizado, _ = cronometrar(indexar_colunas, colunas, config)
+
+    assert ref == novo, "Resultados divergentes!"
+
+    print(f"Colunas: {args.colunas:,}")
+    print(f"  Regex por par (original):      {t_original * 1000:10.1f} ms")
+    print(f"  Índice compilado (1ª vez):     {t_primeira * 1000:10.1f} ms  ({t_original / t_primeira:.1f}x)")
+    print(f"  Índice memorizado (rerun):     {t_memorizado * 1000:10.1f} ms  ({t_original / t_memorizado:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
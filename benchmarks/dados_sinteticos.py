@@ -0,0 +1,248 @@
+# ============================================================================
+# GERADOR DE DADOS SINTÉTICOS EM ESCALA (MONITORES, MOSAIK E MEDIDORES)
+# ============================================================================
+# Os exemplos do repositório têm 24 linhas e 4 barras: não servem para medir
+# como o dashboard escala. Aqui um cenário inteiro é gerado com o número de
+# barras, fases e passos de tempo que se quiser, nos mesmos formatos dos
+# arquivos reais:
+#
+#   monitores/  Sintetico_Mon_tensao{barra}_1.csv e ..._potencia{barra}_1.csv
+#               (hour, t(sec), V1, VAngle1, ..., I1, IAngle1, ... / "P1 (kW)", ...)
+#   config_circuito.json  apontando para os monitores (kv_base por barra)
+#   results.csv  resultados do mosaik: "Grid-0.0-Bus R17-vm_pu" (1 fase) ou
+#                "Bus-R17-V1_pu" por fase, correntes das linhas, taps e PV
+#   medicoes/    planilhas de medidores ("Tensao.Average.Van", sep=";")
+#   energymeters/  um EMout.txt por cenário (gerar_emout, fora do gerar_cenario)
+#
+# As curvas seguem uma carga diária com queda de tensão ao longo do
+# alimentador, desequilíbrio entre fases e ruído, para que os cálculos (FD,
+# DRP/DRC, pu) e a reamostragem trabalhem sobre dados parecidos com os reais.
+#
+# Uso:
+#   python benchmarks/dados_sinteticos.py /tmp/cenario --barras 100 --passos 50000 --passo-s 60
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+KV_BASE_PADRAO = 13.8
+VN_MEDIDOR_PADRAO = 220.0
+INICIO_PADRAO = "2021-05-21 00:00:00"
+
+
+def _curva_carga(segundos):
+    """Carga diária normalizada (0,35 de madrugada a ~1,0 no pico da noite)."""
+    hora = (segundos / 3600.0) % 24
+    return 0.35 + 0.25 * np.exp(-((hora - 11.5) / 3.0) ** 2) + 0.4 * np.exp(-((hora - 19.5) / 2.0) ** 2)
+
+
+def _fasores_barra(rng, segundos, distancia, n_fases, v_base):
+    """Módulos e ângulos de tensão/corrente de uma barra (distancia de 0 a 1 ao longo do alimentador)."""
+    carga = _curva_carga(segundos)
+    n = len(segundos)
+    # Cada fase carregada de um jeito: o desequilíbrio cresce em direção à ponta
+    pesos = 1 + distancia * rng.uniform(-0.25, 0.25, n_fases)
+    modulos_v, angulos_v, modulos_i, angulos_i = [], [], [], []
+    for f in range(n_fases):
+        queda = 0.07 * distancia * carga * pesos[f]
+        modulos_v.append(v_base * (1.03 - queda) + rng.normal(0, 0.002 * v_base, n))
+        angulos_v.append(-120.0 * f - 30 * queda + rng.normal(0, 0.05, n))
+        modulos_i.append(200 * (1 - 0.6 * distancia) * carga * pesos[f] + rng.normal(0, 1.0, n))
+        angulos_i.append(angulos_v[-1] - 25 + rng.normal(0, 0.5, n))
+    # Ângulos em (-180, 180], como o OpenDSS escreve
+    angulos_v = [(a + 180) % 360 - 180 for a in angulos_v]
+    angulos_i = [(a + 180) % 360 - 180 for a in angulos_i]
+    return modulos_v, angulos_v, modulos_i, angulos_i
+
+
+def gerar_monitores_opendss(pasta, n_barras, n_fases=3, n_passos=8760, passo_s=3600, kv_base=KV_BASE_PADRAO,
+                            semente=0, prefixo="Sintetico"):
+    """
+    Grava um par de monitores (tensão/corrente e potência) por barra e o config_circuito.json.
+
+    Retorna o caminho do config_circuito.json (os monitores ficam em pasta/monitores).
+    """
+    rng = np.random.default_rng(semente)
+    pasta_monitores = os.path.join(pasta, "monitores")
+    os.makedirs(pasta_monitores, exist_ok=True)
+
+    # Como o OpenDSS: "hour" é a hora inteira e "t(sec)" os segundos dentro dela
+    segundos = np.arange(1, n_passos + 1, dtype=np.int64) * passo_s
+    hour, t_sec = segundos // 3600, (segundos % 3600).astype(float)
+    v_base = kv_base * 1000 / np.sqrt(3)
+
+    elementos = []
+    for b in range(n_barras):
+        nome = f"b{b:04d}"
+        distancia = b / max(n_barras - 1, 1)
+        modulos_v, angulos_v, modulos_i, angulos_i = _fasores_barra(rng, segundos, distancia, n_fases, v_base)
+
+        vi = {"hour": hour, "t(sec)": t_sec}
+        for f in range(n_fases):
+            vi[f"V{f + 1}"], vi[f"VAngle{f + 1}"] = modulos_v[f], angulos_v[f]
+        for f in range(n_fases):
+            vi[f"I{f + 1}"], vi[f"IAngle{f + 1}"] = modulos_i[f], angulos_i[f]
+
+        pq = {"hour": hour, "t(sec)": t_sec}
+        for f in range(n_fases):
+            s_kva = modulos_v[f] * modulos_i[f] / 1000
+            defasagem = np.radians(angulos_v[f] - angulos_i[f])
+            pq[f"P{f + 1} (kW)"], pq[f"Q{f + 1} (kvar)"] = s_kva * np.cos(defasagem), s_kva * np.sin(defasagem)
+
+        arquivo = f"{prefixo}_Mon_tensao{nome}_1.csv"
+        pd.DataFrame(vi).to_csv(os.path.join(pasta_monitores, arquivo), index=False, float_format="%.6g")
+        pd.DataFrame(pq).to_csv(os.path.join(pasta_monitores, arquivo.replace("tensao", "potencia")),
+                                index=False, float_format="%.6g")
+        elementos.append({
+            "nome": f"Barra {nome}",
+            "arquivo": arquivo,
+            "kv_base": kv_base,
+            "tipo": "trafo" if b == 0 else "carga",
+        })
+
+    config = {
+        "nome_cenario": f"Cenário sintético ({n_barras} barras, {n_passos} passos de {passo_s} s)",
+        "pasta_arquivos": pasta_monitores,
+        "elementos": elementos,
+    }
+    caminho_config = os.path.join(pasta, "config_circuito.json")
+    with open(caminho_config, "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=4)
+    return caminho_config
+
+
+def gerar_resultados_mosaik(caminho, n_barras, n_fases=1, n_passos=1440, passo_s=60, semente=0,
+                            inicio=INICIO_PADRAO):
+    """
+    Grava um results.csv no formato do mosaik.
+
+    Com 1 fase as barras saem como no pandapower ("Grid-0.0-Bus R17-vm_pu",
+    "-p_mw"); com mais fases, como o exportado por fase ("Bus-R17-V1_pu").
+    Cada barra tem uma linha a montante (correntes e ângulos por fase); a cada
+    20 barras um regulador (tap) e a cada 10 uma usina fotovoltaica.
+    """
+    rng = np.random.default_rng(semente)
+    segundos = np.arange(n_passos, dtype=np.int64) * passo_s
+    datas = pd.Timestamp(inicio) + pd.to_timedelta(segundos, unit="s")
+    hora = (segundos / 3600.0 + datas[0].hour) % 24
+    sol = np.clip(np.sin((hora - 6) / 12 * np.pi), 0, None)
+
+    colunas = {"date": datas.strftime("%Y-%m-%d %H:%M:%S")}
+    for b in range(n_barras):
+        distancia = b / max(n_barras - 1, 1)
+        modulos_v, _, modulos_i, angulos_i = _fasores_barra(rng, segundos, distancia, n_fases, 1.0)
+        if n_fases == 1:
+            colunas[f"Grid-0.0-Bus R{b}-vm_pu"] = modulos_v[0]
+            colunas[f"Grid-0.0-Bus R{b}-p_mw"] = modulos_v[0] * modulos_i[0] / 1000
+        else:
+            for f in range(n_fases):
+                colunas[f"Bus-R{b}-V{f + 1}_pu"] = modulos_v[f]
+        for f in range(n_fases):
+            colunas[f"Line-L{b}-I{f + 1}_A"] = modulos_i[f]
+            colunas[f"Line-L{b}-I{f + 1}_ang"] = angulos_i[f]
+        if b % 20 == 0:
+            colunas[f"RegControl-R{b}-tap"] = np.round(np.cumsum(rng.choice([-1, 0, 0, 0, 1], n_passos)).clip(-16, 16))
+        if b % 10 == 0:
+            colunas[f"PV-0.PV_{b // 10}-P_gen"] = 0.5 * sol * rng.uniform(0.8, 1.0, n_passos)
+
+    pd.DataFrame(colunas).to_csv(caminho, index=False, float_format="%.8g")
+    return caminho
+
+
+def gerar_medicoes(pasta, n_medidores, n_passos=4032, passo_s=600, vn=VN_MEDIDOR_PADRAO, semente=0,
+                   inicio=INICIO_PADRAO):
+    """Planilhas de medidores (sep=";") com tensões e correntes médias por fase; retorna os caminhos."""
+    rng = np.random.default_rng(semente)
+    os.makedirs(pasta, exist_ok=True)
+    segundos = np.arange(n_passos, dtype=np.int64) * passo_s
+    datas = (pd.Timestamp(inicio) + pd.to_timedelta(segundos, unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+
+    caminhos = []
+    for m in range(n_medidores):
+        # Alguns medidores ficam perto dos limites do PRODIST para gerar DRP/DRC
+        distancia = rng.uniform(0, 1.6)
+        modulos_v, _, modulos_i, _ = _fasores_barra(rng, segundos, distancia, 3, vn)
+        dados = {"Data": datas}
+        for f, fase in enumerate("abc"):
+            dados[f"Tensao.Average.V{fase}n"] = modulos_v[f]
+        for f, fase in enumerate("abc"):
+            dados[f"Corrente.Average.I{fase}"] = modulos_i[f]
+        dados["Corrente.Average.In"] = np.abs(modulos_i[0] - modulos_i[1]) + np.abs(modulos_i[1] - modulos_i[2])
+
+        caminho = os.path.join(pasta, f"medidor_{m:04d}.csv")
+        pd.DataFrame(dados).to_csv(caminho, sep=";", index=False, float_format="%.4f")
+        caminhos.append(caminho)
+    return caminhos
+
+
+# Registradores do EnergyMeter na ordem do OpenDSS (sem os por nível de tensão)
+REGISTRADORES_EMOUT = [
+    "kWh", "kvarh", "Max kW", "Max kVA", "Zone kWh", "Zone kvarh", "Zone Max kW", "Zone Max kVA",
+    "Overload kWh Normal", "Overload kWh Emerg", "Load EEN", "Load UE", "Zone Losses kWh",
+    "Zone Losses kvarh", "Zone Max kW Losses", "Zone Max kvar Losses", "Load Losses kWh",
+    "Load Losses kvarh", "No Load Losses kWh", "No Load Losses kvarh", "Max kW Load Losses",
+    "Max kW No Load Losses", "Line Losses", "Transformer Losses", "Line Mode Line Losses",
+    "Zero Mode Line Losses", "3-phase Line Losses", "1- and 2-phase Line Losses", "Gen kWh",
+    "Gen kvarh", "Gen Max kW", "Gen Max kVA",
+]
+
+
+def gerar_emout(pasta, n_cenarios, n_medidores, niveis_kv=(138, 13.8), semente=0):
+    """
+    Um EMout.txt por cenário (pasta/energymeters/cenario_XXXX/), com n_medidores
+    linhas e os registradores por nível de tensão; retorna os caminhos.
+    """
+    rng = np.random.default_rng(semente)
+    nomes = list(REGISTRADORES_EMOUT)
+    for tipo in ["Losses", "Line Loss", "Load Loss", "No Load Loss", "Load Energy"]:
+        nomes += [f"{kv:g} kV {tipo}" for kv in niveis_kv]
+    cabecalho = ["", "ENERGY METER VALUES", "", "Registers:"]
+    cabecalho += [f"Reg {i} = {nome}" for i, nome in enumerate(nomes, start=1)]
+    cabecalho += ["", "Meter           " + "".join(f"Reg {i:<7d}" for i in range(1, len(nomes) + 1)), ""]
+
+    caminhos = []
+    for c in range(n_cenarios):
+        valores = np.round(rng.uniform(0, 60000, (n_medidores, len(nomes))))
+        pasta_cenario = os.path.join(pasta, "energymeters", f"cenario_{c:04d}")
+        os.makedirs(pasta_cenario, exist_ok=True)
+        caminho = os.path.join(pasta_cenario, "Sintetico_EMout.txt")
+        linhas = [f"medidor{m:03d}".ljust(16) + "".join(f"{v:>11.0f}" for v in valores[m]) for m in range(n_medidores)]
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write("\n".join(cabecalho + linhas) + "\n")
+        caminhos.append(caminho)
+    return caminhos
+
+
+def gerar_cenario(pasta, n_barras=20, n_fases=3, n_passos=20_000, passo_s=60, n_medidores=10, semente=0):
+    """Cenário completo (monitores + config, results.csv do mosaik e medições); retorna os caminhos."""
+    os.makedirs(pasta, exist_ok=True)
+    return {
+        "config": gerar_monitores_opendss(pasta, n_barras, n_fases, n_passos, passo_s, semente=semente),
+        "resultados": gerar_resultados_mosaik(os.path.join(pasta, "results.csv"), n_barras, n_fases,
+                                              n_passos, passo_s, semente=semente),
+        "medicoes": gerar_medicoes(os.path.join(pasta, "medicoes"), n_medidores, n_passos, passo_s, semente=semente),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um cenário sintético (monitores, mosaik e medições)")
+    parser.add_argument("pasta", help="pasta de saída")
+    parser.add_argument("--barras", type=int, default=20)
+    parser.add_argument("--fases", type=int, default=3, choices=[1, 2, 3])
+    parser.add_argument("--passos", type=int, default=20_000, help="linhas de cada arquivo")
+    parser.add_argument("--passo-s", type=int, default=60, help="intervalo entre amostras (s)")
+    parser.add_argument("--medidores", type=int, default=10)
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+
+    caminhos = gerar_cenario(args.pasta, args.barras, args.fases, args.passos, args.passo_s, args.medidores, args.semente)
+    print(f"config:     {caminhos['config']}")
+    print(f"resultados: {caminhos['resultados']}")
+    print(f"medições:   {len(caminhos['medicoes'])} arquivos em {os.path.dirname(caminhos['medicoes'][0])}"
+          if caminhos["medicoes"] else "medições:   nenhuma")
+
+
+if __name__ == "__main__":
+    main()
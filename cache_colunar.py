@@ -0,0 +1,176 @@
+# ============================================================================
+# CACHE COLUNAR EM DISCO PARA OS CSVs DOS MONITORES
+# ============================================================================
+# Ao ler um CSV pela primeira vez, cada coluna já tratada é gravada como um
+# arquivo .npy em uma pasta "sidecar" (.tsdq_cache) ao lado do arquivo
+# original. Nas próximas leituras - mesmo após reiniciar o Streamlit - as
+# colunas binárias são carregadas diretamente, sem parse de texto.
+#
+# A entrada do cache é validada por caminho, tamanho, data de modificação e
+# hash do conteúdo: se o monitor for reescrito pelo OpenDSS, o cache é
+# descartado e refeito automaticamente.
+#
+# Tabelas derivadas do mesmo arquivo (ex.: níveis da pirâmide de agregados)
+# usam uma "variante" e ficam na mesma pasta, com a mesma validação.
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+PASTA_CACHE = ".tsdq_cache"
+
+# Incrementar sempre que o formato gravado (ou o tratamento das colunas) mudar
+VERSAO_CACHE = 1
+
+
+def calcular_hash_arquivo(caminho):
+    """Hash BLAKE2b do conteúdo do arquivo (leitura em blocos)."""
+    with open(caminho, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+
+def _assinatura(caminho):
+    info = os.stat(caminho)
+    return {
+        "caminho": os.path.abspath(caminho),
+        "tamanho": info.st_size,
+        "mtime_ns": info.st_mtime_ns,
+    }
+
+
+def _pasta_entrada(caminho, variante=""):
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    return os.path.join(pasta, PASTA_CACHE, nome + variante)
+
+
+def _ler_meta(pasta_entrada):
+    try:
+        with open(os.path.join(pasta_entrada, "meta.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _entrada_valida(meta, caminho, versao, variante=""):
+    """Confere se a entrada do cache corresponde ao arquivo atual."""
+    if meta is None or meta.get("versao") != [VERSAO_CACHE, versao]:
+        return False
+
+    assinatura = _assinatura(caminho)
+    if meta["caminho"] != assinatura["caminho"] or meta["tamanho"] != assinatura["tamanho"]:
+        return False
+    if meta["mtime_ns"] == assinatura["mtime_ns"]:
+        return True
+
+    # Arquivo "tocado" (mtime mudou, tamanho igual): decide pelo conteúdo
+    if meta["hash"] != calcular_hash_arquivo(caminho):
+        return False
+    meta["mtime_ns"] = assinatura["mtime_ns"]
+    try:
+        _gravar_meta(_pasta_entrada(caminho, variante), meta)
+    except OSError:
+        pass
+    return True
+
+
+def _gravar_meta(pasta_entrada, meta):
+    temporario = os.path.join(pasta_entrada, "meta.json.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(temporario, os.path.join(pasta_entrada, "meta.json"))
+
+
+def _carregar_colunas(pasta_entrada, meta):
+    dados = {}
+    for i, info in enumerate(meta["colunas"]):
+        valores = np.load(os.path.join(pasta_entrada, f"col_{i:05d}.npy"))
+        if info["objeto"]:
+            # Colunas de texto são gravadas como unicode + máscara de nulos
+            nulos = np.load(os.path.join(pasta_entrada, f"col_{i:05d}_na.npy"))
+            valores = valores.astype(object)
+            valores[nulos] = np.nan
+        dados[info["nome"]] = valores
+    return pd.DataFrame(dados, columns=[info["nome"] for info in meta["colunas"]])
+
+
+def _gravar_colunas(caminho, df, meta, variante=""):
+    pasta_entrada = _pasta_entrada(caminho, variante)
+    # Meta é removido primeiro: uma gravação interrompida nunca parece válida
+    shutil.rmtree(pasta_entrada, ignore_errors=True)
+    os.makedirs(pasta_entrada, exist_ok=True)
+
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        objeto = serie.dtype == object
+        if objeto:
+            np.save(os.path.join(pasta_entrada, f"col_{i:05d}_na.npy"), serie.isna().to_numpy())
+            valores = serie.fillna("").astype(str).to_numpy(dtype=str)
+        else:
+            valores = serie.to_numpy()
+        np.save(os.path.join(pasta_entrada, f"col_{i:05d}.npy"), valores, allow_pickle=False)
+        colunas.append({"nome": nome, "objeto": bool(objeto)})
+
+    meta["colunas"] = colunas
+    _gravar_meta(pasta_entrada, meta)
+
+
+def assinatura_arquivo(caminho, versao=0):
+    """Assinatura (caminho, tamanho, mtime, hash) a tirar antes de ler o arquivo."""
+    meta = _assinatura(caminho)
+    meta.update({"versao": [VERSAO_CACHE, versao], "hash": calcular_hash_arquivo(caminho)})
+    return meta
+
+
+def gravar_no_cache(caminho, df, assinatura, variante=""):
+    """Grava uma tabela já calculada a partir do arquivo (ignora falhas de escrita)."""
+    try:
+        _gravar_colunas(caminho, df, dict(assinatura), variante)
+    except (OSError, ValueError):
+        shutil.rmtree(_pasta_entrada(caminho, variante), ignore_errors=True)
+
+
+def ler_cache_existente(caminho, versao=0, variante=""):
+    """Retorna a entrada do cache se estiver válida, sem nunca ler o arquivo original."""
+    pasta_entrada = _pasta_entrada(caminho, variante)
+    meta = _ler_meta(pasta_entrada)
+    if not _entrada_valida(meta, caminho, versao, variante):
+        return None
+    try:
+        return _carregar_colunas(pasta_entrada, meta)
+    except (OSError, ValueError):
+        return None
+
+
+def ler_com_cache(caminho, leitor, versao=0, variante=""):
+    """
+    Lê um arquivo usando o cache colunar em disco.
+
+    Parâmetros:
+        caminho: arquivo de origem (ex.: CSV de monitor do OpenDSS)
+        leitor: função caminho -> DataFrame usada quando o cache não existe
+                ou está desatualizado (inclui o tratamento das colunas)
+        versao: identifica o tratamento aplicado pelo leitor; mudar o valor
+                invalida as entradas gravadas com outro tratamento
+        variante: sufixo para guardar tabelas derivadas do mesmo arquivo
+
+    Se a pasta não permitir escrita, o arquivo é simplesmente lido pelo leitor.
+    """
+    df = ler_cache_existente(caminho, versao, variante)
+    if df is not None:
+        return df
+
+    # Assinatura e hash são tirados antes da leitura: se o arquivo mudar
+    # durante o parse, a entrada gravada já nasce inválida
+    assinatura = assinatura_arquivo(caminho, versao)
+    df = leitor(caminho)
+    gravar_no_cache(caminho, df, assinatura, variante)
+    return df
+
+
+def limpar_cache(pasta):
+    """Remove o cache colunar de uma pasta de monitores."""
+    shutil.rmtree(os.path.join(pasta, PASTA_CACHE), ignore_errors=True)
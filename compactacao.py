@@ -0,0 +1,157 @@
+# ============================================================================
+# POLÍTICA DE TIPOS COMPACTOS PARA OS DATAFRAMES CARREGADOS
+# ============================================================================
+# Por padrão o pandas guarda medições em float64 e textos como objetos Python.
+# Aqui cada DataFrame carregado passa por uma etapa única de compactação:
+#   - medições em float32, quando a conversão respeita a tolerância e não
+#     muda nenhuma leitura de faixa PRODIST (medições inteiras também, se
+#     forem representadas exatamente);
+#   - colunas de tempo em int64 / datetime64 (nunca reduzidas);
+#   - textos repetidos (ex.: Origem/Atributo do OMNeT++) como "category".
+# O mesmo servidor Streamlit passa a guardar várias vezes mais cenários em
+# cache, e o antes/depois de memória fica registrado em df.attrs.
+import numpy as np
+import pandas as pd
+
+from indicadores_prodist import LIMITES_FAIXAS_PU
+
+# Incrementar quando a política mudar: frames compactados guardados em disco
+# (armazém compartilhado) levam a versão na chave e são refeitos
+VERSAO_COMPACTACAO = 2
+
+# Tolerância da conversão para float32 (relativa e absoluta); colunas que
+# não passam na verificação continuam em float64. 2**-24 é o erro de um
+# único arredondamento para float32: qualquer valor normal passa, e só
+# valores subnormais (que perdem dígitos) são recusados.
+TOLERANCIA_RELATIVA_FLOAT32 = 2.0**-24
+TOLERANCIA_ABSOLUTA_FLOAT32 = 0.0
+
+# O arredondamento pode levar uma leitura colada num limite de faixa (em pu)
+# para o outro lado (0.91999999 vira 0.92000002) e mudar DRP/DRC: colunas em
+# que isso acontece continuam em float64
+LIMITES_FLOAT32 = LIMITES_FAIXAS_PU
+
+# Textos viram "category" quando há no máximo esta fração de valores distintos
+FRACAO_MAX_CATEGORIAS = 0.5
+
+# Colunas tratadas como eixo de tempo (comparação sem diferenciar maiúsculas)
+COLUNAS_TEMPO = {"hour", "tsec", "t(sec)", "time", "tempo", "tempo_eixox", "t(h)"}
+
+# Maior inteiro representado exatamente em float32
+LIMITE_INTEIRO_FLOAT32 = 2**24
+
+CHAVE_ATTRS = "compactacao"
+
+
+def memoria_bytes(df):
+    """Memória ocupada pelo DataFrame, incluindo o conteúdo dos objetos."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _formatar_bytes(n):
+    return f"{n / 1024**2:.1f} MB" if n >= 1024**2 else f"{n / 1024:.1f} kB"
+
+
+def _cruza_limite(valores, convertidos, limites):
+    """Algum valor mudou de lado (ou passou a coincidir com) um dos limites?"""
+    for limite in limites:
+        # O arredondamento é monótono: só um valor que vira exatamente
+        # float32(limite) pode mudar de lado; a comparação exata fica para eles
+        candidatos = convertidos == np.float32(limite)
+        if candidatos.any():
+            antes = np.sign(valores[candidatos] - limite)
+            depois = np.sign(convertidos[candidatos].astype(np.float64) - limite)
+            if (antes != depois).any():
+                return True
+    return False
+
+
+def _float32_dentro_da_tolerancia(valores, rtol, atol, limites=()):
+    with np.errstate(over="ignore"):
+        convertidos = valores.astype(np.float32)
+    if not np.isfinite(convertidos[np.isfinite(valores)]).all():
+        return None  # Fora do alcance do float32
+    if not np.allclose(valores, convertidos, rtol=rtol, atol=atol, equal_nan=True):
+        return None
+    if _cruza_limite(valores, convertidos, limites):
+        return None
+    return convertidos
+
+
+def compactar_tipos(df, rtol=TOLERANCIA_RELATIVA_FLOAT32, atol=TOLERANCIA_ABSOLUTA_FLOAT32,
+                    fracao_categorias=FRACAO_MAX_CATEGORIAS, colunas_tempo=(), limites=LIMITES_FLOAT32):
+    """
+    Aplica a política de tipos compactos (retorna um novo DataFrame).
+
+    Parâmetros:
+        rtol, atol: tolerância aceita na conversão float64 -> float32
+        limites: valores que o arredondamento para float32 não pode cruzar
+        fracao_categorias: fração máxima de valores distintos para virar category
+        colunas_tempo: nomes extras tratados como tempo, além de COLUNAS_TEMPO
+
+    O resumo (bytes antes/depois e colunas convertidas) fica em
+    df.attrs["compactacao"].
+    """
+    tempo = COLUNAS_TEMPO | {str(c).lower() for c in colunas_tempo}
+    antes = memoria_bytes(df)
+    resumo = {"float32": [], "float64_mantidas": [], "categorias": [], "tempo": []}
+
+    colunas = {}
+    for nome in df.columns:
+        serie = df[nome]
+        dtype = serie.dtype
+
+        if str(nome).strip().lower() in tempo:
+            # Tempo: datetime64 ou inteiro de 64 bits, sem perda
+            if pd.api.types.is_integer_dtype(dtype) and dtype != np.int64:
+                serie = serie.astype(np.int64)
+            elif pd.api.types.is_float_dtype(dtype) and serie.notna().all() and (serie % 1 == 0).all():
+                serie = serie.astype(np.int64)
+            elif dtype == object:
+                # Datas em texto: só converte se todas as não nulas forem reconhecidas
+                datas = pd.to_datetime(serie.astype(str).str.strip(), format="mixed", errors="coerce")
+                if datas.notna().sum() == serie.notna().sum():
+                    serie = datas.where(serie.notna())
+            resumo["tempo"].append(nome)
+
+        elif dtype == np.float64:
+            convertidos = _float32_dentro_da_tolerancia(serie.to_numpy(), rtol, atol, limites)
+            if convertidos is None:
+                resumo["float64_mantidas"].append(nome)
+            else:
+                serie = pd.Series(convertidos, index=serie.index, name=nome)
+                resumo["float32"].append(nome)
+
+        elif pd.api.types.is_integer_dtype(dtype) and dtype.itemsize > 4:
+            # Inteiros até 2**24 cabem exatamente em float32 (e não estouram em contas)
+            if len(serie) and serie.abs().max() < LIMITE_INTEIRO_FLOAT32:
+                serie = serie.astype(np.float32)
+                resumo["float32"].append(nome)
+
+        elif dtype == object and len(serie):
+            distintos = serie.nunique(dropna=True)
+            if distintos <= fracao_categorias * len(serie) and serie.dropna().map(type).eq(str).all():
+                serie = serie.astype("category")
+                resumo["categorias"].append(nome)
+
+        colunas[nome] = serie
+
+    compacto = pd.DataFrame(colunas, index=df.index, columns=df.columns)
+    compacto.attrs = dict(df.attrs)
+    resumo.update({"bytes_antes": antes, "bytes_depois": memoria_bytes(compacto)})
+    compacto.attrs[CHAVE_ATTRS] = resumo
+    return compacto
+
+
+def resumo_compactacao(df):
+    """Texto curto com o antes/depois de memória (vazio se o df não foi compactado)."""
+    resumo = df.attrs.get(CHAVE_ATTRS)
+    if not resumo:
+        return ""
+    antes, depois = resumo["bytes_antes"], resumo["bytes_depois"]
+    reducao = (1 - depois / antes) * 100 if antes else 0.0
+    return (
+        f"💾 Memória: {_formatar_bytes(antes)} → {_formatar_bytes(depois)} (-{reducao:.0f}%) | "
+        f"{len(resumo['float32'])} col. float32, {len(resumo['categorias'])} categóricas"
+        + (f", {len(resumo['float64_mantidas'])} mantidas em float64" if resumo["float64_mantidas"] else "")
+    )
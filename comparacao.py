@@ -0,0 +1,413 @@
+# ============================================================================
+# COMPARAÇÃO VETORIZADA DE DOIS ARQUIVOS DE RESULTADOS (VÁRIAS COLUNAS)
+# ============================================================================
+# Validar uma mudança de modelo é conferir milhares de barras, não uma. Aqui:
+#   - as colunas em pu dos dois arquivos são pareadas automaticamente pelo
+#     nome (sem diferenciar maiúsculas, espaços e pontuação);
+#   - as linhas são alinhadas pelo instante (merge_asof com tolerância), e
+#     não pela posição;
+#   - erro máximo, médio, RMS e o instante da primeira divergência de todos
+#     os pares saem de uma única passada sobre a matriz (amostras × pares).
+# Para arquivos maiores que a memória, comparar_em_blocos percorre os dois
+# CSVs em blocos alinhados e guarda só as estatísticas corridas de cada par.
+# Usado pelo comparador.py e por: python main.py comparar <arq1> <arq2>
+import io
+import itertools
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from fonte_resultados import TAMANHO_BLOCO_CSV, ler_cabecalho_csv, medir_pico_memoria
+
+# Marcador das colunas comparadas (grandezas em pu)
+MARCADOR_PU = "pu"
+
+# Tolerância padrão do alinhamento por tempo (segundos; passos, se numérico)
+TOLERANCIA_ALINHAMENTO_S = 30.0
+
+# Diferença (pu) acima da qual o par é considerado divergente
+LIMIAR_DIVERGENCIA_PADRAO = 1e-4
+
+
+def _normalizar(nome):
+    return re.sub(r"[^0-9a-z]", "", str(nome).lower())
+
+
+def parear_colunas(colunas1, colunas2, filtro="", marcador=MARCADOR_PU):
+    """
+    Pares (coluna do arquivo 1, coluna do arquivo 2) com o mesmo nome normalizado.
+
+    Só entram colunas que contêm o marcador (ex.: "pu", sem diferenciar
+    maiúsculas) e o filtro digitado.
+    Retorna a lista ordenada pelo nome da coluna do arquivo 1.
+    """
+    candidatas2 = {}
+    for col in colunas2:
+        if marcador in col.lower() and filtro in col:
+            candidatas2.setdefault(_normalizar(col), col)
+    return sorted(
+        (col, candidatas2[_normalizar(col)])
+        for col in colunas1
+        if marcador in col.lower() and filtro in col and _normalizar(col) in candidatas2
+    )
+
+
+def _tipo_tempo(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return "data"
+    if pd.api.types.is_numeric_dtype(serie):
+        return "numero"
+    return None
+
+
+def alinhar_linhas(tempo1, tempo2, tolerancia=TOLERANCIA_ALINHAMENTO_S):
+    """
+    Para cada linha do arquivo 1, a linha do arquivo 2 no instante mais próximo.
+
+    Parâmetros:
+        tempo1, tempo2: colunas de tempo (datetime ou numéricas)
+        tolerancia: diferença máxima aceita (segundos para datas)
+
+    Retorna:
+        (índices do arquivo 1, índices do arquivo 2 ou -1 sem par, modo), onde
+        modo é "tempo" ou "posição" (sem tempo comparável, alinha pela ordem)
+    """
+    tempo1, tempo2 = pd.Series(tempo1).reset_index(drop=True), pd.Series(tempo2).reset_index(drop=True)
+    tipo = _tipo_tempo(tempo1)
+    if tipo is None or tipo != _tipo_tempo(tempo2):
+        n = min(len(tempo1), len(tempo2))
+        return np.arange(n), np.arange(n), "posição"
+
+    if tipo == "data":
+        tempo1 = tempo1.astype("datetime64[ns]")
+        tempo2 = tempo2.astype("datetime64[ns]")
+        tolerancia = pd.Timedelta(seconds=tolerancia)
+    else:
+        tempo1, tempo2 = tempo1.astype(float), tempo2.astype(float)
+
+    esquerda = pd.DataFrame({"t": tempo1, "i1": np.arange(len(tempo1))}).dropna().sort_values("t", kind="stable")
+    direita = pd.DataFrame({"t": tempo2, "i2": np.arange(len(tempo2))}).dropna().sort_values("t", kind="stable")
+    pares = pd.merge_asof(esquerda, direita, on="t", direction="nearest", tolerance=tolerancia)
+    pares = pares.sort_values("i1", kind="stable")
+    return pares["i1"].to_numpy(), pares["i2"].fillna(-1).to_numpy(dtype=np.int64), "tempo"
+
+
+def matrizes_alinhadas(df1, df2, pares, indices1, indices2):
+    """Matrizes (amostras × pares) em float64; linhas sem par no arquivo 2 ficam NaN."""
+    A = np.column_stack([df1[c1].to_numpy(dtype=float)[indices1] for c1, _ in pares])
+    B = np.full_like(A, np.nan)
+    com_par = indices2 >= 0
+    B[com_par] = np.column_stack([df2[c2].to_numpy(dtype=float)[indices2[com_par]] for _, c2 in pares])
+    return A, B
+
+
+# =======================================================
+# ESTATÍSTICAS ACUMULADAS POR PAR (EM MEMÓRIA OU POR BLOCOS)
+# =======================================================
+
+def novo_acumulador(n_pares):
+    """Estatísticas corridas de cada par; ocupam O(pares), não O(amostras)."""
+    return {
+        "amostras": np.zeros(n_pares, dtype=np.int64),
+        "erro_max": np.full(n_pares, -np.inf),
+        "linha_erro_max": np.full(n_pares, -1, dtype=np.int64),
+        "instante_erro_max": np.full(n_pares, None, dtype=object),
+        "soma_abs": np.zeros(n_pares),
+        "soma_quadrados": np.zeros(n_pares),
+        "violacoes": np.zeros(n_pares, dtype=np.int64),
+        "primeira_divergencia": np.full(n_pares, None, dtype=object),
+    }
+
+
+def acumular(acumulador, tempo, linhas, A, B, limiar=LIMIAR_DIVERGENCIA_PADRAO):
+    """
+    Atualiza as estatísticas com um bloco alinhado (amostras × pares).
+
+    linhas: posição de cada amostra no arquivo 1 (linha de dados, a partir de 0)
+    """
+    if len(A) == 0:
+        return acumulador
+    tempo = np.asarray(tempo)
+    erro = np.abs(A - B)
+    validos = ~np.isnan(erro)
+    erro_zerado = np.where(validos, erro, 0.0)
+
+    i_max = np.where(validos, erro, -np.inf).argmax(axis=0)
+    max_bloco = np.where(validos.any(axis=0), erro_zerado[i_max, np.arange(erro.shape[1])], -np.inf)
+    melhorou = max_bloco > acumulador["erro_max"]
+    acumulador["erro_max"][melhorou] = max_bloco[melhorou]
+    acumulador["linha_erro_max"][melhorou] = np.asarray(linhas)[i_max[melhorou]]
+    acumulador["instante_erro_max"][melhorou] = list(tempo[i_max[melhorou]])
+
+    divergente = erro_zerado > limiar
+    primeira = divergente.any(axis=0) & (acumulador["violacoes"] == 0)
+    acumulador["primeira_divergencia"][primeira] = list(tempo[divergente.argmax(axis=0)[primeira]])
+
+    acumulador["amostras"] += validos.sum(axis=0)
+    acumulador["soma_abs"] += erro_zerado.sum(axis=0)
+    acumulador["soma_quadrados"] += (erro_zerado ** 2).sum(axis=0)
+    acumulador["violacoes"] += divergente.sum(axis=0)
+    return acumulador
+
+
+def ranking_erros(acumulador, pares):
+    """
+    Tabela final, do pior para o melhor par (erro máximo).
+
+    Colunas: erro máximo/médio/RMS, linha e instante do erro máximo, primeira
+    divergência (|diferença| > limiar), violações e fração divergente.
+    """
+    n = acumulador["amostras"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        erro_medio = acumulador["soma_abs"] / n
+        erro_rms = np.sqrt(acumulador["soma_quadrados"] / n)
+        fracao = acumulador["violacoes"] / n * 100
+
+    ranking = pd.DataFrame({
+        "coluna_1": [c1 for c1, _ in pares],
+        "coluna_2": [c2 for _, c2 in pares],
+        "amostras": n,
+        "erro_max": np.where(n > 0, acumulador["erro_max"], np.nan),
+        "erro_medio": erro_medio,
+        "erro_rms": erro_rms,
+        "linha_erro_max": acumulador["linha_erro_max"],
+        "instante_erro_max": pd.Series(list(acumulador["instante_erro_max"])).infer_objects(),
+        "primeira_divergencia": pd.Series(list(acumulador["primeira_divergencia"])).infer_objects(),
+        "violacoes": acumulador["violacoes"],
+        "divergentes (%)": fracao,
+    })
+    return ranking.sort_values("erro_max", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+
+
+def metricas_erro(tempo, A, B, pares, limiar=LIMIAR_DIVERGENCIA_PADRAO, linhas=None):
+    """Métricas de todos os pares de uma vez (diferença = arquivo 1 - arquivo 2)."""
+    linhas = np.arange(len(A)) if linhas is None else linhas
+    return ranking_erros(acumular(novo_acumulador(len(pares)), tempo, linhas, A, B, limiar), pares)
+
+
+def comparar(df1, df2, filtro="", tolerancia=TOLERANCIA_ALINHAMENTO_S, limiar=LIMIAR_DIVERGENCIA_PADRAO,
+             coluna_tempo1=None, coluna_tempo2=None):
+    """
+    Pareia, alinha e mede todos os pares de colunas em pu.
+
+    Colunas de tempo: as informadas ou a primeira de cada arquivo.
+
+    Retorna dict com ranking (DataFrame), pares, tempo, A, B (matrizes
+    alinhadas), modo ("tempo" ou "posição") e linhas_sem_par.
+    """
+    coluna_tempo1 = coluna_tempo1 or df1.columns[0]
+    coluna_tempo2 = coluna_tempo2 or df2.columns[0]
+    pares = parear_colunas(df1.columns, df2.columns, filtro)
+    if not pares:
+        return {"ranking": pd.DataFrame(), "pares": [], "modo": None}
+
+    indices1, indices2, modo = alinhar_linhas(df1[coluna_tempo1], df2[coluna_tempo2], tolerancia)
+    tempo = df1[coluna_tempo1].to_numpy()[indices1] if modo == "tempo" else indices1
+    A, B = matrizes_alinhadas(df1, df2, pares, indices1, indices2)
+
+    return {
+        "ranking": metricas_erro(tempo, A, B, pares, limiar, indices1),
+        "pares": pares,
+        "tempo": tempo,
+        "A": A,
+        "B": B,
+        "modo": modo,
+        "linhas_sem_par": int((indices2 < 0).sum()),
+    }
+
+
+# =======================================================
+# COMPARAÇÃO EM BLOCOS (ARQUIVOS MAIORES QUE A MEMÓRIA)
+# =======================================================
+
+def _tempo_bloco(serie, tipo):
+    """
+    (tempo em float64, instantes originais) de um bloco.
+
+    Datas viram segundos desde 1970; valores inválidos ficam NaN / NaT.
+    """
+    if tipo == "numero":
+        instantes = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float)
+        return instantes, instantes
+    datas = pd.to_datetime(serie, format="ISO8601", errors="coerce")
+    falhas = datas.isna() & serie.notna()
+    if falhas.any():
+        # Outros formatos (ou espaços): "mixed" aceita tudo, mas é bem mais lento
+        datas[falhas] = pd.to_datetime(serie[falhas].astype(str).str.strip(), format="mixed", errors="coerce")
+    datas = datas.to_numpy(dtype="datetime64[ns]")
+    return np.where(np.isnat(datas), np.nan, datas.astype(np.int64) / 1e9), datas
+
+
+def _tipo_tempo_bloco(serie):
+    """Tipo da coluna de tempo deduzido do primeiro bloco ("data", "numero" ou None)."""
+    if pd.api.types.is_numeric_dtype(serie):
+        return "numero"
+    if len(serie) and not np.isnan(_tempo_bloco(serie, "data")[0]).all():
+        return "data"
+    return None
+
+
+def _exigir_crescente(tempo, nome):
+    if np.any(np.diff(tempo) < 0):
+        raise ValueError(f"{nome}: o tempo precisa ser crescente para a comparação em blocos.")
+
+
+def _blocos_csv(arquivo, coluna_tempo, colunas, tamanho_bloco):
+    """(tempo bruto, matriz float64 das colunas) de cada bloco, lendo só as colunas pedidas."""
+    desejadas = set(colunas) | {coluna_tempo}
+    for bloco in pd.read_csv(arquivo, usecols=lambda c: c.strip() in desejadas, chunksize=tamanho_bloco):
+        bloco.columns = bloco.columns.str.strip()
+        valores = np.column_stack([pd.to_numeric(bloco[c], errors="coerce").to_numpy(dtype=float) for c in colunas])
+        yield bloco[coluna_tempo], valores
+
+
+class _BufferArquivo2:
+    """
+    Janela deslizante do arquivo 2 usada no alinhamento por tempo.
+
+    Guarda só as linhas que ainda podem ser o instante mais próximo de
+    alguma linha futura do arquivo 1 (tempo >= último instante - tolerância).
+    """
+
+    def __init__(self, blocos, tipo, primeiro):
+        self.blocos, self.tipo = blocos, tipo
+        self.tempo = np.empty(0)
+        self.valores = None
+        self.esgotado = False
+        self._acrescentar(*primeiro)
+
+    def _acrescentar(self, tempo_bruto, valores):
+        tempo, _ = _tempo_bloco(tempo_bruto, self.tipo)
+        validos = ~np.isnan(tempo)
+        tempo, valores = tempo[validos], valores[validos]
+        _exigir_crescente(np.concatenate([self.tempo[-1:], tempo]), "Arquivo 2")
+        self.tempo = np.concatenate([self.tempo, tempo])
+        self.valores = valores if self.valores is None else np.concatenate([self.valores, valores])
+
+    def cobrir_ate(self, limite):
+        """Lê blocos até o buffer chegar a 'limite' (ou o arquivo acabar)."""
+        while not self.esgotado and (not len(self.tempo) or self.tempo[-1] < limite):
+            proximo = next(self.blocos, None)
+            if proximo is None:
+                self.esgotado = True
+            else:
+                self._acrescentar(*proximo)
+
+    def descartar_antes(self, limite):
+        corte = np.searchsorted(self.tempo, limite, side="left")
+        self.tempo, self.valores = self.tempo[corte:], self.valores[corte:]
+
+    def mais_proximo(self, tempo, tolerancia):
+        """Índice no buffer do instante mais próximo (-1 fora da tolerância); empate fica com o anterior."""
+        n = len(self.tempo)
+        if n == 0:
+            return np.full(len(tempo), -1)
+        depois = np.searchsorted(self.tempo, tempo, side="right")
+        antes = depois - 1
+        dist_antes = np.where(antes >= 0, tempo - self.tempo[np.clip(antes, 0, n - 1)], np.inf)
+        dist_depois = np.where(depois < n, self.tempo[np.clip(depois, 0, n - 1)] - tempo, np.inf)
+        escolhido = np.where(dist_antes <= dist_depois, antes, depois)
+        return np.where(np.minimum(dist_antes, dist_depois) <= tolerancia, escolhido, -1)
+
+
+def comparar_em_blocos(arquivo1, arquivo2, filtro="", tolerancia=TOLERANCIA_ALINHAMENTO_S,
+                       limiar=LIMIAR_DIVERGENCIA_PADRAO, tamanho_bloco=TAMANHO_BLOCO_CSV, ao_progredir=None,
+                       medir_pico=False):
+    """
+    Mesmo ranking de comparar(), sem carregar os arquivos inteiros.
+
+    Os dois CSVs são percorridos em blocos alinhados e só as estatísticas
+    corridas de cada par ficam em memória (erro máximo com linha e instante,
+    soma dos erros e dos quadrados, violações do limiar). A memória depende
+    do tamanho do bloco (e das linhas do arquivo 2 dentro da tolerância), não
+    do comprimento dos arquivos. No alinhamento por tempo os dois arquivos
+    precisam estar em ordem crescente de tempo.
+
+    Parâmetros:
+        arquivo1, arquivo2: caminhos ou arquivos binários abertos
+        tamanho_bloco: linhas do arquivo 1 por bloco
+        ao_progredir: função opcional (fração_lida, linhas_lidas) chamada a cada bloco
+        medir_pico: mede o pico de memória (mais lento; só na CLI)
+
+    Retorna dict com ranking, pares, modo, linhas_sem_par e estatisticas
+    (linhas, pico_bytes, segundos; pico_bytes é None sem medir_pico).
+    """
+    inicio = time.perf_counter()
+
+    abertos = []
+    with medir_pico_memoria(medir_pico) as medicao:
+        try:
+            handles = []
+            for arquivo in (arquivo1, arquivo2):
+                if isinstance(arquivo, (str, os.PathLike)):
+                    arquivo = open(arquivo, "rb")
+                    abertos.append(arquivo)
+                handles.append(arquivo)
+            handle1, handle2 = handles
+            total_bytes = max(handle1.seek(0, io.SEEK_END), 1)
+            handle1.seek(0)
+
+            colunas1, colunas2 = ler_cabecalho_csv(handle1), ler_cabecalho_csv(handle2)
+            pares = parear_colunas(colunas1, colunas2, filtro)
+            if not pares:
+                return {"ranking": pd.DataFrame(), "pares": [], "modo": None}
+
+            blocos1 = _blocos_csv(handle1, colunas1[0], [c1 for c1, _ in pares], tamanho_bloco)
+            blocos2 = _blocos_csv(handle2, colunas2[0], [c2 for _, c2 in pares], tamanho_bloco)
+            primeiro1, primeiro2 = next(blocos1, None), next(blocos2, None)
+
+            acumulador = novo_acumulador(len(pares))
+            linhas, sem_par = 0, 0
+            modo = "posição"
+            if primeiro1 is not None and primeiro2 is not None:
+                tipo = _tipo_tempo_bloco(primeiro1[0])
+                if tipo is not None and tipo == _tipo_tempo_bloco(primeiro2[0]):
+                    modo = "tempo"
+
+            if modo == "tempo":
+                buffer = _BufferArquivo2(blocos2, tipo, primeiro2)
+                ultimo = -np.inf
+                for tempo_bruto, A in itertools.chain([primeiro1], blocos1):
+                    tempo, instantes = _tempo_bloco(tempo_bruto, tipo)
+                    posicoes = np.arange(linhas, linhas + len(A))
+                    validos = ~np.isnan(tempo)
+                    tempo, instantes, A, posicoes = tempo[validos], instantes[validos], A[validos], posicoes[validos]
+                    _exigir_crescente(np.concatenate([[ultimo], tempo]), "Arquivo 1")
+
+                    if len(tempo):
+                        ultimo = tempo[-1]
+                        buffer.cobrir_ate(ultimo + tolerancia)
+                        indices2 = buffer.mais_proximo(tempo, tolerancia)
+                        com_par = indices2 >= 0
+                        B = np.full_like(A, np.nan)
+                        B[com_par] = buffer.valores[indices2[com_par]]
+                        acumular(acumulador, instantes, posicoes, A, B, limiar)
+                        sem_par += int((~com_par).sum())
+                        buffer.descartar_antes(ultimo - tolerancia)
+
+                    linhas += len(tempo_bruto)
+                    if ao_progredir is not None:
+                        ao_progredir(min(handle1.tell() / total_bytes, 1.0), linhas)
+            elif primeiro1 is not None and primeiro2 is not None:
+                # Sem tempo comparável: pareia pela ordem, como alinhar_linhas
+                for (_, A), (_, B) in zip(itertools.chain([primeiro1], blocos1), itertools.chain([primeiro2], blocos2)):
+                    n = min(len(A), len(B))
+                    posicoes = np.arange(linhas, linhas + n)
+                    acumular(acumulador, posicoes, posicoes, A[:n], B[:n], limiar)
+                    linhas += n
+                    if ao_progredir is not None:
+                        ao_progredir(min(handle1.tell() / total_bytes, 1.0), linhas)
+        finally:
+            for handle in abertos:
+                handle.close()
+
+    return {
+        "ranking": ranking_erros(acumulador, pares),
+        "pares": pares,
+        "modo": modo,
+        "linhas_sem_par": sem_par,
+        "estatisticas": {"linhas": linhas, "pico_bytes": medicao["pico_bytes"], "segundos": time.perf_counter() - inicio},
+    }
@@ -1,12 +1,100 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 
+from comparacao import LIMIAR_DIVERGENCIA_PADRAO, TOLERANCIA_ALINHAMENTO_S, comparar, comparar_em_blocos
+from compactacao import compactar_tipos, resumo_compactacao
+from fonte_resultados import TAMANHO_BLOCO_CSV
+from instrumentacao import (
+    ETAPA_CALCULO, ETAPA_FIGURA, ETAPA_LEITURA, ativar_painel, etapa, mostrar_grafico, render_painel
+)
+from reamostragem import MAX_PONTOS_PADRAO, indices_reamostragem_grupo
+
 # --- 1. CONFIGURAÇÃO (1ª LINHA) ---
 st.set_page_config(layout="wide", page_title="Comparador Universal")
 
 st.title("🕵️ Comparador Universal OpenDSS")
-st.markdown("Compare qualquer barra entre os dois arquivos.")
+st.markdown("Compare todas as barras em pu entre os dois arquivos, alinhadas pelo instante.")
+ativar_painel("Comparador")
+
+# --- CÁLCULO (guardado enquanto arquivos e parâmetros não mudam) ---
+@st.cache_resource(max_entries=4, show_spinner="Comparando todas as colunas...")
+def comparar_arquivos(id1, id2, filtro, tolerancia_alinhamento, limiar, _df1, _df2):
+    """Resultado de comparacao.comparar; os arquivos entram na chave pelo file_id."""
+    return comparar(_df1, _df2, filtro, tolerancia_alinhamento, limiar)
+
+def mostrar_ranking(resultado):
+    """Métricas gerais e tabela dos pares, do maior para o menor erro."""
+    ranking = resultado["ranking"]
+    divergentes = int((ranking["violacoes"] > 0).sum())
+
+    st.write("---")
+    st.info("Passo 2: Piores barras (maior erro primeiro)")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Pares comparados", f"{len(resultado['pares']):,}")
+    m2.metric("Pares divergentes", f"{divergentes:,}", delta_color="inverse",
+              delta="IGUAIS ✅" if divergentes == 0 else "DIFERENTES ❌")
+    m3.metric("Maior erro (pu)", f"{ranking['erro_max'].iloc[0]:.5f}")
+    st.caption(
+        f"Alinhamento por {resultado['modo']}"
+        + (f" | {resultado['linhas_sem_par']:,} linhas do Arquivo 1 sem par no Arquivo 2" if resultado["linhas_sem_par"] else "")
+    )
+    st.dataframe(ranking, use_container_width=True, hide_index=True)
+    return ranking
+
+
+def pagina_em_blocos():
+    """Comparação de arquivos grandes do servidor, lidos em blocos (só o ranking)."""
+    st.caption("Os dois CSVs são percorridos em blocos e só as estatísticas de cada par ficam em memória: "
+               "a memória depende do tamanho do bloco, não do arquivo. Os arquivos precisam estar em ordem de tempo.")
+    c1, c2 = st.columns(2)
+    caminho1 = c1.text_input("📂 Caminho do Arquivo 1 (no servidor):", key="caminho1").strip()
+    caminho2 = c2.text_input("📂 Caminho do Arquivo 2 (no servidor):", key="caminho2").strip()
+
+    col_filtro, col_alinhamento, col_tolerancia, col_bloco = st.columns(4)
+    filtro_barra = col_filtro.text_input("Filtro de barra:", value="", key="filtro_blocos")
+    tolerancia_alinhamento = col_alinhamento.number_input(
+        "Tolerância do alinhamento (s):", min_value=0.0, value=TOLERANCIA_ALINHAMENTO_S, step=10.0, key="alinhamento_blocos"
+    )
+    tolerancia = col_tolerancia.select_slider("Tolerância", options=[1e-6, 1e-4, 0.01], value=LIMIAR_DIVERGENCIA_PADRAO,
+                                              key="tolerancia_blocos")
+    tamanho_bloco = col_bloco.number_input("Linhas por bloco:", min_value=1_000, value=TAMANHO_BLOCO_CSV, step=50_000)
+
+    if st.button("▶️ Comparar", type="primary", disabled=not (caminho1 and caminho2)):
+        barra = st.progress(0.0, text="Lendo os arquivos...")
+        try:
+            with etapa(ETAPA_CALCULO, "comparação em blocos"):
+                st.session_state["comparacao_em_blocos"] = comparar_em_blocos(
+                    caminho1, caminho2, filtro_barra, tolerancia_alinhamento, tolerancia, int(tamanho_bloco),
+                    ao_progredir=lambda fracao, linhas: barra.progress(fracao, text=f"{linhas:,} linhas do Arquivo 1 lidas")
+                )
+        except (OSError, ValueError) as erro:
+            st.error(f"Erro: {erro}")
+            return
+        finally:
+            barra.empty()
+
+    resultado = st.session_state.get("comparacao_em_blocos")
+    if resultado is None:
+        return
+    if not resultado["pares"]:
+        st.warning(f"⚠️ Nenhuma coluna em pu com '{filtro_barra}' encontrada nos dois arquivos.")
+        return
+
+    estatisticas = resultado["estatisticas"]
+    st.caption(f"⏱️ {estatisticas['linhas']:,} linhas em {estatisticas['segundos']:.1f} s")
+    ranking = mostrar_ranking(resultado)
+    st.download_button("⬇️ Baixar ranking (CSV)", ranking.to_csv(index=False).encode("utf-8"),
+                       file_name="ranking_comparacao.csv", mime="text/csv")
+
+
+leitura = st.radio("Leitura dos arquivos:", ["Em memória (upload)", "Em blocos (arquivos grandes no servidor)"],
+                   horizontal=True)
+if leitura.startswith("Em blocos"):
+    pagina_em_blocos()
+    render_painel()
+    st.stop()
 
 # --- 2. UPLOAD ---
 c1, c2 = st.columns(2)
@@ -18,95 +106,106 @@ with c2:
 if file1 and file2:
     try:
         # Leitura
-        df1 = pd.read_csv(file1)
-        df2 = pd.read_csv(file2)
+        with etapa(ETAPA_LEITURA, file1.name):
+            df1 = pd.read_csv(file1)
+        with etapa(ETAPA_LEITURA, file2.name):
+            df2 = pd.read_csv(file2)
         
         # Limpeza
         df1.columns = df1.columns.str.strip()
         df2.columns = df2.columns.str.strip()
+
+        # Tipos compactos (float32 / category)
+        with etapa(ETAPA_LEITURA, "tipos compactos"):
+            df1 = compactar_tipos(df1, colunas_tempo=[df1.columns[0]])
+            df2 = compactar_tipos(df2, colunas_tempo=[df2.columns[0]])
+        st.caption(f"Arquivo 1 — {resumo_compactacao(df1)}  \nArquivo 2 — {resumo_compactacao(df2)}")
         
         st.write("---")
         
-        # --- 3. FILTRO DE BARRA ---
-        col_filtro, col_vazio = st.columns([1, 2])
+        # --- 3. FILTRO DE BARRA E ALINHAMENTO ---
+        col_filtro, col_alinhamento, col_tolerancia = st.columns([1, 1, 1])
         with col_filtro:
             st.info("Passo 1: Escolha a Barra")
-            # O valor padrão é vazio para mostrar tudo, ou você pode por "840"
+            # O valor padrão é vazio para comparar todas as colunas que tem "pu"
             filtro_barra = st.text_input("Digite o número da barra para filtrar:", value="")
-            
-        # Filtra as colunas baseadas no que você digitou
-        # Se deixar vazio, mostra todas as colunas que tem "pu"
-        cols1 = sorted([c for c in df1.columns if filtro_barra in c and "pu" in c])
-        cols2 = sorted([c for c in df2.columns if filtro_barra in c and "pu" in c])
-        
-        if not cols1:
-            st.warning(f"⚠️ Nenhuma coluna com '{filtro_barra}' encontrada no Arquivo 1.")
-        if not cols2:
-            st.warning(f"⚠️ Nenhuma coluna com '{filtro_barra}' encontrada no Arquivo 2.")
+        with col_alinhamento:
+            st.info("Alinhamento por instante")
+            tolerancia_alinhamento = st.number_input(
+                "Tolerância do alinhamento (s):", min_value=0.0, value=TOLERANCIA_ALINHAMENTO_S, step=10.0,
+                help="Cada linha do Arquivo 1 é pareada com o instante mais próximo do Arquivo 2 dentro desta tolerância."
+            )
+        with col_tolerancia:
+            st.info("Divergência")
+            tolerancia = st.select_slider("Tolerância", options=[1e-6, 1e-4, 0.01], value=LIMIAR_DIVERGENCIA_PADRAO)
+
+        # Todos os pares de uma vez (só recalcula se arquivos, filtro ou tolerâncias mudarem)
+        with etapa(ETAPA_CALCULO, "comparação"):
+            resultado = comparar_arquivos(file1.file_id, file2.file_id, filtro_barra, tolerancia_alinhamento, tolerancia, df1, df2)
+        pares = resultado["pares"]
+
+        if not pares:
+            st.warning(f"⚠️ Nenhuma coluna em pu com '{filtro_barra}' encontrada nos dois arquivos.")
+        else:
+            # --- 4. RANKING DAS PIORES BARRAS ---
+            ranking = mostrar_ranking(resultado)
 
-        if cols1 and cols2:
-            # --- 4. SELEÇÃO DAS COLUNAS ---
+            # --- 5. DETALHE DE UM PAR ---
             st.write("---")
-            st.info("Passo 2: Selecione as Fases para cruzar")
-            
-            sel_c1, sel_c2 = st.columns(2)
-            
-            with sel_c1:
-                coluna_a = st.selectbox("Coluna do Arq 1:", cols1)
-                
-            with sel_c2:
-                # Tenta achar o match automático pelo nome
-                idx_padrao = 0
-                if coluna_a in cols2:
-                    idx_padrao = cols2.index(coluna_a)
-                coluna_b = st.selectbox("Coluna do Arq 2:", cols2, index=idx_padrao)
-
-           # --- 5. CÁLCULOS E VISUALIZAÇÃO PONTUAL ---
-            min_len = min(len(df1), len(df2))
-            val_a = df1[coluna_a].iloc[:min_len]
-            val_b = df2[coluna_b].iloc[:min_len]
-            
+            st.info("Passo 3: Detalhe de um par")
+            rotulos = [c1 if c1 == c2 else f"{c1} ↔ {c2}" for c1, c2 in zip(ranking["coluna_1"], ranking["coluna_2"])]
+            escolhido = st.selectbox("Par (ordenado pelo erro):", range(len(rotulos)), format_func=lambda i: rotulos[i])
+            coluna_a, coluna_b = ranking["coluna_1"].iloc[escolhido], ranking["coluna_2"].iloc[escolhido]
+            j = pares.index((coluna_a, coluna_b))
+
+            tempo = resultado["tempo"]
+            val_a, val_b = resultado["A"][:, j], resultado["B"][:, j]
             diff = val_a - val_b
-            max_diff = diff.abs().max()
-            idx_max_diff = diff.abs().idxmax() # Acha a linha onde o erro é maior
-            
+            n_linhas = len(diff)
+            idx_max_diff = int(np.nanargmax(np.abs(diff))) if np.isfinite(diff).any() else 0
+
             # --- SELETOR DE TEMPO ---
-            st.write("---")
             st.markdown("#### ⏱️ Navegar no Tempo")
             
             # Botão para pular para o pior caso
             if st.button(f"Pular para Maior Diferença (Linha {idx_max_diff})"):
-                step_inicial = int(idx_max_diff)
+                step_inicial = idx_max_diff
             else:
                 step_inicial = 0
             
-            # Slider para escolher a linha
+            # Slider para escolher a linha (linhas já alinhadas pelo instante)
             step = st.slider("Escolha a Linha (Passo de Tempo):", 
-                             min_value=0, max_value=min_len-1, value=step_inicial)
+                             min_value=0, max_value=max(n_linhas - 1, 1), value=step_inicial)
+            step = min(step, n_linhas - 1)
 
             # Pega o valor EXATO daquela linha
-            v1_atual = val_a.iloc[step]
-            v2_atual = val_b.iloc[step]
+            v1_atual = val_a[step]
+            v2_atual = val_b[step]
             diff_atual = v1_atual - v2_atual
 
             # Métricas
+            instante = pd.Series(tempo[step:step + 1]).iloc[0]
             m1, m2, m3 = st.columns(3)
-            m1.metric(f"Valor Arq 1 (Linha {step})", f"{v1_atual:.5f}")
-            m2.metric(f"Valor Arq 2 (Linha {step})", f"{v2_atual:.5f}")
-            
-            tolerancia = st.select_slider("Tolerância", options=[1e-6, 1e-4, 0.01], value=1e-4)
+            m1.metric(f"Valor Arq 1 ({instante})", f"{v1_atual:.5f}")
+            m2.metric(f"Valor Arq 2 ({instante})", f"{v2_atual:.5f}")
             
-            if abs(diff_atual) <= tolerancia:
+            if np.isnan(diff_atual):
+                m3.metric("Diferença", "SEM PAR ⚠️", delta="sem instante correspondente", delta_color="off")
+            elif abs(diff_atual) <= tolerancia:
                 m3.metric("Diferença", "IGUAIS ✅", delta=f"{diff_atual:.5f}", delta_color="off")
             else:
                 m3.metric("Diferença", "DIFERENTES ❌", delta=f"{diff_atual:.5f}", delta_color="inverse")
 
-            # --- 6. GRÁFICO ---
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(y=val_a, name=f"Arquivo Luís ({coluna_a})", line=dict(color='blue', width=2)))
-            fig.add_trace(go.Scatter(y=val_b, name=f"Arquivo com mais monitores ({coluna_b})", line=dict(color='red', width=1, dash='dot')))
-            fig.update_layout(title=f"Comparação Visual: {filtro_barra}", height=450, hovermode="x unified")
-            st.plotly_chart(fig, use_container_width=True)
+            # --- 6. GRÁFICO (reamostrado, mantendo os extremos das duas curvas e da diferença) ---
+            with etapa(ETAPA_FIGURA, coluna_a):
+                indices = indices_reamostragem_grupo(tempo, [val_a, val_b, diff], MAX_PONTOS_PADRAO, "Mín/Máx")
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=tempo[indices], y=val_a[indices], name=f"Arquivo Luís ({coluna_a})", line=dict(color='blue', width=2)))
+                fig.add_trace(go.Scatter(x=tempo[indices], y=val_b[indices], name=f"Arquivo com mais monitores ({coluna_b})", line=dict(color='red', width=1, dash='dot')))
+                fig.update_layout(title=f"Comparação Visual: {coluna_a}", height=450, hovermode="x unified")
+            mostrar_grafico(fig, use_container_width=True)
             
     except Exception as e:
-        st.error(f"Erro: {e}")
\ No newline at end of file
+        st.error(f"Erro: {e}")
+
+render_painel()
@@ -0,0 +1,281 @@
+# ============================================================================
+# COMPONENTES SIMÉTRICAS E DESEQUILÍBRIO DE TENSÃO (PRODIST MÓDULO 8)
+# ============================================================================
+# Motor vetorizado: em vez de percorrer o DataFrame linha a linha, monta uma
+# matriz de fasores complexos (tempo × fase) - ou (elementos × tempo × fase)
+# para vários monitores - e aplica a transformação de Fortescue de uma vez.
+# O lote de sequências (calcular_sequencias_lote) faz tensões e correntes de
+# todos os elementos numa única transformação e devolve uma tabela "longa"
+# (uma linha por elemento e instante) usada pelo dashboard e pela CLI.
+import numpy as np
+import pandas as pd
+
+# Limite PRODIST para o fator de desequilíbrio (ajustável)
+LIMITE_FD_PRODIST = 3.0
+
+# Operador 'a' (rotação de 120°)
+A = np.exp(1j * np.radians(120))
+A2 = np.exp(1j * np.radians(240))
+
+# Matriz de transformação de componentes simétricas
+# [V0] = 1/3 * [1   1   1] [Va]
+# [V1] = 1/3 * [1   a  a2] [Vb]
+# [V2] = 1/3 * [1  a2   a] [Vc]
+MATRIZ_FORTESCUE = np.array([
+    [1, 1, 1],
+    [1, A, A2],
+    [1, A2, A],
+]) / 3
+
+# Nomes aceitos para cada fase (nome do monitor OpenDSS, nome alternativo)
+COLUNAS_MODULO_TENSAO = [("V1", "V1mag"), ("V2", "V2mag"), ("V3", "V3mag")]
+COLUNAS_ANGULO_TENSAO = [("VAngle1", "V1ang"), ("VAngle2", "V2ang"), ("VAngle3", "V3ang")]
+COLUNAS_MODULO_CORRENTE = [("I1", "I1mag"), ("I2", "I2mag"), ("I3", "I3mag")]
+COLUNAS_ANGULO_CORRENTE = [("IAngle1", "I1ang"), ("IAngle2", "I2ang"), ("IAngle3", "I3ang")]
+
+COLUNAS_RESULTADO = ['hora', 'V_positiva', 'V_negativa', 'V_zero', 'FD (%)', 'FD_limite']
+COLUNAS_SEQUENCIAS = [
+    'elemento', 'hora',
+    'V_positiva', 'V_negativa', 'V_zero', 'FD (%)',
+    'I_positiva', 'I_negativa', 'I_zero', 'FD_I (%)',
+]
+
+
+def calcular_componentes_simetricas(Va_mag, Va_ang, Vb_mag, Vb_ang, Vc_mag, Vc_ang):
+    """
+    Calcula componentes simétricas (positiva, negativa, zero)
+    a partir de tensões de fase.
+
+    Aceita escalares ou arrays NumPy (mesmo formato para todas as entradas).
+
+    Parâmetros:
+        Va_mag, Vb_mag, Vc_mag: Magnitudes das tensões (V)
+        Va_ang, Vb_ang, Vc_ang: Ângulos das tensões (graus)
+
+    Retorna:
+        V_pos: Tensão de sequência positiva (módulo e ângulo)
+        V_neg: Tensão de sequência negativa (módulo e ângulo)
+        V_zero: Tensão de sequência zero (módulo e ângulo)
+    """
+    # Converter para radianos e forma complexa
+    Va = Va_mag * np.exp(1j * np.radians(Va_ang))
+    Vb = Vb_mag * np.exp(1j * np.radians(Vb_ang))
+    Vc = Vc_mag * np.exp(1j * np.radians(Vc_ang))
+
+    V_zero = (Va + Vb + Vc) / 3
+    V_pos = (Va + A * Vb + A2 * Vc) / 3
+    V_neg = (Va + A2 * Vb + A * Vc) / 3
+
+    # Converter de volta para módulo e ângulo
+    def polar(complex_num):
+        magnitude = np.abs(complex_num)
+        angle = np.degrees(np.angle(complex_num))
+        return magnitude, angle
+
+    return {
+        'positiva': polar(V_pos),
+        'negativa': polar(V_neg),
+        'zero': polar(V_zero)
+    }
+
+
+def _extrair_coluna(df, nomes_possiveis):
+    """Retorna a primeira coluna existente como float (ou zeros, como no cálculo original)."""
+    for nome in nomes_possiveis:
+        if nome in df.columns:
+            return df[nome].to_numpy(dtype=float)
+    return np.zeros(len(df))
+
+
+def _tem_coluna(df, nomes_possiveis):
+    return any(nome in df.columns for nome in nomes_possiveis)
+
+
+def montar_fasores(df, colunas_modulo, colunas_angulo):
+    """Monta a matriz (tempo × fase) de fasores complexos a partir das colunas do monitor."""
+    modulos = np.column_stack([_extrair_coluna(df, nomes) for nomes in colunas_modulo])
+    angulos = np.column_stack([_extrair_coluna(df, nomes) for nomes in colunas_angulo])
+    return modulos * np.exp(1j * np.radians(angulos))
+
+
+def transformar_fortescue(fasores):
+    """
+    Aplica a transformação de componentes simétricas no último eixo.
+
+    Entrada (..., 3) com as fases A, B, C; saída (..., 3) com as
+    sequências zero, positiva e negativa, nesta ordem.
+    """
+    return fasores @ MATRIZ_FORTESCUE.T
+
+
+def _fator_desequilibrio(modulo_pos, modulo_neg):
+    """FD = V_neg / V_pos × 100 (zero quando a sequência positiva é nula ou inválida)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(modulo_pos > 0, modulo_neg / modulo_pos * 100, 0.0)
+
+
+def _eixo_hora(df):
+    return df['hour'].to_numpy() if 'hour' in df.columns else df.index.to_numpy()
+
+
+def calcular_fator_desequilibrio(df):
+    """
+    Calcula o fator de desequilíbrio de tensão para cada ponto no tempo.
+
+    Fator de desequilíbrio = (V_negativa / V_positiva) × 100%
+    """
+    sequencias = np.abs(transformar_fortescue(
+        montar_fasores(df, COLUNAS_MODULO_TENSAO, COLUNAS_ANGULO_TENSAO)
+    ))
+    V_zero, V_pos, V_neg = sequencias[:, 0], sequencias[:, 1], sequencias[:, 2]
+
+    return pd.DataFrame({
+        'hora': _eixo_hora(df),
+        'V_positiva': V_pos,
+        'V_negativa': V_neg,
+        'V_zero': V_zero,
+        'FD (%)': _fator_desequilibrio(V_pos, V_neg),
+        'FD_limite': LIMITE_FD_PRODIST
+    }, columns=COLUNAS_RESULTADO)
+
+
+def _bloco_fasores(dados, grandezas):
+    """
+    Bloco (elementos × tempo × grandeza × fase) de fasores e o tamanho de cada monitor.
+
+    grandezas: lista de (colunas_modulo, colunas_angulo), ex.: tensão e corrente.
+    Monitores com menos amostras são completados com NaN.
+    """
+    tamanhos = np.array([len(df) for df in dados.values()])
+    fasores = np.full((len(dados), int(tamanhos.max()), len(grandezas), 3), np.nan, dtype=complex)
+    for i, df in enumerate(dados.values()):
+        for g, (colunas_modulo, colunas_angulo) in enumerate(grandezas):
+            fasores[i, :len(df), g] = montar_fasores(df, colunas_modulo, colunas_angulo)
+    return fasores, tamanhos
+
+
+def calcular_fator_desequilibrio_lote(dados):
+    """
+    Calcula o fator de desequilíbrio de vários monitores em uma única chamada.
+
+    Parâmetros:
+        dados: dicionário {nome_do_elemento: DataFrame do monitor}
+
+    Retorna:
+        DataFrame "longo" com a coluna 'elemento' e as mesmas colunas de
+        calcular_fator_desequilibrio. Monitores com menos amostras são
+        completados com NaN no bloco (elementos × tempo × fase) e essas
+        posições são descartadas no resultado.
+    """
+    dados = {nome: df for nome, df in dados.items() if df is not None}
+    if not dados:
+        return pd.DataFrame(columns=['elemento'] + COLUNAS_RESULTADO)
+
+    nomes = list(dados)
+    fasores, tamanhos = _bloco_fasores(dados, [(COLUNAS_MODULO_TENSAO, COLUNAS_ANGULO_TENSAO)])
+
+    sequencias = np.abs(transformar_fortescue(fasores[:, :, 0]))
+    validos = np.arange(fasores.shape[1]) < tamanhos[:, None]
+
+    V_zero = sequencias[..., 0][validos]
+    V_pos = sequencias[..., 1][validos]
+    V_neg = sequencias[..., 2][validos]
+
+    return pd.DataFrame({
+        'elemento': np.repeat(nomes, tamanhos),
+        'hora': np.concatenate([_eixo_hora(df) for df in dados.values()]),
+        'V_positiva': V_pos,
+        'V_negativa': V_neg,
+        'V_zero': V_zero,
+        'FD (%)': _fator_desequilibrio(V_pos, V_neg),
+        'FD_limite': LIMITE_FD_PRODIST
+    })
+
+
+def calcular_desequilibrio_topologia(topologia, carregar):
+    """
+    Fator de desequilíbrio de todos os elementos da topologia.
+
+    Parâmetros:
+        topologia: lista de elementos no formato de TOPOLOGIA_SISTEMA
+        carregar: função que recebe o caminho do monitor e devolve o DataFrame
+                  (ex.: carregar_dados do dashboard)
+    """
+    return calcular_fator_desequilibrio_lote(
+        {item["nome"]: carregar(item["arquivo_vi"]) for item in topologia}
+    )
+
+
+def calcular_sequencias_lote(dados):
+    """
+    Sequências de tensão e corrente e os fatores de desequilíbrio de vários
+    monitores em uma única transformação sobre o bloco
+    (elementos × tempo × grandeza × fase).
+
+    Parâmetros:
+        dados: dicionário {nome_do_elemento: DataFrame do monitor}
+
+    Retorna:
+        DataFrame "longo" com as colunas COLUNAS_SEQUENCIAS, uma linha por
+        elemento e instante. FD_I (%) é o desequilíbrio de corrente
+        (I_negativa / I_positiva × 100); monitores sem as colunas I1... ficam
+        com NaN nas colunas de corrente.
+    """
+    dados = {nome: df for nome, df in dados.items() if df is not None}
+    if not dados:
+        return pd.DataFrame(columns=COLUNAS_SEQUENCIAS)
+
+    nomes = list(dados)
+    fasores, tamanhos = _bloco_fasores(dados, [
+        (COLUNAS_MODULO_TENSAO, COLUNAS_ANGULO_TENSAO),
+        (COLUNAS_MODULO_CORRENTE, COLUNAS_ANGULO_CORRENTE),
+    ])
+    sem_corrente = np.array([not _tem_coluna(df, COLUNAS_MODULO_CORRENTE[0]) for df in dados.values()])
+    fasores[sem_corrente, :, 1] = np.nan
+
+    # Eixo -1 passa a ser (zero, positiva, negativa)
+    sequencias = np.abs(transformar_fortescue(fasores))
+    validos = np.arange(fasores.shape[1]) < tamanhos[:, None]
+    tensao, corrente = sequencias[:, :, 0][validos], sequencias[:, :, 1][validos]
+
+    fd_corrente = _fator_desequilibrio(corrente[:, 1], corrente[:, 2])
+    fd_corrente[np.isnan(corrente[:, 1])] = np.nan
+
+    return pd.DataFrame({
+        'elemento': np.repeat(nomes, tamanhos),
+        'hora': np.concatenate([_eixo_hora(df) for df in dados.values()]),
+        'V_positiva': tensao[:, 1],
+        'V_negativa': tensao[:, 2],
+        'V_zero': tensao[:, 0],
+        'FD (%)': _fator_desequilibrio(tensao[:, 1], tensao[:, 2]),
+        'I_positiva': corrente[:, 1],
+        'I_negativa': corrente[:, 2],
+        'I_zero': corrente[:, 0],
+        'FD_I (%)': fd_corrente,
+    }, columns=COLUNAS_SEQUENCIAS)
+
+
+def calcular_sequencias_topologia(topologia, carregar):
+    """Sequências de tensão e corrente de todos os elementos da topologia (ver calcular_sequencias_lote)."""
+    return calcular_sequencias_lote(
+        {item["nome"]: carregar(item["arquivo_vi"]) for item in topologia}
+    )
+
+
+def resumir_sequencias(tabela):
+    """
+    Uma linha por elemento: máximo e p95 dos fatores de desequilíbrio de
+    tensão e corrente, % do tempo acima do limite do PRODIST (tensão) e a
+    maior sequência zero de corrente (indicador de corrente de neutro).
+    """
+    grupos = tabela.groupby('elemento', sort=False)
+    resumo = pd.DataFrame({
+        'amostras': grupos.size(),
+        'FD_max (%)': grupos['FD (%)'].max(),
+        'FD_p95 (%)': grupos['FD (%)'].quantile(0.95),
+        'FD_acima_limite (%)': (tabela['FD (%)'] > LIMITE_FD_PRODIST).groupby(tabela['elemento'], sort=False).mean() * 100,
+        'FD_I_max (%)': grupos['FD_I (%)'].max(),
+        'FD_I_p95 (%)': grupos['FD_I (%)'].quantile(0.95),
+        'I_zero_max': grupos['I_zero'].max(),
+    })
+    return resumo.reset_index()
@@ -0,0 +1,301 @@
+# ============================================================================
+# LOG DE COMUNICAÇÃO DO OMNeT++ (FORMATO LONGO -> COLUNAR) E ENLACES
+# ============================================================================
+# O log da co-simulação vem no formato longo, uma linha por evento:
+#     Tempo | Origem | Atributo | Valor   (+ Destino, opcional)
+# e chega a dezenas de milhões de linhas. Em vez de converter textos e
+# montar um pivot_table denso (tempo × variável, quase todo NaN):
+#   - Origem, Atributo, Destino e Valor são lidos já codificados por
+#     dicionário (category); o Valor é convertido para número uma vez por
+#     texto distinto, não uma vez por linha;
+#   - o "pivot" é colunar: as amostras de cada variável (Origem | Atributo)
+#     ficam contíguas, ordenadas pelo tempo, e cada variável é uma fatia;
+#   - as estatísticas por enlace (taxa, intervalo entre eventos, latência e
+#     perda) saem de contagens e reduções sobre os códigos inteiros.
+# Usado pela página "Comunicação" do layout_2.py.
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from fonte_resultados import ler_cabecalho_csv
+
+COLUNAS_LOG = ["Tempo", "Origem", "Atributo", "Valor"]
+COLUNA_DESTINO = "Destino"
+
+# Linhas do log lidas por vez
+TAMANHO_BLOCO_LOG = 1_000_000
+
+# Classificação dos atributos pelo nome (sem diferenciar maiúsculas)
+PADRAO_LATENCIA = r"delay|lat[eê]ncia|latency|atraso|rtt"
+PADRAO_PERDA = r"drop|loss|lost|perd|descart"
+PADRAO_RECEPCAO = r"rcvd|receiv|receb|rx"
+PADRAO_ENVIO = r"sent|envi|tx"
+
+OUTRO, ENVIO, RECEPCAO, PERDA, LATENCIA = 0, 1, 2, 3, 4
+
+PERCENTIL_LATENCIA = 95
+
+
+# =======================================================
+# LEITURA (CODIFICADA POR DICIONÁRIO)
+# =======================================================
+
+def _valores_numericos(valor):
+    """Valor (category) em float64: cada texto distinto é convertido uma única vez."""
+    numeros = pd.to_numeric(valor.cat.categories.astype(str).str.strip(), errors="coerce")
+    numeros = np.append(np.asarray(numeros, dtype=float), np.nan)  # código -1 (vazio) -> NaN
+    return numeros[valor.cat.codes.to_numpy()]
+
+
+def ler_log_comunicacao(arquivo, tamanho_bloco=TAMANHO_BLOCO_LOG, ao_progredir=None):
+    """
+    Lê o log em blocos, já com Origem/Atributo/Destino como category.
+
+    Parâmetros:
+        arquivo: caminho ou arquivo binário aberto (ex.: upload do Streamlit)
+        ao_progredir: função opcional (fração_lida, linhas_lidas) chamada a cada bloco
+
+    Retorna:
+        DataFrame com Tempo e Valor em float64 (Valor NaN quando não é
+        número) e as colunas de texto em category; linhas sem tempo são
+        descartadas. Levanta ValueError se faltar alguma coluna.
+    """
+    abrir = isinstance(arquivo, (str, os.PathLike))
+    handle = open(arquivo, "rb") if abrir else arquivo
+    try:
+        total_bytes = max(handle.seek(0, io.SEEK_END), 1)
+        handle.seek(0)
+        colunas = ler_cabecalho_csv(handle)
+        faltando = [c for c in COLUNAS_LOG if c not in colunas]
+        if faltando:
+            raise ValueError(f"colunas ausentes no log: {faltando} (encontradas: {colunas})")
+
+        textos = ["Origem", "Atributo"] + ([COLUNA_DESTINO] if COLUNA_DESTINO in colunas else [])
+        desejadas = set(COLUNAS_LOG) | set(textos)
+        partes = {c: [] for c in ["Tempo", "Valor"] + textos}
+        linhas = 0
+        for bloco in pd.read_csv(handle, usecols=lambda c: c.strip() in desejadas,
+                                 dtype={c: "category" for c in textos + ["Valor"]}, chunksize=tamanho_bloco):
+            bloco.columns = bloco.columns.str.strip()
+            tempo = pd.to_numeric(bloco["Tempo"], errors="coerce").to_numpy(dtype=float)
+            validas = ~np.isnan(tempo)
+            partes["Tempo"].append(tempo[validas])
+            partes["Valor"].append(_valores_numericos(bloco["Valor"])[validas])
+            for c in textos:
+                partes[c].append(bloco[c][validas])
+            linhas += len(bloco)
+            if ao_progredir is not None:
+                ao_progredir(min(handle.tell() / total_bytes, 1.0), linhas)
+    finally:
+        if abrir:
+            handle.close()
+
+    dados = {}
+    for c, pedacos in partes.items():
+        if c in textos:
+            # Junta os dicionários dos blocos e recodifica (sem voltar a texto)
+            dados[c] = union_categoricals(pedacos) if pedacos else pd.Categorical([])
+        else:
+            dados[c] = np.concatenate(pedacos) if pedacos else np.empty(0)
+    return pd.DataFrame(dados, columns=["Tempo", "Origem", "Atributo", "Valor"] + textos[2:])
+
+
+# =======================================================
+# PIVOT COLUNAR (UMA FATIA POR VARIÁVEL)
+# =======================================================
+
+def pivotar_colunar(log):
+    """
+    Amostras de cada variável (Origem | Atributo) contíguas e ordenadas pelo tempo.
+
+    Eventos repetidos no mesmo instante viram a média (como o pivot_table).
+
+    Retorna dict com:
+        variaveis: nomes "Origem | Atributo" (só as que têm valores numéricos)
+        inicio: posições de início de cada variável (len = variáveis + 1)
+        tempo, valor: amostras de todas as variáveis, em sequência
+    """
+    validas = ~np.isnan(log["Valor"].to_numpy())
+    origem = log["Origem"].cat.codes.to_numpy()[validas].astype(np.int64)
+    atributo = log["Atributo"].cat.codes.to_numpy()[validas].astype(np.int64)
+    tempo = log["Tempo"].to_numpy()[validas]
+    valor = log["Valor"].to_numpy()[validas]
+
+    n_atributos = len(log["Atributo"].cat.categories) + 1  # +1: código -1 (vazio)
+    codigos, variavel = np.unique((origem + 1) * n_atributos + (atributo + 1), return_inverse=True)
+
+    ordem = np.lexsort((tempo, variavel))
+    variavel, tempo, valor = variavel[ordem], tempo[ordem], valor[ordem]
+
+    # Um grupo por (variável, instante)
+    novo = np.ones(len(tempo), dtype=bool)
+    novo[1:] = (variavel[1:] != variavel[:-1]) | (tempo[1:] != tempo[:-1])
+    inicios = np.flatnonzero(novo)
+    if len(inicios):
+        valor = np.add.reduceat(valor, inicios) / np.diff(np.append(inicios, len(novo)))
+    else:
+        valor = valor[:0]
+    tempo, variavel = tempo[inicios], variavel[inicios]
+
+    origens = np.append(log["Origem"].cat.categories.astype(str), "")
+    atributos = np.append(log["Atributo"].cat.categories.astype(str), "")
+    nomes = [f"{origens[c // n_atributos - 1]} | {atributos[c % n_atributos - 1]}" for c in codigos]
+    return {
+        "variaveis": nomes,
+        "inicio": np.searchsorted(variavel, np.arange(len(codigos) + 1)),
+        "tempo": tempo,
+        "valor": valor,
+    }
+
+
+def serie_variavel(pivot, i):
+    """(tempo, valor) da i-ésima variável do pivot colunar (visões, sem cópia)."""
+    inicio, fim = pivot["inicio"][i], pivot["inicio"][i + 1]
+    return pivot["tempo"][inicio:fim], pivot["valor"][inicio:fim]
+
+
+# =======================================================
+# ESTATÍSTICAS POR ENLACE
+# =======================================================
+
+def classificar_atributos(atributos):
+    """Classe (ENVIO, RECEPCAO, PERDA, LATENCIA ou OUTRO) de cada nome de atributo."""
+    nomes = pd.Series(atributos, dtype=str)
+    classes = np.full(len(nomes), OUTRO, dtype=np.int8)
+    # Da menos para a mais específica: a última regra que casa prevalece
+    for classe, padrao in ((ENVIO, PADRAO_ENVIO), (RECEPCAO, PADRAO_RECEPCAO),
+                           (PERDA, PADRAO_PERDA), (LATENCIA, PADRAO_LATENCIA)):
+        classes[nomes.str.contains(padrao, case=False, regex=True).to_numpy()] = classe
+    return classes
+
+
+def _codigos_enlace(log):
+    """Código inteiro de cada linha e nome de cada enlace (Origem ou Origem → Destino)."""
+    origem = log["Origem"].cat.codes.to_numpy().astype(np.int64)
+    if COLUNA_DESTINO not in log.columns:
+        codigos, enlace = np.unique(origem, return_inverse=True)
+        origens = np.append(log["Origem"].cat.categories.astype(str), "")
+        return enlace, [origens[c] for c in codigos]
+
+    destino = log[COLUNA_DESTINO].cat.codes.to_numpy().astype(np.int64)
+    n_destinos = len(log[COLUNA_DESTINO].cat.categories) + 1
+    codigos, enlace = np.unique((origem + 1) * n_destinos + (destino + 1), return_inverse=True)
+    origens = np.append(log["Origem"].cat.categories.astype(str), "")
+    destinos = np.append(log[COLUNA_DESTINO].cat.categories.astype(str), "")
+    return enlace, [f"{origens[c // n_destinos - 1]} → {destinos[c % n_destinos - 1]}" for c in codigos]
+
+
+def _percentil_por_grupo(grupo, valores, n_grupos, percentil):
+    """Percentil (interpolação linear, como np.percentile) de cada grupo; NaN se vazio."""
+    ordem = np.lexsort((valores, grupo))
+    grupo, valores = grupo[ordem], valores[ordem]
+    contagem = np.bincount(grupo, minlength=n_grupos)
+    inicio = np.concatenate([[0], np.cumsum(contagem)[:-1]])
+
+    posicao = (contagem - 1) * percentil / 100
+    baixo = np.floor(posicao).astype(np.int64)
+    alto = np.ceil(posicao).astype(np.int64)
+    saida = np.full(n_grupos, np.nan)
+    tem = contagem > 0
+    if tem.any():
+        v_baixo = valores[inicio[tem] + baixo[tem]]
+        v_alto = valores[inicio[tem] + alto[tem]]
+        saida[tem] = v_baixo + (v_alto - v_baixo) * (posicao[tem] - baixo[tem])
+    return saida
+
+
+def _perda_percentual(enviadas, recebidas, pareadas):
+    """1 - recebidas / enviadas em %, em [0, 100]; NaN sem envios ou sem Destino para parear."""
+    if not pareadas:
+        return np.full(len(enviadas), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        perda = np.clip((1 - recebidas / enviadas) * 100, 0, 100)
+    return np.where(enviadas > 0, perda, np.nan)
+
+
+def estatisticas_enlaces(log, percentil=PERCENTIL_LATENCIA):
+    """
+    Tabela com uma linha por enlace (Origem, ou Origem → Destino se houver Destino).
+
+    Colunas: eventos, duração e taxa de eventos, intervalo médio entre
+    eventos e jitter (desvio padrão do intervalo), latência média /
+    percentil / máxima (atributos de atraso), enviadas, recebidas,
+    descartadas e perda (%) = 1 - recebidas / enviadas, limitada a [0, 100].
+
+    A perda só existe com a coluna Destino: sem ela o enlace é só a Origem,
+    que tem apenas envios (remetente) ou apenas recepções (receptor), e a
+    perda fica NaN.
+    """
+    if log.empty:
+        return pd.DataFrame()
+    enlace, nomes = _codigos_enlace(log)
+    n = len(nomes)
+    tempo = log["Tempo"].to_numpy()
+    valor = log["Valor"].to_numpy()
+    classe = np.append(classificar_atributos(log["Atributo"].cat.categories), OUTRO)[log["Atributo"].cat.codes.to_numpy()]
+
+    # Intervalos entre eventos consecutivos do mesmo enlace
+    ordem = np.lexsort((tempo, enlace))
+    enlace_ord, tempo_ord = enlace[ordem], tempo[ordem]
+    mesmo = enlace_ord[1:] == enlace_ord[:-1]
+    intervalo = np.diff(tempo_ord)[mesmo]
+    enlace_intervalo = enlace_ord[1:][mesmo]
+
+    eventos = np.bincount(enlace, minlength=n)
+    n_intervalos = np.bincount(enlace_intervalo, minlength=n)
+    soma_intervalos = np.bincount(enlace_intervalo, weights=intervalo, minlength=n)
+    soma_quadrados = np.bincount(enlace_intervalo, weights=intervalo ** 2, minlength=n)
+    primeiro = np.full(n, np.inf)
+    ultimo = np.full(n, -np.inf)
+    np.minimum.at(primeiro, enlace, tempo)
+    np.maximum.at(ultimo, enlace, tempo)
+
+    latencia = (classe == LATENCIA) & ~np.isnan(valor)
+    n_latencia = np.bincount(enlace[latencia], minlength=n)
+    maxima = np.full(n, -np.inf)
+    np.maximum.at(maxima, enlace[latencia], valor[latencia])
+
+    enviadas = np.bincount(enlace[classe == ENVIO], minlength=n)
+    recebidas = np.bincount(enlace[classe == RECEPCAO], minlength=n)
+    descartadas = np.bincount(enlace[classe == PERDA], minlength=n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        duracao = ultimo - primeiro
+        intervalo_medio = soma_intervalos / n_intervalos
+        jitter = np.sqrt(np.maximum(soma_quadrados / n_intervalos - intervalo_medio ** 2, 0))
+        tabela = pd.DataFrame({
+            "enlace": nomes,
+            "eventos": eventos,
+            "duração (s)": duracao,
+            "taxa (eventos/s)": np.where(duracao > 0, eventos / duracao, np.nan),
+            "intervalo médio (s)": intervalo_medio,
+            "jitter (s)": jitter,
+            "latência média": np.bincount(enlace[latencia], weights=valor[latencia], minlength=n) / n_latencia,
+            f"latência p{percentil:g}": _percentil_por_grupo(enlace[latencia], valor[latencia], n, percentil),
+            "latência máx.": np.where(n_latencia > 0, maxima, np.nan),
+            "enviadas": enviadas,
+            "recebidas": recebidas,
+            "descartadas": descartadas,
+            "perda (%)": _perda_percentual(enviadas, recebidas, COLUNA_DESTINO in log.columns),
+        })
+    return tabela.sort_values("eventos", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def processar_log_comunicacao(arquivo, ao_progredir=None):
+    """Leitura, pivot colunar e tabela de enlaces; retorna dict com estatísticas de tempo/memória."""
+    inicio = time.perf_counter()
+    log = ler_log_comunicacao(arquivo, ao_progredir=ao_progredir)
+    pivot = pivotar_colunar(log)
+    enlaces = estatisticas_enlaces(log)
+    return {
+        "log": log,
+        "pivot": pivot,
+        "enlaces": enlaces,
+        "linhas": len(log),
+        "bytes_memoria": int(log.memory_usage(index=False, deep=False).sum()),
+        "segundos": time.perf_counter() - inicio,
+    }
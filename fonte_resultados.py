@@ -0,0 +1,268 @@
+# ============================================================================
+# FONTES DE RESULTADOS DA CO-SIMULAÇÃO (layout_2)
+# ============================================================================
+# Leitura direta de resultados em HDF5 (pandas HDFStore, formato "table" do
+# mosaik) sem exportar para CSV. Só as colunas escolhidas são lidas e a
+# janela de tempo é aplicada no próprio arquivo (where / start-stop), então
+# uma visualização com zoom nunca carrega a tabela inteira.
+#
+# Para CSVs muito grandes há também a leitura em blocos: o cabeçalho é lido
+# primeiro, o mapeamento decide as colunas necessárias e só elas são lidas,
+# bloco a bloco, para um armazenamento compacto em float32.
+#
+# O pico de memória da leitura só é medido quando pedido (CLI ou opção na
+# lateral do layout_2): o tracemalloc deixa a leitura ~1,7x mais lenta e é do
+# processo inteiro. Fora disso o pico aparece no painel de instrumentação
+# (instrumentacao.etapa).
+import io
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+COL_TEMPO = "Tempo_EixoX"
+
+# Linhas lidas por vez quando é preciso varrer uma coluna inteira
+TAMANHO_BLOCO_HDF = 500_000
+TAMANHO_BLOCO_CSV = 200_000
+
+
+def _para_datetime(serie):
+    return pd.to_datetime(serie.astype(str).str.strip(), format='mixed', errors='coerce')
+
+
+def converter_tempo(serie):
+    """Converte a coluna de tempo para datetime; se falhar tudo, usa o passo numérico."""
+    tempo = _para_datetime(serie)
+    if tempo.isna().all():
+        return pd.Series(np.arange(len(serie)), index=serie.index)
+    return tempo
+
+
+# =======================================================
+# CSV EM BLOCOS
+# =======================================================
+
+@contextmanager
+def medir_pico_memoria(ligado):
+    """
+    Pico de memória do bloco (tracemalloc) em medicao["pico_bytes"].
+
+    Só mede se ligado e se ninguém mais estiver usando o tracemalloc (o painel
+    de instrumentação): ele nunca é ligado ou desligado por cima de outro
+    usuário. Sem medição, pico_bytes fica None.
+    """
+    medicao = {"pico_bytes": None}
+    if not ligado or tracemalloc.is_tracing():
+        yield medicao
+        return
+    tracemalloc.start()
+    try:
+        yield medicao
+    finally:
+        medicao["pico_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def ler_cabecalho_csv(arquivo):
+    """Nomes das colunas (sem espaços nas bordas) lendo só a primeira linha."""
+    colunas = pd.read_csv(arquivo, nrows=0).columns.str.strip().tolist()
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+    return colunas
+
+
+def _tamanho_arquivo(handle):
+    posicao = handle.tell()
+    total = handle.seek(0, io.SEEK_END)
+    handle.seek(posicao)
+    return max(total, 1)
+
+
+def ler_csv_em_blocos(arquivo, colunas, tamanho_bloco=TAMANHO_BLOCO_CSV, ao_progredir=None, medir_pico=False):
+    """
+    Lê apenas a coluna de tempo (primeira coluna) e as colunas pedidas, em blocos.
+
+    Parâmetros:
+        arquivo: caminho ou arquivo binário aberto (ex.: upload do Streamlit)
+        colunas: colunas de dados já resolvidas pelo mapeamento
+        tamanho_bloco: linhas por bloco
+        ao_progredir: função opcional (fração_lida, linhas_lidas) chamada a cada bloco
+        medir_pico: mede o pico de memória (mais lento; ver medir_pico_memoria)
+
+    Retorna:
+        (DataFrame com Tempo_EixoX + colunas em float32, dicionário de estatísticas;
+         pico_bytes é None sem medir_pico)
+    """
+    colunas = list(dict.fromkeys(colunas))
+    inicio = time.perf_counter()
+
+    abrir = isinstance(arquivo, (str, os.PathLike))
+    handle = open(arquivo, "rb") if abrir else arquivo
+    with medir_pico_memoria(medir_pico) as medicao:
+        df, linhas, total_bytes = _ler_blocos(handle, colunas, tamanho_bloco, ao_progredir, abrir)
+
+    estatisticas = {
+        "linhas": linhas,
+        "colunas": len(colunas),
+        "bytes_arquivo": total_bytes,
+        "bytes_memoria": int(df.memory_usage(index=False).sum()),
+        "pico_bytes": medicao["pico_bytes"],
+        "segundos": time.perf_counter() - inicio,
+    }
+    return df, estatisticas
+
+
+def _ler_blocos(handle, colunas, tamanho_bloco, ao_progredir, fechar):
+    try:
+        total_bytes = _tamanho_arquivo(handle)
+        primeira_coluna = ler_cabecalho_csv(handle)[0]
+        desejadas = set(colunas) | {primeira_coluna}
+
+        tempos = []
+        valores = {col: [] for col in colunas}
+        linhas = 0
+        for bloco in pd.read_csv(handle, usecols=lambda c: c.strip() in desejadas, chunksize=tamanho_bloco):
+            bloco.columns = bloco.columns.str.strip()
+            tempos.append(_para_datetime(bloco[primeira_coluna]).to_numpy())
+            for col in colunas:
+                valores[col].append(pd.to_numeric(bloco[col], errors="coerce").to_numpy(dtype=np.float32))
+            linhas += len(bloco)
+            if ao_progredir is not None:
+                ao_progredir(min(handle.tell() / total_bytes, 1.0), linhas)
+    finally:
+        if fechar:
+            handle.close()
+
+    df = pd.DataFrame(
+        {col: np.concatenate(partes) if partes else np.empty(0, dtype=np.float32)
+         for col, partes in valores.items()},
+        columns=colunas
+    )
+    tempo = pd.Series(np.concatenate(tempos) if tempos else np.empty(0, dtype="datetime64[ns]"))
+    if tempo.isna().all():
+        tempo = pd.Series(np.arange(len(df)))
+    df.insert(0, COL_TEMPO, tempo.to_numpy())
+    return df, linhas, total_bytes
+
+
+# =======================================================
+# HDF5
+# =======================================================
+
+
+def listar_tabelas_hdf(caminho):
+    """Lista as chaves (tabelas) do HDFStore."""
+    with pd.HDFStore(caminho, mode="r") as store:
+        return store.keys()
+
+
+def _indice_e_tempo(storer):
+    """True quando o índice da tabela já é o eixo de tempo (datetime)."""
+    return storer.is_table and storer.index_axes[0].kind.startswith("datetime")
+
+
+def ler_cabecalho_hdf(caminho, chave):
+    """Nomes das colunas da tabela, sem ler os dados."""
+    with pd.HDFStore(caminho, mode="r") as store:
+        return store.select(chave, start=0, stop=0).columns.tolist()
+
+
+def ler_eixo_tempo_hdf(caminho, chave):
+    """
+    Lê apenas o eixo de tempo da tabela.
+
+    Usa o índice quando ele é datetime; senão, a primeira coluna (mesma
+    convenção do upload de CSV), lida em blocos para não carregar as demais.
+    """
+    with pd.HDFStore(caminho, mode="r") as store:
+        storer = store.get_storer(chave)
+        if _indice_e_tempo(storer):
+            return store.select_column(chave, "index").reset_index(drop=True)
+
+        primeira_coluna = store.select(chave, start=0, stop=0).columns[0]
+        if not storer.is_table:
+            # Formato "fixed" não permite leitura parcial
+            serie = store.select(chave)[primeira_coluna]
+        elif primeira_coluna in (storer.data_columns or []):
+            serie = store.select_column(chave, primeira_coluna)
+        else:
+            serie = pd.concat(
+                bloco[primeira_coluna]
+                for bloco in store.select(chave, columns=[primeira_coluna], chunksize=TAMANHO_BLOCO_HDF)
+            )
+    return converter_tempo(serie.reset_index(drop=True))
+
+
+def _mascara_janela(eixo_tempo, inicio, fim):
+    mascara = np.ones(len(eixo_tempo), dtype=bool)
+    if inicio is not None:
+        mascara &= (eixo_tempo >= inicio).to_numpy()
+    if fim is not None:
+        mascara &= (eixo_tempo <= fim).to_numpy()
+    return mascara
+
+
+def _janela_posicional(eixo_tempo, inicio, fim):
+    """Converte a janela de tempo em (start, stop) ou coordenadas de linha."""
+    if inicio is None and fim is None:
+        return 0, len(eixo_tempo), None
+
+    mascara = _mascara_janela(eixo_tempo, inicio, fim)
+
+    posicoes = np.flatnonzero(mascara)
+    if len(posicoes) == 0:
+        return 0, 0, None
+    if eixo_tempo.is_monotonic_increasing:
+        return int(posicoes[0]), int(posicoes[-1]) + 1, None
+    return None, None, posicoes
+
+
+def ler_janela_hdf(caminho, chave, colunas, eixo_tempo, inicio=None, fim=None):
+    """
+    Lê somente as colunas pedidas dentro da janela [inicio, fim].
+
+    Parâmetros:
+        caminho, chave: arquivo e tabela do HDFStore
+        colunas: colunas de dados (resultado do mapeamento dinâmico)
+        eixo_tempo: saída de ler_eixo_tempo_hdf (usada para localizar a janela)
+        inicio, fim: limites da janela (None = sem limite)
+
+    Retorna:
+        DataFrame com a coluna Tempo_EixoX seguida das colunas pedidas.
+    """
+    colunas = list(dict.fromkeys(colunas))
+    with pd.HDFStore(caminho, mode="r") as store:
+        storer = store.get_storer(chave)
+
+        if not storer.is_table:
+            df = store.select(chave)[colunas]
+            df = df.reset_index(drop=True)
+            df.insert(0, COL_TEMPO, eixo_tempo.to_numpy())
+            if inicio is not None or fim is not None:
+                df = df[_mascara_janela(df[COL_TEMPO], inicio, fim)].reset_index(drop=True)
+            return df
+
+        if _indice_e_tempo(storer):
+            condicoes = []
+            if inicio is not None:
+                condicoes.append(f"index >= Timestamp('{pd.Timestamp(inicio)}')")
+            if fim is not None:
+                condicoes.append(f"index <= Timestamp('{pd.Timestamp(fim)}')")
+            df = store.select(chave, where=" & ".join(condicoes) or None, columns=colunas)
+            tempo = df.index.to_numpy()
+        else:
+            start, stop, coordenadas = _janela_posicional(eixo_tempo, inicio, fim)
+            if coordenadas is not None:
+                df = store.select(chave, where=coordenadas, columns=colunas)
+                tempo = eixo_tempo.to_numpy()[coordenadas]
+            else:
+                df = store.select(chave, start=start, stop=stop, columns=colunas)
+                tempo = eixo_tempo.to_numpy()[start:stop]
+
+    df = df.reset_index(drop=True)
+    df.insert(0, COL_TEMPO, tempo)
+    return df
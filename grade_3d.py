@@ -0,0 +1,151 @@
+# ============================================================================
+# REAMOSTRAGEM DE GRADES PARA AS SUPERFÍCIES 3D
+# ============================================================================
+# Um go.Surface com todas as amostras de tempo × todas as barras manda
+# milhões de células para o navegador, e uma linha Scatter3d por barra
+# multiplica o número de traços. Aqui a grade (linhas × tempo) é reduzida no
+# servidor até caber em um orçamento de células:
+#   - no tempo, cada intervalo vira duas colunas com o mínimo e o máximo de
+#     cada linha (na ordem em que ocorreram), como o Mín/Máx dos gráficos 2D;
+#   - com milhares de linhas (barras), grupos de linhas vizinhas viram duas
+#     linhas, a envoltória mínima e a máxima do grupo.
+# Nenhum pico ou afundamento some da superfície, só a resolução muda.
+# As linhas de borda (efeito waterfall) viram um único traço separado por NaN.
+import numpy as np
+import plotly.graph_objects as go
+
+# Orçamento padrão de células da superfície (linhas × colunas)
+MAX_CELULAS_PADRAO = 60_000
+
+# Colunas de tempo mínimas antes de começar a agrupar linhas
+MIN_COLUNAS_TEMPO = 200
+
+
+def _intervalos(n, n_saida):
+    """Tamanho do intervalo para que n amostras virem no máximo n_saida (2 por intervalo)."""
+    n_intervalos = max(n_saida // 2, 1)
+    return int(np.ceil(n / n_intervalos))
+
+
+def _min_max_tempo(Z, eixo_tempo, tamanho):
+    """Duas colunas (mín/máx na ordem de ocorrência) por intervalo de tempo."""
+    linhas, n = Z.shape
+    n_intervalos = int(np.ceil(n / tamanho))
+
+    blocos = np.full((linhas, n_intervalos * tamanho), np.nan)
+    blocos[:, :n] = Z
+    blocos = blocos.reshape(linhas, n_intervalos, tamanho)
+
+    vazio = np.isnan(blocos)
+    i_min = np.where(vazio, np.inf, blocos).argmin(axis=2)
+    i_max = np.where(vazio, -np.inf, blocos).argmax(axis=2)
+    v_min = np.take_along_axis(blocos, i_min[..., None], axis=2)[..., 0]
+    v_max = np.take_along_axis(blocos, i_max[..., None], axis=2)[..., 0]
+
+    min_primeiro = i_min <= i_max
+    saida = np.empty((linhas, 2 * n_intervalos))
+    saida[:, 0::2] = np.where(min_primeiro, v_min, v_max)
+    saida[:, 1::2] = np.where(min_primeiro, v_max, v_min)
+
+    # Cada par de colunas fica no início e no fim do seu intervalo
+    inicio = np.arange(n_intervalos) * tamanho
+    fim = np.minimum(inicio + tamanho - 1, n - 1)
+    indices = np.empty(2 * n_intervalos, dtype=np.int64)
+    indices[0::2], indices[1::2] = inicio, fim
+    return saida, np.asarray(eixo_tempo)[indices]
+
+
+def _envoltoria_linhas(Z, nomes, tamanho):
+    """Duas linhas (envoltória mín/máx) por grupo de linhas vizinhas."""
+    linhas, n = Z.shape
+    n_grupos = int(np.ceil(linhas / tamanho))
+
+    blocos = np.full((n_grupos * tamanho, n), np.nan)
+    blocos[:linhas] = Z
+    blocos = blocos.reshape(n_grupos, tamanho, n)
+
+    # fmin/fmax ignoram NaN (grupos sem dados continuam NaN)
+    saida = np.empty((2 * n_grupos, n))
+    saida[0::2] = np.fmin.reduce(blocos, axis=1)
+    saida[1::2] = np.fmax.reduce(blocos, axis=1)
+
+    rotulos = []
+    for g in range(n_grupos):
+        primeiro, ultimo = nomes[g * tamanho], nomes[min((g + 1) * tamanho, linhas) - 1]
+        grupo = primeiro if primeiro == ultimo else f"{primeiro} … {ultimo}"
+        rotulos += [f"{grupo} (mín)", f"{grupo} (máx)"]
+    return saida, rotulos
+
+
+def reduzir_grade(Z, eixo_tempo, nomes, max_celulas=MAX_CELULAS_PADRAO):
+    """
+    Reduz a grade Z (linhas × tempo) para no máximo max_celulas células.
+
+    O tempo é reduzido primeiro; as linhas só são agrupadas quando nem
+    MIN_COLUNAS_TEMPO colunas caberiam no orçamento.
+
+    Retorna:
+        (Z reduzida, eixo_tempo reduzido, nomes das linhas, resumo) onde
+        resumo = {"celulas_antes", "celulas_depois", "amostras_por_intervalo",
+                  "linhas_por_grupo"} (1 = sem redução naquele eixo)
+    """
+    Z = np.asarray(Z, dtype=float)
+    nomes = list(nomes)
+    linhas, n = Z.shape
+    resumo = {"celulas_antes": Z.size, "amostras_por_intervalo": 1, "linhas_por_grupo": 1}
+
+    if Z.size > max_celulas:
+        colunas_possiveis = max_celulas // linhas
+        if colunas_possiveis < min(MIN_COLUNAS_TEMPO, n):
+            # Milhares de linhas: agrupa até caberem MIN_COLUNAS_TEMPO colunas
+            colunas_alvo = min(MIN_COLUNAS_TEMPO, n)
+            tamanho = _intervalos(linhas, max(max_celulas // colunas_alvo, 2))
+            if tamanho > 1:
+                Z, nomes = _envoltoria_linhas(Z, nomes, tamanho)
+                resumo["linhas_por_grupo"] = tamanho
+            colunas_possiveis = max_celulas // len(nomes)
+
+        if Z.shape[1] > colunas_possiveis:
+            tamanho = _intervalos(Z.shape[1], colunas_possiveis)
+            if tamanho > 1:
+                Z, eixo_tempo = _min_max_tempo(Z, eixo_tempo, tamanho)
+                resumo["amostras_por_intervalo"] = tamanho
+
+    resumo["celulas_depois"] = Z.size
+    return Z, np.asarray(eixo_tempo), nomes, resumo
+
+
+def texto_resumo_grade(resumo):
+    """Legenda curta da redução (vazia se a grade coube inteira)."""
+    if resumo["celulas_depois"] >= resumo["celulas_antes"]:
+        return ""
+    partes = [f"🧊 Superfície com {resumo['celulas_depois']:,} de {resumo['celulas_antes']:,} células"]
+    if resumo["amostras_por_intervalo"] > 1:
+        partes.append(f"mín/máx a cada {resumo['amostras_por_intervalo']:,} amostras")
+    if resumo["linhas_por_grupo"] > 1:
+        partes.append(f"envoltória a cada {resumo['linhas_por_grupo']:,} barras")
+    return " | ".join(partes) + " (picos preservados)."
+
+
+def traco_bordas(Z, eixo_tempo, posicoes, nomes, largura=4, cor="black"):
+    """
+    Linhas de borda de todas as linhas de Z em um único Scatter3d.
+
+    Cada linha termina com um ponto NaN, o que interrompe o desenho entre
+    uma linha e a próxima.
+    """
+    linhas, n = Z.shape
+    eixo_tempo = np.asarray(eixo_tempo)
+    x = np.tile(np.append(eixo_tempo, eixo_tempo[-1:]), linhas)
+    y = np.repeat(np.asarray(posicoes), n + 1)
+    z = np.hstack([Z, np.full((linhas, 1), np.nan)]).ravel()
+    texto = np.repeat(np.asarray(nomes, dtype=object), n + 1)
+    return go.Scatter3d(
+        x=x, y=y, z=z,
+        mode="lines",
+        line=dict(width=largura, color=cor),
+        connectgaps=False,
+        text=texto,
+        hovertemplate="%{text}<br>%{x}<br>%{z}<extra></extra>",
+        showlegend=False
+    )
@@ -0,0 +1,171 @@
+# ============================================================================
+# INDICADORES DE TENSÃO EM REGIME PERMANENTE (PRODIST MÓDULO 8)
+# ============================================================================
+# Faixas adequada / precária / crítica e os indicadores DRP e DRC, usados pelo
+# dashboard de medições (layout_drp_drc.py) e pelo relatório em lote (main.py),
+# para que os dois mostrem exatamente os mesmos números.
+#
+# Para medições de campo, as leituras são antes integradas nas janelas de
+# 10 minutos do PRODIST (valor eficaz da janela) e todas as fases são
+# classificadas de uma vez com np.digitize contra as faixas de
+# calcular_limites.
+import numpy as np
+import pandas as pd
+
+# Limites de referência dos indicadores (%)
+LIMITE_DRP_PRODIST = 3.0
+LIMITE_DRC_PRODIST = 0.5
+
+# Janela de integração das leituras (PRODIST: 10 minutos)
+JANELA_PRODIST_S = 600
+
+# Códigos das faixas (-1 = janela sem leitura válida)
+ADEQUADA, PRECARIA, CRITICA = 0, 1, 2
+
+# Frações de Vn que separam as faixas: precária mín, adequada mín, adequada máx, precária máx
+LIMITES_FAIXAS_PU = (0.87, 0.92, 1.05, 1.06)
+
+
+def calcular_limites(vn):
+    """Calcula limites simplificados de DRP/DRC baseados na Tensão Nominal (Vn)."""
+    # Atenção: Ajuste estas porcentagens (LIMITES_FAIXAS_PU) conforme a norma exata do PRODIST
+    limite_precaria_min, limite_adequada_min, limite_adequada_max, limite_precaria_max = (
+        vn * fracao for fracao in LIMITES_FAIXAS_PU
+    )
+
+    return limite_adequada_min, limite_adequada_max, limite_precaria_min, limite_precaria_max
+
+
+def calcular_drp_drc(tensoes, vn, total_medicoes=None):
+    """
+    Conta as leituras em cada faixa e calcula DRP e DRC (%).
+
+    Parâmetros:
+        tensoes: série/array de tensões na mesma unidade de vn (NaN são ignorados)
+        vn: tensão nominal de referência
+        total_medicoes: denominador dos indicadores (padrão: número de leituras)
+
+    Retorna:
+        dict com adequadas, precarias, criticas, DRP (%) e DRC (%)
+    """
+    tensoes = np.asarray(tensoes, dtype=float)
+    if total_medicoes is None:
+        total_medicoes = len(tensoes)
+    tensoes = tensoes[~np.isnan(tensoes)]
+    l_adq_min, l_adq_max, l_prec_min, l_prec_max = calcular_limites(vn)
+
+    adequadas = int(((tensoes >= l_adq_min) & (tensoes <= l_adq_max)).sum())
+    precarias = int((((tensoes >= l_prec_min) & (tensoes < l_adq_min)) |
+                     ((tensoes > l_adq_max) & (tensoes <= l_prec_max))).sum())
+    criticas = int(((tensoes < l_prec_min) | (tensoes > l_prec_max)).sum())
+
+    return {
+        "adequadas": adequadas,
+        "precarias": precarias,
+        "criticas": criticas,
+        "DRP (%)": precarias / total_medicoes * 100 if total_medicoes else np.nan,
+        "DRC (%)": criticas / total_medicoes * 100 if total_medicoes else np.nan,
+    }
+
+
+def resumir_tensoes(tensoes, percentis=(1, 5, 50, 95, 99)):
+    """Mínimo, máximo e percentis de uma série de tensões (ignorando NaN)."""
+    tensoes = pd.to_numeric(pd.Series(tensoes), errors="coerce").to_numpy(dtype=float)
+    validas = tensoes[~np.isnan(tensoes)]
+    resumo = {"min": np.nan, "max": np.nan}
+    resumo.update({f"p{q:g}": np.nan for q in percentis})
+    if len(validas):
+        resumo["min"], resumo["max"] = validas.min(), validas.max()
+        for q, valor in zip(percentis, np.percentile(validas, percentis)):
+            resumo[f"p{q:g}"] = valor
+    return resumo
+
+
+# =======================================================
+# JANELAS DE 10 MINUTOS E CLASSIFICAÇÃO VETORIZADA
+# =======================================================
+
+def integrar_janelas(tempo_s, tensoes, janela_s=JANELA_PRODIST_S):
+    """
+    Valor eficaz (média quadrática) das leituras em cada janela de tempo.
+
+    Parâmetros:
+        tempo_s: instante de cada leitura em segundos (None: cada leitura já
+                 é uma janela)
+        tensoes: matriz (leituras × fases); NaN são ignorados
+
+    Retorna:
+        (inicio das janelas em segundos, matriz janelas × fases)
+    """
+    tensoes = np.asarray(tensoes, dtype=float)
+    if tensoes.ndim == 1:
+        tensoes = tensoes[:, None]
+    if tempo_s is None:
+        return np.arange(len(tensoes), dtype=float), tensoes
+
+    tempo_s = np.asarray(tempo_s, dtype=float)
+    validas = np.isfinite(tempo_s)
+    tempo_s, tensoes = tempo_s[validas], tensoes[validas]
+    inicios, janela = np.unique(np.floor(tempo_s / janela_s).astype(np.int64), return_inverse=True)
+
+    presentes = ~np.isnan(tensoes)
+    quadrados = np.where(presentes, tensoes, 0.0) ** 2
+    n_janelas = len(inicios)
+    soma = np.column_stack([np.bincount(janela, q, n_janelas) for q in quadrados.T])
+    contagem = np.column_stack([np.bincount(janela, p, n_janelas) for p in presentes.T])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        eficaz = np.sqrt(soma / contagem)
+    return inicios * float(janela_s), eficaz
+
+
+def classificar_faixas(tensoes, vn):
+    """
+    Código da faixa (ADEQUADA, PRECARIA, CRITICA; -1 para NaN) de cada valor.
+
+    Mesma convenção de calcular_drp_drc: os limites da faixa adequada e da
+    precária pertencem à faixa mais favorável.
+    """
+    tensoes = np.asarray(tensoes, dtype=float)
+    l_adq_min, l_adq_max, l_prec_min, l_prec_max = calcular_limites(vn)
+    limites = [l_prec_min, l_adq_min, np.nextafter(l_adq_max, np.inf), np.nextafter(l_prec_max, np.inf)]
+    # Intervalos: < prec_min | prec_min..adq_min | adq_min..adq_max | ..prec_max | > prec_max
+    faixas = np.array([CRITICA, PRECARIA, ADEQUADA, PRECARIA, CRITICA])
+    codigos = faixas[np.digitize(tensoes, limites)]
+    return np.where(np.isnan(tensoes), -1, codigos)
+
+
+def calcular_drp_drc_janelas(tempo_s, tensoes, vn, fases, janela_s=JANELA_PRODIST_S):
+    """
+    DRP/DRC de várias fases em uma passada, sobre as janelas de 10 minutos.
+
+    Parâmetros:
+        tempo_s: instante de cada leitura em segundos (None: sem integração)
+        tensoes: matriz (leituras × fases) na mesma unidade de vn
+        fases: nomes das fases (colunas da matriz)
+
+    Retorna:
+        DataFrame com uma linha por fase: fase, janelas, adequadas, precarias,
+        criticas, DRP (%), DRC (%), V_min e V_max (das janelas)
+    """
+    _, eficaz = integrar_janelas(tempo_s, tensoes, janela_s)
+    codigos = classificar_faixas(eficaz, vn)
+
+    contagens = np.stack([(codigos == c).sum(axis=0) for c in (ADEQUADA, PRECARIA, CRITICA)])
+    janelas = contagens.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drp = np.where(janelas > 0, contagens[PRECARIA] / janelas * 100, np.nan)
+        drc = np.where(janelas > 0, contagens[CRITICA] / janelas * 100, np.nan)
+        v_min = np.where(janelas > 0, np.fmin.reduce(eficaz, axis=0), np.nan)
+        v_max = np.where(janelas > 0, np.fmax.reduce(eficaz, axis=0), np.nan)
+
+    return pd.DataFrame({
+        "fase": list(fases),
+        "janelas": janelas,
+        "adequadas": contagens[ADEQUADA],
+        "precarias": contagens[PRECARIA],
+        "criticas": contagens[CRITICA],
+        "DRP (%)": drp,
+        "DRC (%)": drc,
+        "V_min": v_min,
+        "V_max": v_max,
+    })
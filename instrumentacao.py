@@ -0,0 +1,217 @@
+# ============================================================================
+# INSTRUMENTAÇÃO POR ETAPA (TEMPO E PICO DE MEMÓRIA) DOS DASHBOARDS
+# ============================================================================
+# Cada rerun de uma página pode ser medido etapa por etapa: leitura do
+# arquivo, conversão do tempo, mapeamento de colunas, cálculos (FD, DRP/DRC,
+# pu), montagem das figuras e serialização para o navegador.
+#
+#     with etapa(ETAPA_LEITURA, "results.csv"):
+#         df = pd.read_csv(...)
+#
+# Sem registro ativo (painel desligado, CLI, processos do lote) etapa() não
+# faz nada. Com o painel ligado, o pico de memória vem do tracemalloc, que
+# deixa as alocações mais lentas: por isso ele só roda enquanto algum painel
+# estiver ligado. O tracemalloc é do processo inteiro: com várias sessões
+# medindo ao mesmo tempo, os picos de uma aparecem nas outras.
+#
+# O registro de cada rerun pode ser baixado em JSON pelo painel e, se a
+# variável de ambiente TSDQ_INSTRUMENTACAO apontar para um arquivo, é
+# acrescentado a ele (uma linha JSON por rerun) para comparar versões.
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+ETAPA_LEITURA = "leitura do arquivo"
+ETAPA_TEMPO = "conversão do tempo"
+ETAPA_MAPEAMENTO = "mapeamento de colunas"
+ETAPA_CALCULO = "cálculo"
+ETAPA_FIGURA = "montagem da figura"
+ETAPA_SERIALIZACAO = "serialização"
+
+ARQUIVO_REGISTROS = os.environ.get("TSDQ_INSTRUMENTACAO", "")
+
+_LOCAL = threading.local()  # Cada sessão do Streamlit roda o script na própria thread
+_TRAVA = threading.Lock()
+_USUARIOS_TRACEMALLOC = 0
+_TRACEMALLOC_NOSSO = False
+
+
+# =======================================================
+# REGISTRO DE UM RERUN
+# =======================================================
+
+def _ligar_tracemalloc():
+    global _USUARIOS_TRACEMALLOC, _TRACEMALLOC_NOSSO
+    with _TRAVA:
+        if _USUARIOS_TRACEMALLOC == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _TRACEMALLOC_NOSSO = True
+        _USUARIOS_TRACEMALLOC += 1
+
+
+def _desligar_tracemalloc():
+    global _USUARIOS_TRACEMALLOC, _TRACEMALLOC_NOSSO
+    with _TRAVA:
+        _USUARIOS_TRACEMALLOC -= 1
+        if _USUARIOS_TRACEMALLOC == 0 and _TRACEMALLOC_NOSSO:
+            tracemalloc.stop()
+            _TRACEMALLOC_NOSSO = False
+
+
+def liberar_registro(registro):
+    """Solta o tracemalloc de um registro que não chegou ao fim (ex.: rerun interrompido)."""
+    if registro.pop("_usa_tracemalloc", False):
+        _desligar_tracemalloc()
+
+
+def iniciar_registro(pagina, medir_memoria=True):
+    """Começa a medir o rerun desta thread; um registro anterior não encerrado é descartado."""
+    if getattr(_LOCAL, "registro", None) is not None:
+        encerrar_registro(gravar=False)
+    if medir_memoria:
+        _ligar_tracemalloc()
+    registro = {
+        "pagina": pagina,
+        "inicio": datetime.now().isoformat(timespec="seconds"),
+        "medir_memoria": medir_memoria,
+        "etapas": [],
+        "_usa_tracemalloc": medir_memoria,
+    }
+    _LOCAL.registro = registro
+    _LOCAL.abertas = []
+    _LOCAL.t0 = time.perf_counter()
+    return registro
+
+
+def registro_ativo():
+    return getattr(_LOCAL, "registro", None)
+
+
+def _atualizar_picos(abertas):
+    """Leva o pico desde o último reset para todas as etapas abertas."""
+    pico = tracemalloc.get_traced_memory()[1]
+    for item in abertas:
+        item["pico_bytes"] = max(item["pico_bytes"], pico - item["_base"])
+
+
+@contextmanager
+def etapa(nome, detalhe=""):
+    """
+    Mede o bloco como uma etapa do rerun (tempo e alocação acima do início).
+
+    Etapas podem ser aninhadas; a de fora inclui o tempo e o pico das de dentro.
+    """
+    registro = registro_ativo()
+    if registro is None:
+        yield None
+        return
+
+    abertas = _LOCAL.abertas
+    item = {
+        "etapa": nome,
+        "detalhe": detalhe,
+        "nivel": len(abertas),
+        "inicio_s": round(time.perf_counter() - _LOCAL.t0, 6),
+        "segundos": None,
+        "pico_bytes": 0,
+    }
+    if registro["medir_memoria"]:
+        _atualizar_picos(abertas)
+        tracemalloc.reset_peak()
+        item["_base"] = tracemalloc.get_traced_memory()[0]
+    registro["etapas"].append(item)
+    abertas.append(item)
+    inicio = time.perf_counter()
+    try:
+        yield item
+    finally:
+        item["segundos"] = time.perf_counter() - inicio
+        if registro["medir_memoria"]:
+            _atualizar_picos(abertas)
+            del item["_base"]
+        abertas.remove(item)
+
+
+def encerrar_registro(gravar=True):
+    """Fecha o registro desta thread e o retorna (None se não havia registro)."""
+    registro = registro_ativo()
+    if registro is None:
+        return None
+    _LOCAL.registro = None
+    registro["total_s"] = time.perf_counter() - _LOCAL.t0
+    if registro["medir_memoria"]:
+        registro["memoria_atual_bytes"] = tracemalloc.get_traced_memory()[0]
+    liberar_registro(registro)
+    for item in _LOCAL.abertas:  # Etapas interrompidas (ex.: st.stop)
+        item.pop("_base", None)
+
+    if gravar and ARQUIVO_REGISTROS:
+        with _TRAVA, open(ARQUIVO_REGISTROS, "a", encoding="utf-8") as f:
+            f.write(registro_em_json(registro, indent=None) + "\n")
+    return registro
+
+
+def registro_em_json(registro, indent=2):
+    return json.dumps(registro, ensure_ascii=False, indent=indent, default=str)
+
+
+def tabela_etapas(registro):
+    """Uma linha por etapa, com o nome recuado pelo aninhamento."""
+    tabela = pd.DataFrame(registro["etapas"], columns=["etapa", "detalhe", "nivel", "inicio_s", "segundos", "pico_bytes"])
+    tabela["etapa"] = ["  " * n + e for n, e in zip(tabela["nivel"], tabela["etapa"])]
+    tabela["pico (MB)"] = tabela.pop("pico_bytes") / 1024**2
+    return tabela.drop(columns="nivel")
+
+
+# =======================================================
+# PAINEL NA LATERAL (STREAMLIT)
+# =======================================================
+
+def ativar_painel(pagina):
+    """Interruptor na lateral; ligado, começa a medir este rerun."""
+    import streamlit as st
+
+    # O rerun anterior pode ter parado no meio (st.stop) sem fechar o registro
+    pendente = st.session_state.pop("registro_instrumentacao", None)
+    if pendente is not None:
+        liberar_registro(pendente)
+
+    if st.sidebar.toggle("⏱️ Instrumentação (tempo e memória)", key="instrumentacao_ativa"):
+        st.session_state["registro_instrumentacao"] = iniciar_registro(pagina)
+        return st.session_state["registro_instrumentacao"]
+    return None
+
+
+def mostrar_grafico(fig, **kwargs):
+    """st.plotly_chart medido como etapa de serialização."""
+    import streamlit as st
+
+    with etapa(ETAPA_SERIALIZACAO, fig.layout.title.text or ""):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def render_painel():
+    """Encerra o registro do rerun e mostra as etapas na lateral (com download em JSON)."""
+    import streamlit as st
+
+    registro = encerrar_registro()
+    st.session_state.pop("registro_instrumentacao", None)
+    if registro is None:
+        return
+    with st.sidebar.expander("⏱️ Etapas deste rerun", expanded=True):
+        st.caption(f"{registro['pagina']} | total {registro['total_s']:.2f} s | {len(registro['etapas'])} etapas")
+        st.dataframe(
+            tabela_etapas(registro).style.format({"inicio_s": "{:.3f}", "segundos": "{:.3f}", "pico (MB)": "{:.1f}"}),
+            hide_index=True
+        )
+        st.download_button(
+            "⬇️ Baixar JSON", registro_em_json(registro).encode("utf-8"),
+            file_name=f"instrumentacao_{registro['inicio'].replace(':', '-')}.json",
+            mime="application/json"
+        )
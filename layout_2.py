@@ -5,6 +5,45 @@ import re
 import numpy as np
 import json
 import os 
+
+from armazem_compartilhado import ATRIBUTO_CHAVE, Sessao, liberar, obter_arquivo, obter_envio, resumo_armazem
+from compactacao import compactar_tipos, resumo_compactacao
+from comunicacao import COLUNA_DESTINO, processar_log_comunicacao, serie_variavel
+from fonte_resultados import (
+    ler_cabecalho_csv,
+    ler_cabecalho_hdf,
+    ler_csv_em_blocos,
+    ler_eixo_tempo_hdf,
+    ler_janela_hdf,
+    listar_tabelas_hdf,
+)
+from grade_3d import MAX_CELULAS_PADRAO, reduzir_grade, texto_resumo_grade
+from instrumentacao import (
+    ETAPA_FIGURA, ETAPA_LEITURA, ETAPA_MAPEAMENTO, ETAPA_SERIALIZACAO, ETAPA_TEMPO,
+    ativar_painel, etapa, mostrar_grafico, render_painel
+)
+from mapeamento_colunas import indexar_colunas
+from piramide import (
+    COL_TEMPO_NIVEL,
+    NIVEIS_PIRAMIDE,
+    NIVEL_NATIVO,
+    canais_disponiveis,
+    coluna_estatistica,
+    escolher_nivel,
+    ler_piramide,
+    para_segundos,
+    recortar_nivel,
+    reduzir_nivel,
+    tracos_envelope,
+)
+from reamostragem import (
+    MAX_PONTOS_PADRAO,
+    METODOS_REAMOSTRAGEM,
+    indices_reamostragem,
+    janela_da_selecao,
+    mascara_janela,
+)
+from tabela_paginada import classes_tensao_pu, render_tabela_paginada
 # 1. CONFIGURAÇÃO DA PÁGINA
 st.set_page_config(layout="wide", page_title="Visualizador OpenDSS - Tensão e Corrente")
 
@@ -44,6 +83,12 @@ unit_map = {
 # =======================================================
 
 # 1. Função para ler o arquivo JSON de metadados
+@st.cache_resource(max_entries=4, show_spinner=False)
+def ler_metadados(caminho_completo, mtime_ns):
+    """JSON de metadados, relido só quando o arquivo muda (não altere o dicionário)"""
+    with open(caminho_completo, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def carregar_metadados(nome_arquivo="mapeamento.json"):
     # Descobre a pasta exata onde este arquivo layout_2.py está salvo
     diretorio_atual = os.path.dirname(os.path.abspath(__file__))
@@ -51,8 +96,7 @@ def carregar_metadados(nome_arquivo="mapeamento.json"):
     caminho_completo = os.path.join(diretorio_atual, nome_arquivo)
     
     try:
-        with open(caminho_completo, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return ler_metadados(caminho_completo, os.stat(caminho_completo).st_mtime_ns)
     except FileNotFoundError:
         import streamlit as st
         st.error(f"❌ Arquivo de configuração não encontrado!")
@@ -62,34 +106,111 @@ def carregar_metadados(nome_arquivo="mapeamento.json"):
 
 # 2. Nova função de mapeamento dinâmico
 def realizar_mapeamento_dinamico(df, config):
-    """Varre as colunas e organiza os dados com base no JSON de metadados."""
-    mapas = {grandeza: {} for grandeza in config.keys()}
-    # Compila os padrões regex, IGNORANDO as configurações de sistema que começam com "_"
-    padroes = {
-        grandeza: re.compile(dados["regex"]) 
-        for grandeza, dados in config.items() 
-            if not grandeza.startswith("_")
-    }
+    """
+    Varre as colunas e organiza os dados com base no JSON de metadados.
+
+    Usa o índice compilado (uma única regex combinada), memorizado pelo
+    cabeçalho: os reruns da página não varrem as colunas de novo.
+    """
+    return indexar_colunas(df.columns, config)
+
+# 3. Leitura de resultados em HDF5 (cache invalidado pela data de modificação)
+@st.cache_data
+def carregar_tabelas_hdf(caminho, mtime):
+    return listar_tabelas_hdf(caminho)
+
+@st.cache_data
+def carregar_cabecalho_hdf(caminho, chave, mtime):
+    return ler_cabecalho_hdf(caminho, chave)
+
+@st.cache_data
+def carregar_eixo_tempo_hdf(caminho, chave, mtime):
+    return ler_eixo_tempo_hdf(caminho, chave)
+
+@st.cache_data
+def carregar_janela_hdf(caminho, chave, colunas, inicio, fim, mtime):
+    """Lê do HDF5 apenas as colunas mapeadas, dentro da janela de tempo."""
+    eixo_tempo = carregar_eixo_tempo_hdf(caminho, chave, mtime)
+    return ler_janela_hdf(caminho, chave, list(colunas), eixo_tempo, inicio, fim)
+
+# 4. Leitura de CSVs grandes em blocos (apenas as colunas mapeadas, em float32)
+LIMITE_LEITURA_EM_BLOCOS = 100 * 1024**2  # Acima disso a leitura em blocos já vem marcada
+
+def carregar_csv_em_blocos(arquivo, chave_arquivo, colunas, medir_pico=False):
+    """
+    Lê as colunas em blocos com barra de progresso na lateral.
+
+    O resultado fica guardado na sessão (por arquivo, conjunto de colunas e
+    medição do pico); ao trocar de arquivo as leituras anteriores são descartadas.
+    """
+    leituras = st.session_state.setdefault("leituras_em_blocos", {})
+    for chave in [c for c in leituras if c[0] != chave_arquivo]:
+        del leituras[chave]
+
+    chave = (chave_arquivo, colunas, medir_pico)
+    if chave not in leituras:
+        if hasattr(arquivo, "seek"):
+            arquivo.seek(0)
+        barra = st.sidebar.progress(0.0, text="Lendo CSV em blocos...")
+        leituras[chave] = ler_csv_em_blocos(
+            arquivo, list(colunas),
+            ao_progredir=lambda fracao, linhas: barra.progress(fracao, text=f"Lendo CSV em blocos... {linhas:,} linhas"),
+            medir_pico=medir_pico
+        )
+        barra.empty()
+    return leituras[chave]
 
-    for col in df.columns:
-        for grandeza, dados in config.items():
-            if grandeza.startswith("_"):
-                continue
-            match = padroes[grandeza].search(col)
-            if match:
-                elemento = match.group(1) 
-                if dados["tem_fase"]:
-                    fase_num = match.group(2)
-                    fase = f"{dados['prefixo']}{fase_num}" if fase_num else dados["prefixo"]
-                else:
-                    fase = dados["prefixo"]
-                
-                if elemento not in mapas[grandeza]:
-                    mapas[grandeza][elemento] = {}
-                mapas[grandeza][elemento][fase] = col
-                break 
-                
-    return mapas
+# 5. CSV inteiro (arquivos menores): tempo tratado e tipos compactos
+def ler_csv_resultados(arquivo):
+    # 1. Leitura e Limpeza
+    with etapa(ETAPA_LEITURA, "read_csv"):
+        df = pd.read_csv(arquivo)
+    df.columns = df.columns.str.strip() 
+
+    # =======================================================
+    # 2. TRATAMENTO DE TEMPO (Força Bruta Elegante)
+    # =======================================================
+    # Pega o nome da primeira coluna do CSV (geralmente é a data)
+    primeira_coluna = df.columns[0]
+
+    # Tenta converter forçando a inferência de formato do Pandas
+    with etapa(ETAPA_TEMPO, primeira_coluna):
+        df['Tempo_EixoX'] = pd.to_datetime(df[primeira_coluna].astype(str).str.strip(), format='mixed', errors='coerce')
+
+    # Se falhou tudo (tudo virou NaT), cria um Passo numérico
+    if df['Tempo_EixoX'].isna().all():
+        df['Tempo_EixoX'] = range(len(df))
+
+    # 3. Tipos compactos (float32 / category) para caber mais cenários na memória
+    with etapa(ETAPA_LEITURA, "tipos compactos"):
+        return compactar_tipos(df, colunas_tempo=[primeira_coluna])
+
+# 6. Log de comunicação do OMNeT++ (pivot colunar e enlaces), guardado na sessão
+def carregar_log_comunicacao(arquivo, caminho):
+    """Processa o log uma vez por arquivo; ao trocar de arquivo o anterior é descartado."""
+    chave = (caminho, os.path.getmtime(caminho)) if caminho else arquivo.file_id
+    guardado = st.session_state.get("log_comunicacao")
+    if guardado is None or guardado["chave"] != chave:
+        st.session_state.pop("log_comunicacao", None)
+        if arquivo is not None and not caminho:
+            arquivo.seek(0)
+        barra = st.progress(0.0, text="Lendo log de comunicação...")
+        try:
+            dados = processar_log_comunicacao(
+                caminho or arquivo,
+                ao_progredir=lambda fracao, linhas: barra.progress(fracao, text=f"Lendo log de comunicação... {linhas:,} linhas")
+            )
+        finally:
+            barra.empty()
+        guardado = {"chave": chave, "dados": dados}
+        st.session_state["log_comunicacao"] = guardado
+    return guardado["dados"]
+
+# 7. Pirâmide de agregados (10 min / 1 h / 1 dia) guardada ao lado do arquivo
+@st.cache_data
+def carregar_piramide(caminho, tabela, mtime):
+    """Só lê a pirâmide já construída; a construção é pedida pelo botão na lateral."""
+    return ler_piramide(caminho, tabela, construir=False)
 
 # =======================================================
 # FUNÇÕES VISUAIS
@@ -111,50 +232,121 @@ def render_cabecalho():
     st.markdown("<h1 style='text-align: center;'>OpenTES - TSDQ</h1>", unsafe_allow_html=True)
     st.markdown("<hr>", unsafe_allow_html=True)
 
-def colorir_tabela(val, grandeza_ativa):
-    """Aplica cores apenas se a grandeza for Tensão (PRODIST)."""
-    if grandeza_ativa != "Tensão (pu)":
-        return ''
-    color = ''
-    if isinstance(val, (int, float)):
-        if val < 0.87 or val > 1.06:
-            color = 'background-color: #ffcccc; color: red; font-weight: bold;'
-        elif val < 0.92 or val > 1.05:
-            color = 'background-color: #fff4cc; color: #b36b00;'
-    return color
-
 # =======================================================
 # EXECUÇÃO PRINCIPAL
 # =======================================================
 
 render_cabecalho()
+ativar_painel("Visualizador de resultados")
 
-st.info("📂 Carregue o arquivo CSV (Tensão ou Corrente) gerado pelo OpenDSS.")
+st.info("📂 Carregue o arquivo CSV (Tensão ou Corrente) gerado pelo OpenDSS ou informe um arquivo de resultados no servidor.")
 uploaded_file = st.file_uploader("Arraste seu CSV aqui", type=["csv"])
+caminho_servidor = st.text_input(
+    "...ou informe o caminho de um arquivo no servidor (.csv ou .h5):",
+    value="",
+    help="Indicado para resultados grandes do mosaik: HDF5 (HDFStore) ou CSV lido em blocos."
+).strip()
+
+if uploaded_file or caminho_servidor:
+    fonte_hdf = None
+    fonte_blocos = None
+
+    if caminho_servidor and not os.path.isfile(caminho_servidor):
+        st.error(f"❌ Arquivo não encontrado: `{caminho_servidor}`")
+        st.stop()
 
-if uploaded_file:
-    # 1. Leitura e Limpeza
-    df = pd.read_csv(uploaded_file)
-    df.columns = df.columns.str.strip() 
+    if caminho_servidor.lower().endswith((".h5", ".hdf5", ".hdf")):
+        # 1. HDF5: lê só o cabeçalho e o eixo de tempo; os dados vêm sob demanda
+        caminho_hdf = caminho_servidor
+        mtime_hdf = os.path.getmtime(caminho_hdf)
 
-   # =======================================================
-    # 2. TRATAMENTO DE TEMPO (Força Bruta Elegante)
-    # =======================================================
-    # Pega o nome da primeira coluna do CSV (geralmente é a data)
-    primeira_coluna = df.columns[0]
-    
-    # Tenta converter forçando a inferência de formato do Pandas
-    df['Tempo_EixoX'] = pd.to_datetime(df[primeira_coluna].astype(str).str.strip(), format='mixed', errors='coerce')
-    
-    # Se falhou tudo (tudo virou NaT), cria um Passo numérico
-    if df['Tempo_EixoX'].isna().all():
-        df['Tempo_EixoX'] = range(len(df))
+        st.sidebar.header("Arquivo HDF5")
+        chave_hdf = st.sidebar.selectbox("Tabela:", carregar_tabelas_hdf(caminho_hdf, mtime_hdf))
+        eixo_tempo_hdf = carregar_eixo_tempo_hdf(caminho_hdf, chave_hdf, mtime_hdf)
+
+        inicio, fim = None, None
+        if len(eixo_tempo_hdf) > 1:
+            if pd.api.types.is_datetime64_any_dtype(eixo_tempo_hdf):
+                t_min = eixo_tempo_hdf.min().to_pydatetime()
+                t_max = eixo_tempo_hdf.max().to_pydatetime()
+            else:
+                t_min, t_max = int(eixo_tempo_hdf.min()), int(eixo_tempo_hdf.max())
+            inicio, fim = st.sidebar.slider("Janela de tempo:", min_value=t_min, max_value=t_max, value=(t_min, t_max))
+
+        fonte_hdf = {"caminho": caminho_hdf, "chave": chave_hdf, "inicio": inicio, "fim": fim, "mtime": mtime_hdf}
+        df = pd.DataFrame(columns=carregar_cabecalho_hdf(caminho_hdf, chave_hdf, mtime_hdf))
+    else:
+        arquivo_csv = caminho_servidor or uploaded_file
+        if caminho_servidor:
+            tamanho_csv = os.path.getsize(caminho_servidor)
+            chave_csv = (caminho_servidor, os.path.getmtime(caminho_servidor))
+        else:
+            tamanho_csv = uploaded_file.size
+            chave_csv = uploaded_file.file_id
+
+        leitura_em_blocos = st.sidebar.checkbox(
+            "Leitura em blocos (arquivos grandes)",
+            value=tamanho_csv > LIMITE_LEITURA_EM_BLOCOS,
+            help="Lê primeiro o cabeçalho e depois apenas as colunas da grandeza escolhida, em float32."
+        )
+        if leitura_em_blocos:
+            # 1. Só o cabeçalho agora; as colunas são lidas depois do mapeamento
+            medir_pico = st.sidebar.checkbox(
+                "Medir pico de memória",
+                value=False,
+                help="Mede o pico da leitura com tracemalloc. Deixa a leitura bem mais lenta; use só para diagnóstico."
+            )
+            fonte_blocos = {"arquivo": arquivo_csv, "chave": chave_csv, "medir_pico": medir_pico}
+            df = pd.DataFrame(columns=ler_cabecalho_csv(arquivo_csv))
+        else:
+            # 1-3. Leitura, tempo e tipos compactos, uma única vez para todas as
+            # sessões: o armazém compartilhado guarda as colunas por conteúdo
+            dono = st.session_state.setdefault("sessao_armazem", Sessao())
+            with etapa(ETAPA_LEITURA, "armazém compartilhado"):
+                if caminho_servidor:
+                    df = obter_arquivo(caminho_servidor, ler_csv_resultados, dono)
+                else:
+                    df = obter_envio(uploaded_file.getvalue(), ler_csv_resultados, dono, identificador=uploaded_file.file_id)
+            # Ao trocar de arquivo a sessão larga o anterior (o armazém pode descartá-lo)
+            chave_anterior = st.session_state.get("chave_armazem")
+            if chave_anterior and chave_anterior != df.attrs.get(ATRIBUTO_CHAVE):
+                liberar(chave_anterior, dono)
+            st.session_state["chave_armazem"] = df.attrs.get(ATRIBUTO_CHAVE)
+            st.sidebar.caption(resumo_compactacao(df))
+            st.sidebar.caption(resumo_armazem())
         
     col_time = 'Tempo_EixoX'
 
+    # PIRÂMIDE DE AGREGADOS (apenas para arquivos no servidor: fica ao lado do arquivo)
+    piramide = None
+    if caminho_servidor:
+        tabela_piramide = fonte_hdf["chave"] if fonte_hdf is not None else None
+        mtime_piramide = os.path.getmtime(caminho_servidor)
+        with etapa(ETAPA_LEITURA, "pirâmide"):
+            piramide = carregar_piramide(caminho_servidor, tabela_piramide, mtime_piramide)
+        if piramide is None:
+            if st.sidebar.button("Construir pirâmide de agregados", help="Mín/máx/média em 10 min, 1 h e 1 dia para abrir séries longas sem ler todas as amostras."):
+                with st.spinner("Construindo pirâmide de agregados..."):
+                    ler_piramide(caminho_servidor, tabela_piramide)
+                carregar_piramide.clear()
+                piramide = carregar_piramide(caminho_servidor, tabela_piramide, mtime_piramide)
+        else:
+            st.sidebar.caption(f"📊 Pirâmide de agregados disponível ({' / '.join(NIVEIS_PIRAMIDE)})")
+
+    def obter_dados(colunas):
+        """No HDF5, lê apenas as colunas pedidas na janela escolhida; no CSV, usa o df carregado."""
+        if fonte_hdf is None:
+            return df
+        with etapa(ETAPA_LEITURA, "janela HDF5"):
+            return carregar_janela_hdf(
+                fonte_hdf["caminho"], fonte_hdf["chave"], tuple(colunas),
+                fonte_hdf["inicio"], fonte_hdf["fim"], fonte_hdf["mtime"]
+            )
+
     # 3. Mapeamento Dinâmico via JSON
     config_metadados = carregar_metadados("mapeamento.json")
-    mapas_gerais = realizar_mapeamento_dinamico(df, config_metadados)
+    with etapa(ETAPA_MAPEAMENTO, "mapeamento.json"):
+        mapas_gerais = realizar_mapeamento_dinamico(df, config_metadados)
 
     # 4. Interface Lateral para escolha da Grandeza
     st.sidebar.header("Configurações de Dados")
@@ -169,6 +361,22 @@ if uploaded_file:
     # 5. Configuração dinâmica puxada diretamente do JSON
     mapa_ativo = mapas_gerais[grandeza]
     config_ativa = config_metadados[grandeza]
+
+    if fonte_blocos is not None:
+        # Leitura em blocos apenas das colunas mapeadas para a grandeza escolhida
+        colunas_grandeza = tuple(sorted({col for fases in mapa_ativo.values() for col in fases.values()}))
+        with etapa(ETAPA_LEITURA, "colunas em blocos"):
+            df, estatisticas_leitura = carregar_csv_em_blocos(
+                fonte_blocos["arquivo"], fonte_blocos["chave"], colunas_grandeza, fonte_blocos["medir_pico"]
+            )
+        pico_leitura = estatisticas_leitura["pico_bytes"]
+        st.sidebar.caption(
+            f"📦 {estatisticas_leitura['linhas']:,} linhas × {estatisticas_leitura['colunas']} colunas "
+            f"em {estatisticas_leitura['segundos']:.1f} s  \n"
+            f"Memória (float32): {estatisticas_leitura['bytes_memoria'] / 1024**2:.1f} MB | "
+            f"Arquivo: {estatisticas_leitura['bytes_arquivo'] / 1024**2:.1f} MB"
+            + (f" | Pico na leitura: {pico_leitura / 1024**2:.1f} MB" if pico_leitura is not None else "")
+        )
     
     prefixo = config_ativa["prefixo"]
     tem_fases = config_ativa["tem_fase"]
@@ -198,170 +406,243 @@ if uploaded_file:
             format_func=formatar_nome
         )
 
-        fig = go.Figure()
-        cores_fases = {'1': '#FF4B4B', '2': '#1C83E1', '3': '#00CC96'}
-
-        # DEFINIÇÃO DAS CHAVES
-        if tem_fases:
-            chaves_para_plotar = [f"{prefixo}1", f"{prefixo}2", f"{prefixo}3", prefixo]
+        # REAMOSTRAGEM: limite de pontos por curva e zoom pela seleção em caixa
+        st.sidebar.subheader("Desempenho do Gráfico")
+        max_pontos = st.sidebar.number_input(
+            "Pontos por curva (máx.):", min_value=100, max_value=200_000, value=MAX_PONTOS_PADRAO, step=500
+        )
+        metodo_reamostragem = st.sidebar.radio("Reamostragem:", METODOS_REAMOSTRAGEM, horizontal=True)
+
+        chave_grafico = f"grafico_2d_{grandeza}_{elemento}"
+        janela_grafico = janela_da_selecao(st.session_state.get(chave_grafico))
+        colunas_elemento = list(mapa_ativo[elemento].values())
+
+        # PIRÂMIDE: com mais amostras na janela do que o orçamento de pontos,
+        # desenha o nível agregado mais grosso que ainda o preenche (sem ler os dados)
+        nivel_2d = NIVEL_NATIVO
+        if canais_disponiveis(piramide, colunas_elemento):
+            janela = janela_grafico
+            if janela is None and fonte_hdf is not None and fonte_hdf["inicio"] is not None:
+                janela = (fonte_hdf["inicio"], fonte_hdf["fim"])
+            janela_s = None if janela is None else tuple(para_segundos(v) for v in janela)
+            nivel_2d = escolher_nivel(piramide, colunas_elemento[0], janela_s, max_pontos)
+            if nivel_2d != NIVEL_NATIVO:
+                df_nivel = reduzir_nivel(recortar_nivel(piramide[nivel_2d], janela_s), colunas_elemento, max_pontos)
+                if df_nivel.empty:
+                    nivel_2d = NIVEL_NATIVO
+
+        if nivel_2d == NIVEL_NATIVO:
+            df = obter_dados(colunas_elemento)
+            visiveis = mascara_janela(df[col_time], janela_grafico)
+            if not visiveis.any():
+                visiveis[:] = True
+            eixo_x_visivel = df[col_time].to_numpy()[visiveis]
+            # (mínimo, máximo) de cada coluna: as próprias amostras
+            extremos = {col: (df[col], df[col]) for col in colunas_elemento}
         else:
-            chaves_para_plotar = [prefixo]
+            eixo_origem = eixo_tempo_hdf if fonte_hdf is not None else df[col_time]
+            tempo_s = df_nivel[COL_TEMPO_NIVEL].reset_index(drop=True)
+            if pd.api.types.is_datetime64_any_dtype(eixo_origem):
+                tempo_s = pd.to_datetime(tempo_s, unit="s")
+            eixo_x_visivel = tempo_s.to_numpy()
+            visiveis = np.ones(len(df_nivel), dtype=bool)
+            extremos = {
+                col: tuple(df_nivel[coluna_estatistica(col, e)].reset_index(drop=True) for e in ("min", "max"))
+                for col in colunas_elemento
+            }
+        with etapa(ETAPA_FIGURA, f"{grandeza} - {elemento}"):
+            pontos_enviados = 0
+
+            fig = go.Figure()
+            cores_fases = {'1': '#FF4B4B', '2': '#1C83E1', '3': '#00CC96'}
+
+            # DEFINIÇÃO DAS CHAVES
+            if tem_fases:
+                chaves_para_plotar = [f"{prefixo}1", f"{prefixo}2", f"{prefixo}3", prefixo]
+            else:
+                chaves_para_plotar = [prefixo]
 
-        # ESCALA GLOBAL
+            # ESCALA GLOBAL
         
-        primeira_chave_valida = next((c for c in chaves_para_plotar if c in mapa_ativo[elemento]), None)
+            primeira_chave_valida = next((c for c in chaves_para_plotar if c in mapa_ativo[elemento]), None)
 
-        coluna_exemplo = mapa_ativo[elemento][primeira_chave_valida]
+            coluna_exemplo = mapa_ativo[elemento][primeira_chave_valida]
 
-        if "_MW" in coluna_exemplo:
-            unidade_base = "W"
-            fator = 1e6
-        elif "_Mvar" in coluna_exemplo:
-            unidade_base = "var"
-            fator = 1e6
-        elif "P_gen" in coluna_exemplo:
             if "_MW" in coluna_exemplo:
                 unidade_base = "W"
                 fator = 1e6
+            elif "_Mvar" in coluna_exemplo:
+                unidade_base = "var"
+                fator = 1e6
+            elif "P_gen" in coluna_exemplo:
+                if "_MW" in coluna_exemplo:
+                    unidade_base = "W"
+                    fator = 1e6
+                elif "_kW" in coluna_exemplo:
+                    unidade_base = "W"
+                    fator = 1e3
+                else:
+                    unidade_base = "W"
+                    fator = 1
             elif "_kW" in coluna_exemplo:
                 unidade_base = "W"
                 fator = 1e3
-            else:
+            elif "_W" in coluna_exemplo:
                 unidade_base = "W"
                 fator = 1
-        elif "_kW" in coluna_exemplo:
-            unidade_base = "W"
-            fator = 1e3
-        elif "_W" in coluna_exemplo:
-            unidade_base = "W"
-            fator = 1
-        elif "_pu" in coluna_exemplo:
-            unidade_base = "pu"
-            fator = 1
-        elif "_kV" in coluna_exemplo:
-            unidade_base = "V"
-            fator = 1e3
-        elif "_V" in coluna_exemplo:
-            unidade_base = "V"
-            fator = 1
-        elif "_A" in coluna_exemplo:
-            unidade_base = "A"
-            fator = 1
-        else:
-            unidade_base = ""
-            fator = 1
+            elif "_pu" in coluna_exemplo:
+                unidade_base = "pu"
+                fator = 1
+            elif "_kV" in coluna_exemplo:
+                unidade_base = "V"
+                fator = 1e3
+            elif "_V" in coluna_exemplo:
+                unidade_base = "V"
+                fator = 1
+            elif "_A" in coluna_exemplo:
+                unidade_base = "A"
+                fator = 1
+            else:
+                unidade_base = ""
+                fator = 1
 
-        # ESCALA GLOBAL CORRIGIDA
-        todos_valores = []
+            # ESCALA GLOBAL CORRIGIDA
+            todos_valores = []
 
-        for chave in chaves_para_plotar:
-            if chave in mapa_ativo[elemento]:
-                dados_temp = df[mapa_ativo[elemento][chave]] * fator
-                todos_valores.append(dados_temp.abs().max())
+            for chave in chaves_para_plotar:
+                if chave in mapa_ativo[elemento]:
+                    minimos, maximos = extremos[mapa_ativo[elemento][chave]]
+                    todos_valores.append(max((minimos * fator).abs().max(), (maximos * fator).abs().max()))
 
-        valor_referencia = max(todos_valores) if todos_valores else 0
+            valor_referencia = max(todos_valores) if todos_valores else 0
 
-        if valor_referencia > 0:
-            if unidade_base in ["W", "var"] and valor_referencia < 1:
+            if valor_referencia > 0:
+                if unidade_base in ["W", "var"] and valor_referencia < 1:
+                    unidade_final = unidade_base
+                    fator_escala_global = 1
+                else:
+                    valor_ref_scaled, unidade_final = auto_scale(valor_referencia, unidade_base)
+                    fator_escala_global = valor_referencia / valor_ref_scaled
+            else:
                 unidade_final = unidade_base
                 fator_escala_global = 1
-            else:
-                valor_ref_scaled, unidade_final = auto_scale(valor_referencia, unidade_base)
-                fator_escala_global = valor_referencia / valor_ref_scaled
-        else:
-            unidade_final = unidade_base
-            fator_escala_global = 1
-
-        for chave in chaves_para_plotar:
-            if chave in mapa_ativo[elemento]:
-                dados_y = df[mapa_ativo[elemento][chave]]
-
-                dados_convertidos = dados_y * fator
-                dados_plot = dados_convertidos / fator_escala_global
-
-                val_min = dados_plot.min()
-                val_max = dados_plot.max()
 
-                cor_linha = '#000000'  # padrão (preto)
-
-                if tem_fases:
-                    nome_legenda = f"Fase {chave[-1]} (Mín: {val_min:.5g} | Máx: {val_max:.5g})"
-                    cor_linha = cores_fases.get(chave[-1], '#000000')
-                    formato_linha = 'linear'
-                else:
-                    nome_legenda = f"{elemento} (Mín: {val_min:.5g} | Máx: {val_max:.5g})"
-                    cor_linha = '#9B59B6' if prefixo == 'Tap' else '#F39C12'
-                    formato_linha = 'hv' if prefixo == 'Tap' else 'linear'
+            for chave in chaves_para_plotar:
+                if chave in mapa_ativo[elemento]:
+                    minimos, maximos = extremos[mapa_ativo[elemento][chave]]
+
+                    minimos_plot = minimos * fator / fator_escala_global
+                    maximos_plot = maximos * fator / fator_escala_global
+
+                    val_min = minimos_plot.min()
+                    val_max = maximos_plot.max()
+
+                    cor_linha = '#000000'  # padrão (preto)
+
+                    if tem_fases:
+                        nome_legenda = f"Fase {chave[-1]} (Mín: {val_min:.5g} | Máx: {val_max:.5g})"
+                        cor_linha = cores_fases.get(chave[-1], '#000000')
+                        formato_linha = 'linear'
+                    else:
+                        nome_legenda = f"{elemento} (Mín: {val_min:.5g} | Máx: {val_max:.5g})"
+                        cor_linha = '#9B59B6' if prefixo == 'Tap' else '#F39C12'
+                        formato_linha = 'hv' if prefixo == 'Tap' else 'linear'
+
+                    if nivel_2d != NIVEL_NATIVO:
+                        # Nível agregado: faixa mín–máx sombreada + média
+                        media_plot = df_nivel[coluna_estatistica(mapa_ativo[elemento][chave], "media")] * fator / fator_escala_global
+                        pontos_enviados = len(df_nivel)
+                        fig.add_traces(tracos_envelope(
+                            eixo_x_visivel, minimos_plot, maximos_plot, media_plot.to_numpy(),
+                            nome_legenda, cor_linha, formato_linha
+                        ))
+                        continue
+
+                    # Só a janela visível é reamostrada (resolução total ao ampliar);
+                    # nas amostras nativas mínimos e máximos são a própria série
+                    y_visivel = minimos_plot.to_numpy()[visiveis]
+                    indices = indices_reamostragem(eixo_x_visivel, y_visivel, max_pontos, metodo_reamostragem)
+                    pontos_enviados = max(pontos_enviados, len(indices))
+
+                    fig.add_trace(go.Scatter(
+                        x=eixo_x_visivel[indices],
+                        y=y_visivel[indices],
+                        mode='lines',
+                        name=nome_legenda,
+                        line=dict(color=cor_linha),
+                        line_shape=formato_linha
+                    ))
+
+            # LIMITES PRODIST
+            if grandeza == "Tensão":
+                tempo_min = eixo_x_visivel.min()
+                tempo_max = eixo_x_visivel.max()
 
                 fig.add_trace(go.Scatter(
-                    x=df[col_time],
-                    y=dados_plot,
+                    x=[tempo_min, tempo_max],
+                    y=[1.05, 1.05],
                     mode='lines',
-                    name=nome_legenda,
-                    line=dict(color=cor_linha),
-                    line_shape=formato_linha
+                    name='🚨 Limite Sup. (1.05)',
+                    line=dict(color='red', dash='dash'),
+                    visible='legendonly'
                 ))
 
-        # LIMITES PRODIST
-        if grandeza == "Tensão":
-            tempo_min = df[col_time].min()
-            tempo_max = df[col_time].max()
-
-            fig.add_trace(go.Scatter(
-                x=[tempo_min, tempo_max],
-                y=[1.05, 1.05],
-                mode='lines',
-                name='🚨 Limite Sup. (1.05)',
-                line=dict(color='red', dash='dash'),
-                visible='legendonly'
-            ))
-
-            fig.add_trace(go.Scatter(
-                x=[tempo_min, tempo_max],
-                y=[0.92, 0.92],
-                mode='lines',
-                name='🚨 Limite Inf. (0.92)',
-                line=dict(color='orange', dash='dash'),
-                visible='legendonly'
-            ))
+                fig.add_trace(go.Scatter(
+                    x=[tempo_min, tempo_max],
+                    y=[0.92, 0.92],
+                    mode='lines',
+                    name='🚨 Limite Inf. (0.92)',
+                    line=dict(color='orange', dash='dash'),
+                    visible='legendonly'
+                ))
 
-        nome_limpo = re.sub(r"\s*\(.*?\)", "", grandeza)
-
-        # LIMITE DINÂMICO LOCAL (por elemento)
-        y_min = float('inf')
-        y_max = float('-inf')
-
-        for chave in chaves_para_plotar:
-            if chave in mapa_ativo[elemento]:
-                dados_y = df[mapa_ativo[elemento][chave]] * fator
-                dados_plot = dados_y / fator_escala_global
-
-                y_min = min(y_min, dados_plot.min())
-                y_max = max(y_max, dados_plot.max())
-
-        # proteção contra erro
-        if y_min == float('inf') or y_max == float('-inf'):
-            y_min, y_max = 0, 1
-
-        # margem de 5%
-        margem = 0.05 * (y_max - y_min) if y_max != y_min else 0.01
-
-        fig.update_layout(
-            title=f"{grandeza} - {elemento}",
-            yaxis=dict(
-                title=f"{nome_limpo} [{unidade_final}]",
-                range=[y_min - margem, y_max + margem],
-                nticks=12,
-                tickformat=".5g",
-                zeroline=False
-            ),
-            xaxis_title="Tempo",
-            template="plotly_white",
-            height=600,
-            hovermode="x unified"
-        )
+            nome_limpo = re.sub(r"\s*\(.*?\)", "", grandeza)
+
+            # LIMITE DINÂMICO LOCAL (por elemento)
+            y_min = float('inf')
+            y_max = float('-inf')
+
+            for chave in chaves_para_plotar:
+                if chave in mapa_ativo[elemento]:
+                    minimos, maximos = extremos[mapa_ativo[elemento][chave]]
+
+                    y_min = min(y_min, (minimos[visiveis] * fator / fator_escala_global).min())
+                    y_max = max(y_max, (maximos[visiveis] * fator / fator_escala_global).max())
+
+            # proteção contra erro
+            if y_min == float('inf') or y_max == float('-inf'):
+                y_min, y_max = 0, 1
+
+            # margem de 5%
+            margem = 0.05 * (y_max - y_min) if y_max != y_min else 0.01
+
+            fig.update_layout(
+                title=f"{grandeza} - {elemento}",
+                yaxis=dict(
+                    title=f"{nome_limpo} [{unidade_final}]",
+                    range=[y_min - margem, y_max + margem],
+                    nticks=12,
+                    tickformat=".5g",
+                    zeroline=False
+                ),
+                xaxis_title="Tempo",
+                template="plotly_white",
+                height=600,
+                hovermode="x unified",
+                dragmode="select"
+            )
 
-        st.plotly_chart(fig, use_container_width=True)
+        mostrar_grafico(fig, use_container_width=True, key=chave_grafico, on_select="rerun", selection_mode="box")
+        if nivel_2d != NIVEL_NATIVO:
+            st.caption(
+                f"📊 Pirâmide de agregados, nível {nivel_2d}: {pontos_enviados:,} intervalos por curva (faixa mín–máx e média). "
+                "Selecione uma região em caixa para descer de nível até as amostras originais; duplo clique volta à visão completa."
+            )
+        else:
+            st.caption(
+                f"🔎 {pontos_enviados:,} de {int(visiveis.sum()):,} amostras por curva ({metodo_reamostragem}). "
+                "Selecione uma região em caixa para ampliar com resolução total; duplo clique volta à visão completa."
+            )
 
     # =======================================================
     # VISUALIZAÇÃO 3D
@@ -377,6 +658,7 @@ if uploaded_file:
             st.info(f"💡 Exibindo o mapa 3D geral para {grandeza}.")
         
         lista_elementos = sorted(mapa_ativo.keys())
+        df = obter_dados(mapa_ativo[el][f_key] for el in lista_elementos if f_key in mapa_ativo[el])
         z_data = []
         for el in lista_elementos:
             if f_key in mapa_ativo[el]:
@@ -384,42 +666,54 @@ if uploaded_file:
             else:
                 z_data.append(np.full(len(df), np.nan))
         
-        z_matrix = np.array(z_data).T
-        
-        # --- NOVO: Tratamento do Eixo Y para Horário ---
-        # Se a coluna de tempo for do tipo data, extrai apenas a Hora e o Minuto (HH:MM)
-        if pd.api.types.is_datetime64_any_dtype(df[col_time]):
-            eixo_y = df[col_time].dt.strftime('%H:%M')
-        else:
-            eixo_y = df[col_time] # Se for apenas um 'Passo' numérico, usa ele mesmo
-            
-        # Adicionamos y=eixo_y na construção da Superfície
-        fig_3d = go.Figure(data=[go.Surface(
-            z=z_matrix, 
-            x=lista_elementos, 
-            y=eixo_y, 
-            colorscale='Viridis',
-            colorbar=dict(
-                title=label_y,
-                nticks=15,        # Força 15 valores diferentes na barra de cores
-                tickformat=".3f"  # Mostra 3 casas decimais (ex: 1.025)
+        # Reduz a grade no servidor (mín/máx por intervalo; envoltória de
+        # elementos vizinhos quando são milhares), preservando os extremos
+        max_celulas = st.sidebar.number_input(
+            "Células da superfície (máx.):", min_value=1_000, max_value=2_000_000,
+            value=MAX_CELULAS_PADRAO, step=10_000
+        )
+        with etapa(ETAPA_FIGURA, titulo_3d):
+            z_data, eixo_tempo_3d, elementos_3d, resumo_grade = reduzir_grade(
+                np.array(z_data), df[col_time].to_numpy(), lista_elementos, max_celulas
             )
-        )])
+            z_matrix = z_data.T
         
-        fig_3d.update_layout(
-            title=titulo_3d,
-            scene=dict(
-                xaxis_title="Elementos", 
-                yaxis_title="Horário", 
-                zaxis_title=label_y,
-                zaxis=dict(
-                    nticks=15,        # Força 15 valores na escala vertical do gráfico 3D
-                    tickformat=".3f"  # Mostra 3 casas decimais
+            # --- NOVO: Tratamento do Eixo Y para Horário ---
+            # Se a coluna de tempo for do tipo data, extrai apenas a Hora e o Minuto (HH:MM)
+            if pd.api.types.is_datetime64_any_dtype(df[col_time]):
+                eixo_y = pd.DatetimeIndex(eixo_tempo_3d).strftime('%H:%M')
+            else:
+                eixo_y = eixo_tempo_3d # Se for apenas um 'Passo' numérico, usa ele mesmo
+            
+            # Adicionamos y=eixo_y na construção da Superfície
+            fig_3d = go.Figure(data=[go.Surface(
+                z=z_matrix, 
+                x=elementos_3d, 
+                y=eixo_y, 
+                colorscale='Viridis',
+                colorbar=dict(
+                    title=label_y,
+                    nticks=15,        # Força 15 valores diferentes na barra de cores
+                    tickformat=".3f"  # Mostra 3 casas decimais (ex: 1.025)
                 )
-            ),
-            height=750
-        )
-        st.plotly_chart(fig_3d, use_container_width=True)
+            )])
+        
+            fig_3d.update_layout(
+                title=titulo_3d,
+                scene=dict(
+                    xaxis_title="Elementos", 
+                    yaxis_title="Horário", 
+                    zaxis_title=label_y,
+                    zaxis=dict(
+                        nticks=15,        # Força 15 valores na escala vertical do gráfico 3D
+                        tickformat=".3f"  # Mostra 3 casas decimais
+                    )
+                ),
+                height=750
+            )
+        mostrar_grafico(fig_3d, use_container_width=True)
+        if texto_resumo_grade(resumo_grade):
+            st.caption(texto_resumo_grade(resumo_grade))
 
     # =======================================================
     # VISUALIZAÇÃO GEOGRÁFICA (MAPA)
@@ -450,7 +744,8 @@ if uploaded_file:
         
         if arquivo_geo_upload is not None:
             # 3. Lê os dados do ficheiro carregado
-            df_geo = pd.read_csv(arquivo_geo_upload)
+            with etapa(ETAPA_LEITURA, arquivo_geo_upload.name):
+                df_geo = pd.read_csv(arquivo_geo_upload)
             
             # 4. Verifica se as colunas configuradas no JSON realmente existem no ficheiro
             if col_nome in df_geo.columns and col_x in df_geo.columns and col_y in df_geo.columns:
@@ -479,7 +774,7 @@ if uploaded_file:
                     yaxis=dict(scaleanchor="x", scaleratio=1) 
                 )
                 
-                st.plotly_chart(fig_mapa, use_container_width=True)
+                mostrar_grafico(fig_mapa, use_container_width=True)
                 
                 with st.expander("📊 Ver Tabela de Coordenadas"):
                     st.dataframe(df_geo)
@@ -499,99 +794,88 @@ if uploaded_file:
             type=["csv"],
             key="upload_comunicacao"
         )
+        caminho_com = st.text_input(
+            "...ou o caminho do log no servidor (logs grandes):", value="", key="caminho_comunicacao"
+        ).strip()
 
-        if arquivo_com is not None:
-            # leitura
-            df_com = pd.read_csv(arquivo_com)
-
-            # limpeza
-            df_com.columns = df_com.columns.str.strip()
-
-            # validação do seu padrão
-            colunas_necessarias = ["Tempo", "Origem", "Atributo", "Valor"]
-
-            if all(col in df_com.columns for col in colunas_necessarias):
-
-                # conversões
-                df_com["Tempo"] = pd.to_numeric(df_com["Tempo"], errors="coerce")
-                df_com["Valor_num"] = pd.to_numeric(df_com["Valor"], errors="coerce")
-
-                # remove inválidos
-                df_com = df_com.dropna(subset=["Tempo", "Valor_num"])
-
-                # cria variável
-                df_com["variavel"] = df_com["Origem"] + " | " + df_com["Atributo"]
-
-                # pivot correto
-                df_pivot = df_com.pivot_table(
-                    index="Tempo",
-                    columns="variavel",
-                    values="Valor_num",
-                    aggfunc="mean"
-                ).reset_index()
-
-                df_pivot = df_pivot.sort_values("Tempo")
-
-                st.success("Arquivo de comunicação carregado corretamente.")
-
-            else:
+        if arquivo_com is not None or caminho_com:
+            if caminho_com and not os.path.isfile(caminho_com):
+                st.error(f"❌ Arquivo não encontrado: `{caminho_com}`")
+                st.stop()
+            try:
+                with etapa(ETAPA_LEITURA, "log de comunicação"):
+                    dados_com = carregar_log_comunicacao(arquivo_com, caminho_com)
+            except ValueError as erro:
                 st.error(f"""
-            Formato inválido.
+            Formato inválido ({erro}).
 
             Esperado:
-            Tempo | Origem | Atributo | Valor
-
-            Encontrado:
-            {list(df_com.columns)}
+            Tempo | Origem | Atributo | Valor (| Destino)
             """)
                 st.stop()
 
-                # seleção de variável
-                st.success("Arquivo de comunicação carregado corretamente.")
-
-                colunas_validas = [
-                    c for c in df_pivot.columns
-                    if c != "Tempo" and df_pivot[c].notna().sum() > 0
-                ]
-
-                if len(colunas_validas) == 0:
-                    st.warning("Nenhuma variável numérica disponível para plotagem.")
-                    st.stop()
+            pivot = dados_com["pivot"]
+            st.success("Arquivo de comunicação carregado corretamente.")
+            st.caption(
+                f"📦 {dados_com['linhas']:,} eventos | {len(pivot['variaveis']):,} variáveis | "
+                f"{len(dados_com['enlaces']):,} enlaces | {dados_com['bytes_memoria'] / 1024**2:,.1f} MB em memória | "
+                f"{dados_com['segundos']:.1f} s"
+            )
 
-                variavel = st.selectbox(
-                    "Selecione a variável",
-                    colunas_validas
+            # Estatísticas por enlace
+            st.subheader("🔗 Enlaces")
+            st.dataframe(dados_com["enlaces"], use_container_width=True, hide_index=True)
+            if COLUNA_DESTINO not in dados_com["log"].columns:
+                st.caption(
+                    "ℹ️ Sem a coluna Destino no log, envios e recepções não podem ser pareados "
+                    "(o remetente só registra envios e o receptor só recepções): a perda fica em branco."
                 )
 
-                fig = go.Figure()
+            # Série de uma variável (fatia do pivot colunar)
+            if len(pivot["variaveis"]) == 0:
+                st.warning("Nenhuma variável numérica disponível para plotagem.")
+                st.stop()
 
-                fig.add_trace(go.Scatter(
-                    x=df_pivot["Tempo"],
-                    y=df_pivot[variavel],
-                    mode='lines',
-                    name=variavel
-                ))
+            variavel = st.selectbox(
+                "Selecione a variável",
+                pivot["variaveis"]
+            )
+            tempo_var, valor_var = serie_variavel(pivot, pivot["variaveis"].index(variavel))
+            indices = indices_reamostragem(tempo_var, valor_var, MAX_PONTOS_PADRAO, "Mín/Máx")
 
-                st.plotly_chart(fig, use_container_width=True)
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(
+                x=tempo_var[indices],
+                y=valor_var[indices],
+                mode='lines',
+                name=variavel
+            ))
+            fig.update_layout(xaxis_title="Tempo (s)", yaxis_title=variavel)
+            mostrar_grafico(fig, use_container_width=True)
+            if len(indices) < len(tempo_var):
+                st.caption(f"⚡ {len(indices):,} de {len(tempo_var):,} amostras (Mín/Máx).")
 
-                with st.expander("📊 Ver dados de comunicação"):
-                    st.dataframe(df_pivot)
-            #else:
-            #    st.error("Formato do arquivo OMNeT inválido (esperado: colunas 'time' e 'value').")
+            with st.expander("📊 Ver dados de comunicação"):
+                st.dataframe(pd.DataFrame({"Tempo": tempo_var, variavel: valor_var}), hide_index=True)
     # =======================================================
     # TABELA DE DADOS
     # =======================================================
     with st.expander("📊 Ver Tabela de Dados"):
-        # 1. Identifica quais colunas são numéricas (exclui a coluna de tempo/data)
-        colunas_numericas = df.select_dtypes(include=['float64', 'float32']).columns
-        
-        # 2. Aplica a formatação e as cores apenas nesse subconjunto (subset)
-        st.dataframe(
-            df.style
-            .format("{:.6f}", subset=colunas_numericas)
-            .map(colorir_tabela, grandeza_ativa=grandeza, subset=colunas_numericas),
-            use_container_width=True
-        )
+        if fonte_hdf is not None and pagina not in ["Gráfico 2D", "Superfície 3D"]:
+            st.info("No modo HDF5 a tabela mostra apenas as colunas lidas pelos gráficos 2D/3D.")
+        else:
+            # Só a página visível é enviada; cores das faixas PRODIST apenas nas tensões em pu
+            colunas_numericas = df.select_dtypes(include=['float64', 'float32']).columns
+            colunas_pu = [c for c in colunas_numericas if "_pu" in c] if grandeza == "Tensão" else []
+            with etapa(ETAPA_SERIALIZACAO, "Tabela de Dados"):
+                render_tabela_paginada(
+                    df, "tabela_dados",
+                    colunas_destaque=colunas_pu,
+                    classificar=classes_tensao_pu
+                )
 
 else:
-    st.warning("⚠️ Aguardando upload do arquivo CSV...")
\ No newline at end of file
+    st.warning("⚠️ Aguardando upload do arquivo CSV ou caminho do HDF5...")
+
+# Painel de instrumentação (páginas que param no meio com st.stop não chegam aqui)
+render_painel()
@@ -3,13 +3,53 @@
 # ============================================================================
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import glob
 import re
 import plotly.graph_objects as go
+from plotly.colors import qualitative
 import numpy as np
 import json
 import os
+from collections import OrderedDict
+
+from acompanhamento import INTERVALOS_ATUALIZACAO, acompanhar
+from armazem_compartilhado import Sessao, hash_arquivo, obter_arquivo, resumo_armazem, selecionar_colunas
+from compactacao import resumo_compactacao
+from componentes_simetricas import (
+    LIMITE_FD_PRODIST,
+    calcular_fator_desequilibrio,
+    calcular_sequencias_lote,
+    resumir_sequencias,
+)
+from grade_3d import MAX_CELULAS_PADRAO, reduzir_grade, texto_resumo_grade, traco_bordas
+from instrumentacao import (
+    ETAPA_CALCULO, ETAPA_FIGURA, ETAPA_LEITURA, ETAPA_MAPEAMENTO,
+    ativar_painel, etapa, mostrar_grafico, render_painel
+)
+from monitores import carregar_monitor, montar_topologia
+from por_unidade import S_BASE_PADRAO_MVA, TENSAO, converter_df_pu, fatores_pu
+from piramide import (
+    COL_TEMPO_NIVEL,
+    NIVEL_NATIVO,
+    canais_disponiveis,
+    canais_do_bloco,
+    coluna_estatistica,
+    escolher_nivel,
+    ler_piramide,
+    recortar_nivel,
+    reduzir_nivel,
+    tempo_em_segundos,
+    tracos_envelope,
+)
+from reamostragem import (
+    MAX_PONTOS_PADRAO,
+    METODOS_REAMOSTRAGEM,
+    indices_reamostragem_grupo,
+    janela_da_selecao,
+    mascara_janela,
+)
+from tabela_paginada import classes_desequilibrio, estilo_pagina, render_tabela_paginada
+from topologia import carregar_topologia
 
 # --- ESTA TEM QUE SER A PRIMEIRA LINHA 'st.' DO CÓDIGO ---
 st.set_page_config(
@@ -23,12 +63,22 @@ st.set_page_config(
 # CONFIGURAÇÃO DA TOPOLOGIA (VIA ARQUIVO JSON)
 # ============================================================================
 
+@st.cache_resource(max_entries=4, show_spinner=False)
+def carregar_cenario(caminho_json, mtime_ns):
+    """
+    Configuração e topologia (pares de arquivos tensão/potência) do cenário.
+
+    Guardadas entre reruns e sessões; a data de modificação entra na chave,
+    então editar o JSON recarrega o cenário. Não altere o que é retornado.
+    """
+    with open(caminho_json, 'r', encoding='utf-8') as f:
+        dados = json.load(f)
+    return dados, montar_topologia(dados)
+
 # Função para carregar a configuração
 def carregar_configuracao(caminho_json):
     try:
-        with open(caminho_json, 'r', encoding='utf-8') as f:
-            dados = json.load(f)
-        return dados
+        return carregar_cenario(caminho_json, os.stat(caminho_json).st_mtime_ns)
     except FileNotFoundError:
         st.error(f"O arquivo '{caminho_json}' não foi encontrado!")
         st.stop()
@@ -36,42 +86,12 @@ def carregar_configuracao(caminho_json):
         st.error(f"Erro ao ler o JSON. Verifique se a formatação está correta.")
         st.stop()
 
-# 1. Carrega o arquivo JSON
-config = carregar_configuracao('config_circuito.json')
-
-# 2. Monta a estrutura que o código usará
-pasta_base = config.get("pasta_arquivos", "") # Pega o nome da pasta definido no JSON
-TOPOLOGIA_SISTEMA = []
-
-for item in config["elementos"]:
-    # Monta o caminho base conforme está no JSON
-    caminho_original = os.path.join(pasta_base, item["arquivo"])
-    
-    # --- LÓGICA INTELIGENTE DE DETECÇÃO DE ARQUIVOS ---
-    # Seus arquivos são separados: "...tensao..." e "...potencia..."
-    # O código abaixo tenta adivinhar o par correto automaticamente.
-    caminho_vi = caminho_original
-    caminho_pq = caminho_original
-    
-    # Se o JSON apontar para o arquivo de tensão, calculamos o nome do de potência
-    if "tensao" in caminho_original.lower():
-        caminho_pq = caminho_original.replace("tensao", "potencia")
-        
-    # Se o JSON apontar para o arquivo de potência, calculamos o nome do de tensão
-    elif "potencia" in caminho_original.lower():
-        caminho_vi = caminho_original.replace("potencia", "tensao")
-    
-    # Adiciona na lista com os caminhos corretos para cada grandeza
-    TOPOLOGIA_SISTEMA.append({
-        "nome": item["nome"],
-        "arquivo": caminho_original,
-        "kv_base": item["kv_base"],
-        "tipo": item.get("tipo", "generico"),
-        "arquivo_vi": caminho_vi, # Usa o arquivo de Tensão/Corrente
-        "arquivo_pq": caminho_pq  # Usa o arquivo de Potência
-    })
+# 1-2. Carrega o arquivo JSON e a estrutura que o código usará (só relê se o JSON mudar)
+config, TOPOLOGIA_SISTEMA = carregar_configuracao('config_circuito.json')
 # Opcional: Mostrar na tela que carregou com sucesso
 st.sidebar.success(f"Cenário carregado: {config['nome_cenario']}")
+# Base de potência do cenário (opcional no JSON) para as conversões em pu
+S_BASE_CENARIO_MVA = float(config.get("s_base_mva", S_BASE_PADRAO_MVA))
 
 
 
@@ -165,21 +185,45 @@ MAPA_LEGENDAS = {
 # ============================================================================
 # 5. FUNÇÕES AUXILIARES
 # ============================================================================
-def sanitize_columns(cols):
-    """Remove espaços e caracteres especiais dos nomes das colunas"""
-    return [c.strip().replace(" ", "_").replace("(", "").replace(")", "") for c in cols]
+def sessao_armazem():
+    """Dono das referências desta sessão no armazém compartilhado."""
+    return st.session_state.setdefault("sessao_armazem", Sessao())
 
-@st.cache_data
-def carregar_dados(padrao_arquivo):
-    """Carrega dados de um arquivo CSV"""
+def carregar_dados(padrao_arquivo, dono=None):
+    """
+    Carrega dados de um arquivo CSV (via cache colunar em disco).
+
+    O DataFrame é uma visão somente leitura do armazém compartilhado: todas
+    as sessões do servidor usam a mesma cópia das colunas.
+    dono: Sessao a usar fora da thread da sessão (ex.: threads da topologia)
+    """
     arquivos = glob.glob(padrao_arquivo)
     if not arquivos:
         return None
-    
-    df = pd.read_csv(arquivos[0])
-    df.columns = sanitize_columns(df.columns)
-    
-    return df
+    with etapa(ETAPA_LEITURA, os.path.basename(arquivos[0])):
+        return obter_arquivo(arquivos[0], carregar_monitor, dono or sessao_armazem())
+
+@st.cache_data
+def carregar_piramide(arquivo, mtime_ns, _df):
+    """
+    Pirâmide de agregados do monitor (construída na primeira abertura e guardada em disco).
+
+    mtime_ns entra na chave do cache: arquivo regravado refaz a leitura.
+    _df (fora da chave) é o monitor já carregado pela sessão; só é usado
+    se a pirâmide precisar ser construída, sem reler o CSV.
+    """
+    def blocos():
+        yield tempo_em_segundos(_df), _df[canais_do_bloco(_df, True)]
+
+    return ler_piramide(arquivo, blocos=blocos())
+
+def filtrar_colunas_com_dados(df):
+    """Remove colunas zeradas (mantém o eixo de tempo) sem copiar os dados"""
+    colunas_com_dados = [
+        c for c in df.columns 
+        if not (df[c] == 0).all() or c.lower() in ["hour", "time", "step"]
+    ]
+    return selecionar_colunas(df, colunas_com_dados)
 
 def detectar_grupo(df, canal):
     """Identifica grupo de variáveis relacionadas baseado no canal selecionado"""
@@ -223,27 +267,114 @@ def listar_grupos_para_3d(df):
         
     return grupos
 
+# Acima deste número de pontos os marcadores deixam de ser desenhados
+LIMITE_MARCADORES = 500
+
+def preparar_dados_grafico(df, eixo_x, colunas, chave_grafico, max_pontos, metodo):
+    """Recorta a janela selecionada (zoom) no gráfico e reamostra as colunas"""
+    visiveis = mascara_janela(df[eixo_x], janela_da_selecao(st.session_state.get(chave_grafico)))
+    if not visiveis.any():
+        visiveis[:] = True
+    df_visivel = df[visiveis]
+    indices = indices_reamostragem_grupo(
+        df_visivel[eixo_x].to_numpy(),
+        [df_visivel[c].to_numpy() for c in colunas],
+        max_pontos, metodo
+    )
+    return df_visivel.iloc[indices]
+
+def nivel_piramide_visivel(piramide, canais, chave_grafico, max_pontos):
+    """
+    Escolhe o nível agregado para a janela visível do gráfico (eixo em horas).
+
+    Retorna (nome_do_nivel, intervalos) ou (None, None) quando as amostras
+    nativas já cabem no orçamento de pontos.
+    """
+    if not canais_disponiveis(piramide, canais):
+        return None, None
+    janela = janela_da_selecao(st.session_state.get(chave_grafico))
+    janela_s = None if janela is None else (janela[0] * 3600, janela[1] * 3600)
+    nivel = escolher_nivel(piramide, canais[0], janela_s, max_pontos)
+    if nivel == NIVEL_NATIVO:
+        return None, None
+    df_nivel = recortar_nivel(piramide[nivel], janela_s)
+    if df_nivel.empty:
+        return None, None
+    return nivel, reduzir_nivel(df_nivel, canais, max_pontos)
+
+# Figuras montadas guardadas por sessão (voltar a uma barra já vista não remonta)
+FIGURAS_GUARDADAS = 32
+
+def figura_guardada(chave_grafico, assinatura, montar):
+    """
+    Figura do rerun anterior desta sessão, se a assinatura não mudou.
+
+    assinatura: o que define a figura (conteúdo do arquivo, canais, zoom...);
+                None não guarda (modo ao vivo)
+    montar: função que retorna (fig, nivel_da_piramide)
+    """
+    figuras = st.session_state.setdefault("figuras_2d", OrderedDict())
+    entrada = figuras.get(chave_grafico)
+    if assinatura is not None and entrada is not None and entrada[0] == assinatura:
+        figuras.move_to_end(chave_grafico)
+        return entrada[1], entrada[2]
+
+    fig, nivel = montar()
+    if assinatura is not None:
+        figuras[chave_grafico] = (assinatura, fig, nivel)
+        figuras.move_to_end(chave_grafico)
+        while len(figuras) > FIGURAS_GUARDADAS:
+            figuras.popitem(last=False)
+    return fig, nivel
+
+def figura_envelope(df_nivel, canais, titulo):
+    """Faixa mín–máx e média de cada canal a partir de um nível da pirâmide"""
+    fig = go.Figure()
+    horas = df_nivel[COL_TEMPO_NIVEL] / 3600
+    cores = qualitative.Plotly
+    for i, canal in enumerate(canais):
+        fig.add_traces(tracos_envelope(
+            horas,
+            df_nivel[coluna_estatistica(canal, "min")],
+            df_nivel[coluna_estatistica(canal, "max")],
+            df_nivel[coluna_estatistica(canal, "media")],
+            MAPA_LEGENDAS.get(canal, canal),
+            cores[i % len(cores)]
+        ))
+    fig.update_layout(title=titulo)
+    return fig
+
 # ============================================================================
 # 6. FUNÇÃO PRINCIPAL DE PLOTAGEM
 # ============================================================================
-def carregar_e_plotar(nome_monitor, monitor_info, monitor_key):
-    """Carrega dados e cria visualizações para um monitor específico"""
-    # Carregar dados
-    df = carregar_dados(monitor_info["path"])
+def carregar_e_plotar(nome_monitor, monitor_info, monitor_key, max_pontos=MAX_PONTOS_PADRAO, metodo="LTTB", df=None):
+    """
+    Carrega dados e cria visualizações para um monitor específico.
+
+    df: dados já em memória (modo ao vivo); sem ele, lê o arquivo pelo cache
+    """
+    # Só a análise 2D usa o plotly.express (~0,1 s para importar)
+    import plotly.express as px
+
+    # Carregar dados (arquivo ainda sendo escrito não usa a pirâmide em disco)
+    arquivo_completo = df is None
+    if arquivo_completo:
+        df = carregar_dados(monitor_info["path"])
     if df is None:
         st.error(f"Nenhum arquivo encontrado para {nome_monitor}.")
         return None, None, None, None
+    # Identifica o conteúdo do arquivo para reaproveitar as figuras já montadas
+    arquivo = glob.glob(monitor_info["path"])[0] if arquivo_completo else None
+    origem = hash_arquivo(arquivo) if arquivo_completo else None
+    df_monitor = df  # Completo, antes do filtro de colunas (base da pirâmide)
     
-    # Filtro de colunas zeradas
-    colunas_com_dados = [
-        c for c in df.columns 
-        if not (df[c] == 0).all() or c.lower() in ["hour", "time", "step"]
-    ]
-    df = df[colunas_com_dados]
+    # Filtro de colunas zeradas e identificação do eixo
+    with etapa(ETAPA_MAPEAMENTO, nome_monitor):
+        df = filtrar_colunas_com_dados(df)
 
-    # Identificar colunas
-    eixo_x = next((c for c in df.columns if c.lower() in ["hour", "time"]), df.columns[0])
-    colunas_y = [c for c in df.columns if c != eixo_x]
+        # Identificar colunas
+        eixo_x = next((c for c in df.columns if c.lower() in ["hour", "time"]), df.columns[0])
+        colunas_y = [c for c in df.columns if c != eixo_x]
     
     # Interface de seleção
     st.subheader(f"{nome_monitor} (valores reais)")
@@ -254,7 +385,22 @@ def carregar_e_plotar(nome_monitor, monitor_info, monitor_key):
         key=f"single_{nome_monitor}_{monitor_key}"
     )
     
-    grupo, titulo = detectar_grupo(df, canal)
+    with etapa(ETAPA_MAPEAMENTO, canal):
+        grupo, titulo = detectar_grupo(df, canal)
+
+    # Pirâmide de agregados (só para o eixo em horas dos monitores)
+    with etapa(ETAPA_LEITURA, "pirâmide"):
+        piramide = (
+            carregar_piramide(arquivo, os.stat(arquivo).st_mtime_ns, df_monitor)
+            if eixo_x == "hour" and arquivo_completo else None
+        )
+    niveis_usados = set()
+
+    def assinatura(origem, canais, chave_grafico):
+        # Tudo o que muda a figura: conteúdo do arquivo, canais, zoom, orçamento de pontos
+        if origem is None:
+            return None
+        return (origem, tuple(canais), janela_da_selecao(st.session_state.get(chave_grafico)), max_pontos, metodo)
     
     col1, col2 = st.columns(2)
     
@@ -266,42 +412,115 @@ def carregar_e_plotar(nome_monitor, monitor_info, monitor_key):
         elif canal.startswith(('I', 'i')): yaxis_label = "Corrente [A]"
         elif canal.startswith(('P', 'p')): yaxis_label = "Potência [kW]"
         
-        # Cria o gráfico usando o nome original (V1)
-        fig = px.line(df, x=eixo_x, y=canal, title=f"{nome_monitor} - Detalhe", markers=True)
-        
-        # AQUI ACONTECE A MÁGICA: Renomeia a legenda visualmente
-        novo_nome = MAPA_LEGENDAS.get(canal, canal)
-        fig.for_each_trace(lambda t: t.update(name=novo_nome, legendgroup=novo_nome, hovertemplate=t.hovertemplate.replace(t.name, novo_nome)))
+        # Cria o gráfico usando o nome original (V1), com a janela visível reamostrada
+        chave_grafico = f"grafico_{monitor_key}_{canal}"
+
+        def montar_individual():
+            nivel, df_nivel = nivel_piramide_visivel(piramide, [canal], chave_grafico, max_pontos)
+            if nivel:
+                # Muitas amostras na janela: desenha o nível agregado (faixa mín–máx + média)
+                fig = figura_envelope(df_nivel, [canal], f"{nome_monitor} - Detalhe")
+            else:
+                df_plot = preparar_dados_grafico(df, eixo_x, [canal], chave_grafico, max_pontos, metodo)
+                fig = px.line(df_plot, x=eixo_x, y=canal, title=f"{nome_monitor} - Detalhe", markers=len(df_plot) <= LIMITE_MARCADORES)
+            
+                # AQUI ACONTECE A MÁGICA: Renomeia a legenda visualmente
+                novo_nome = MAPA_LEGENDAS.get(canal, canal)
+                fig.for_each_trace(lambda t: t.update(name=novo_nome, legendgroup=novo_nome, hovertemplate=t.hovertemplate.replace(t.name, novo_nome)))
         
-        fig.update_layout(xaxis_title="Hora", yaxis_title=yaxis_label, template="plotly_white")
-        st.plotly_chart(fig, use_container_width=True)
+            fig.update_layout(xaxis_title="Hora", yaxis_title=yaxis_label, template="plotly_white", dragmode="select")
+            return fig, nivel
+
+        with etapa(ETAPA_FIGURA, f"{nome_monitor} - Detalhe"):
+            fig, nivel = figura_guardada(chave_grafico, assinatura(origem, [canal], chave_grafico), montar_individual)
+        if nivel:
+            niveis_usados.add(nivel)
+        mostrar_grafico(fig, use_container_width=True, key=chave_grafico, on_select="rerun", selection_mode="box")
     
     with col2:
         # --- GRÁFICO DE GRUPO (Todas as fases) ---
         if grupo:
-            fig2 = px.line(df, x=eixo_x, y=grupo, title=f"{nome_monitor} - Trifásico", markers=True)
-            
-            # Renomeia todas as linhas do grupo (V1->Fase A, V2->Fase B...)
-            fig2.for_each_trace(lambda t: t.update(name=MAPA_LEGENDAS.get(t.name, t.name)))
-            
-            fig2.update_layout(xaxis_title="Hora", yaxis_title=titulo, template="plotly_white")
+            chave_grafico_grupo = f"grafico_{monitor_key}_{canal}_grupo"
+
+            def montar_grupo():
+                nivel, df_nivel = nivel_piramide_visivel(piramide, grupo, chave_grafico_grupo, max_pontos)
+                if nivel:
+                    fig2 = figura_envelope(df_nivel, grupo, f"{nome_monitor} - Trifásico")
+                else:
+                    df_plot_grupo = preparar_dados_grafico(df, eixo_x, grupo, chave_grafico_grupo, max_pontos, metodo)
+                    fig2 = px.line(df_plot_grupo, x=eixo_x, y=grupo, title=f"{nome_monitor} - Trifásico", markers=len(df_plot_grupo) <= LIMITE_MARCADORES)
+                
+                    # Renomeia todas as linhas do grupo (V1->Fase A, V2->Fase B...)
+                    fig2.for_each_trace(lambda t: t.update(name=MAPA_LEGENDAS.get(t.name, t.name)))
+                
+                    # Símbolos diferentes
+                    symbols = ["circle", "square", "diamond", "cross", "x", "triangle-up"]
+                    for i, col in enumerate(grupo):
+                        # Precisamos usar o nome original 'col' para selecionar, depois atualizar
+                        nome_legenda = MAPA_LEGENDAS.get(col, col)
+                        fig2.update_traces(selector=dict(name=nome_legenda), marker_symbol=symbols[i % len(symbols)])
             
-            # Símbolos diferentes
-            symbols = ["circle", "square", "diamond", "cross", "x", "triangle-up"]
-            for i, col in enumerate(grupo):
-                # Precisamos usar o nome original 'col' para selecionar, depois atualizar
-                nome_legenda = MAPA_LEGENDAS.get(col, col)
-                fig2.update_traces(selector=dict(name=nome_legenda), marker_symbol=symbols[i % len(symbols)])
+                fig2.update_layout(xaxis_title="Hora", yaxis_title=titulo, template="plotly_white", dragmode="select")
+                return fig2, nivel
+
+            with etapa(ETAPA_FIGURA, f"{nome_monitor} - Trifásico"):
+                fig2, nivel = figura_guardada(
+                    chave_grafico_grupo, assinatura(origem, grupo, chave_grafico_grupo), montar_grupo
+                )
+            if nivel:
+                niveis_usados.add(nivel)
             
-            st.plotly_chart(fig2, use_container_width=True)
+            mostrar_grafico(fig2, use_container_width=True, key=chave_grafico_grupo, on_select="rerun", selection_mode="box")
         else:
             st.info("Visualização em grupo não disponível para esta variável.")
     
+    if niveis_usados:
+        st.caption(
+            f"📊 Janela com mais de {max_pontos:,} amostras: exibindo a pirâmide de agregados "
+            f"({', '.join(sorted(niveis_usados))}) com faixa mín–máx e média. "
+            "Selecione uma região em caixa para descer de nível até as amostras originais."
+        )
+    elif len(df) > max_pontos:
+        st.caption(
+            f"🔎 Gráficos limitados a {max_pontos:,} pontos por curva ({metodo}). "
+            "Selecione uma região em caixa para ampliar com resolução total; duplo clique volta à visão completa."
+        )
+
+    resumo_memoria = resumo_compactacao(df)
+    if resumo_memoria:
+        st.caption(resumo_memoria)
+
     with st.expander("Ver tabela de dados"):
-        st.dataframe(df)
+        render_tabela_paginada(df, f"tabela_{monitor_key}")
     
     return df, eixo_x, canal, grupo
 
+def painel_ao_vivo(nome_monitor, caminho, monitor_key, max_pontos, metodo):
+    """
+    Monitor acompanhado ao vivo: lê só as linhas novas do CSV e redesenha.
+
+    Roda dentro de um st.fragment com run_every, então cada monitor atualiza
+    sozinho, sem refazer o resto da página.
+    """
+    arquivos = glob.glob(caminho)
+    if not arquivos:
+        st.info(f"⏳ Aguardando o OpenDSS criar o monitor de {nome_monitor}...")
+        return None
+
+    # Estado de leitura compartilhado pelo processo; a sessão guarda só a visão
+    visoes = st.session_state.setdefault("monitores_ao_vivo", {})
+    visao = visoes[arquivos[0]] = acompanhar(arquivos[0], visoes.get(arquivos[0]))
+    if visao["df"] is None:
+        st.info(f"⏳ Aguardando as primeiras linhas de {nome_monitor}...")
+        return None
+
+    st.caption(
+        f"📡 Ao vivo: {visao['linhas']:,} linhas lidas "
+        f"(+{visao['linhas_novas']:,} nesta atualização, {visao['posicao'] / 1024:,.0f} kB do arquivo)"
+    )
+    df, _, _, _ = carregar_e_plotar(nome_monitor, {"path": caminho}, monitor_key, max_pontos, metodo, df=visao["df"])
+    return df
+
 # ============================================================================
 # 9. FUNÇÃO DE VISUALIZAÇÃO 3D INDEPENDENTE (COM GRÁFICO 3D RESTAURADO)
 # ============================================================================
@@ -330,6 +549,11 @@ def render_visualizacao_3d_independente():
     with col2:
         # Checkbox para alternar entre 2D e 3D
         modo_visualizacao = st.radio("Modo de Visualização:", ["3D (Espacial)", "2D (Plano)"])
+        # Ângulos não têm base: a opção só vale para magnitudes e potências
+        usar_pu = st.checkbox(
+            "Visualizar em PU (Por Unidade)", key="pu_3d_elemento", disabled="Ângulo" in tipo_variavel,
+            help=f"Bases: kv_base do elemento ({item_selecionado['kv_base']:g} kV) e S base de {S_BASE_CENARIO_MVA:g} MVA"
+        ) and "Ângulo" not in tipo_variavel
 
     with col3:
         fases = st.multiselect("Fases:", ["Fase A (1)", "Fase B (2)", "Fase C (3)"], default=["Fase A (1)", "Fase B (2)", "Fase C (3)"])
@@ -351,108 +575,114 @@ def render_visualizacao_3d_independente():
     # Mapeamento para posicionar as fases no eixo Y do gráfico 3D
     posicao_fases = {"Fase A (1)": 0, "Fase B (2)": 1, "Fase C (3)": 2}
     
-    col_tempo = next((c for c in df.columns if c.lower() in ["hour", "time", "t(h)"]), df.columns[0])
-    eixo_x = df[col_tempo]
+    with etapa(ETAPA_MAPEAMENTO, escolha_elemento):
+        col_tempo = next((c for c in df.columns if c.lower() in ["hour", "time", "t(h)"]), df.columns[0])
+        eixo_x = df[col_tempo]
     
-    colunas_para_plotar = []
+        colunas_para_plotar = []
 
-    for fase_selecionada in fases:
-        num_fase = mapa_fases[fase_selecionada]
+        for fase_selecionada in fases:
+            num_fase = mapa_fases[fase_selecionada]
         
-        # Regex para encontrar a coluna (Mesma lógica da resposta anterior)
-        padrao = ""
-        if "Tensão (Magnitude)" in tipo_variavel: padrao = f"V{num_fase}$| V{num_fase}$|V{num_fase}\\s"
-        elif "Tensão (Ângulo)" in tipo_variavel: padrao = f"Ang.*{num_fase}"
-        elif "Corrente (Magnitude)" in tipo_variavel: padrao = f"I{num_fase}$| I{num_fase}$|I{num_fase}\\s"
-        elif "Corrente (Ângulo)" in tipo_variavel: padrao = f"Ang.*I{num_fase}|Ang.*{num_fase}"
-        elif "Potência Ativa" in tipo_variavel: padrao = f"P{num_fase}| P{num_fase}"
-        elif "Potência Reativa" in tipo_variavel: padrao = f"Q{num_fase}| Q{num_fase}"
-
-        col_encontrada = None
-        for col in df.columns:
-            if re.search(padrao, col, re.IGNORECASE) and col != col_tempo:
-                if "Magnitude" in tipo_variavel and "Ang" in col: continue
-                if "Corrente (Magnitude)" in tipo_variavel and "Ang" in col: continue
-                col_encontrada = col
-                break
+            # Regex para encontrar a coluna (Mesma lógica da resposta anterior)
+            padrao = ""
+            if "Tensão (Magnitude)" in tipo_variavel: padrao = f"V{num_fase}$| V{num_fase}$|V{num_fase}\\s"
+            elif "Tensão (Ângulo)" in tipo_variavel: padrao = f"Ang.*{num_fase}"
+            elif "Corrente (Magnitude)" in tipo_variavel: padrao = f"I{num_fase}$| I{num_fase}$|I{num_fase}\\s"
+            elif "Corrente (Ângulo)" in tipo_variavel: padrao = f"Ang.*I{num_fase}|Ang.*{num_fase}"
+            elif "Potência Ativa" in tipo_variavel: padrao = f"P{num_fase}| P{num_fase}"
+            elif "Potência Reativa" in tipo_variavel: padrao = f"Q{num_fase}| Q{num_fase}"
+
+            col_encontrada = None
+            for col in df.columns:
+                if re.search(padrao, col, re.IGNORECASE) and col != col_tempo:
+                    if "Magnitude" in tipo_variavel and "Ang" in col: continue
+                    if "Corrente (Magnitude)" in tipo_variavel and "Ang" in col: continue
+                    col_encontrada = col
+                    break
         
-        if col_encontrada:
-            colunas_para_plotar.append((fase_selecionada, col_encontrada))
+            if col_encontrada:
+                colunas_para_plotar.append((fase_selecionada, col_encontrada))
+
+        # Valores das fases escolhidas (em pu: um fator por coluna, de uma vez)
+        colunas_valores = [c for _, c in colunas_para_plotar]
+        if usar_pu:
+            valores = converter_df_pu(df, item_selecionado["kv_base"], S_BASE_CENARIO_MVA, colunas=colunas_valores)
+        else:
+            valores = df[colunas_valores]
+        rotulo_z = f"{tipo_variavel} [pu]" if usar_pu else tipo_variavel
 
     # 5. PLOTAGEM (AQUI ESTÁ A CORREÇÃO PARA 3D)
     if colunas_para_plotar:
-        fig = go.Figure()
+        with etapa(ETAPA_FIGURA, escolha_elemento):
+            fig = go.Figure()
         
-        # --- MODO 3D (EFEITO COMPLETO) ---
-        if modo_visualizacao == "3D (Espacial)":
+            # --- MODO 3D (EFEITO COMPLETO) ---
+            if modo_visualizacao == "3D (Espacial)":
             
-            # 1. PREPARAR DADOS
-            z_data = []
-            y_labels = [] 
+                # 1. PREPARAR DADOS
+                z_data = []
+                y_labels = [] 
             
-            for nome_fase, nome_coluna in colunas_para_plotar:
-                z_data.append(df[nome_coluna].values)
-                y_labels.append(nome_fase)            
+                for nome_fase, nome_coluna in colunas_para_plotar:
+                    z_data.append(valores[nome_coluna].values)
+                    y_labels.append(nome_fase)            
             
-            # 2. CAMADA 1: O TAPETE (Superfície Colorida)
-            fig.add_trace(go.Surface(
-                z=z_data,
-                x=eixo_x,
-                y=[0, 1, 2], 
-                colorscale='Turbo',
-                opacity=0.8, # Deixei um pouco mais transparente para ver as linhas pretas
-                contours_z=dict(show=True, usecolormap=True, project_z=True),
-                colorbar=dict(title=tipo_variavel)
-            ))
-
-            # 3. CAMADA 2: AS BORDAS (Seu código aqui!)
-            # Isso desenha uma linha preta grossa em cima de cada fase para destacar
-            for i, nome in enumerate(y_labels):
-                fig.add_trace(go.Scatter3d(
-                    x=eixo_x,
-                    y=[i] * len(eixo_x),
-                    z=z_data[i], # Usa os mesmos dados do tapete
-                    mode='lines',
-                    line=dict(width=5, color='black'), # Linha grossa preta
-                    name=nome,
-                    showlegend=False
+                # Reduz o tempo no servidor (mín/máx por intervalo), sem perder picos
+                z_data, eixo_x_3d, y_labels, resumo_grade = reduzir_grade(z_data, eixo_x, y_labels)
+
+                # 2. CAMADA 1: O TAPETE (Superfície Colorida)
+                fig.add_trace(go.Surface(
+                    z=z_data,
+                    x=eixo_x_3d,
+                    y=[0, 1, 2], 
+                    colorscale='Turbo',
+                    opacity=0.8, # Deixei um pouco mais transparente para ver as linhas pretas
+                    contours_z=dict(show=True, usecolormap=True, project_z=True),
+                    colorbar=dict(title=rotulo_z)
                 ))
+
+                # 3. CAMADA 2: AS BORDAS (Seu código aqui!)
+                # Uma linha preta grossa em cima de cada fase, todas no mesmo traço
+                fig.add_trace(traco_bordas(z_data, eixo_x_3d, np.arange(len(y_labels)), y_labels, largura=5))
             
-            # 4. A MOLDURA (Layout Padronizado)
-            fig.update_layout(
-                title=f"Perfil: {escolha_elemento} - {tipo_variavel}",
-                height=600,
-                margin=dict(l=0, r=0, b=0, t=40),
-                scene=dict(
-                    xaxis_title="Tempo",
-                    yaxis_title="Fases",
-                    zaxis_title=tipo_variavel,
+                # 4. A MOLDURA (Layout Padronizado)
+                fig.update_layout(
+                    title=f"Perfil: {escolha_elemento} - {rotulo_z}",
+                    height=600,
+                    margin=dict(l=0, r=0, b=0, t=40),
+                    scene=dict(
+                        xaxis_title="Tempo",
+                        yaxis_title="Fases",
+                        zaxis_title=rotulo_z,
                     
-                    xaxis=dict(backgroundcolor="white", gridcolor="lightgrey", showbackground=True),
-                    yaxis=dict(
-                        backgroundcolor="white", 
-                        gridcolor="lightgrey", 
-                        showbackground=True,
-                        tickmode='array',      
-                        tickvals=[0, 1, 2],
-                        ticktext=y_labels
-                    ),
-                    zaxis=dict(backgroundcolor="white", gridcolor="lightgrey", showbackground=True),
+                        xaxis=dict(backgroundcolor="white", gridcolor="lightgrey", showbackground=True),
+                        yaxis=dict(
+                            backgroundcolor="white", 
+                            gridcolor="lightgrey", 
+                            showbackground=True,
+                            tickmode='array',      
+                            tickvals=[0, 1, 2],
+                            ticktext=y_labels
+                        ),
+                        zaxis=dict(backgroundcolor="white", gridcolor="lightgrey", showbackground=True),
                     
-                    aspectmode="manual",
-                    aspectratio=dict(x=1, y=0.5, z=0.5) 
+                        aspectmode="manual",
+                        aspectratio=dict(x=1, y=0.5, z=0.5) 
+                    )
                 )
-            )
 
-        # --- MODO 2D ---
-        else:
-            for nome_fase, nome_coluna in colunas_para_plotar:
-                fig.add_trace(go.Scatter(
-                    x=eixo_x, y=df[nome_coluna], mode='lines', name=nome_fase
-                ))
-            fig.update_layout(height=500, title=f"Perfil 2D: {escolha_elemento}")
+            # --- MODO 2D ---
+            else:
+                for nome_fase, nome_coluna in colunas_para_plotar:
+                    fig.add_trace(go.Scatter(
+                        x=eixo_x, y=valores[nome_coluna], mode='lines', name=nome_fase
+                    ))
+                fig.update_layout(height=500, title=f"Perfil 2D: {escolha_elemento}", yaxis_title=rotulo_z)
 
-        st.plotly_chart(fig, use_container_width=True)
+        mostrar_grafico(fig, use_container_width=True)
+        if modo_visualizacao == "3D (Espacial)" and texto_resumo_grade(resumo_grade):
+            st.caption(texto_resumo_grade(resumo_grade))
         
     else:
         st.warning("Colunas não encontradas.")   
@@ -464,99 +694,6 @@ def render_visualizacao_3d_independente():
 # ============================================================================
 # 8. FUNÇÃO PARA CÁLCULO DE DESEQUILÍBRIO DE TENSÃO (PRODIST MÓDULO 8)
 # ============================================================================
-def calcular_componentes_simetricas(Va_mag, Va_ang, Vb_mag, Vb_ang, Vc_mag, Vc_ang):
-    """
-    Calcula componentes simétricas (positiva, negativa, zero)
-    a partir de tensões de fase.
-    
-    Parâmetros:
-        Va_mag, Vb_mag, Vc_mag: Magnitudes das tensões (V)
-        Va_ang, Vb_ang, Vc_ang: Ângulos das tensões (graus)
-    
-    Retorna:
-        V_pos: Tensão de sequência positiva (módulo e ângulo)
-        V_neg: Tensão de sequência negativa (módulo e ângulo)
-        V_zero: Tensão de sequência zero (módulo e ângulo)
-    """
-    # Converter para radianos e forma complexa
-    Va = Va_mag * np.exp(1j * np.radians(Va_ang))
-    Vb = Vb_mag * np.exp(1j * np.radians(Vb_ang))
-    Vc = Vc_mag * np.exp(1j * np.radians(Vc_ang))
-    
-    # Operador 'a' (rotação de 120°)
-    a = np.exp(1j * np.radians(120))
-    a2 = np.exp(1j * np.radians(240))
-    
-    # Matriz de transformação de componentes simétricas
-    # [V0] = 1/3 * [1   1   1] [Va]
-    # [V1] = 1/3 * [1   a  a2] [Vb]
-    # [V2] = 1/3 * [1  a2   a] [Vc]
-    
-    V_zero = (Va + Vb + Vc) / 3
-    V_pos = (Va + a * Vb + a2 * Vc) / 3
-    V_neg = (Va + a2 * Vb + a * Vc) / 3
-    
-    # Converter de volta para módulo e ângulo
-    def polar(complex_num):
-        magnitude = np.abs(complex_num)
-        angle = np.degrees(np.angle(complex_num))
-        return magnitude, angle
-    
-    V_pos_mag, V_pos_ang = polar(V_pos)
-    V_neg_mag, V_neg_ang = polar(V_neg)
-    V_zero_mag, V_zero_ang = polar(V_zero)
-    
-    return {
-        'positiva': (V_pos_mag, V_pos_ang),
-        'negativa': (V_neg_mag, V_neg_ang),
-        'zero': (V_zero_mag, V_zero_ang)
-    }
-
-def calcular_fator_desequilibrio(df):
-    """
-    Calcula o fator de desequilíbrio de tensão para cada ponto no tempo.
-    
-    Fator de desequilíbrio = (V_negativa / V_positiva) × 100%
-    """
-    resultados = []
-    
-    for idx, row in df.iterrows():
-        # Obter magnitudes e ângulos (ajustar nomes das colunas se necessário)
-        Va_mag = row['V1'] if 'V1' in df.columns else row.get('V1mag', 0)
-        Va_ang = row['VAngle1'] if 'VAngle1' in df.columns else row.get('V1ang', 0)
-        
-        Vb_mag = row['V2'] if 'V2' in df.columns else row.get('V2mag', 0)
-        Vb_ang = row['VAngle2'] if 'VAngle2' in df.columns else row.get('V2ang', 0)
-        
-        Vc_mag = row['V3'] if 'V3' in df.columns else row.get('V3mag', 0)
-        Vc_ang = row['VAngle3'] if 'VAngle3' in df.columns else row.get('V3ang', 0)
-        
-        # Calcular componentes simétricas
-        componentes = calcular_componentes_simetricas(
-            Va_mag, Va_ang, Vb_mag, Vb_ang, Vc_mag, Vc_ang
-        )
-        
-        V_pos_mag, _ = componentes['positiva']
-        V_neg_mag, _ = componentes['negativa']
-        V_zero_mag, _ = componentes['zero']
-        
-        # Calcular fator de desequilíbrio
-        if V_pos_mag > 0:
-            fator_desequilibrio = (V_neg_mag / V_pos_mag) * 100
-        else:
-            fator_desequilibrio = 0
-        
-        resultados.append({
-            'hora': row['hour'] if 'hour' in df.columns else idx,
-            'V_positiva': V_pos_mag,
-            'V_negativa': V_neg_mag,
-            'V_zero': V_zero_mag,
-            'FD (%)': fator_desequilibrio,
-            'FD_limite': 3.0  # Limite PRODIST (ajustável)
-        })
-    
-    return pd.DataFrame(resultados)
-
 def render_analise_desequilibrio(df_sub, df_carga):
     """Renderiza análise de desequilíbrio de tensão conforme PRODIST"""
     st.divider()
@@ -584,95 +721,112 @@ def render_analise_desequilibrio(df_sub, df_carga):
     
     for idx, (tab, (nome, df)) in enumerate(zip(tabs, dados_disponiveis)):
         with tab:
+            # Figuras reaproveitadas enquanto o monitor (e a base) não mudar
+            kv_base = df.attrs.get("kv_base")
+            assinatura = None if df.attrs.get("origem") is None else (df.attrs["origem"], kv_base, S_BASE_CENARIO_MVA)
             # Calcular fator de desequilíbrio
-            df_fd = calcular_fator_desequilibrio(df)
+            with etapa(ETAPA_CALCULO, f"FD {nome}"):
+                df_fd = calcular_fator_desequilibrio(df)
             
             col1, col2 = st.columns(2)
             
             with col1:
                 # Gráfico do fator de desequilíbrio
-                fig = go.Figure()
-                
-                # Linha do fator de desequilíbrio
-                fig.add_trace(go.Scatter(
-                    x=df_fd['hora'],
-                    y=df_fd['FD (%)'],
-                    mode='lines+markers',
-                    name='Fator de Desequilíbrio',
-                    line=dict(color='blue', width=2),
-                    marker=dict(size=8)
-                ))
+                def montar_fd():
+                    fig = go.Figure()
                 
-                # Linha do limite PRODIST
-                fig.add_trace(go.Scatter(
-                    x=df_fd['hora'],
-                    y=df_fd['FD_limite'],
-                    mode='lines',
-                    name='Limite PRODIST (3.0%)',
-                    line=dict(color='red', width=2, dash='dash'),
-                    fillcolor='rgba(255, 0, 0, 0.1)',
-                    fill='tonexty'
-                ))
-                
-                fig.update_layout(
-                    title=f'Fator de Desequilíbrio - {nome}',
-                    xaxis_title='Hora',
-                    yaxis_title='Fator de Desequilíbrio (%)',
-                    template='plotly_white',
-                    height=400,
-                    hovermode='x unified'
-                )
+                    # Linha do fator de desequilíbrio
+                    fig.add_trace(go.Scatter(
+                        x=df_fd['hora'],
+                        y=df_fd['FD (%)'],
+                        mode='lines+markers',
+                        name='Fator de Desequilíbrio',
+                        line=dict(color='blue', width=2),
+                        marker=dict(size=8)
+                    ))
                 
-                # Destacar pontos acima do limite
-                acima_limite = df_fd[df_fd['FD (%)'] > 3.0]
-                if not acima_limite.empty:
+                    # Linha do limite PRODIST
                     fig.add_trace(go.Scatter(
-                        x=acima_limite['hora'],
-                        y=acima_limite['FD (%)'],
-                        mode='markers',
-                        name='Acima do Limite',
-                        marker=dict(color='red', size=10, symbol='x')
+                        x=df_fd['hora'],
+                        y=df_fd['FD_limite'],
+                        mode='lines',
+                        name='Limite PRODIST (3.0%)',
+                        line=dict(color='red', width=2, dash='dash'),
+                        fillcolor='rgba(255, 0, 0, 0.1)',
+                        fill='tonexty'
                     ))
                 
-                st.plotly_chart(fig, use_container_width=True)
+                    fig.update_layout(
+                        title=f'Fator de Desequilíbrio - {nome}',
+                        xaxis_title='Hora',
+                        yaxis_title='Fator de Desequilíbrio (%)',
+                        template='plotly_white',
+                        height=400,
+                        hovermode='x unified'
+                    )
+                
+                    # Destacar pontos acima do limite
+                    acima_limite = df_fd[df_fd['FD (%)'] > 3.0]
+                    if not acima_limite.empty:
+                        fig.add_trace(go.Scatter(
+                            x=acima_limite['hora'],
+                            y=acima_limite['FD (%)'],
+                            mode='markers',
+                            name='Acima do Limite',
+                            marker=dict(color='red', size=10, symbol='x')
+                        ))
+                    return fig, None
+
+                with etapa(ETAPA_FIGURA, f"FD {nome}"):
+                    fig, _ = figura_guardada(f"fd_{nome}", assinatura, montar_fd)
+                mostrar_grafico(fig, use_container_width=True)
             
             with col2:
                 # Gráfico das componentes simétricas
-                fig2 = go.Figure()
+                def montar_componentes():
+                    fig2 = go.Figure()
+                    # Com o kv_base do elemento as três sequências vão para pu com um só fator
+                    sequencias = ['V_positiva', 'V_negativa', 'V_zero']
+                    componentes = df_fd[sequencias].to_numpy(dtype=float)
+                    if kv_base:
+                        componentes = componentes * fatores_pu(sequencias, kv_base, S_BASE_CENARIO_MVA, TENSAO)
                 
-                fig2.add_trace(go.Scatter(
-                    x=df_fd['hora'],
-                    y=df_fd['V_positiva'],
-                    mode='lines+markers',
-                    name='Sequência Positiva (V+)',
-                    line=dict(color='green', width=2)
-                ))
-                
-                fig2.add_trace(go.Scatter(
-                    x=df_fd['hora'],
-                    y=df_fd['V_negativa'],
-                    mode='lines+markers',
-                    name='Sequência Negativa (V-)',
-                    line=dict(color='orange', width=2)
-                ))
+                    fig2.add_trace(go.Scatter(
+                        x=df_fd['hora'],
+                        y=componentes[:, 0],
+                        mode='lines+markers',
+                        name='Sequência Positiva (V+)',
+                        line=dict(color='green', width=2)
+                    ))
                 
-                fig2.add_trace(go.Scatter(
-                    x=df_fd['hora'],
-                    y=df_fd['V_zero'],
-                    mode='lines+markers',
-                    name='Sequência Zero (V0)',
-                    line=dict(color='purple', width=2)
-                ))
+                    fig2.add_trace(go.Scatter(
+                        x=df_fd['hora'],
+                        y=componentes[:, 1],
+                        mode='lines+markers',
+                        name='Sequência Negativa (V-)',
+                        line=dict(color='orange', width=2)
+                    ))
                 
-                fig2.update_layout(
-                    title=f'Componentes Simétricas - {nome}',
-                    xaxis_title='Hora',
-                    yaxis_title='Tensão [V]',
-                    template='plotly_white',
-                    height=400
-                )
+                    fig2.add_trace(go.Scatter(
+                        x=df_fd['hora'],
+                        y=componentes[:, 2],
+                        mode='lines+markers',
+                        name='Sequência Zero (V0)',
+                        line=dict(color='purple', width=2)
+                    ))
                 
-                st.plotly_chart(fig2, use_container_width=True)
+                    fig2.update_layout(
+                        title=f'Componentes Simétricas - {nome}',
+                        xaxis_title='Hora',
+                        yaxis_title='Tensão [pu]' if kv_base else 'Tensão [V]',
+                        template='plotly_white',
+                        height=400
+                    )
+                    return fig2, None
+
+                with etapa(ETAPA_FIGURA, f"Componentes simétricas {nome}"):
+                    fig2, _ = figura_guardada(f"componentes_{nome}", assinatura, montar_componentes)
+                mostrar_grafico(fig2, use_container_width=True)
             
             # Estatísticas
             st.markdown("###  Estatísticas do Desequilíbrio")
@@ -714,18 +868,16 @@ def render_analise_desequilibrio(df_sub, df_carga):
             
             # Tabela com resultados detalhados
             with st.expander(" Ver Tabela de Resultados Detalhados"):
-                st.dataframe(
-                    df_fd.style.format({
+                render_tabela_paginada(
+                    df_fd, f"tabela_desequilibrio_{idx}",
+                    colunas_destaque=['FD (%)'],
+                    classificar=classes_desequilibrio,
+                    formato={
                         'V_positiva': '{:.2f}',
                         'V_negativa': '{:.2f}',
                         'V_zero': '{:.2f}',
                         'FD (%)': '{:.4f}%'
-                    }).apply(
-                        lambda x: ['background-color: #ffcccc' if v > 3.0 and k == 'FD (%)' 
-                                 else '' for k, v in x.items()],
-                        axis=1
-                    ),
-                    use_container_width=True
+                    }
                 )
             
             # Recomendações baseadas nos resultados
@@ -760,46 +912,55 @@ def render_analise_desequilibrio(df_sub, df_carga):
         st.divider()
         st.subheader(" Análise Comparativa")
         
+        assinatura = (df_sub.attrs.get("origem"), df_carga.attrs.get("origem"))
+        if None in assinatura:
+            assinatura = None
+
         # Calcular para ambos
-        df_fd_sub = calcular_fator_desequilibrio(df_sub)
-        df_fd_carga = calcular_fator_desequilibrio(df_carga)
+        with etapa(ETAPA_CALCULO, "FD comparativo"):
+            df_fd_sub = calcular_fator_desequilibrio(df_sub)
+            df_fd_carga = calcular_fator_desequilibrio(df_carga)
         
-        fig_comp = go.Figure()
+        def montar_comparativo():
+            fig_comp = go.Figure()
         
-        fig_comp.add_trace(go.Scatter(
-            x=df_fd_sub['hora'],
-            y=df_fd_sub['FD (%)'],
-            mode='lines+markers',
-            name='Subestação',
-            line=dict(color='blue', width=2)
-        ))
-        
-        fig_comp.add_trace(go.Scatter(
-            x=df_fd_carga['hora'],
-            y=df_fd_carga['FD (%)'],
-            mode='lines+markers',
-            name='Carga D',
-            line=dict(color='green', width=2)
-        ))
+            fig_comp.add_trace(go.Scatter(
+                x=df_fd_sub['hora'],
+                y=df_fd_sub['FD (%)'],
+                mode='lines+markers',
+                name='Subestação',
+                line=dict(color='blue', width=2)
+            ))
         
-        # Linha do limite
-        fig_comp.add_trace(go.Scatter(
-            x=df_fd_sub['hora'],
-            y=[3.0] * len(df_fd_sub),
-            mode='lines',
-            name='Limite 3.0%',
-            line=dict(color='red', width=2, dash='dash')
-        ))
+            fig_comp.add_trace(go.Scatter(
+                x=df_fd_carga['hora'],
+                y=df_fd_carga['FD (%)'],
+                mode='lines+markers',
+                name='Carga D',
+                line=dict(color='green', width=2)
+            ))
         
-        fig_comp.update_layout(
-            title='Comparação do Fator de Desequilíbrio',
-            xaxis_title='Hora',
-            yaxis_title='Fator de Desequilíbrio (%)',
-            template='plotly_white',
-            height=500
-        )
+            # Linha do limite
+            fig_comp.add_trace(go.Scatter(
+                x=df_fd_sub['hora'],
+                y=[3.0] * len(df_fd_sub),
+                mode='lines',
+                name='Limite 3.0%',
+                line=dict(color='red', width=2, dash='dash')
+            ))
         
-        st.plotly_chart(fig_comp, use_container_width=True)
+            fig_comp.update_layout(
+                title='Comparação do Fator de Desequilíbrio',
+                xaxis_title='Hora',
+                yaxis_title='Fator de Desequilíbrio (%)',
+                template='plotly_white',
+                height=500
+            )
+            return fig_comp, None
+
+        with etapa(ETAPA_FIGURA, "FD comparativo"):
+            fig_comp, _ = figura_guardada("fd_comparativo", assinatura, montar_comparativo)
+        mostrar_grafico(fig_comp, use_container_width=True)
         
         # Insights
         st.markdown("#### Análise Comparativa")
@@ -817,6 +978,80 @@ def render_analise_desequilibrio(df_sub, df_carga):
             sugerindo possíveis problemas na distribuição ou nas cargas.
             """)
 
+@st.cache_resource(max_entries=2, show_spinner="Calculando as componentes simétricas de todos os elementos...")
+def sequencias_topologia(elementos):
+    """
+    Tabela longa (elemento × instante) e resumo das sequências de tensão e corrente.
+
+    elementos: tupla de (nome, caminho, hash do conteúdo); o hash entra na
+    chave, então um monitor alterado refaz o cálculo. Não altere o retorno.
+    """
+    dados = {nome: carregar_dados(caminho) for nome, caminho, _ in elementos}
+    tabela = calcular_sequencias_lote(dados)
+    return tabela, resumir_sequencias(tabela)
+
+def render_sequencias_topologia():
+    """Componentes simétricas de tensão e corrente de todos os elementos (sob demanda)"""
+    st.divider()
+    st.subheader(" Componentes Simétricas de Todos os Elementos")
+
+    if not st.toggle("Calcular para todos os elementos (tensão e corrente)", key="sequencias_todos"):
+        st.caption(
+            f"Sequências positiva, negativa e zero de tensão e corrente e os fatores de desequilíbrio "
+            f"dos {len(TOPOLOGIA_SISTEMA)} elementos, numa única chamada vetorizada."
+        )
+        return
+
+    elementos = []
+    for item in TOPOLOGIA_SISTEMA:
+        arquivos = glob.glob(item["arquivo_vi"])
+        if arquivos:
+            elementos.append((item["nome"], item["arquivo_vi"], hash_arquivo(arquivos[0])))
+    if not elementos:
+        st.warning("Nenhum monitor de tensão encontrado.")
+        return
+
+    with etapa(ETAPA_CALCULO, f"sequências ({len(elementos)} elementos)"):
+        tabela, resumo = sequencias_topologia(tuple(elementos))
+
+    def montar_barras():
+        fig = go.Figure([
+            go.Bar(x=resumo["elemento"], y=resumo["FD_max (%)"], name="Tensão (FD máx.)"),
+            go.Bar(x=resumo["elemento"], y=resumo["FD_I_max (%)"], name="Corrente (FD_I máx.)"),
+        ])
+        fig.add_hline(y=LIMITE_FD_PRODIST, line_dash="dash", line_color="red",
+                      annotation_text=f"Limite PRODIST ({LIMITE_FD_PRODIST:.1f}%)")
+        fig.update_layout(
+            title="Desequilíbrio Máximo por Elemento",
+            yaxis_title="Fator de Desequilíbrio (%)",
+            barmode="group",
+            template="plotly_white",
+            height=400
+        )
+        return fig, None
+
+    with etapa(ETAPA_FIGURA, "sequências por elemento"):
+        fig, _ = figura_guardada("sequencias_por_elemento", tuple(elementos), montar_barras)
+    mostrar_grafico(fig, use_container_width=True)
+
+    st.dataframe(
+        estilo_pagina(
+            resumo, ["FD_max (%)", "FD_p95 (%)"], classes_desequilibrio,
+            formato={c: "{:.4f}" for c in resumo.columns if c not in ("elemento", "amostras")}
+        ),
+        hide_index=True, use_container_width=True
+    )
+    st.caption("O desequilíbrio de corrente (FD_I) não tem limite no PRODIST; I_zero indica corrente de neutro.")
+
+    with st.expander(" Ver tabela completa (elemento × instante)"):
+        render_tabela_paginada(
+            tabela, "tabela_sequencias",
+            colunas_destaque=["FD (%)"],
+            classificar=classes_desequilibrio,
+            formato="{:.4f}"
+        )
+        st.caption("Para exportar: python main.py sequencias config_circuito.json -o sequencias.parquet")
+
 # ============================================================================
 # 8. FUNÇÃO COMPARATIVA 3D (TOPOLOGIA) - VERSÃO COMPLETA COM PU
 # ============================================================================
@@ -853,7 +1088,14 @@ def render_topologia_comparativa():
         
     with col3:
         # Se for usar PU, precisamos da Base de Potência
-        s_base_mva = st.number_input("S Base (MVA):", value=100.0, step=10.0)
+        s_base_mva = st.number_input("S Base (MVA):", value=S_BASE_CENARIO_MVA, step=10.0)
+
+    with st.sidebar:
+        st.subheader("Desempenho do 3D")
+        max_celulas = st.number_input(
+            "Células da superfície (máx.):", min_value=1_000, max_value=2_000_000,
+            value=MAX_CELULAS_PADRAO, step=10_000
+        )
 
     # --- 2. CONFIGURAÇÃO INTELIGENTE (O Segredo para não dar erro) ---
     # Define qual arquivo usar e qual coluna buscar baseado na escolha
@@ -876,146 +1118,102 @@ def render_topologia_comparativa():
     tipo_arquivo_necessario = config_atual["tipo"] # "VI" ou "PQ"
     lista_colunas_possiveis = config_atual["col_match"]
     
-    # --- 3. PROCESSAMENTO DOS DADOS ---
-    dados_z = []      
-    nomes_eixo_y = [] 
-    eixo_x = None     
-    
-    progresso = st.progress(0, text="Processando topologia...")
-
-    for i, item in enumerate(itens_filtrados):
-        nome_barra = item["nome"]
-        kv_base_barra = item["kv_base"] # Tensão nominal daquela barra (ex: 13.8 ou 138)
-        
-        # LÓGICA DE SELEÇÃO DE ARQUIVO (A CORREÇÃO PRINCIPAL)
-        if tipo_arquivo_necessario == "VI":
-            caminho = item["arquivo_vi"]
-        else:
-            caminho = item["arquivo_pq"]
-            
-        df = carregar_dados(caminho)
-        
-        if df is not None:
-            # Tenta achar a coluna correta (ex: V1, P1...)
-            coluna_alvo = None
-            for col in df.columns:
-                if any(x in col for x in lista_colunas_possiveis):
-                    coluna_alvo = col
-                    break
-            
-            if coluna_alvo:
-                # Captura o Eixo X (Tempo) apenas na primeira iteração válida
-                if eixo_x is None:
-                    # Tenta achar coluna de tempo ou usa índice
-                    col_tempo = next((c for c in df.columns if c.lower() in ["hour", "time", "t(h)"]), None)
-                    if col_tempo:
-                        eixo_x = df[col_tempo].values
-                    else:
-                        eixo_x = np.arange(len(df))
-
-                # Pega os valores brutos
-                valor_bruto = df[coluna_alvo].values
-                valor_final = valor_bruto
-
-                # --- CÁLCULO DO PU (RESTAURADO) ---
-                if usar_pu:
-                    # 1. Tensão (Vpu = V_lida / Vbase_fase_neutro)
-                    # Nota: O arquivo OpenDSS geralmente dá V em Volts ou kV. O kv_base é linha-linha.
-                    if "Tensão" in variavel:
-                        # Vbase fase-neutro em Volts = (kV_base * 1000) / sqrt(3)
-                        # Assumindo que o arquivo CSV traz em Volts (comum em monitores mode=0)
-                        # Se o arquivo já estiver em kV, ajustar a multiplicação
-                        v_base_volts = (kv_base_barra * 1000) / 1.73205
-                        # Se o valor bruto for muito pequeno, pode ser que o csv esteja em kV. 
-                        # Aqui assumimos CSV em Volts (padrão OpenDSS Monitor V).
-                        valor_final = valor_bruto / v_base_volts
-
-                    # 2. Corrente (Ipu = I / Ibase)
-                    elif "Corrente" in variavel:
-                        v_base_volts = (kv_base_barra * 1000) # Tensão linha
-                        s_base_va = s_base_mva * 1_000_000
-                        i_base = s_base_va / (1.73205 * v_base_volts)
-                        valor_final = valor_bruto / i_base
-
-                    # 3. Potência (Ppu = P_kW / Sbase_kVA)
-                    elif "Potência" in variavel:
-                        s_base_kva = s_base_mva * 1000
-                        valor_final = valor_bruto / s_base_kva
-
-                dados_z.append(valor_final)
-                nomes_eixo_y.append(nome_barra)
-        
-        # Atualiza barra de progresso
-        progresso.progress((i + 1) / len(TOPOLOGIA_SISTEMA))
+    # --- 3. PROCESSAMENTO DOS DADOS (barras em paralelo) ---
+    progresso = st.progress(0.0, text="Processando topologia...")
+    dono = sessao_armazem()  # As threads não acessam o st.session_state
+
+    def atualizar_progresso(concluidas, total, nome_barra):
+        progresso.progress(concluidas / total, text=f"Processando topologia... {concluidas}/{total} ({nome_barra})")
+
+    with etapa(ETAPA_CALCULO, "topologia" + (" em pu" if usar_pu else "")):
+        Z, eixo_x, nomes_eixo_y = carregar_topologia(
+            itens_filtrados, tipo_arquivo_necessario, lista_colunas_possiveis,
+            variavel.split()[0], usar_pu, s_base_mva,
+            carregar=lambda caminho: carregar_dados(caminho, dono),
+            ao_progredir=atualizar_progresso
+        )
 
     progresso.empty()
 
     # --- 4. PLOTAGEM 3D (SUPERFÍCIE / WATERFALL) ---
-    if not dados_z:
+    if Z is None:
         st.error("Não foram encontrados dados compatíveis para a visualização.")
         return
 
-    Z = np.array(dados_z)
-    Y_indices = np.arange(len(nomes_eixo_y))
-    # Cria malha para o plot
-    # Se eixo_x for muito grande, o plot 3D pode ficar pesado. 
-    # Dica: Se quiser mais performance, adicione [::5] para pular dados.
-    if len(eixo_x) != Z.shape[1]:
-        # Fallback se tamanhos diferem
-        eixo_x = np.arange(Z.shape[1])
-        
-    X, Y = np.meshgrid(eixo_x, Y_indices)
+    # Reduz a grade no servidor (mín/máx por intervalo) antes de montar a figura
+    with etapa(ETAPA_FIGURA, f"Topologia 3D: {variavel}"):
+        Z, eixo_x, nomes_eixo_y, resumo_grade = reduzir_grade(Z, eixo_x, nomes_eixo_y, max_celulas)
+        Y_indices = np.arange(len(nomes_eixo_y))
 
-    fig = go.Figure()
+        fig = go.Figure()
 
-    # Define Cores
-    if "Tensão" in variavel: cmap = 'Viridis'
-    elif "Corrente" in variavel: cmap = 'Plasma'
-    else: cmap = 'Inferno'
-
-    # Adiciona Superfície
-    fig.add_trace(go.Surface(
-        z=Z, x=X, y=Y,
-        colorscale=cmap,
-        colorbar=dict(title="PU" if usar_pu else config_atual["unidade"]),
-        opacity=0.9
-    ))
-
-    # Adiciona Linhas de destaque (efeito Waterfall) nas bordas
-    for i, nome in enumerate(nomes_eixo_y):
-        fig.add_trace(go.Scatter3d(
-            x=eixo_x,
-            y=[i] * len(eixo_x),
-            z=Z[i],
-            mode='lines',
-            line=dict(width=4, color='black'), # Linha preta destaca a borda
-            name=nome,
-            showlegend=False
+        # Define Cores
+        if "Tensão" in variavel: cmap = 'Viridis'
+        elif "Corrente" in variavel: cmap = 'Plasma'
+        else: cmap = 'Inferno'
+
+        # Adiciona Superfície (x e y 1D: o Plotly monta a malha no navegador)
+        fig.add_trace(go.Surface(
+            z=Z, x=eixo_x, y=Y_indices,
+            colorscale=cmap,
+            colorbar=dict(title="PU" if usar_pu else config_atual["unidade"]),
+            opacity=0.9
         ))
 
-    # Layout
-    unidade_z = "PU" if usar_pu else config_atual["unidade"]
-    fig.update_layout(
-        title=f"Topologia 3D: {variavel} ({unidade_z})",
-        scene=dict(
-            xaxis_title="Tempo / Amostras",
-            yaxis=dict(
-                title="Barras (Topologia)",
-                tickvals=Y_indices,
-                ticktext=nomes_eixo_y
+        # Adiciona Linhas de destaque (efeito Waterfall) nas bordas, em um só traço
+        fig.add_trace(traco_bordas(Z, eixo_x, Y_indices, nomes_eixo_y, largura=4))
+
+        # Layout
+        unidade_z = "PU" if usar_pu else config_atual["unidade"]
+        fig.update_layout(
+            title=f"Topologia 3D: {variavel} ({unidade_z})",
+            scene=dict(
+                xaxis_title="Tempo / Amostras",
+                yaxis=dict(
+                    title="Barras (Topologia)",
+                    tickvals=Y_indices,
+                    ticktext=nomes_eixo_y
+                ),
+                zaxis_title=unidade_z,
+                aspectmode="manual",
+                aspectratio=dict(x=1, y=1.5, z=0.8) # Estica um pouco o Y para ver as barras
             ),
-            zaxis_title=unidade_z,
-            aspectmode="manual",
-            aspectratio=dict(x=1, y=1.5, z=0.8) # Estica um pouco o Y para ver as barras
-        ),
-        height=700,
-        margin=dict(l=0, r=0, b=0, t=40)
-    )
+            height=700,
+            margin=dict(l=0, r=0, b=0, t=40)
+        )
 
-    st.plotly_chart(fig, use_container_width=True)
+    mostrar_grafico(fig, use_container_width=True)
+    if texto_resumo_grade(resumo_grade):
+        st.caption(texto_resumo_grade(resumo_grade))
 # ============================================================================
 # 9. FUNÇÃO PRINCIPAL DO APLICATIVO
 # ============================================================================
+# Até este número de barras a escolha é por botões; acima, por uma lista
+LIMITE_BOTOES_BARRAS = 8
+
+def seletor_barra(nomes_barras):
+    """Barra escolhida na Análise 2D (guardada na sessão entre reruns)"""
+    chave = "barra_analise_2d"
+    # O JSON pode ter mudado desde a última escolha
+    if st.session_state.get(chave) not in nomes_barras:
+        st.session_state.pop(chave, None)
+    if len(nomes_barras) <= LIMITE_BOTOES_BARRAS:
+        return st.radio("Barra:", nomes_barras, horizontal=True, key=chave, label_visibility="collapsed")
+    return st.selectbox(f"Barra ({len(nomes_barras)} no cenário):", nomes_barras, key=chave)
+
+def dados_desequilibrio(item):
+    """Monitor de tensão/corrente da barra (sem colunas zeradas) para o desequilíbrio"""
+    if item is None:
+        return None
+    df = carregar_dados(item["arquivo_vi"])
+    if df is None:
+        return None
+    df = filtrar_colunas_com_dados(df)
+    # Identifica o conteúdo para reaproveitar as figuras (attrs desta cópia, não do armazém)
+    df.attrs["origem"] = hash_arquivo(glob.glob(item["arquivo_vi"])[0])
+    df.attrs["kv_base"] = item.get("kv_base")
+    return df
+
 def main():
     """Função principal com navegação lateral"""
     
@@ -1035,6 +1233,7 @@ def main():
             ["Análise Linear (2D)", "Análise de Barras (3D)", "Topologia (3D)"]
         )
         st.divider()
+        ativar_painel(f"Dashboard OpenDSS - {pagina}")
 
     render_cabecalho()
 
@@ -1051,49 +1250,60 @@ def main():
         )
         st.divider()
 
-        # 1. Cria as abas automaticamente baseadas no JSON
+        with st.sidebar:
+            st.subheader("Desempenho dos Gráficos")
+            max_pontos = st.number_input(
+                "Pontos por curva (máx.):", min_value=100, max_value=200_000, value=MAX_PONTOS_PADRAO, step=500
+            )
+            metodo_reamostragem = st.radio("Reamostragem:", METODOS_REAMOSTRAGEM, horizontal=True)
+
+            # Simulação em andamento: acompanha os CSVs lendo só as linhas novas
+            ao_vivo = st.toggle("📡 Ao vivo (simulação em andamento)", value=False)
+            if ao_vivo:
+                intervalo = st.select_slider("Atualizar a cada (s):", INTERVALOS_ATUALIZACAO, value=5)
+
+        # 1. Barras do JSON: só a escolhida é carregada e desenhada neste rerun
         nomes_abas = [item["nome"] for item in TOPOLOGIA_SISTEMA]
         if not nomes_abas:
             st.error("Nenhuma barra encontrada no JSON.")
             return
 
-        abas = st.tabs(nomes_abas)
-
-        # Variáveis para guardar dados para o desequilíbrio
-        df_sub_baixa = None
-        df_carga = None
+        nome_barra = seletor_barra(nomes_abas)
+        item = TOPOLOGIA_SISTEMA[nomes_abas.index(nome_barra)]
 
-        # 2. Preenche cada aba num loop inteligente
-        for aba, item in zip(abas, TOPOLOGIA_SISTEMA):
-            with aba:
-                # Define qual arquivo usar
-                if tipo_variavel == "Tensão, corrente e ângulo":
-                    caminho = item["arquivo_vi"]
-                    suffix_key = "vi"
-                else:
-                    caminho = item["arquivo_pq"]
-                    suffix_key = "pq"
-
-                # Plota o gráfico
-                df_atual, _, _, _ = carregar_e_plotar(
-                    item["nome"], 
-                    {"path": caminho}, # Monta o dicionário temporário
-                    f"key_{item['nome']}_{suffix_key}" # Chave única
-                )
+        # Define qual arquivo usar
+        if tipo_variavel == "Tensão, corrente e ângulo":
+            caminho = item["arquivo_vi"]
+            suffix_key = "vi"
+        else:
+            caminho = item["arquivo_pq"]
+            suffix_key = "pq"
+
+        # 2. Plota o gráfico da barra escolhida
+        if ao_vivo:
+            # O monitor é um fragmento que se atualiza sozinho
+            st.fragment(painel_ao_vivo, run_every=intervalo)(
+                item["nome"], caminho, f"key_{item['nome']}_{suffix_key}",
+                max_pontos, metodo_reamostragem
+            )
+        else:
+            carregar_e_plotar(
+                item["nome"], 
+                {"path": caminho}, # Monta o dicionário temporário
+                f"key_{item['nome']}_{suffix_key}", # Chave única
+                max_pontos=max_pontos,
+                metodo=metodo_reamostragem
+            )
 
-                # 3. Lógica para capturar dados para o Desequilíbrio
-                # Tenta identificar pelo 'tipo' definido no JSON
-                if item.get("tipo") == "trafo":
-                    df_sub_baixa = df_atual
-                elif item.get("tipo") == "carga" and df_carga is None: 
-                    # Pega a primeira carga que encontrar (ou refine a lógica se precisar da D)
-                    df_carga = df_atual
-                    
         # -----------------------------------------------------
         # ANÁLISE DE DESEQUILÍBRIO
         # -----------------------------------------------------
         if tipo_variavel == "Tensão, corrente e ângulo":
-            # Verifica se achou os dados necessários no loop acima
+            # 3. Identifica pelo 'tipo' definido no JSON (trafo e a primeira carga);
+            # lidos do armazém, sem desenhar as outras barras
+            df_sub_baixa = dados_desequilibrio(next((i for i in TOPOLOGIA_SISTEMA if i.get("tipo") == "trafo"), None))
+            df_carga = dados_desequilibrio(next((i for i in TOPOLOGIA_SISTEMA if i.get("tipo") == "carga"), None))
+
             if df_sub_baixa is not None and df_carga is not None:
                 render_analise_desequilibrio(df_sub_baixa, df_carga)
             elif df_sub_baixa is None and len(TOPOLOGIA_SISTEMA) >= 2:
@@ -1104,6 +1314,8 @@ def main():
             else:
                 st.warning("É necessário ter elementos definidos como 'trafo' e 'carga' no JSON para a análise automática de desequilíbrio.")
 
+            render_sequencias_topologia()
+
     # ROTA 2: ANÁLISE DE BARRAS (3D Comparativo)
     elif pagina == "Análise de Barras (3D)":
         render_topologia_comparativa()
@@ -1112,5 +1324,9 @@ def main():
     elif pagina == "Topologia (3D)":
         render_visualizacao_3d_independente()
 
+    # Memória compartilhada entre as sessões (depois de carregar a página)
+    st.sidebar.caption(resumo_armazem())
+    render_painel()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
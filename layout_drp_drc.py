@@ -2,6 +2,20 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
+from compactacao import compactar_tipos, resumo_compactacao
+
+from indicadores_prodist import (
+    LIMITE_DRC_PRODIST,
+    LIMITE_DRP_PRODIST,
+    calcular_drp_drc_janelas,
+    calcular_limites,
+)
+from instrumentacao import (
+    ETAPA_CALCULO, ETAPA_FIGURA, ETAPA_LEITURA, ETAPA_MAPEAMENTO,
+    ativar_painel, etapa, mostrar_grafico, render_painel
+)
+from medidores import ler_medicoes, mapear_grandezas_medidor, processar_medidores, tempo_medicoes_s
+
 # 1. CONFIGURAÇÃO DA PÁGINA
 st.set_page_config(layout="wide", page_title="Dashboard Qualidade de Energia - DRP/DRC")
 
@@ -9,40 +23,10 @@ st.set_page_config(layout="wide", page_title="Dashboard Qualidade de Energia - D
 # FUNÇÕES DE PROCESSAMENTO E MAPEAMENTO
 # =======================================================
 
-def mapear_grandezas_medidor(df):
-    """
-    Busca as colunas de Tensão Média e Corrente Média na planilha do medidor.
-    """
-    mapa_tensoes = {}
-    mapa_correntes = {}
-    
-    for col in df.columns:
-        col_lower = col.lower()
-        
-        # Mapeamento de Tensões de Fase (van, vbn, vcn) - Pega apenas a média
-        if 'tensao.average.v' in col_lower:
-            if 'an' in col_lower: mapa_tensoes['Fase A'] = col
-            elif 'bn' in col_lower: mapa_tensoes['Fase B'] = col
-            elif 'cn' in col_lower: mapa_tensoes['Fase C'] = col
-            
-        # Mapeamento de Correntes (ia, ib, ic, in) - Pega apenas a média
-        elif 'corrente.average.i' in col_lower:
-            if 'ia' in col_lower: mapa_correntes['Fase A'] = col
-            elif 'ib' in col_lower: mapa_correntes['Fase B'] = col
-            elif 'ic' in col_lower: mapa_correntes['Fase C'] = col
-            elif 'in' in col_lower: mapa_correntes['Neutro'] = col
-                
-    return mapa_tensoes, mapa_correntes
-
-def calcular_limites(vn):
-    """Calcula limites simplificados de DRP/DRC baseados na Tensão Nominal (Vn)."""
-    # Atenção: Ajuste estas porcentagens conforme a norma exata do PRODIST
-    limite_adequada_min = vn * 0.92
-    limite_adequada_max = vn * 1.05
-    limite_precaria_min = vn * 0.87
-    limite_precaria_max = vn * 1.06
-    
-    return limite_adequada_min, limite_adequada_max, limite_precaria_min, limite_precaria_max
+@st.cache_data(show_spinner="Calculando DRP/DRC dos medidores...")
+def calcular_lote(arquivos, vn):
+    """DRP/DRC (janelas de 10 min) de todos os arquivos enviados, em paralelo."""
+    return processar_medidores(list(arquivos), vn)
 
 # =======================================================
 # FUNÇÕES VISUAIS
@@ -69,37 +53,34 @@ def render_cabecalho():
 # =======================================================
 
 render_cabecalho()
+ativar_painel("DRP / DRC")
+
+st.info("📂 Carregue um ou mais arquivos CSV ou XLSX com as medições dos equipamentos.")
+uploaded_files = st.file_uploader("Arraste seus arquivos aqui", type=["csv", "xlsx"], accept_multiple_files=True)
 
-st.info("📂 Carregue o arquivo CSV ou XLSX com as medições do equipamento.")
-uploaded_file = st.file_uploader("Arraste seu arquivo aqui", type=["csv", "xlsx"])
+if uploaded_files:
+    # Com vários medidores, os gráficos mostram um de cada vez
+    nomes_arquivos = [f.name for f in uploaded_files]
+    if len(uploaded_files) > 1:
+        escolhido = st.sidebar.selectbox("Medidor:", nomes_arquivos)
+        uploaded_file = uploaded_files[nomes_arquivos.index(escolhido)]
+    else:
+        uploaded_file = uploaded_files[0]
 
-if uploaded_file:
-    # 1. Leitura Robusta
+    # 1. Leitura Robusta (2. o tratamento de tempo cria 'Tempo_EixoX')
     try:
-        if uploaded_file.name.endswith('.csv'):
-            try:
-                df = pd.read_csv(uploaded_file, sep=';', encoding='utf-8')
-            except Exception:
-                uploaded_file.seek(0)
-                df = pd.read_excel(uploaded_file)
-        else:
-            df = pd.read_excel(uploaded_file)
-            
-        df.columns = df.columns.str.strip()
-        
+        df = ler_medicoes(uploaded_file)
     except Exception as e:
         st.error(f"Erro ao ler o arquivo: {e}")
         st.stop()
 
-    # 2. TRATAMENTO DE TEMPO
-    primeira_coluna = df.columns[0]
-    df['Tempo_EixoX'] = pd.to_datetime(df[primeira_coluna].astype(str).str.strip(), format='mixed', errors='coerce')
-    if df['Tempo_EixoX'].isna().all():
-        df['Tempo_EixoX'] = range(len(df))
     col_time = 'Tempo_EixoX'
+    with etapa(ETAPA_LEITURA, "tipos compactos"):
+        df = compactar_tipos(df, colunas_tempo=[df.columns[0]])
 
     # 3. Mapeamento de Variáveis
-    mapa_tensoes, mapa_correntes = mapear_grandezas_medidor(df)
+    with etapa(ETAPA_MAPEAMENTO, uploaded_file.name):
+        mapa_tensoes, mapa_correntes = mapear_grandezas_medidor(df)
 
     if not mapa_tensoes:
         st.error("❌ Não foram encontradas colunas de tensão no arquivo.")
@@ -107,10 +88,11 @@ if uploaded_file:
 
     # 4. Interface Lateral
     st.sidebar.header("Configurações PRODIST")
+    st.sidebar.caption(resumo_compactacao(df))
     vn = st.sidebar.number_input("Tensão Nominal (Vn) em Volts:", min_value=110.0, max_value=38000.0, value=220.0, step=1.0)
     
     # Adicionada a nova página para o Gráfico de Correntes
-    pagina = st.sidebar.radio("Navegação:", ["Gráfico de Tensões 2D", "Gráfico de Correntes (Equilíbrio)", "Relatório DRP e DRC"])
+    pagina = st.sidebar.radio("Navegação:", ["Gráfico de Tensões 2D", "Gráfico de Correntes (Equilíbrio)", "Relatório DRP e DRC", "Lote de Medidores"])
 
     l_adq_min, l_adq_max, l_prec_min, l_prec_max = calcular_limites(vn)
     
@@ -122,22 +104,23 @@ if uploaded_file:
     # =======================================================
     if pagina == "Gráfico de Tensões 2D":
         st.subheader("Perfil de Tensão ao Longo do Tempo")
-        fig = go.Figure()
+        with etapa(ETAPA_FIGURA, "Perfil de tensão"):
+            fig = go.Figure()
 
-        for nome_fase, col_name in mapa_tensoes.items():
-            fig.add_trace(go.Scatter(
-                x=df[col_time], y=df[col_name],
-                mode='lines', name=nome_fase, 
-                line=dict(color=cores_grafico.get(nome_fase, '#333')),
-            ))
+            for nome_fase, col_name in mapa_tensoes.items():
+                fig.add_trace(go.Scatter(
+                    x=df[col_time], y=df[col_name],
+                    mode='lines', name=nome_fase, 
+                    line=dict(color=cores_grafico.get(nome_fase, '#333')),
+                ))
 
-        fig.add_hline(y=l_adq_max, line_dash="dash", line_color="orange", annotation_text="Max Adequada")
-        fig.add_hline(y=l_adq_min, line_dash="dash", line_color="orange", annotation_text="Min Adequada")
-        fig.add_hline(y=l_prec_max, line_dash="dot", line_color="red", annotation_text="Crítica Superior")
-        fig.add_hline(y=l_prec_min, line_dash="dot", line_color="red", annotation_text="Crítica Inferior")
+            fig.add_hline(y=l_adq_max, line_dash="dash", line_color="orange", annotation_text="Max Adequada")
+            fig.add_hline(y=l_adq_min, line_dash="dash", line_color="orange", annotation_text="Min Adequada")
+            fig.add_hline(y=l_prec_max, line_dash="dot", line_color="red", annotation_text="Crítica Superior")
+            fig.add_hline(y=l_prec_min, line_dash="dot", line_color="red", annotation_text="Crítica Inferior")
 
-        fig.update_layout(yaxis_title="Tensão (V)", template="plotly_white", height=600)
-        st.plotly_chart(fig, use_container_width=True)
+            fig.update_layout(yaxis_title="Tensão (V)", template="plotly_white", height=600)
+        mostrar_grafico(fig, use_container_width=True)
 
     # =======================================================
     # NOVO: VISUALIZAÇÃO DE CORRENTES
@@ -146,17 +129,18 @@ if uploaded_file:
         st.subheader("Perfil de Correntes - Análise de Equilíbrio das Fases")
         
         if mapa_correntes:
-            fig_i = go.Figure()
-
-            for nome_fase, col_name in mapa_correntes.items():
-                fig_i.add_trace(go.Scatter(
-                    x=df[col_time], y=df[col_name],
-                    mode='lines', name=nome_fase, 
-                    line=dict(color=cores_grafico.get(nome_fase, '#333')),
-                ))
-
-            fig_i.update_layout(yaxis_title="Corrente (A)", template="plotly_white", height=600)
-            st.plotly_chart(fig_i, use_container_width=True)
+            with etapa(ETAPA_FIGURA, "Perfil de correntes"):
+                fig_i = go.Figure()
+
+                for nome_fase, col_name in mapa_correntes.items():
+                    fig_i.add_trace(go.Scatter(
+                        x=df[col_time], y=df[col_name],
+                        mode='lines', name=nome_fase, 
+                        line=dict(color=cores_grafico.get(nome_fase, '#333')),
+                    ))
+
+                fig_i.update_layout(yaxis_title="Corrente (A)", template="plotly_white", height=600)
+            mostrar_grafico(fig_i, use_container_width=True)
             
             # Caixa de informação com dicas técnicas
             st.info("""
@@ -174,27 +158,49 @@ if uploaded_file:
         st.subheader("Cálculo de Duração Relativa (DRP e DRC)")
         st.write(f"**Tensão Nominal de Referência:** {vn} V")
         
+        # Leituras integradas nas janelas de 10 min do PRODIST, fases de uma vez
+        with etapa(ETAPA_CALCULO, "DRP/DRC"):
+            tensoes = df[list(mapa_tensoes.values())].to_numpy(dtype=float)
+            tempo_s = tempo_medicoes_s(df)
+            indicadores_fases = calcular_drp_drc_janelas(tempo_s, tensoes, vn, list(mapa_tensoes))
+        if tempo_s is None:
+            st.caption("⚠️ Sem data/hora nas leituras: cada leitura conta como uma janela.")
+        else:
+            st.caption(f"Indicadores sobre {int(indicadores_fases['janelas'].max())} janelas de 10 minutos (valor eficaz da janela).")
+
         col1, col2, col3 = st.columns(3)
-        total_medicoes = len(df)
         
-        for nome_fase, col_name in mapa_tensoes.items():
-            tensoes = df[col_name].dropna()
-            
-            leituras_adequadas = tensoes[(tensoes >= l_adq_min) & (tensoes <= l_adq_max)].count()
-            leituras_precarias = tensoes[((tensoes >= l_prec_min) & (tensoes < l_adq_min)) | 
-                                         ((tensoes > l_adq_max) & (tensoes <= l_prec_max))].count()
-            leituras_criticas = tensoes[(tensoes < l_prec_min) | (tensoes > l_prec_max)].count()
-            
-            drp = (leituras_precarias / total_medicoes) * 100
-            drc = (leituras_criticas / total_medicoes) * 100
+        for _, indicadores in indicadores_fases.iterrows():
+            nome_fase = indicadores["fase"]
+            leituras_adequadas = indicadores["adequadas"]
+            drp = indicadores["DRP (%)"]
+            drc = indicadores["DRC (%)"]
             
             with (col1 if 'A' in nome_fase else col2 if 'B' in nome_fase else col3):
                 st.markdown(f"### {nome_fase}")
                 st.metric(label="DRP (Tensão Precária)", value=f"{drp:.2f} %", 
-                          delta="Atenção" if drp > 3 else "Normal", delta_color="inverse")
+                          delta="Atenção" if drp > LIMITE_DRP_PRODIST else "Normal", delta_color="inverse")
                 st.metric(label="DRC (Tensão Crítica)", value=f"{drc:.2f} %", 
-                          delta="Crítico" if drc > 0.5 else "Normal", delta_color="inverse")
-                st.write(f"Leituras Adequadas: {leituras_adequadas}")
+                          delta="Crítico" if drc > LIMITE_DRC_PRODIST else "Normal", delta_color="inverse")
+                st.write(f"Janelas Adequadas: {leituras_adequadas}")
+
+    # =======================================================
+    # LOTE DE MEDIDORES (TODOS OS ARQUIVOS ENVIADOS)
+    # =======================================================
+    elif pagina == "Lote de Medidores":
+        st.subheader("DRP e DRC de Todos os Medidores")
+        st.write(f"**Tensão Nominal de Referência:** {vn} V | **Medidores:** {len(uploaded_files)}")
+
+        with etapa(ETAPA_CALCULO, f"DRP/DRC de {len(uploaded_files)} medidores"):
+            tabela = calcular_lote(tuple((f.name, f.getvalue()) for f in uploaded_files), vn)
+        if "DRP (%)" in tabela.columns:
+            violacoes = tabela[(tabela["DRP (%)"] > LIMITE_DRP_PRODIST) | (tabela["DRC (%)"] > LIMITE_DRC_PRODIST)]
+            st.metric("Medidores com violação", f"{violacoes['medidor'].nunique()} de {tabela['medidor'].nunique()}")
+        st.dataframe(tabela, use_container_width=True, hide_index=True)
+        st.download_button(
+            "⬇️ Baixar tabela (CSV)", tabela.to_csv(index=False).encode("utf-8"),
+            file_name="drp_drc_medidores.csv", mime="text/csv"
+        )
 
     # =======================================================
     # TABELA DE DADOS
@@ -203,4 +209,6 @@ if uploaded_file:
         st.dataframe(df, use_container_width=True)
 
 else:
-    st.warning("⚠️ Aguardando upload da planilha de medições...")
\ No newline at end of file
+    st.warning("⚠️ Aguardando upload da planilha de medições...")
+
+render_painel()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+
+import streamlit as st
+import plotly.graph_objects as go
+
+from instrumentacao import (
+    ETAPA_CALCULO, ETAPA_FIGURA, ETAPA_LEITURA,
+    ativar_painel, etapa, mostrar_grafico, render_painel
+)
+from medidores_energia import carregar_emout_lote, indicadores_energia, listar_emout, perdas_por_nivel
+
+# 1. CONFIGURAÇÃO DA PÁGINA
+st.set_page_config(layout="wide", page_title="Dashboard Energia e Perdas - EnergyMeter")
+
+# =======================================================
+# FUNÇÕES DE LEITURA
+# =======================================================
+
+@st.cache_resource(max_entries=4, show_spinner="Lendo os registradores dos EnergyMeters...")
+def carregar_registradores(alvo, assinaturas):
+    """
+    Registradores, indicadores e perdas por nível de todos os EMout do alvo.
+
+    assinaturas: (arquivo, tamanho, mtime) de cada EMout; entra na chave para
+    que um arquivo reescrito pelo OpenDSS seja relido. Não altere o retorno.
+    """
+    tabela = carregar_emout_lote(alvo)
+    return tabela, indicadores_energia(tabela), perdas_por_nivel(tabela)
+
+def assinaturas_emout(alvo):
+    assinaturas = []
+    for arquivo in listar_emout(alvo):
+        info = os.stat(arquivo)
+        assinaturas.append((arquivo, info.st_size, info.st_mtime_ns))
+    return tuple(assinaturas)
+
+# =======================================================
+# FUNÇÕES VISUAIS
+# =======================================================
+
+def render_cabecalho():
+    col_logo, col_titulo = st.columns([1, 4])
+    with col_logo:
+         st.markdown(
+            """
+            <div align="center">
+            <a target="_blank" href="https://github.com/grei-ufc" style="background:none">
+                <img src="https://raw.githubusercontent.com/grei-ufc/tsdq-dataview-opentes/main/imagens/Grei3.png" width="150">
+            </a>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+    st.markdown("<h1 style='text-align: center;'>Energia e Perdas - EnergyMeters do OpenDSS</h1>", unsafe_allow_html=True)
+    st.markdown("<hr>", unsafe_allow_html=True)
+
+# Componentes das perdas da zona (empilhadas nos gráficos)
+COMPONENTES_PERDAS = {
+    "Perdas nas linhas (kWh)": "#1C83E1",
+    "Perdas nos trafos (kWh)": "#FF4B4B",
+}
+COMPONENTES_TRAFO = {
+    "Perdas em carga (kWh)": "#00CC96",
+    "Perdas em vazio (kWh)": "#FFA15A",
+}
+
+def figura_perdas(indicadores, componentes, titulo):
+    """Barras empilhadas das componentes das perdas por cenário e medidor"""
+    rotulos = indicadores["cenario"].astype(str) + " | " + indicadores["medidor"].astype(str)
+    fig = go.Figure()
+    for coluna, cor in componentes.items():
+        fig.add_trace(go.Bar(x=rotulos, y=indicadores[coluna], name=coluna.replace(" (kWh)", ""), marker_color=cor))
+    fig.update_layout(
+        title=titulo, barmode="stack", yaxis_title="Energia [kWh]",
+        template="plotly_white", height=450
+    )
+    return fig
+
+# =======================================================
+# EXECUÇÃO PRINCIPAL
+# =======================================================
+
+render_cabecalho()
+ativar_painel("Energia e Perdas")
+
+st.info("📂 Informe um arquivo EMout.txt ou uma pasta com os resultados (uma subpasta por cenário).")
+alvo = st.text_input("Arquivo ou pasta dos EnergyMeters:", value="Exemplos")
+
+if not os.path.exists(alvo):
+    st.error(f"'{alvo}' não foi encontrado.")
+    render_painel()
+    st.stop()
+
+with etapa(ETAPA_LEITURA, "EMout"):
+    assinaturas = assinaturas_emout(alvo)
+if not assinaturas:
+    st.warning("⚠️ Nenhum arquivo EMout (*EMout*.txt) encontrado.")
+    render_painel()
+    st.stop()
+
+try:
+    with etapa(ETAPA_LEITURA, f"{len(assinaturas)} arquivos EMout"):
+        tabela, indicadores, niveis = carregar_registradores(alvo, assinaturas)
+except (OSError, ValueError) as e:
+    st.error(f"Erro ao ler os EnergyMeters: {e}")
+    render_painel()
+    st.stop()
+
+# Filtros na lateral
+st.sidebar.header("Filtros")
+cenarios = list(indicadores["cenario"].cat.categories)
+escolhidos = st.sidebar.multiselect("Cenários:", cenarios, default=cenarios)
+medidores = list(indicadores["medidor"].cat.categories)
+medidores_escolhidos = st.sidebar.multiselect("Medidores:", medidores, default=medidores)
+st.sidebar.caption(f"{len(assinaturas)} arquivos | {len(tabela)} medidores | {tabela.shape[1] - 3} registradores")
+
+with etapa(ETAPA_CALCULO, "filtro"):
+    filtro = indicadores["cenario"].isin(escolhidos) & indicadores["medidor"].isin(medidores_escolhidos)
+    selecao = indicadores[filtro]
+if selecao.empty:
+    st.warning("Nenhum medidor nos filtros escolhidos.")
+    render_painel()
+    st.stop()
+
+# --- Totais da seleção ---
+energia_zona = selecao["Energia na zona (kWh)"].sum()
+perdas_total = selecao["Perdas (kWh)"].sum()
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Energia (kWh)", f"{selecao['Energia (kWh)'].sum():,.0f}")
+col2.metric("Perdas da zona (kWh)", f"{perdas_total:,.0f}")
+col3.metric("Perdas (%)", f"{perdas_total / energia_zona * 100:.2f} %" if energia_zona > 0 else "-")
+col4.metric("Energia não suprida (EEN + UE)", f"{selecao['EEN (kWh)'].sum() + selecao['UE (kWh)'].sum():,.0f} kWh")
+
+aba_perdas, aba_niveis, aba_tabelas = st.tabs(["Perdas por Medidor", "Perdas por Nível de Tensão", "Tabelas"])
+
+with aba_perdas:
+    col_a, col_b = st.columns(2)
+    with col_a:
+        with etapa(ETAPA_FIGURA, "Linhas e trafos"):
+            fig = figura_perdas(selecao, COMPONENTES_PERDAS, "Perdas: Linhas × Transformadores")
+        mostrar_grafico(fig, use_container_width=True)
+    with col_b:
+        with etapa(ETAPA_FIGURA, "Carga e vazio"):
+            fig = figura_perdas(selecao, COMPONENTES_TRAFO, "Perdas: Em Carga × Em Vazio")
+        mostrar_grafico(fig, use_container_width=True)
+
+with aba_niveis:
+    niveis_sel = niveis[niveis["cenario"].isin(escolhidos) & niveis["medidor"].isin(medidores_escolhidos)]
+    niveis_sel = niveis_sel[niveis_sel["tipo"] != "Energia das cargas"]
+    if niveis_sel.empty:
+        st.info("Os EMout não têm registradores por nível de tensão (ex.: '13.8 kV Losses').")
+    else:
+        with etapa(ETAPA_FIGURA, "Perdas por nível"):
+            resumo = niveis_sel.groupby(["nivel_kv", "tipo"], as_index=False)["kWh"].sum()
+            fig = go.Figure()
+            for tipo, grupo in resumo.groupby("tipo", sort=False):
+                fig.add_trace(go.Bar(x=grupo["nivel_kv"].map("{:g} kV".format), y=grupo["kWh"], name=tipo))
+            fig.update_layout(
+                title="Perdas por Nível de Tensão (soma da seleção)", barmode="group",
+                yaxis_title="Energia [kWh]", template="plotly_white", height=450
+            )
+        mostrar_grafico(fig, use_container_width=True)
+
+with aba_tabelas:
+    st.dataframe(
+        selecao.style.format({c: "{:,.2f}" for c in selecao.columns if c not in ("cenario", "medidor")}),
+        use_container_width=True, hide_index=True
+    )
+    st.download_button(
+        "⬇️ Baixar indicadores (CSV)", selecao.to_csv(index=False).encode("utf-8"),
+        file_name="energia_perdas.csv", mime="text/csv"
+    )
+    with st.expander("📊 Ver todos os registradores"):
+        st.dataframe(tabela[filtro.to_numpy()], use_container_width=True, hide_index=True)
+
+render_painel()
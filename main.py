@@ -1,6 +1,244 @@
+# ============================================================================
+# LINHA DE COMANDO (EXECUÇÃO SEM STREAMLIT)
+# ============================================================================
+# Uso:
+#   python main.py relatorio config_circuito.json -o relatorio.csv
+#   python main.py relatorio Exemplos/Daily --kv-base 13.8 -o relatorio.parquet
+#   python main.py sequencias config_circuito.json -o sequencias.parquet --resumo resumo.csv
+#   python main.py drp medicoes/ --vn 220 -o drp_drc.csv
+#   python main.py energia resultados/ -o energia.csv --niveis perdas_niveis.csv
+#   python main.py comparar original.csv novo.csv -o ranking.csv
+import argparse
+import sys
+import time
+
+from analise_lote import (
+    FORMATOS_RELATORIO,
+    PERCENTIS_PADRAO,
+    gerar_relatorio,
+    gerar_sequencias,
+    gravar_relatorio,
+    validar_formato_relatorio,
+)
+from componentes_simetricas import LIMITE_FD_PRODIST
+from comparacao import LIMIAR_DIVERGENCIA_PADRAO, TOLERANCIA_ALINHAMENTO_S, comparar_em_blocos
+from fonte_resultados import TAMANHO_BLOCO_CSV
+from indicadores_prodist import LIMITE_DRC_PRODIST, LIMITE_DRP_PRODIST
+from medidores import gerar_relatorio_medidores
+from medidores_energia import carregar_emout_lote, indicadores_energia, perdas_por_nivel
+
+
+def _mostrar_progresso(feitos, total):
+    print(f"\r  {feitos}/{total} arquivos", end="", file=sys.stderr, flush=True)
+
+
+def comando_relatorio(args):
+    try:
+        relatorio, segundos = gerar_relatorio(
+            args.cenario, args.saida,
+            kv_base=args.kv_base,
+            processos=args.processos,
+            percentis=tuple(args.percentis),
+            ao_progredir=None if args.silencioso else _mostrar_progresso,
+        )
+    except (OSError, ValueError) as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+    print(f"{len(relatorio)} monitores analisados em {segundos:.1f} s -> {args.saida}")
+    if "erro" in relatorio.columns:
+        for _, linha in relatorio[relatorio["erro"].notna()].iterrows():
+            print(f"  ⚠️ {linha['arquivo']}: {linha['erro']}", file=sys.stderr)
+    if "DRP (%)" in relatorio.columns:
+        violacoes = relatorio[(relatorio["DRP (%)"] > LIMITE_DRP_PRODIST) | (relatorio["DRC (%)"] > LIMITE_DRC_PRODIST)]
+        for _, linha in violacoes.iterrows():
+            print(f"  🚨 {linha['elemento']}: DRP {linha['DRP (%)']:.2f} % | DRC {linha['DRC (%)']:.2f} %")
+    return 0
+
+
+def comando_sequencias(args):
+    try:
+        tabela, resumo, segundos = gerar_sequencias(
+            args.cenario, args.saida,
+            kv_base=args.kv_base,
+            saida_resumo=args.resumo,
+            ao_progredir=None if args.silencioso else _mostrar_progresso,
+        )
+    except (OSError, ValueError) as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+    print(f"{len(resumo)} elementos, {len(tabela):,} linhas em {segundos:.1f} s -> {args.saida}")
+    for _, linha in resumo[resumo["FD_max (%)"] > LIMITE_FD_PRODIST].iterrows():
+        print(f"  🚨 {linha['elemento']}: FD máx. {linha['FD_max (%)']:.2f} % "
+              f"({linha['FD_acima_limite (%)']:.1f} % do tempo acima de {LIMITE_FD_PRODIST:.1f} %)")
+    return 0
+
+
+def comando_drp(args):
+    try:
+        tabela, segundos = gerar_relatorio_medidores(
+            args.medicoes, args.saida, args.vn,
+            processos=args.processos,
+            ao_progredir=None if args.silencioso else _mostrar_progresso,
+        )
+    except (OSError, ValueError) as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+    print(f"{tabela['medidor'].nunique()} medidores analisados em {segundos:.1f} s -> {args.saida}")
+    if "erro" in tabela.columns:
+        for _, linha in tabela[tabela["erro"].notna()].iterrows():
+            print(f"  ⚠️ {linha['medidor']}: {linha['erro']}", file=sys.stderr)
+    if "DRP (%)" in tabela.columns:
+        violacoes = tabela[(tabela["DRP (%)"] > LIMITE_DRP_PRODIST) | (tabela["DRC (%)"] > LIMITE_DRC_PRODIST)]
+        for _, linha in violacoes.iterrows():
+            print(f"  🚨 {linha['medidor']} ({linha['fase']}): DRP {linha['DRP (%)']:.2f} % | DRC {linha['DRC (%)']:.2f} %")
+    return 0
+
+
+def comando_energia(args):
+    try:
+        validar_formato_relatorio(args.saida)
+        if args.niveis:
+            validar_formato_relatorio(args.niveis)
+        inicio = time.perf_counter()
+        tabela = carregar_emout_lote(args.alvo, ao_progredir=None if args.silencioso else _mostrar_progresso)
+        if tabela.empty:
+            raise ValueError(f"Nenhum arquivo EMout encontrado em '{args.alvo}'.")
+        indicadores = indicadores_energia(tabela)
+        gravar_relatorio(indicadores, args.saida)
+        if args.niveis:
+            gravar_relatorio(perdas_por_nivel(tabela), args.niveis)
+    except (OSError, ValueError) as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+    print(f"{tabela['cenario'].nunique()} cenários, {len(tabela)} medidores em "
+          f"{time.perf_counter() - inicio:.1f} s -> {args.saida}")
+    for _, linha in indicadores.nlargest(5, "Perdas (%)").iterrows():
+        print(f"  {linha['cenario']} | {linha['medidor']}: perdas {linha['Perdas (kWh)']:,.0f} kWh "
+              f"({linha['Perdas (%)']:.2f} %)")
+    return 0
+
+
+def _mostrar_progresso_leitura(fracao, linhas):
+    print(f"\r  {fracao:.0%} ({linhas:,} linhas)", end="", file=sys.stderr, flush=True)
+
+
+def comando_comparar(args):
+    try:
+        validar_formato_relatorio(args.saida)
+        resultado = comparar_em_blocos(
+            args.arquivo1, args.arquivo2, args.filtro,
+            tolerancia=args.tolerancia,
+            limiar=args.limiar,
+            tamanho_bloco=args.bloco,
+            ao_progredir=None if args.silencioso else _mostrar_progresso_leitura,
+            medir_pico=args.medir_memoria,
+        )
+        if not resultado["pares"]:
+            raise ValueError("Nenhuma coluna em pu em comum nos dois arquivos.")
+        gravar_relatorio(resultado["ranking"], args.saida)
+    except (OSError, ValueError) as erro:
+        print(f"❌ {erro}", file=sys.stderr)
+        return 1
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+    ranking, estatisticas = resultado["ranking"], resultado["estatisticas"]
+    pico = "" if estatisticas["pico_bytes"] is None else f"pico {estatisticas['pico_bytes'] / 1024**2:.1f} MB, "
+    print(f"{len(ranking)} pares, {estatisticas['linhas']:,} linhas em {estatisticas['segundos']:.1f} s "
+          f"({pico}alinhamento por {resultado['modo']}) -> {args.saida}")
+    for _, linha in ranking[ranking["violacoes"] > 0].head(10).iterrows():
+        print(f"  ❌ {linha['coluna_1']}: erro máx. {linha['erro_max']:.5f} pu em {linha['instante_erro_max']}")
+    return 0
+
+
 def main():
-    print("Hello from tsdq-dataview-opentes!")
+    parser = argparse.ArgumentParser(description="Ferramentas de linha de comando do TSDQ DataView.")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    relatorio = subcomandos.add_parser(
+        "relatorio",
+        help="Indicadores PRODIST (DRP/DRC, desequilíbrio, tensão mín/máx/percentis) de todos os monitores"
+    )
+    relatorio.add_argument("cenario", help="config_circuito.json ou pasta com os CSVs dos monitores")
+    relatorio.add_argument("-o", "--saida", default="relatorio.csv",
+                           help=f"Arquivo de saída ({', '.join(FORMATOS_RELATORIO)})")
+    relatorio.add_argument("--kv-base", type=float, default=None,
+                           help="Tensão de linha (kV) dos monitores achados na pasta (sem config)")
+    relatorio.add_argument("--percentis", type=float, nargs="+", default=list(PERCENTIS_PADRAO))
+    relatorio.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    relatorio.add_argument("--silencioso", action="store_true", help="Não mostra o progresso")
+    relatorio.set_defaults(funcao=comando_relatorio)
+
+    sequencias = subcomandos.add_parser(
+        "sequencias",
+        help="Componentes simétricas de tensão e corrente e fatores de desequilíbrio de todos os monitores"
+    )
+    sequencias.add_argument("cenario", help="config_circuito.json ou pasta com os CSVs dos monitores")
+    sequencias.add_argument("-o", "--saida", default="sequencias.csv",
+                            help=f"Tabela longa, uma linha por elemento e instante ({', '.join(FORMATOS_RELATORIO)})")
+    sequencias.add_argument("--resumo", default=None, help="Arquivo para o resumo por elemento (opcional)")
+    sequencias.add_argument("--kv-base", type=float, default=None,
+                            help="Tensão de linha (kV) dos monitores achados na pasta (sem config)")
+    sequencias.add_argument("--silencioso", action="store_true", help="Não mostra o progresso")
+    sequencias.set_defaults(funcao=comando_sequencias)
+
+    drp = subcomandos.add_parser(
+        "drp",
+        help="DRP/DRC por medidor e fase (janelas de 10 min do PRODIST) de planilhas de medição"
+    )
+    drp.add_argument("medicoes", nargs="+", help="Arquivos .csv/.xlsx dos medidores ou pastas com eles")
+    drp.add_argument("--vn", type=float, required=True, help="Tensão nominal de fase (V)")
+    drp.add_argument("-o", "--saida", default="drp_drc.csv",
+                     help=f"Arquivo de saída ({', '.join(FORMATOS_RELATORIO)})")
+    drp.add_argument("--processos", type=int, default=None, help="Processos em paralelo (padrão: núcleos)")
+    drp.add_argument("--silencioso", action="store_true", help="Não mostra o progresso")
+    drp.set_defaults(funcao=comando_drp)
+
+    energia = subcomandos.add_parser(
+        "energia",
+        help="Energia e perdas (registradores dos EnergyMeters) de um EMout.txt ou de uma pasta de cenários"
+    )
+    energia.add_argument("alvo", help="Arquivo EMout.txt ou pasta (uma subpasta por cenário)")
+    energia.add_argument("-o", "--saida", default="energia.csv",
+                         help=f"Indicadores por cenário e medidor ({', '.join(FORMATOS_RELATORIO)})")
+    energia.add_argument("--niveis", default=None, help="Arquivo para as perdas por nível de tensão (opcional)")
+    energia.add_argument("--silencioso", action="store_true", help="Não mostra o progresso")
+    energia.set_defaults(funcao=comando_energia)
+
+    comparar = subcomandos.add_parser(
+        "comparar",
+        help="Ranking de erro de todas as colunas em pu de dois CSVs de resultados, lidos em blocos"
+    )
+    comparar.add_argument("arquivo1")
+    comparar.add_argument("arquivo2")
+    comparar.add_argument("-o", "--saida", default="ranking_comparacao.csv",
+                          help=f"Arquivo de saída ({', '.join(FORMATOS_RELATORIO)})")
+    comparar.add_argument("--filtro", default="", help="Só colunas que contêm este texto (ex.: número da barra)")
+    comparar.add_argument("--tolerancia", type=float, default=TOLERANCIA_ALINHAMENTO_S,
+                          help="Tolerância do alinhamento por tempo (s)")
+    comparar.add_argument("--limiar", type=float, default=LIMIAR_DIVERGENCIA_PADRAO,
+                          help="Diferença (pu) considerada divergente")
+    comparar.add_argument("--bloco", type=int, default=TAMANHO_BLOCO_CSV, help="Linhas por bloco")
+    comparar.add_argument("--silencioso", action="store_true", help="Não mostra o progresso")
+    comparar.add_argument("--medir-memoria", action="store_true",
+                          help="Mede o pico de memória (tracemalloc; deixa a comparação mais lenta)")
+    comparar.set_defaults(funcao=comando_comparar)
+
+    args = parser.parse_args()
+    return args.funcao(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
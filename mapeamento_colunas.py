@@ -0,0 +1,127 @@
+# ============================================================================
+# ÍNDICE COMPILADO DO MAPEAMENTO DE COLUNAS (mapeamento.json)
+# ============================================================================
+# As regex de todas as grandezas do JSON são combinadas em um único padrão
+# ancorado: cada coluna é classificada com UMA tentativa a partir do início,
+# em vez de uma busca por grandeza. A ordem de prioridade do JSON é mantida
+# (a primeira grandeza que casa vence), assim como os grupos (1) = elemento
+# e (2) = fase de cada regex.
+#
+# O resultado fica memorizado pela "impressão digital" do cabeçalho (nomes
+# das colunas + conteúdo do JSON): reruns do Streamlit e outras sessões no
+# mesmo processo reaproveitam o índice sem varrer as colunas de novo.
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# Quantos cabeçalhos diferentes ficam memorizados ao mesmo tempo
+MAX_INDICES_MEMORIZADOS = 16
+
+# Regex que começam com "(?:prefixo)?(.+?)": se casam em alguma posição,
+# também casam na posição 0 (o grupo do nome absorve o que vem antes), e a
+# busca mais à esquerda é justamente essa. Para elas search() == match(),
+# sem o custo quadrático de tentar cada posição de início quando não casam.
+_INICIO_ANCORAVEL = re.compile(r"^(?:\(\?:(?:[^()\\]|\\.)*\)\?)?\(\.[+*]\??\)")
+
+_indices = OrderedDict()
+_trava_indices = threading.Lock()
+
+
+def _grandezas(config):
+    """Grandezas do JSON, ignorando as configurações de sistema (chaves com "_")."""
+    return [(g, dados) for g, dados in config.items() if not g.startswith("_")]
+
+
+@lru_cache(maxsize=8)
+def _compilar(config_json):
+    """
+    Compila o padrão combinado a partir do JSON serializado.
+
+    Retorna (padrão, regras), onde regras[k] = (grandeza, prefixo, tem_fase,
+    grupo_elemento, grupo_fase) da k-ésima alternativa. Se alguma regex não
+    puder ser combinada (ex.: flags globais no meio do padrão), retorna
+    padrão None e as regex individuais, na ordem do JSON.
+    """
+    grandezas = _grandezas(json.loads(config_json))
+    individuais = [re.compile(dados["regex"]) for _, dados in grandezas]
+
+    alternativas, regras = [], []
+    deslocamento = 1
+    for k, ((grandeza, dados), padrao) in enumerate(zip(grandezas, individuais)):
+        # Demais regex: (?s:.*?) + regex equivale a search() (início mais à
+        # esquerda); a alternância só passa à grandeza seguinte se esta não casar
+        inicio = "" if _INICIO_ANCORAVEL.match(dados["regex"]) else "(?s:.*?)"
+        alternativas.append(f"(?P<g{k}>{inicio}(?:{dados['regex']}))")
+        grupo_fase = deslocamento + 2 if padrao.groups >= 2 else None
+        regras.append((grandeza, dados["prefixo"], dados["tem_fase"], deslocamento + 1, grupo_fase))
+        deslocamento += 1 + padrao.groups
+
+    try:
+        combinado = re.compile("|".join(alternativas))
+    except re.error:
+        return None, list(zip(grandezas, individuais))
+    return combinado, regras
+
+
+def _classificar(colunas, config_json):
+    combinado, regras = _compilar(config_json)
+    mapas = {grandeza: {} for grandeza in json.loads(config_json)}
+
+    if combinado is None:
+        # Caminho lento: uma busca por grandeza, como no mapeamento original
+        for col in colunas:
+            for (grandeza, dados), padrao in regras:
+                match = padrao.search(col)
+                if match:
+                    fase_num = match.group(2) if dados["tem_fase"] else None
+                    fase = f"{dados['prefixo']}{fase_num}" if fase_num else dados["prefixo"]
+                    mapas[grandeza].setdefault(match.group(1), {})[fase] = col
+                    break
+        return mapas
+
+    match_coluna = combinado.match
+    for col in colunas:
+        match = match_coluna(col)
+        if match is None:
+            continue
+        grandeza, prefixo, tem_fase, grupo_elemento, grupo_fase = regras[int(match.lastgroup[1:])]
+        fase_num = match.group(grupo_fase) if tem_fase and grupo_fase else None
+        fase = f"{prefixo}{fase_num}" if fase_num else prefixo
+        mapas[grandeza].setdefault(match.group(grupo_elemento), {})[fase] = col
+    return mapas
+
+
+def impressao_digital(colunas, config_json):
+    """Hash do cabeçalho (nomes e ordem das colunas) junto com o JSON de mapeamento."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(config_json.encode("utf-8"))
+    h.update(b"\x00")
+    h.update("\x1f".join(map(str, colunas)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def indexar_colunas(colunas, config):
+    """
+    Organiza as colunas em grandeza -> elemento -> fase -> coluna.
+
+    O índice é memorizado pela impressão digital do cabeçalho; o dicionário
+    retornado é compartilhado entre chamadas e não deve ser alterado.
+    """
+    config_json = json.dumps(config, ensure_ascii=False)
+    colunas = [str(c) for c in colunas]
+    chave = impressao_digital(colunas, config_json)
+
+    with _trava_indices:
+        if chave in _indices:
+            _indices.move_to_end(chave)
+            return _indices[chave]
+
+    mapas = _classificar(colunas, config_json)
+    with _trava_indices:
+        _indices[chave] = mapas
+        while len(_indices) > MAX_INDICES_MEMORIZADOS:
+            _indices.popitem(last=False)
+    return mapas
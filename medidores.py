@@ -0,0 +1,194 @@
+# ============================================================================
+# MEDIÇÕES DE CAMPO: LEITURA, MAPEAMENTO E DRP/DRC EM LOTE
+# ============================================================================
+# Planilhas dos medidores de qualidade (CSV com ";" ou XLSX, colunas como
+# "Tensao.Average.Van"). Uma campanha tem centenas de medidores com semanas
+# de leituras cada; aqui os arquivos são processados em paralelo (um
+# processo por núcleo) e o resultado é uma tabela "tidy", uma linha por
+# medidor e fase, com os indicadores sobre as janelas de 10 min do PRODIST.
+#
+# Usado pelo dashboard (layout_drp_drc.py) e por: python main.py drp <arquivos>
+import glob
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analise_lote import gravar_relatorio, validar_formato_relatorio
+from indicadores_prodist import JANELA_PRODIST_S, calcular_drp_drc_janelas
+from instrumentacao import ETAPA_LEITURA, ETAPA_TEMPO, etapa
+
+EXTENSOES_MEDICOES = (".csv", ".xlsx")
+
+
+def mapear_grandezas_medidor(df):
+    """
+    Busca as colunas de Tensão Média e Corrente Média na planilha do medidor.
+    """
+    mapa_tensoes = {}
+    mapa_correntes = {}
+
+    for col in df.columns:
+        col_lower = col.lower()
+
+        # Mapeamento de Tensões de Fase (van, vbn, vcn) - Pega apenas a média
+        if 'tensao.average.v' in col_lower:
+            if 'an' in col_lower: mapa_tensoes['Fase A'] = col
+            elif 'bn' in col_lower: mapa_tensoes['Fase B'] = col
+            elif 'cn' in col_lower: mapa_tensoes['Fase C'] = col
+
+        # Mapeamento de Correntes (ia, ib, ic, in) - Pega apenas a média
+        elif 'corrente.average.i' in col_lower:
+            if 'ia' in col_lower: mapa_correntes['Fase A'] = col
+            elif 'ib' in col_lower: mapa_correntes['Fase B'] = col
+            elif 'ic' in col_lower: mapa_correntes['Fase C'] = col
+            elif 'in' in col_lower: mapa_correntes['Neutro'] = col
+
+    return mapa_tensoes, mapa_correntes
+
+
+def ler_medicoes(arquivo, nome=None):
+    """
+    Lê a planilha do medidor (caminho ou arquivo aberto) e cria 'Tempo_EixoX'.
+
+    CSV é lido com ";" e, se falhar, como Excel (alguns medidores exportam
+    XLSX com extensão .csv). Sem data/hora reconhecível, Tempo_EixoX vira o
+    número da leitura.
+    """
+    nome = nome or getattr(arquivo, "name", str(arquivo))
+    with etapa(ETAPA_LEITURA, os.path.basename(nome)):
+        if nome.lower().endswith(".csv"):
+            try:
+                df = pd.read_csv(arquivo, sep=';', encoding='utf-8')
+            except Exception:
+                if hasattr(arquivo, "seek"):
+                    arquivo.seek(0)
+                df = pd.read_excel(arquivo)
+        else:
+            df = pd.read_excel(arquivo)
+
+    df.columns = df.columns.str.strip()
+    primeira_coluna = df.columns[0]
+    with etapa(ETAPA_TEMPO, primeira_coluna):
+        df['Tempo_EixoX'] = pd.to_datetime(df[primeira_coluna].astype(str).str.strip(), format='mixed', errors='coerce')
+        if df['Tempo_EixoX'].isna().all():
+            df['Tempo_EixoX'] = range(len(df))
+    return df
+
+
+def tempo_medicoes_s(df):
+    """Instantes em segundos para as janelas de 10 min (None se não houver data/hora)."""
+    tempo = df['Tempo_EixoX']
+    if not pd.api.types.is_datetime64_any_dtype(tempo):
+        return None
+    return np.where(tempo.isna(), np.nan, tempo.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9)
+
+
+def indicadores_medidor(df, vn, medidor="", janela_s=JANELA_PRODIST_S):
+    """Tabela tidy (uma linha por fase) com DRP/DRC do medidor."""
+    mapa_tensoes, _ = mapear_grandezas_medidor(df)
+    if not mapa_tensoes:
+        raise ValueError("não foram encontradas colunas de tensão")
+
+    tensoes = np.column_stack([pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+                               for col in mapa_tensoes.values()])
+    tempo_s = tempo_medicoes_s(df)
+    tabela = calcular_drp_drc_janelas(tempo_s, tensoes, vn, list(mapa_tensoes), janela_s)
+    tabela.insert(0, "medidor", medidor)
+    tabela["integracao"] = f"{janela_s // 60} min" if tempo_s is not None else "leitura"
+    return tabela
+
+
+# =======================================================
+# LOTE DE MEDIDORES (EM PARALELO)
+# =======================================================
+
+def listar_medicoes(alvos):
+    """Arquivos de medição a partir de arquivos e/ou pastas (busca recursiva)."""
+    arquivos = []
+    for alvo in alvos:
+        if os.path.isdir(alvo):
+            for extensao in EXTENSOES_MEDICOES:
+                arquivos += glob.glob(os.path.join(alvo, "**", f"*{extensao}"), recursive=True)
+        else:
+            arquivos.append(alvo)
+    return sorted(set(arquivos))
+
+
+def analisar_medidor(entrada, vn, janela_s=JANELA_PRODIST_S):
+    """
+    Indicadores de um medidor; entrada é um caminho ou (nome, bytes).
+
+    Erros de leitura viram uma linha com a coluna 'erro' (o lote continua).
+    """
+    if isinstance(entrada, tuple):
+        nome, conteudo = entrada
+        arquivo = io.BytesIO(conteudo)
+    else:
+        nome = arquivo = entrada
+    medidor = os.path.splitext(os.path.basename(nome))[0]
+    try:
+        return indicadores_medidor(ler_medicoes(arquivo, nome), vn, medidor, janela_s)
+    except (OSError, ValueError, pd.errors.ParserError) as erro:
+        return pd.DataFrame([{"medidor": medidor, "erro": str(erro)}])
+
+
+def _analisar_bloco(entradas, vn, janela_s):
+    return [analisar_medidor(entrada, vn, janela_s) for entrada in entradas]
+
+
+def processar_medidores(entradas, vn, processos=None, janela_s=JANELA_PRODIST_S, ao_progredir=None):
+    """
+    DRP/DRC de vários medidores, em paralelo quando processos != 1.
+
+    Parâmetros:
+        entradas: caminhos ou tuplas (nome, bytes) (ex.: arquivos enviados)
+        vn: tensão nominal de fase (V), a mesma para todos os medidores
+        ao_progredir: função opcional (feitos, total) chamada a cada bloco
+
+    Retorna um DataFrame tidy: uma linha por medidor e fase.
+    """
+    processos = processos or os.cpu_count() or 1
+    tamanho_bloco = max(1, min(16, len(entradas) // (processos * 4) or 1))
+    blocos = [entradas[i:i + tamanho_bloco] for i in range(0, len(entradas), tamanho_bloco)]
+
+    tabelas, feitos = [], 0
+    if processos == 1 or len(blocos) <= 1:
+        resultados = (_analisar_bloco(bloco, vn, janela_s) for bloco in blocos)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=processos)
+        resultados = executor.map(_analisar_bloco, blocos, [vn] * len(blocos), [janela_s] * len(blocos))
+    try:
+        for bloco, resultado in zip(blocos, resultados):
+            tabelas.extend(resultado)
+            feitos += len(bloco)
+            if ao_progredir is not None:
+                ao_progredir(feitos, len(entradas))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not tabelas:
+        return pd.DataFrame()
+    tabela = pd.concat(tabelas, ignore_index=True)
+    # Linhas de erro não têm contagens: mantém as colunas inteiras
+    for coluna in ("janelas", "adequadas", "precarias", "criticas"):
+        if coluna in tabela.columns:
+            tabela[coluna] = tabela[coluna].astype("Int64")
+    return tabela
+
+
+def gerar_relatorio_medidores(alvos, saida, vn, processos=None, ao_progredir=None):
+    """Lista, analisa e grava; retorna (tabela, segundos)."""
+    validar_formato_relatorio(saida)  # falha antes de processar, não depois
+    inicio = time.perf_counter()
+    arquivos = listar_medicoes(alvos)
+    if not arquivos:
+        raise ValueError("Nenhum arquivo de medição encontrado (.csv ou .xlsx).")
+    tabela = processar_medidores(arquivos, vn, processos, ao_progredir=ao_progredir)
+    gravar_relatorio(tabela, saida)
+    return tabela, time.perf_counter() - inicio
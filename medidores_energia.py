@@ -0,0 +1,232 @@
+# ============================================================================
+# LEITURA DOS REGISTRADORES DOS ENERGYMETERS DO OPENDSS (EMout.txt)
+# ============================================================================
+# O OpenDSS grava os registradores dos EnergyMeters em um texto de largura
+# fixa:
+#
+#   Registers:
+#   Reg 1 = kWh
+#   ...
+#   Meter           Reg 1      Reg 2 ...
+#
+#   medidorsub       57101      30197 ...
+#
+# Cada arquivo vira uma tabela tipada (uma linha por medidor, uma coluna
+# float64 por registrador, com o nome do registrador) montada de uma vez a
+# partir das linhas do arquivo, sem DataFrame.append por linha.
+#
+# Ao contrário dos monitores, o EMout não passa pelo cache colunar em disco:
+# são poucas linhas e dezenas de colunas, e abrir um .npy por registrador
+# custa mais que reler o texto (~0,5 ms por arquivo). As tabelas ficam em
+# memória, validadas por tamanho e data de modificação do arquivo.
+#
+# Pastas com vários cenários (uma subpasta por cenário, vários medidores por
+# arquivo) são lidas em lote: o nome do cenário vem da subpasta (ou do nome
+# do arquivo, se estiver na raiz) e todas as tabelas são unidas no fim.
+import glob
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Tabelas de EMout guardadas em memória (uma por arquivo)
+MAX_ARQUIVOS_EM_MEMORIA = 4096
+
+PADRAO_ARQUIVO_EMOUT = "*EMout*.txt"
+
+# Registradores usados nos indicadores (nomes como o OpenDSS escreve)
+REG_KWH = "kWh"
+REG_KVARH = "kvarh"
+REG_ZONA_KWH = "Zone kWh"
+REG_PERDAS_ZONA = "Zone Losses kWh"
+REG_PERDAS_CARGA = "Load Losses kWh"
+REG_PERDAS_VAZIO = "No Load Losses kWh"
+REG_PERDAS_LINHAS = "Line Losses"
+REG_PERDAS_TRAFOS = "Transformer Losses"
+REG_EEN = "Load EEN"
+REG_UE = "Load UE"
+REG_GERACAO = "Gen kWh"
+
+# Registradores por nível de tensão: "13.8 kV Losses", "138 kV Line Loss"...
+PADRAO_NIVEL = re.compile(r"^([\d.]+) kV (Losses|Line Loss|Load Loss|No Load Loss|Load Energy)$")
+TIPOS_NIVEL = {
+    "Losses": "Perdas totais",
+    "Line Loss": "Perdas nas linhas",
+    "Load Loss": "Perdas em carga",
+    "No Load Loss": "Perdas em vazio",
+    "Load Energy": "Energia das cargas",
+}
+
+_REGISTRADOR = re.compile(r"^Reg\s+(\d+)\s*=\s*(.*?)\s*$")
+
+
+# =======================================================
+# UM ARQUIVO
+# =======================================================
+
+def ler_emout(fonte):
+    """
+    Lê um EMout.txt (caminho ou arquivo aberto/enviado).
+
+    Retorna um DataFrame com a coluna 'medidor' e uma coluna float64 por
+    registrador, na ordem do arquivo. Registradores sem nome no cabeçalho
+    ficam como "Reg N".
+    """
+    if isinstance(fonte, (str, os.PathLike)):
+        with open(fonte, "r", encoding="utf-8", errors="replace") as f:
+            linhas = f.read().splitlines()
+    else:
+        conteudo = fonte.read()
+        if isinstance(conteudo, bytes):
+            conteudo = conteudo.decode("utf-8", errors="replace")
+        linhas = conteudo.splitlines()
+
+    nomes_registradores = {}
+    medidores, valores = [], []
+    na_tabela = False
+    for linha in linhas:
+        if not na_tabela:
+            encontrado = _REGISTRADOR.match(linha)
+            if encontrado:
+                nomes_registradores[int(encontrado.group(1))] = encontrado.group(2)
+            elif linha.startswith("Meter"):
+                na_tabela = True
+            continue
+        campos = linha.split()
+        if campos:
+            medidores.append(campos[0])
+            valores.append(campos[1:])
+
+    if not na_tabela:
+        raise ValueError("Arquivo sem a tabela de registradores do EnergyMeter (linha 'Meter').")
+
+    n_registradores = max([len(v) for v in valores] + [len(nomes_registradores)])
+    colunas = [nomes_registradores.get(i, f"Reg {i}") for i in range(1, n_registradores + 1)]
+    matriz = np.full((len(valores), n_registradores), np.nan)
+    for i, linha in enumerate(valores):
+        matriz[i, :len(linha)] = np.asarray(linha, dtype=float)
+
+    df = pd.DataFrame(matriz, columns=colunas)
+    df.insert(0, "medidor", medidores)
+    return df
+
+
+@lru_cache(maxsize=MAX_ARQUIVOS_EM_MEMORIA)
+def _emout_em_memoria(caminho, tamanho, mtime_ns):
+    return ler_emout(caminho)
+
+
+def carregar_emout(caminho):
+    """Tabela do EMout, relida só quando o arquivo muda (não altere o DataFrame retornado)."""
+    info = os.stat(caminho)
+    return _emout_em_memoria(os.path.abspath(caminho), info.st_size, info.st_mtime_ns)
+
+
+# =======================================================
+# VÁRIOS ARQUIVOS (CENÁRIOS)
+# =======================================================
+
+def listar_emout(alvo):
+    """Arquivo EMout único ou todos os EMout de uma pasta (recursivamente), em ordem."""
+    if os.path.isfile(alvo):
+        return [alvo]
+    return sorted(glob.glob(os.path.join(alvo, "**", PADRAO_ARQUIVO_EMOUT), recursive=True))
+
+
+def nome_cenario(caminho, raiz):
+    """Subpasta do arquivo em relação à raiz; na própria raiz, o nome do arquivo sem '_EMout'."""
+    pasta = os.path.relpath(os.path.dirname(os.path.abspath(caminho)), os.path.abspath(raiz))
+    if pasta != ".":
+        return pasta.replace(os.sep, "/")
+    return re.sub(r"_?EMout$", "", os.path.splitext(os.path.basename(caminho))[0], flags=re.IGNORECASE) or "EMout"
+
+
+def carregar_emout_lote(alvo, ao_progredir=None):
+    """
+    Registradores de todos os EMout do alvo (arquivo ou pasta) em uma tabela.
+
+    Colunas: 'cenario', 'arquivo', 'medidor' (categóricas) e os
+    registradores; arquivos com registradores diferentes ficam com NaN nos
+    que não têm. ao_progredir(feitos, total) é chamada a cada arquivo.
+    """
+    arquivos = listar_emout(alvo)
+    raiz = os.path.dirname(alvo) if os.path.isfile(alvo) else alvo
+
+    tabelas = []
+    for feitos, arquivo in enumerate(arquivos, start=1):
+        tabelas.append(carregar_emout(arquivo))
+        if ao_progredir is not None:
+            ao_progredir(feitos, len(arquivos))
+
+    if not tabelas:
+        return pd.DataFrame(columns=["cenario", "arquivo", "medidor"])
+    # Uma única concatenação (cópia); cenário e arquivo entram repetidos por medidor
+    tabela = pd.concat(tabelas, ignore_index=True, sort=False)
+    tamanhos = [len(df) for df in tabelas]
+    tabela.insert(0, "arquivo", pd.Categorical(np.repeat(arquivos, tamanhos)))
+    tabela.insert(0, "cenario", pd.Categorical(np.repeat([nome_cenario(a, raiz) for a in arquivos], tamanhos)))
+    tabela["medidor"] = tabela["medidor"].astype("category")
+    return tabela
+
+
+# =======================================================
+# INDICADORES DE ENERGIA E PERDAS
+# =======================================================
+
+def _registrador(tabela, nome):
+    return tabela[nome].to_numpy(dtype=float) if nome in tabela.columns else np.full(len(tabela), np.nan)
+
+
+def indicadores_energia(tabela):
+    """
+    Uma linha por cenário e medidor com energia, perdas e energia não suprida.
+
+    Perdas (%) = perdas da zona / energia que entra na zona (Zone kWh).
+    """
+    energia = _registrador(tabela, REG_KWH)
+    reativa = _registrador(tabela, REG_KVARH)
+    zona = _registrador(tabela, REG_ZONA_KWH)
+    perdas = _registrador(tabela, REG_PERDAS_ZONA)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perdas_pct = np.where(zona > 0, perdas / zona * 100, np.nan)
+        fator_potencia = np.where(np.hypot(energia, reativa) > 0, energia / np.hypot(energia, reativa), np.nan)
+
+    return pd.DataFrame({
+        "cenario": tabela["cenario"],
+        "medidor": tabela["medidor"],
+        "Energia (kWh)": energia,
+        "Energia reativa (kvarh)": reativa,
+        "Fator de potência": fator_potencia,
+        "Energia na zona (kWh)": zona,
+        "Perdas (kWh)": perdas,
+        "Perdas (%)": perdas_pct,
+        "Perdas nas linhas (kWh)": _registrador(tabela, REG_PERDAS_LINHAS),
+        "Perdas nos trafos (kWh)": _registrador(tabela, REG_PERDAS_TRAFOS),
+        "Perdas em carga (kWh)": _registrador(tabela, REG_PERDAS_CARGA),
+        "Perdas em vazio (kWh)": _registrador(tabela, REG_PERDAS_VAZIO),
+        "EEN (kWh)": _registrador(tabela, REG_EEN),
+        "UE (kWh)": _registrador(tabela, REG_UE),
+        "Geração (kWh)": _registrador(tabela, REG_GERACAO),
+    })
+
+
+def perdas_por_nivel(tabela):
+    """Tabela longa (cenário, medidor, nível em kV, tipo, kWh) dos registradores por nível de tensão."""
+    registradores = [(c, PADRAO_NIVEL.match(c)) for c in tabela.columns if isinstance(c, str)]
+    registradores = [(c, float(m.group(1)), TIPOS_NIVEL[m.group(2)]) for c, m in registradores if m]
+    if not registradores:
+        return pd.DataFrame(columns=["cenario", "medidor", "nivel_kv", "tipo", "kWh"])
+
+    colunas = [c for c, _, _ in registradores]
+    valores = tabela[colunas].to_numpy(dtype=float)
+    n = len(tabela)
+    return pd.DataFrame({
+        "cenario": np.repeat(tabela["cenario"].to_numpy(), len(colunas)),
+        "medidor": np.repeat(tabela["medidor"].to_numpy(), len(colunas)),
+        "nivel_kv": np.tile([kv for _, kv, _ in registradores], n),
+        "tipo": np.tile([tipo for _, _, tipo in registradores], n),
+        "kWh": valores.ravel(),
+    })
+
@@ -0,0 +1,83 @@
+# ============================================================================
+# LEITURA DOS MONITORES DO OPENDSS
+# ============================================================================
+# Funções compartilhadas entre o dashboard (layout_basico.py), a pirâmide de
+# agregados e a linha de comando (main.py), para que todos leiam os monitores
+# e o config_circuito.json do mesmo jeito (mesmos nomes de colunas, mesmos
+# pares tensão/potência, mesmo cache em disco).
+import glob
+import os
+
+import pandas as pd
+
+from cache_colunar import ler_com_cache
+from compactacao import compactar_tipos
+
+
+def sanitize_columns(cols):
+    """Remove espaços e caracteres especiais dos nomes das colunas"""
+    return [c.strip().replace(" ", "_").replace("(", "").replace(")", "") for c in cols]
+
+
+def eh_monitor_opendss(colunas):
+    """Monitores exportados pelo OpenDSS começam com as colunas hour, t(sec)."""
+    return "hour" in [c.strip().lower() for c in colunas]
+
+
+def ler_csv_monitor(caminho):
+    """Lê o CSV do monitor e padroniza os nomes das colunas"""
+    df = pd.read_csv(caminho)
+    df.columns = sanitize_columns(df.columns)
+    return df
+
+
+def carregar_monitor(caminho):
+    """Lê o monitor passando pelo cache colunar em disco (float64) e compacta os tipos em memória"""
+    return compactar_tipos(ler_com_cache(caminho, ler_csv_monitor))
+
+
+def carregar_monitor_padrao(padrao_arquivo):
+    """Primeiro arquivo que casa com o padrão (glob), ou None se não houver"""
+    arquivos = glob.glob(padrao_arquivo)
+    if not arquivos:
+        return None
+    return carregar_monitor(arquivos[0])
+
+
+def montar_topologia(config, raiz=""):
+    """
+    Monta a lista de elementos do config_circuito.json com os caminhos dos monitores.
+
+    raiz: pasta a partir da qual "pasta_arquivos" é resolvida (padrão: a atual)
+    """
+    pasta_base = os.path.join(raiz, config.get("pasta_arquivos", "")) # Pega o nome da pasta definido no JSON
+    topologia = []
+
+    for item in config["elementos"]:
+        # Monta o caminho base conforme está no JSON
+        caminho_original = os.path.join(pasta_base, item["arquivo"])
+
+        # --- LÓGICA INTELIGENTE DE DETECÇÃO DE ARQUIVOS ---
+        # Seus arquivos são separados: "...tensao..." e "...potencia..."
+        # O código abaixo tenta adivinhar o par correto automaticamente.
+        caminho_vi = caminho_original
+        caminho_pq = caminho_original
+
+        # Se o JSON apontar para o arquivo de tensão, calculamos o nome do de potência
+        if "tensao" in caminho_original.lower():
+            caminho_pq = caminho_original.replace("tensao", "potencia")
+
+        # Se o JSON apontar para o arquivo de potência, calculamos o nome do de tensão
+        elif "potencia" in caminho_original.lower():
+            caminho_vi = caminho_original.replace("potencia", "tensao")
+
+        # Adiciona na lista com os caminhos corretos para cada grandeza
+        topologia.append({
+            "nome": item["nome"],
+            "arquivo": caminho_original,
+            "kv_base": item["kv_base"],
+            "tipo": item.get("tipo", "generico"),
+            "arquivo_vi": caminho_vi, # Usa o arquivo de Tensão/Corrente
+            "arquivo_pq": caminho_pq  # Usa o arquivo de Potência
+        })
+    return topologia
@@ -0,0 +1,315 @@
+# ============================================================================
+# PIRÂMIDE DE AGREGADOS (MULTIRRESOLUÇÃO) DAS SÉRIES TEMPORAIS
+# ============================================================================
+# Para cada canal (V1..V3, I1..I3, P/Q dos monitores e as colunas vm_pu/p_mw
+# do mosaik) guarda mínimo, máximo, média e contagem em intervalos de
+# 10 min, 1 h e 1 dia. Os níveis ficam no cache colunar ao lado do arquivo
+# (.tsdq_cache) e são invalidados junto com ele.
+#
+# Os gráficos escolhem o nível mais grosso que ainda preenche o orçamento de
+# pontos, então abrir um ano de dados de 1 minuto não exige ler as amostras.
+#
+# Os monitores do OpenDSS marcam cada amostra no fim do intervalo (modo
+# daily: hour 1 a 24, t(sec) 0). Para eles os intervalos são fechados à
+# direita, (início, fim]: a amostra das 24 h fica no mesmo dia das demais e
+# cada amostra cai no intervalo que ela representa.
+#
+# Construção offline:
+#   python piramide.py Exemplos/Daily/*.csv results_1.h5
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from cache_colunar import assinatura_arquivo, gravar_no_cache, ler_cache_existente
+from fonte_resultados import converter_tempo, ler_cabecalho_csv
+from monitores import eh_monitor_opendss, sanitize_columns
+from reamostragem import indices_reamostragem_grupo
+
+NIVEL_NATIVO = "nativo"
+# Do mais fino para o mais grosso (segundos por intervalo)
+NIVEIS_PIRAMIDE = {"10 min": 600, "1 h": 3600, "1 dia": 86400}
+VERSAO_PIRAMIDE = 2
+TAMANHO_BLOCO_PIRAMIDE = 500_000
+
+# Canais dos monitores (V1, I2, P1_kW, Q3_kvar; ângulos ficam de fora)
+PADRAO_CANAL_MONITOR = re.compile(r"^[VIPQ]\d")
+COL_TEMPO_NIVEL = "tempo_s"
+ESTATISTICAS = ("min", "max", "media", "n")
+
+
+def coluna_estatistica(canal, estatistica):
+    return f"{canal}__{estatistica}"
+
+
+def canais_do_bloco(df, monitor):
+    """Colunas que entram na pirâmide: canais do monitor ou, nos resultados do mosaik, as numéricas."""
+    if monitor:
+        return [c for c in df.columns if PADRAO_CANAL_MONITOR.match(c)]
+    return [c for c in df.columns[1:] if pd.api.types.is_numeric_dtype(df[c])]
+
+
+def tempo_em_segundos(df, deslocamento=0):
+    """
+    Eixo de tempo em segundos.
+
+    Monitores: hour * 3600 + t(sec). Demais arquivos: primeira coluna como
+    data/hora; se não for data, o número da linha (a partir do deslocamento).
+    """
+    if "hour" in df.columns:
+        segundos = df["tsec"].to_numpy(dtype=float) if "tsec" in df.columns else 0.0
+        return df["hour"].to_numpy(dtype=float) * 3600 + segundos
+
+    tempo = df[df.columns[0]]
+    if not pd.api.types.is_datetime64_any_dtype(tempo):
+        tempo = converter_tempo(tempo)
+    if pd.api.types.is_datetime64_any_dtype(tempo):
+        return tempo.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+    return np.arange(deslocamento, deslocamento + len(df), dtype=float)
+
+
+# =======================================================
+# AGREGAÇÃO
+# =======================================================
+
+def _agregar_parcial(tempo_s, valores, canais, periodo, fechado_a_direita=False):
+    """Mín, máx, soma e contagem por intervalo de um bloco (tempo ordenado)."""
+    ordem = np.argsort(tempo_s, kind="stable")
+    tempo_s, valores = tempo_s[ordem], valores[ordem]
+
+    if fechado_a_direita:
+        intervalo = (np.ceil(tempo_s / periodo) - 1).astype(np.int64)
+    else:
+        intervalo = np.floor(tempo_s / periodo).astype(np.int64)
+    inicios = np.flatnonzero(np.r_[True, intervalo[1:] != intervalo[:-1]])
+
+    finitos = np.isfinite(valores)
+    contagem = np.add.reduceat(finitos, inicios, axis=0)
+    soma = np.add.reduceat(np.where(finitos, valores, 0.0), inicios, axis=0)
+    minimo = np.minimum.reduceat(np.where(finitos, valores, np.inf), inicios, axis=0)
+    maximo = np.maximum.reduceat(np.where(finitos, valores, -np.inf), inicios, axis=0)
+
+    dados = {COL_TEMPO_NIVEL: intervalo[inicios] * float(periodo)}
+    for j, canal in enumerate(canais):
+        dados[coluna_estatistica(canal, "min")] = minimo[:, j]
+        dados[coluna_estatistica(canal, "max")] = maximo[:, j]
+        dados[coluna_estatistica(canal, "soma")] = soma[:, j]
+        dados[coluna_estatistica(canal, "n")] = contagem[:, j]
+    return pd.DataFrame(dados)
+
+
+def _combinar_parciais(partes, canais):
+    """Junta os parciais dos blocos (um intervalo pode estar em dois blocos)."""
+    if not partes:
+        return pd.DataFrame(columns=[COL_TEMPO_NIVEL])
+    todos = pd.concat(partes, ignore_index=True)
+    regras = {}
+    for canal in canais:
+        regras[coluna_estatistica(canal, "min")] = "min"
+        regras[coluna_estatistica(canal, "max")] = "max"
+        regras[coluna_estatistica(canal, "soma")] = "sum"
+        regras[coluna_estatistica(canal, "n")] = "sum"
+    nivel = todos.groupby(COL_TEMPO_NIVEL, sort=True).agg(regras).reset_index()
+
+    colunas = {COL_TEMPO_NIVEL: nivel[COL_TEMPO_NIVEL].to_numpy()}
+    for canal in canais:
+        n = nivel[coluna_estatistica(canal, "n")].to_numpy()
+        vazio = n == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = nivel[coluna_estatistica(canal, "soma")].to_numpy() / n
+        for estatistica, valores in (
+            ("min", nivel[coluna_estatistica(canal, "min")].to_numpy(dtype=float)),
+            ("max", nivel[coluna_estatistica(canal, "max")].to_numpy(dtype=float)),
+            ("media", media),
+        ):
+            colunas[coluna_estatistica(canal, estatistica)] = np.where(vazio, np.nan, valores)
+        colunas[coluna_estatistica(canal, "n")] = n.astype(np.int64)
+    return pd.DataFrame(colunas)
+
+
+def construir_piramide(blocos, fechado_a_direita=False):
+    """
+    Constrói todos os níveis em uma única passada.
+
+    Parâmetros:
+        blocos: iterável de (tempo_s, DataFrame só com os canais)
+        fechado_a_direita: intervalos (início, fim], para amostras marcadas
+                           no fim do intervalo (monitores do OpenDSS)
+
+    Retorna:
+        {nome_do_nivel: DataFrame com tempo_s e canal__min/max/media/n}
+    """
+    parciais = {nome: [] for nome in NIVEIS_PIRAMIDE}
+    canais = None
+    for tempo_s, df_canais in blocos:
+        if canais is None:
+            canais = list(df_canais.columns)
+        valores = df_canais[canais].to_numpy(dtype=float)
+        for nome, periodo in NIVEIS_PIRAMIDE.items():
+            parciais[nome].append(_agregar_parcial(tempo_s, valores, canais, periodo, fechado_a_direita))
+    return {nome: _combinar_parciais(partes, canais or []) for nome, partes in parciais.items()}
+
+
+def _eh_monitor(caminho):
+    """CSV de monitor do OpenDSS (HDF5 e resultados do mosaik não são)."""
+    if caminho.lower().endswith((".h5", ".hdf5", ".hdf")):
+        return False
+    return eh_monitor_opendss(ler_cabecalho_csv(caminho))
+
+
+def iterar_blocos_arquivo(caminho, tabela=None, tamanho_bloco=TAMANHO_BLOCO_PIRAMIDE):
+    """
+    Lê o arquivo em blocos e devolve (tempo_s, canais) de cada bloco.
+
+    Aceita monitores do OpenDSS (CSV), resultados do mosaik em CSV e HDF5
+    (HDFStore em formato table; tabela = chave, por padrão a primeira).
+    """
+    if caminho.lower().endswith((".h5", ".hdf5", ".hdf")):
+        with pd.HDFStore(caminho, mode="r") as store:
+            chave = tabela or store.keys()[0]
+            deslocamento = 0
+            for bloco in store.select(chave, chunksize=tamanho_bloco):
+                if pd.api.types.is_datetime64_any_dtype(bloco.index):
+                    bloco = bloco.reset_index()
+                bloco = bloco.reset_index(drop=True)
+                yield tempo_em_segundos(bloco, deslocamento), bloco[canais_do_bloco(bloco, False)]
+                deslocamento += len(bloco)
+        return
+
+    monitor = _eh_monitor(caminho)
+    deslocamento = 0
+    for bloco in pd.read_csv(caminho, chunksize=tamanho_bloco):
+        bloco.columns = sanitize_columns(bloco.columns) if monitor else bloco.columns.str.strip()
+        yield tempo_em_segundos(bloco, deslocamento), bloco[canais_do_bloco(bloco, monitor)]
+        deslocamento += len(bloco)
+
+
+# =======================================================
+# PERSISTÊNCIA
+# =======================================================
+
+def _variante(periodo, tabela=None):
+    sufixo = "" if tabela is None else re.sub(r"[^\w.-]", "_", tabela)
+    return f".piramide{sufixo}_{periodo}s"
+
+
+def ler_piramide(caminho, tabela=None, construir=True, blocos=None):
+    """
+    Lê a pirâmide persistida ao lado do arquivo.
+
+    Se algum nível estiver ausente ou desatualizado, reconstrói todos em uma
+    passada (construir=True) ou retorna None (construir=False). Quem já tem
+    os dados em memória pode passar os blocos e evitar reler o arquivo.
+    """
+    piramide = {
+        nome: ler_cache_existente(caminho, VERSAO_PIRAMIDE, _variante(periodo, tabela))
+        for nome, periodo in NIVEIS_PIRAMIDE.items()
+    }
+    if all(nivel is not None for nivel in piramide.values()):
+        return piramide
+    if not construir:
+        return None
+
+    assinatura = assinatura_arquivo(caminho, VERSAO_PIRAMIDE)
+    if blocos is None:
+        blocos = iterar_blocos_arquivo(caminho, tabela)
+    piramide = construir_piramide(blocos, fechado_a_direita=_eh_monitor(caminho))
+    for nome, periodo in NIVEIS_PIRAMIDE.items():
+        gravar_no_cache(caminho, piramide[nome], assinatura, _variante(periodo, tabela))
+    return piramide
+
+
+# =======================================================
+# ESCOLHA DO NÍVEL E GRÁFICOS
+# =======================================================
+
+def canais_disponiveis(piramide, canais):
+    """True se todos os canais pedidos existem na pirâmide."""
+    if not piramide:
+        return False
+    colunas = next(iter(piramide.values())).columns
+    return all(coluna_estatistica(c, "media") in colunas for c in canais)
+
+
+def recortar_nivel(nivel, janela_s):
+    """Intervalos do nível dentro da janela (em segundos); tudo se janela for None."""
+    if janela_s is None:
+        return nivel
+    tempo = nivel[COL_TEMPO_NIVEL].to_numpy()
+    return nivel[(tempo >= janela_s[0]) & (tempo <= janela_s[1])]
+
+
+def para_segundos(valor):
+    """Limite de janela (data/hora ou passo numérico) na escala de tempo_s."""
+    if isinstance(valor, (int, float, np.number)):
+        return float(valor)
+    return pd.Timestamp(valor).value / 1e9
+
+
+def escolher_nivel(piramide, canal, janela_s, max_pontos):
+    """
+    Nome do nível mais grosso que ainda tem pelo menos max_pontos intervalos
+    na janela. Se nem as amostras nativas chegam a isso, retorna "nativo".
+    """
+    niveis = list(NIVEIS_PIRAMIDE)
+    # Amostras nativas = soma das contagens no nível mais fino
+    n_nativo = recortar_nivel(piramide[niveis[0]], janela_s)[coluna_estatistica(canal, "n")].sum()
+    escolhido = NIVEL_NATIVO
+    if n_nativo < max_pontos:
+        return escolhido
+    for nome in niveis:
+        if len(recortar_nivel(piramide[nome], janela_s)) >= max_pontos:
+            escolhido = nome
+        else:
+            break
+    return escolhido
+
+
+def reduzir_nivel(nivel, canais, max_pontos):
+    """
+    Mantém no máximo ~max_pontos intervalos por curva, preservando os
+    intervalos com os extremos (Mín/Máx sobre as colunas min e max).
+    """
+    indices = indices_reamostragem_grupo(
+        nivel[COL_TEMPO_NIVEL].to_numpy(),
+        [nivel[coluna_estatistica(c, e)].to_numpy() for c in canais for e in ("min", "max")],
+        max_pontos, "Mín/Máx"
+    )
+    return nivel.iloc[indices]
+
+
+def _cor_transparente(cor_hex, alfa=0.2):
+    cor_hex = cor_hex.lstrip("#")
+    r, g, b = (int(cor_hex[i:i + 2], 16) for i in (0, 2, 4))
+    return f"rgba({r}, {g}, {b}, {alfa})"
+
+
+def tracos_envelope(x, minimo, maximo, media, nome, cor, line_shape="linear"):
+    """Faixa mín–máx sombreada com a linha da média por cima (mesmo grupo de legenda)."""
+    return [
+        go.Scatter(x=x, y=maximo, mode="lines", line=dict(width=0, shape=line_shape),
+                   legendgroup=nome, showlegend=False, hoverinfo="skip"),
+        go.Scatter(x=x, y=minimo, mode="lines", line=dict(width=0, shape=line_shape),
+                   fill="tonexty", fillcolor=_cor_transparente(cor),
+                   legendgroup=nome, showlegend=False, hoverinfo="skip"),
+        go.Scatter(x=x, y=media, mode="lines", line=dict(color=cor, shape=line_shape),
+                   name=nome, legendgroup=nome),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constrói a pirâmide de agregados ao lado dos arquivos de dados.")
+    parser.add_argument("arquivos", nargs="+", help="CSVs de monitores/resultados ou arquivos HDF5")
+    parser.add_argument("--tabela", default=None, help="Chave do HDFStore (padrão: a primeira)")
+    args = parser.parse_args()
+
+    for caminho in args.arquivos:
+        piramide = ler_piramide(caminho, args.tabela)
+        resumo = ", ".join(f"{nome}: {len(nivel)}" for nome, nivel in piramide.items())
+        print(f"{caminho} -> {resumo}")
+
+
+if __name__ == "__main__":
+    main()
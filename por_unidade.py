@@ -0,0 +1,130 @@
+# ============================================================================
+# CONVERSÃO PARA POR UNIDADE (PU) DE MATRIZES INTEIRAS
+# ============================================================================
+# A unidade de cada coluna é lida uma vez do cabeçalho ("P1 (kW)", "V1_kV",
+# "I1"...) e vira um fator para a unidade das bases (V, A, kW/kvar). As
+# bases saem do kv_base de cada barra e do S base do cenário, e a conversão
+# de uma matriz inteira é uma única multiplicação com broadcast:
+#
+#     Z_pu = Z (barras × tempo) * (fator_unidade / base)[:, None]
+#
+# Colunas já em pu ("V1_pu", "V1 (pu)", saídas do mosaik) passam sem base.
+#
+# Bases (kv_base é a tensão de linha):
+#   tensão    Vbase = kv_base * 1000 / √3  (fase-neutro, V)
+#   corrente  Ibase = S_base / (√3 * kv_base)  (A)
+#   potência  Sbase = S_base * 1000  (kVA; vale para P em kW e Q em kvar)
+#
+# Usado pela Topologia 3D, pela visualização 3D por elemento e pelas
+# componentes simétricas do desequilíbrio (layout_basico.py).
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+S_BASE_PADRAO_MVA = 100.0
+
+TENSAO = "Tensão"
+CORRENTE = "Corrente"
+POTENCIA = "Potência"
+# Grandeza de colunas que o cabeçalho já declara em pu (fator 1, sem base)
+JA_EM_PU = "pu"
+
+RAIZ_3 = np.sqrt(3)
+
+# Unidade escrita no cabeçalho -> (grandeza, fator para a unidade da base)
+UNIDADES = {
+    "v": (TENSAO, 1.0), "kv": (TENSAO, 1e3),
+    "a": (CORRENTE, 1.0), "ka": (CORRENTE, 1e3),
+    "w": (POTENCIA, 1e-3), "kw": (POTENCIA, 1.0), "mw": (POTENCIA, 1e3),
+    "var": (POTENCIA, 1e-3), "kvar": (POTENCIA, 1.0), "mvar": (POTENCIA, 1e3),
+    "va": (POTENCIA, 1e-3), "kva": (POTENCIA, 1.0), "mva": (POTENCIA, 1e3),
+    "pu": (JA_EM_PU, 1.0),
+}
+# Sem unidade no cabeçalho: o padrão dos monitores do OpenDSS pela letra inicial
+UNIDADE_PADRAO = {"v": "v", "i": "a", "p": "kw", "q": "kvar", "s": "kva"}
+
+_UNIDADE_NO_NOME = re.compile(r"[\s_(\[]+(k?v|k?a|[km]?w|[km]?var|[km]?va|pu)[)\]]?\s*$", re.IGNORECASE)
+_ANGULO = re.compile(r"ang", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def detectar_unidade(coluna):
+    """
+    (grandeza, fator) da coluna a partir do nome, ou (None, 1.0) se não for
+    convertível (ângulos, tempo, colunas desconhecidas). Colunas já em pu
+    voltam como (JA_EM_PU, 1.0).
+
+    fator leva o valor para a unidade das bases: V, A ou kW/kvar/kVA.
+    """
+    nome = coluna.strip()
+    if not nome or _ANGULO.search(nome):
+        return None, 1.0
+    encontrado = _UNIDADE_NO_NOME.search(nome)
+    if encontrado:
+        return UNIDADES[encontrado.group(1).lower()]
+    if re.match(r"[VIPQS]\d", nome, re.IGNORECASE):
+        return UNIDADES[UNIDADE_PADRAO[nome[0].lower()]]
+    return None, 1.0
+
+
+def bases_pu(grandeza, kv_base, s_base_mva=S_BASE_PADRAO_MVA):
+    """
+    Base de cada barra (escalar ou vetor de kv_base) na unidade das bases.
+
+    grandeza: TENSAO, CORRENTE ou POTENCIA; outra grandeza tem base 1.
+    """
+    kv_base = np.asarray(kv_base, dtype=float)
+    if grandeza == TENSAO:
+        return kv_base * 1000 / RAIZ_3
+    if grandeza == CORRENTE:
+        return s_base_mva * 1e6 / (RAIZ_3 * kv_base * 1000)
+    if grandeza == POTENCIA:
+        return np.full(kv_base.shape, s_base_mva * 1000)
+    return np.ones(kv_base.shape)
+
+
+def fatores_pu(colunas, kv_base, s_base_mva=S_BASE_PADRAO_MVA, grandeza_padrao=None):
+    """
+    Fator que multiplica cada coluna para chegar em pu (1 nas não convertíveis
+    e nas que já estão em pu).
+
+    colunas e kv_base se alinham elemento a elemento (uma coluna por barra) ou
+    um deles é único (várias colunas de uma barra, ou a mesma coluna em todas).
+    grandeza_padrao vale para colunas cuja unidade o cabeçalho não informa.
+    """
+    colunas = [colunas] if isinstance(colunas, str) else list(colunas)
+    grandezas, fatores_unidade = [], []
+    for coluna in colunas:
+        grandeza, fator = detectar_unidade(coluna)
+        if grandeza is None and grandeza_padrao is not None and not _ANGULO.search(coluna):
+            grandeza = grandeza_padrao
+        grandezas.append(grandeza)
+        fatores_unidade.append(fator)
+
+    kv_base = np.broadcast_to(np.asarray(kv_base, dtype=float), (max(len(colunas), np.size(kv_base)),))
+    if len(colunas) == 1:
+        grandezas, fatores_unidade = grandezas * len(kv_base), fatores_unidade * len(kv_base)
+
+    bases = np.ones(len(kv_base))
+    for grandeza in set(grandezas) - {None, JA_EM_PU}:
+        mascara = np.array([g == grandeza for g in grandezas])
+        bases[mascara] = bases_pu(grandeza, kv_base[mascara], s_base_mva)
+    return np.asarray(fatores_unidade) / bases
+
+
+def converter_matriz_pu(Z, colunas, kv_base, s_base_mva=S_BASE_PADRAO_MVA, grandeza_padrao=None):
+    """Matriz (barras × tempo) em pu: uma coluna de origem e um kv_base por barra."""
+    return np.asarray(Z, dtype=float) * fatores_pu(colunas, kv_base, s_base_mva, grandeza_padrao)[:, None]
+
+
+def converter_df_pu(df, kv_base, s_base_mva=S_BASE_PADRAO_MVA, colunas=None, grandeza_padrao=None):
+    """
+    Cópia das colunas do monitor de uma barra em pu (tempo × colunas).
+
+    colunas: quais converter (padrão: todas); as não convertíveis voltam iguais.
+    """
+    colunas = list(df.columns if colunas is None else colunas)
+    fatores = fatores_pu(colunas, kv_base, s_base_mva, grandeza_padrao)
+    return pd.DataFrame(df[colunas].to_numpy(dtype=float) * fatores[None, :], index=df.index, columns=colunas)
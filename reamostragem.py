@@ -0,0 +1,142 @@
+# ============================================================================
+# REAMOSTRAGEM DE SÉRIES TEMPORAIS PARA OS GRÁFICOS 2D
+# ============================================================================
+# Com milhões de amostras por fase, enviar tudo para o go.Scatter trava o
+# navegador. Aqui cada curva é reduzida a um número máximo de pontos:
+#   - LTTB (Largest-Triangle-Three-Buckets): preserva a forma visual da curva;
+#   - Mín/Máx: guarda o menor e o maior valor de cada intervalo, garantindo
+#     que nenhuma excursão de tensão fique escondida.
+# Ao ampliar (seleção em caixa no gráfico), só a janela visível é reamostrada,
+# então o detalhe volta a ter resolução total.
+import numpy as np
+import pandas as pd
+
+METODOS_REAMOSTRAGEM = ["LTTB", "Mín/Máx"]
+MAX_PONTOS_PADRAO = 2000
+
+
+def _como_float(x):
+    """Eixo X numérico (datetime vira nanossegundos) para o cálculo das áreas."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def indices_lttb(x, y, max_pontos):
+    """Índices escolhidos pelo LTTB (primeiro e último ponto sempre incluídos)."""
+    n = len(y)
+    if max_pontos >= n or max_pontos < 3:
+        return np.arange(n)
+
+    x = _como_float(x)
+    y = np.asarray(y, dtype=float)
+
+    # n-2 intervalos entre o primeiro e o último ponto
+    limites = np.linspace(1, n - 1, max_pontos - 1).astype(np.int64)
+    indices = np.empty(max_pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    anterior = 0
+    for i in range(max_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        if i + 2 < len(limites):
+            prox_inicio, prox_fim = limites[i + 1], limites[i + 2]
+        else:
+            prox_inicio, prox_fim = n - 1, n
+        x_medio = x[prox_inicio:prox_fim].mean()
+        y_medio = y[prox_inicio:prox_fim].mean()
+
+        # Área do triângulo (ponto anterior, candidato, média do próximo intervalo)
+        area = np.abs(
+            (x[anterior] - x_medio) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (y_medio - y[anterior])
+        )
+        anterior = inicio + int(area.argmax())
+        indices[i + 1] = anterior
+
+    return indices
+
+
+def indices_min_max(y, max_pontos):
+    """Índices do mínimo e do máximo de cada intervalo (2 pontos por intervalo)."""
+    n = len(y)
+    if max_pontos >= n:
+        return np.arange(n)
+
+    n_intervalos = max(max_pontos // 2, 1)
+    tamanho = int(np.ceil(n / n_intervalos))
+    n_intervalos = int(np.ceil(n / tamanho))
+
+    # Matriz (intervalos × amostras) completada com NaN no final
+    y = np.asarray(y, dtype=float)
+    blocos = np.full(n_intervalos * tamanho, np.nan)
+    blocos[:n] = y
+    blocos = blocos.reshape(n_intervalos, tamanho)
+
+    base = np.arange(n_intervalos) * tamanho
+    i_min = base + np.where(np.isnan(blocos), np.inf, blocos).argmin(axis=1)
+    i_max = base + np.where(np.isnan(blocos), -np.inf, blocos).argmax(axis=1)
+
+    indices = np.unique(np.concatenate([[0, n - 1], i_min, i_max]))
+    return indices[indices < n]
+
+
+def indices_reamostragem(x, y, max_pontos=MAX_PONTOS_PADRAO, metodo="LTTB"):
+    """
+    Índices das amostras a enviar ao gráfico (ordenados).
+
+    Valores NaN são ignorados na escolha dos pontos.
+    """
+    y = np.asarray(y, dtype=float)
+    if len(y) <= max_pontos:
+        return np.arange(len(y))
+
+    validos = np.flatnonzero(np.isfinite(y))
+    if len(validos) <= max_pontos:
+        return validos
+
+    if metodo == "Mín/Máx":
+        escolhidos = indices_min_max(y[validos], max_pontos)
+    else:
+        escolhidos = indices_lttb(np.asarray(x)[validos], y[validos], max_pontos)
+    return validos[escolhidos]
+
+
+def indices_reamostragem_grupo(x, colunas_y, max_pontos=MAX_PONTOS_PADRAO, metodo="LTTB"):
+    """
+    União dos índices de várias curvas que compartilham o eixo X.
+
+    Útil para gráficos "largos" (ex.: px.line com V1, V2, V3): os extremos
+    de cada fase são preservados e todas continuam alinhadas no mesmo X.
+    """
+    indices = [indices_reamostragem(x, y, max_pontos, metodo) for y in colunas_y]
+    if not indices:
+        return np.arange(len(x))
+    return np.unique(np.concatenate(indices))
+
+
+def janela_da_selecao(estado_grafico):
+    """
+    Extrai a janela (x_inicial, x_final) de uma seleção em caixa do st.plotly_chart.
+
+    Retorna None quando não há seleção (gráfico sem zoom).
+    """
+    if not estado_grafico:
+        return None
+    caixas = estado_grafico.get("selection", {}).get("box", [])
+    if not caixas or not caixas[0].get("x"):
+        return None
+    x0, x1 = caixas[0]["x"][:2]
+    return (x0, x1) if x0 <= x1 else (x1, x0)
+
+
+def mascara_janela(eixo_x, janela):
+    """Máscara booleana das amostras dentro da janela (todas, se janela for None)."""
+    eixo_x = pd.Series(eixo_x)
+    if janela is None:
+        return np.ones(len(eixo_x), dtype=bool)
+    inicio, fim = janela
+    if pd.api.types.is_datetime64_any_dtype(eixo_x):
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+    return ((eixo_x >= inicio) & (eixo_x <= fim)).to_numpy()
@@ -0,0 +1,78 @@
+# ============================================================================
+# TABELA PAGINADA COM DESTAQUE DAS FAIXAS DO PRODIST
+# ============================================================================
+# df.style.map(função) chama Python uma vez por célula e manda ao navegador o
+# HTML da tabela inteira: com milhões de linhas a página congela. Aqui só a
+# página visível (algumas centenas de linhas) é enviada e estilizada, e as
+# classes de cada célula saem de máscaras vetorizadas (np.digitize contra as
+# faixas 0,87 / 0,92 / 1,05 / 1,06 pu), com uma única chamada ao Styler.
+# Abrir a tabela custa o mesmo com 1 mil ou 10 milhões de linhas.
+#
+# Usado pela "Tabela de Dados" do layout_2.py e pela tabela de desequilíbrio
+# do layout_basico.py.
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from componentes_simetricas import LIMITE_FD_PRODIST
+from indicadores_prodist import ADEQUADA, CRITICA, PRECARIA, classificar_faixas
+
+LINHAS_POR_PAGINA = [100, 500, 1000, 5000]
+
+# Estilo de cada código de faixa (índice = código + 1; -1 é NaN, sem estilo)
+ESTILOS_FAIXAS = np.empty(4, dtype=object)
+ESTILOS_FAIXAS[[0, ADEQUADA + 1]] = ""
+ESTILOS_FAIXAS[PRECARIA + 1] = "background-color: #fff4cc; color: #b36b00;"
+ESTILOS_FAIXAS[CRITICA + 1] = "background-color: #ffcccc; color: red; font-weight: bold;"
+
+
+def classes_tensao_pu(valores):
+    """Faixa PRODIST (ADEQUADA, PRECARIA, CRITICA; -1 para NaN) de tensões em pu."""
+    return classificar_faixas(valores, 1.0)
+
+
+def classes_desequilibrio(valores):
+    """CRITICA acima do limite do fator de desequilíbrio (3 %), ADEQUADA abaixo."""
+    valores = np.asarray(valores, dtype=float)
+    return np.where(np.isnan(valores), -1, np.where(valores > LIMITE_FD_PRODIST, CRITICA, ADEQUADA))
+
+
+def estilo_pagina(pagina, colunas_destaque=(), classificar=classes_tensao_pu, formato="{:.6f}"):
+    """
+    Styler de uma página: formato nas colunas numéricas e cores por faixa.
+
+    formato: texto aplicado a todas as colunas float ou dict {coluna: formato}
+    """
+    if isinstance(formato, str):
+        formato = {c: formato for c in pagina.select_dtypes(include=["float64", "float32"]).columns}
+    estilo = pagina.style.format(formato)
+
+    colunas_destaque = [c for c in colunas_destaque if c in pagina.columns]
+    if colunas_destaque and len(pagina):
+        classes = classificar(pagina[colunas_destaque].to_numpy(dtype=float))
+        css = pd.DataFrame(ESTILOS_FAIXAS[classes + 1], index=pagina.index, columns=colunas_destaque)
+        estilo = estilo.apply(lambda _: css, axis=None, subset=colunas_destaque)
+    return estilo
+
+
+def render_tabela_paginada(df, chave, colunas_destaque=(), classificar=classes_tensao_pu, formato="{:.6f}"):
+    """
+    Mostra o df em páginas; só a página escolhida vai para o navegador.
+
+    chave: prefixo único das chaves dos widgets (uma tabela por chave)
+    """
+    total = len(df)
+    col_linhas, col_pagina, col_info = st.columns([1, 1, 3])
+    linhas = col_linhas.selectbox("Linhas por página:", LINHAS_POR_PAGINA, key=f"{chave}_linhas")
+    n_paginas = max(-(-total // linhas), 1)
+
+    # Trocar o tamanho da página pode deixar a página guardada fora do intervalo
+    chave_pagina = f"{chave}_pagina"
+    if st.session_state.get(chave_pagina, 1) > n_paginas:
+        st.session_state[chave_pagina] = n_paginas
+    pagina = col_pagina.number_input("Página:", min_value=1, max_value=n_paginas, step=1, key=chave_pagina)
+
+    inicio = (int(pagina) - 1) * linhas
+    trecho = df.iloc[inicio:inicio + linhas]
+    col_info.caption(f"Página {int(pagina):,} de {n_paginas:,} | linhas {min(inicio + 1, total):,}–{inicio + len(trecho):,} de {total:,}")
+    st.dataframe(estilo_pagina(trecho, colunas_destaque, classificar, formato), use_container_width=True)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import acompanhamento
+
+
+@pytest.fixture(autouse=True)
+def sem_estado_compartilhado(monkeypatch):
+    monkeypatch.setattr(acompanhamento, "_ACOMPANHADOS", acompanhamento.OrderedDict())
+
+
+@pytest.fixture
+def monitor(tmp_path):
+    caminho = tmp_path / "Mon_carga_1.csv"
+    caminho.write_text("hour, t(sec), V1\n1, 0, 7967.5\n2, 0, 7960.25\n")
+    return caminho
+
+
+def acrescentar(caminho, texto):
+    with open(caminho, "a") as f:
+        f.write(texto)
+
+
+def test_sessoes_compartilham_o_mesmo_dataframe(monitor):
+    a = acompanhamento.acompanhar(str(monitor))
+    b = acompanhamento.acompanhar(str(monitor))
+
+    assert a["df"] is b["df"]
+    assert a["linhas_novas"] == 2
+    assert b["linhas_novas"] == 2  # Primeira visão da sessão b
+    assert len(acompanhamento._ACOMPANHADOS) == 1
+
+
+def test_linhas_novas_por_sessao(monitor):
+    a = acompanhamento.acompanhar(str(monitor))
+    b = acompanhamento.acompanhar(str(monitor))
+    acrescentar(monitor, "3, 0, 7955.0\n4, 0, 795")  # Última linha incompleta
+
+    a = acompanhamento.acompanhar(str(monitor), a)
+    assert a["linhas"] == 3
+    assert a["linhas_novas"] == 1
+
+    acrescentar(monitor, "0.5\n")
+    b = acompanhamento.acompanhar(str(monitor), b)
+    assert b["linhas"] == 4
+    assert b["linhas_novas"] == 2
+    assert b["df"]["V1"].tolist() == [7967.5, 7960.25, 7955.0, 7950.5]
+
+
+def test_bloco_fora_do_float32_alarga_a_coluna(monitor):
+    visao = acompanhamento.acompanhar(str(monitor))
+    assert visao["df"]["V1"].dtype == np.float32
+
+    acrescentar(monitor, "3, 0, 1e39\n")
+    visao = acompanhamento.acompanhar(str(monitor), visao)
+
+    assert visao["df"]["V1"].dtype == np.float64
+    assert visao["df"]["V1"].iloc[-1] == 1e39
+    resumo = visao["df"].attrs["compactacao"]
+    assert "V1" in resumo["float64_mantidas"]
+    assert "V1" not in resumo["float32"]
+
+
+def test_arquivo_recriado_recomeca(monitor, tmp_path):
+    visao = acompanhamento.acompanhar(str(monitor))
+    novo = tmp_path / "novo.csv"
+    novo.write_text("hour, t(sec), V1\n1, 0, 1.0\n")
+    novo.replace(monitor)  # Outro inode no mesmo caminho
+
+    visao = acompanhamento.acompanhar(str(monitor), visao)
+
+    assert visao["linhas"] == 1
+    assert visao["linhas_novas"] == 1
+    assert len(acompanhamento._ACOMPANHADOS) == 1
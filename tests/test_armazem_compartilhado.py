@@ -0,0 +1,94 @@
+import os
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import pytest
+
+import armazem_compartilhado as armazem
+
+
+@pytest.fixture(autouse=True)
+def armazem_isolado(tmp_path, monkeypatch):
+    monkeypatch.setattr(armazem, "PASTA_ARMAZEM", str(tmp_path / "armazem"))
+    monkeypatch.setattr(armazem, "_ENTRADAS", OrderedDict())
+    monkeypatch.setattr(armazem, "_HASHES_ARQUIVO", OrderedDict())
+    monkeypatch.setattr(armazem, "_HASHES_ENVIO", OrderedDict())
+    monkeypatch.setattr(armazem, "_TRAVAS_CHAVE", {})
+    monkeypatch.setattr(armazem, "_PASTA_VARRIDA", False)
+
+
+@pytest.fixture
+def arquivo_csv(tmp_path):
+    caminho = tmp_path / "monitor.csv"
+    caminho.write_text("hour, t(sec), V1\n1,0,7967.4\n2,0,7960.1\n")
+    return str(caminho)
+
+
+def leitor_bruto(caminho):
+    return pd.read_csv(caminho)
+
+
+def leitor_limpo(caminho):
+    df = pd.read_csv(caminho)
+    df.columns = ["hour", "tsec", "V1"]
+    return df
+
+
+def test_mesmo_arquivo_com_leitores_diferentes_nao_colide(arquivo_csv):
+    dono = armazem.Sessao()
+    bruto = armazem.obter_arquivo(arquivo_csv, leitor_bruto, dono)
+    limpo = armazem.obter_arquivo(arquivo_csv, leitor_limpo, dono)
+
+    assert list(bruto.columns) == ["hour", " t(sec)", " V1"]
+    assert list(limpo.columns) == ["hour", "tsec", "V1"]
+    assert len(armazem._ENTRADAS) == 2
+
+
+def test_versao_do_leitor_entra_na_chave(arquivo_csv):
+    dono = armazem.Sessao()
+    v1 = armazem.obter_arquivo(arquivo_csv, leitor_limpo, dono)
+    v2 = armazem.obter_arquivo(arquivo_csv, leitor_limpo, dono, versao_leitor=2)
+    assert v1.attrs[armazem.ATRIBUTO_CHAVE] != v2.attrs[armazem.ATRIBUTO_CHAVE]
+
+
+def test_visao_compartilhada_e_somente_leitura(arquivo_csv):
+    chamadas = []
+
+    def leitor(caminho):
+        chamadas.append(caminho)
+        return leitor_limpo(caminho)
+
+    a = armazem.obter_arquivo(arquivo_csv, leitor, armazem.Sessao())
+    b = armazem.obter_arquivo(arquivo_csv, leitor, armazem.Sessao())
+
+    assert len(chamadas) == 1
+    assert b["V1"].tolist() == pytest.approx([7967.4, 7960.1])
+    with pytest.raises(ValueError):
+        a["V1"].to_numpy()[0] = 0.0
+
+
+def test_liberar_permite_descartar(arquivo_csv):
+    dono = armazem.Sessao()
+    visao = armazem.obter_arquivo(arquivo_csv, leitor_limpo, dono)
+    chave = visao.attrs[armazem.ATRIBUTO_CHAVE]
+
+    armazem.liberar(chave, dono)
+    armazem.obter_envio(b"x\n1\n", leitor_bruto, dono, limite_mb=0)
+
+    assert chave not in armazem._ENTRADAS
+    assert not os.path.exists(os.path.join(armazem.PASTA_ARMAZEM, chave))
+
+
+def test_varredura_apaga_pastas_antigas_de_outros_processos(arquivo_csv):
+    antiga = os.path.join(armazem.PASTA_ARMAZEM, "conjunto_antigo")
+    recente = os.path.join(armazem.PASTA_ARMAZEM, "conjunto_recente")
+    os.makedirs(antiga)
+    os.makedirs(recente)
+    dois_dias = time.time() - 48 * 3600
+    os.utime(antiga, (dois_dias, dois_dias))
+
+    armazem.obter_arquivo(arquivo_csv, leitor_limpo, armazem.Sessao())
+
+    assert not os.path.exists(antiga)
+    assert os.path.exists(recente)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from compactacao import compactar_tipos
+from indicadores_prodist import calcular_drp_drc
+
+
+def test_leitura_colada_no_limite_continua_em_float64():
+    df = pd.DataFrame({"V_pu": [0.92 - 1e-8, 1.0, 1.02], "V_ok": [0.95, 1.0, 1.02]})
+    compacto = compactar_tipos(df)
+
+    assert compacto["V_pu"].dtype == np.float64
+    assert compacto["V_ok"].dtype == np.float32
+    assert compacto.attrs["compactacao"]["float64_mantidas"] == ["V_pu"]
+    # A leitura de 0.91999999 continua precária
+    assert calcular_drp_drc(compacto["V_pu"], 1.0)["precarias"] == 1
+
+
+def test_sem_limites_o_arredondamento_mudaria_a_faixa():
+    df = pd.DataFrame({"V_pu": [0.92 - 1e-8]})
+    compacto = compactar_tipos(df, limites=())
+
+    assert compacto["V_pu"].dtype == np.float32
+    assert calcular_drp_drc(compacto["V_pu"], 1.0)["adequadas"] == 1
+
+
+def test_subnormal_e_fora_do_alcance_continuam_em_float64():
+    df = pd.DataFrame({"sub": [1e-40, 1.0], "grande": [1e39, 1.0], "volts": [7967.4, 7960.1]})
+    compacto = compactar_tipos(df)
+
+    assert compacto["sub"].dtype == np.float64
+    assert compacto["grande"].dtype == np.float64
+    assert compacto["volts"].dtype == np.float32
+
+
+def test_tempo_nao_e_reduzido():
+    df = pd.DataFrame({"hour": [1.0, 2.0], "V1": [7967.0, 7960.0]})
+    compacto = compactar_tipos(df)
+
+    assert compacto["hour"].dtype == np.int64
+    assert compacto.attrs["compactacao"]["tempo"] == ["hour"]
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comparacao import alinhar_linhas, comparar, comparar_em_blocos, parear_colunas
+
+ARQUIVO_1 = """time,Bus1_pu,Bus2_pu,P_kw
+0,1.00,0.95,10
+60,1.00,0.95,10
+120,1.00,0.95,10
+180,1.00,0.95,10
+240,1.00,0.95,10
+"""
+
+# Instantes deslocados de 1 s; 240 fica sem par (mais de 30 s do mais próximo)
+ARQUIVO_2 = """time,bus1_PU,Bus2_pu,P_kw
+1,1.00,0.95,99
+61,1.00,0.96,99
+121,1.02,0.95,99
+181,1.00,0.95,99
+"""
+
+
+@pytest.fixture
+def arquivos(tmp_path):
+    caminho1, caminho2 = tmp_path / "base.csv", tmp_path / "novo.csv"
+    caminho1.write_text(ARQUIVO_1)
+    caminho2.write_text(ARQUIVO_2)
+    return str(caminho1), str(caminho2)
+
+
+def test_parear_colunas_por_nome_normalizado():
+    pares = parear_colunas(["time", "Bus-1 V_pu", "Bus-2 V_pu", "P_kw"], ["time", "bus_1_v_PU", "Bus-3 V_pu"])
+    assert pares == [("Bus-1 V_pu", "bus_1_v_PU")]
+
+
+def test_alinhar_linhas_pelo_instante_mais_proximo():
+    indices1, indices2, modo = alinhar_linhas([0, 60, 120, 180], [1, 59, 130, 500], tolerancia=30)
+
+    assert modo == "tempo"
+    assert indices1.tolist() == [0, 1, 2, 3]
+    assert indices2.tolist() == [0, 1, 2, -1]
+
+
+def test_alinhar_linhas_com_datas_usa_segundos():
+    tempo1 = pd.to_datetime(["2024-01-01 00:00", "2024-01-01 00:10"])
+    tempo2 = pd.to_datetime(["2024-01-01 00:00:20", "2024-01-01 00:10:45"])
+    _, indices2, modo = alinhar_linhas(tempo1, tempo2, tolerancia=30)
+
+    assert modo == "tempo"
+    assert indices2.tolist() == [0, -1]
+
+
+def test_alinhar_linhas_sem_tempo_comparavel_usa_a_posicao():
+    indices1, indices2, modo = alinhar_linhas(["a", "b", "c"], [0.0, 1.0])
+
+    assert modo == "posição"
+    assert indices1.tolist() == indices2.tolist() == [0, 1]
+
+
+def test_comparar_ranking(arquivos):
+    resultado = comparar(pd.read_csv(arquivos[0]), pd.read_csv(arquivos[1]))
+    ranking = resultado["ranking"]
+
+    assert resultado["modo"] == "tempo"
+    assert resultado["linhas_sem_par"] == 1
+    assert ranking["coluna_1"].tolist() == ["Bus1_pu", "Bus2_pu"]
+    assert ranking["coluna_2"].tolist() == ["bus1_PU", "Bus2_pu"]
+    assert ranking["amostras"].tolist() == [4, 4]
+    assert ranking["erro_max"].tolist() == pytest.approx([0.02, 0.01])
+    assert ranking["erro_medio"].tolist() == pytest.approx([0.005, 0.0025])
+    assert ranking["erro_rms"].tolist() == pytest.approx([0.01, 0.005])
+    assert ranking["linha_erro_max"].tolist() == [2, 1]
+    assert ranking["instante_erro_max"].tolist() == [120, 60]
+    assert ranking["primeira_divergencia"].tolist() == [120, 60]
+    assert ranking["violacoes"].tolist() == [1, 1]
+    assert ranking["divergentes (%)"].tolist() == pytest.approx([25.0, 25.0])
+
+
+@pytest.mark.parametrize("tamanho_bloco", [1, 2, 100])
+def test_comparar_em_blocos_igual_a_comparar(arquivos, tamanho_bloco):
+    em_memoria = comparar(pd.read_csv(arquivos[0]), pd.read_csv(arquivos[1]))
+    em_blocos = comparar_em_blocos(*arquivos, tamanho_bloco=tamanho_bloco)
+
+    assert em_blocos["modo"] == "tempo"
+    assert em_blocos["linhas_sem_par"] == 1
+    assert em_blocos["estatisticas"]["linhas"] == 5
+    assert em_blocos["estatisticas"]["pico_bytes"] is None
+    colunas = ["coluna_1", "coluna_2", "amostras", "linha_erro_max", "violacoes"]
+    pd.testing.assert_frame_equal(em_blocos["ranking"][colunas], em_memoria["ranking"][colunas])
+    for coluna in ["erro_max", "erro_medio", "erro_rms", "instante_erro_max", "primeira_divergencia"]:
+        assert np.allclose(
+            em_blocos["ranking"][coluna].astype(float), em_memoria["ranking"][coluna].astype(float)
+        ), coluna
+
+
+def test_comparar_em_blocos_exige_tempo_crescente(tmp_path, arquivos):
+    fora_de_ordem = tmp_path / "fora_de_ordem.csv"
+    fora_de_ordem.write_text("time,Bus1_pu\n0,1.0\n120,1.0\n60,1.0\n")
+
+    with pytest.raises(ValueError, match="crescente"):
+        comparar_em_blocos(str(fora_de_ordem), arquivos[1], tamanho_bloco=1)
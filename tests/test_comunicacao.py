@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from comunicacao import estatisticas_enlaces, ler_log_comunicacao, pivotar_colunar, serie_variavel
+
+LOG_OMNET = """Tempo,Origem,Atributo,Valor,Destino
+0.0,node1,packetSent,1,node2
+0.0,node1,endToEndDelay,0.010,node2
+0.0,node1,endToEndDelay,0.030,node2
+1.0,node1,packetSent,1,node2
+1.0,node1,packetReceived,1,node2
+2.0,node1,packetSent,1,node2
+2.0,node1,packetReceived,1,node2
+2.0,node1,endToEndDelay,0.020,node2
+3.0,node1,packetSent,1,node2
+3.0,node1,packetReceived,1,node2
+3.0,node2,state,idle,node1
+4.0,node2,queueLength,5,node1
+"""
+
+
+@pytest.fixture
+def log_omnet(tmp_path):
+    caminho = tmp_path / "omnet.csv"
+    caminho.write_text(LOG_OMNET)
+    return str(caminho)
+
+
+def test_pivot_colunar_concorda_com_pivot_table(log_omnet):
+    # Blocos de 3 linhas: os dicionários dos blocos são unidos na leitura
+    pivot = pivotar_colunar(ler_log_comunicacao(log_omnet, tamanho_bloco=3))
+
+    longo = pd.read_csv(log_omnet)
+    longo["Valor"] = pd.to_numeric(longo["Valor"], errors="coerce")
+    longo["variavel"] = longo["Origem"] + " | " + longo["Atributo"]
+    denso = longo.pivot_table(index="Tempo", columns="variavel", values="Valor", aggfunc="mean")
+
+    # A ordem das variáveis segue os códigos das categorias, não o nome
+    assert sorted(pivot["variaveis"]) == sorted(denso.columns)
+    for i, nome in enumerate(pivot["variaveis"]):
+        tempo, valor = serie_variavel(pivot, i)
+        esperado = denso[nome].dropna()
+        assert tempo.tolist() == esperado.index.tolist()
+        assert valor == pytest.approx(esperado.to_numpy())
+
+
+def test_pivot_colunar_valores_fixos(log_omnet):
+    pivot = pivotar_colunar(ler_log_comunicacao(log_omnet))
+
+    # "node2 | state" não tem valor numérico e fica de fora
+    assert pivot["variaveis"] == [
+        "node1 | endToEndDelay", "node1 | packetReceived", "node1 | packetSent", "node2 | queueLength",
+    ]
+    assert pivot["inicio"].tolist() == [0, 2, 5, 9, 10]
+    tempo, valor = serie_variavel(pivot, 0)
+    assert tempo.tolist() == [0.0, 2.0]
+    assert valor == pytest.approx([0.02, 0.02])  # 0.010 e 0.030 no mesmo instante: média
+
+
+def test_estatisticas_enlaces_com_destino(log_omnet):
+    enlaces = estatisticas_enlaces(ler_log_comunicacao(log_omnet)).set_index("enlace")
+
+    ida = enlaces.loc["node1 → node2"]
+    assert ida["eventos"] == 10
+    assert ida["duração (s)"] == 3.0
+    assert (ida["enviadas"], ida["recebidas"], ida["descartadas"]) == (4, 3, 0)
+    assert ida["perda (%)"] == pytest.approx(25.0)
+    assert ida["latência média"] == pytest.approx(0.02)
+    assert ida["latência p95"] == pytest.approx(0.029)
+    assert ida["latência máx."] == pytest.approx(0.03)
+    assert np.isnan(enlaces.loc["node2 → node1", "perda (%)"])  # Sem envios
+
+
+def test_sem_destino_a_perda_fica_nan(tmp_path):
+    caminho = tmp_path / "sem_destino.csv"
+    caminho.write_text("\n".join(linha.rsplit(",", 1)[0] for linha in LOG_OMNET.splitlines()) + "\n")
+    enlaces = estatisticas_enlaces(ler_log_comunicacao(str(caminho)))
+
+    assert enlaces["enlace"].tolist() == ["node1", "node2"]
+    assert enlaces["perda (%)"].isna().all()
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from indicadores_prodist import (
+    ADEQUADA,
+    CRITICA,
+    PRECARIA,
+    calcular_drp_drc,
+    calcular_drp_drc_janelas,
+    classificar_faixas,
+    integrar_janelas,
+)
+
+
+def test_classificar_faixas_nos_limites():
+    tensoes = [0.8699, 0.87, 0.9199, 0.92, 1.0, 1.05, 1.0501, 1.06, 1.0601, np.nan]
+    codigos = classificar_faixas(tensoes, 1.0)
+
+    # Os limites pertencem à faixa mais favorável
+    assert codigos.tolist() == [
+        CRITICA, PRECARIA, PRECARIA, ADEQUADA, ADEQUADA,
+        ADEQUADA, PRECARIA, PRECARIA, CRITICA, -1,
+    ]
+
+
+def test_classificar_faixas_concorda_com_calcular_drp_drc():
+    tensoes = np.array([0.8699, 0.87, 0.9199, 0.92, 1.0, 1.05, 1.0501, 1.06, 1.0601])
+    codigos = classificar_faixas(tensoes, 1.0)
+    contagem = calcular_drp_drc(tensoes, 1.0)
+
+    assert (codigos == ADEQUADA).sum() == contagem["adequadas"] == 3
+    assert (codigos == PRECARIA).sum() == contagem["precarias"] == 4
+    assert (codigos == CRITICA).sum() == contagem["criticas"] == 2
+
+
+def test_integrar_janelas_valor_eficaz():
+    tempo = [0, 300, 600, 900]
+    tensoes = [3.0, 4.0, 6.0, np.nan]
+    inicios, eficaz = integrar_janelas(tempo, tensoes)
+
+    assert inicios.tolist() == [0.0, 600.0]
+    assert eficaz[:, 0] == pytest.approx([np.sqrt(12.5), 6.0])
+
+
+def test_janela_cruza_o_limite_pela_media_quadratica():
+    # Leituras individuais precária e adequada; o valor eficaz da janela
+    # sqrt((0.90**2 + 0.94**2) / 2) = 0.92021... fica adequado
+    tempo = [0, 300, 600, 900, 1200, 1500]
+    tensoes = [0.90, 0.94, 0.86, 0.86, 1.00, 1.00]
+    resultado = calcular_drp_drc_janelas(tempo, np.array(tensoes)[:, None], 1.0, ["A"]).iloc[0]
+
+    assert resultado["janelas"] == 3
+    assert (resultado["adequadas"], resultado["precarias"], resultado["criticas"]) == (2, 0, 1)
+    assert resultado["DRP (%)"] == 0.0
+    assert resultado["DRC (%)"] == pytest.approx(100 / 3)
+    assert resultado["V_min"] == pytest.approx(0.86)
+    assert resultado["V_max"] == pytest.approx(1.0)
+
+
+def test_sem_tempo_cada_leitura_e_uma_janela():
+    tensoes = np.array([[0.91, 1.0], [0.95, 1.07], [1.0, np.nan]])
+    resultado = calcular_drp_drc_janelas(None, tensoes, 1.0, ["A", "B"])
+
+    assert resultado["janelas"].tolist() == [3, 2]
+    assert resultado["DRP (%)"].tolist() == pytest.approx([100 / 3, 0.0])
+    assert resultado["DRC (%)"].tolist() == pytest.approx([0.0, 50.0])
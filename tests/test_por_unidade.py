@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from por_unidade import (
+    CORRENTE,
+    JA_EM_PU,
+    POTENCIA,
+    TENSAO,
+    converter_df_pu,
+    converter_matriz_pu,
+    detectar_unidade,
+    fatores_pu,
+)
+
+# Bases de 13,8 kV e 100 MVA
+V_BASE = 13800 / np.sqrt(3)            # 7967.43 V (fase-neutro)
+I_BASE = 100e6 / (np.sqrt(3) * 13800)  # 4183.70 A
+S_BASE = 100e3                         # kVA
+
+
+@pytest.mark.parametrize("coluna, esperado", [
+    ("V1", (TENSAO, 1.0)),
+    ("V2 (kV)", (TENSAO, 1e3)),
+    ("I1", (CORRENTE, 1.0)),
+    ("P1 (kW)", (POTENCIA, 1.0)),
+    ("Q1_kvar", (POTENCIA, 1.0)),
+    ("S1 (MVA)", (POTENCIA, 1e3)),
+    ("Bus-R0-V1_pu", (JA_EM_PU, 1.0)),
+    ("VAngle1", (None, 1.0)),
+    ("hour", (None, 1.0)),
+])
+def test_detectar_unidade(coluna, esperado):
+    assert detectar_unidade(coluna) == esperado
+
+
+def test_fatores_pu_de_uma_barra():
+    colunas = ["V1", "V2 (kV)", "I1", "P1 (kW)", "Q1_kvar", "VAngle1", "hour", "V1_pu"]
+    fatores = fatores_pu(colunas, 13.8)
+
+    assert fatores == pytest.approx([
+        1 / V_BASE, 1e3 / V_BASE, 1 / I_BASE, 1 / S_BASE, 1 / S_BASE, 1.0, 1.0, 1.0,
+    ])
+
+
+def test_fatores_pu_uma_coluna_por_barra():
+    fatores = fatores_pu("V1", [13.8, 0.38])
+    assert fatores == pytest.approx([1 / V_BASE, np.sqrt(3) / 380])
+
+    fatores = fatores_pu(["V1", "I1 (kA)"], [13.8, 0.38], s_base_mva=10)
+    assert fatores == pytest.approx([1 / V_BASE, 1e3 * np.sqrt(3) * 380 / 10e6])
+
+
+def test_grandeza_padrao_so_para_colunas_sem_unidade():
+    fatores = fatores_pu(["Bus1_mag", "Bus1_angle", "Bus1_pu"], 13.8, grandeza_padrao=TENSAO)
+    assert fatores == pytest.approx([1 / V_BASE, 1.0, 1.0])
+
+
+def test_converter_matriz_e_df():
+    Z = np.array([[V_BASE, 0.95 * V_BASE], [380 / np.sqrt(3), 1.05 * 380 / np.sqrt(3)]])
+    assert converter_matriz_pu(Z, "V1", [13.8, 0.38]) == pytest.approx(np.array([[1.0, 0.95], [1.0, 1.05]]))
+
+    df = pd.DataFrame({"hour": [1, 2], "V1": [V_BASE, 0.92 * V_BASE], "P1 (kW)": [50e3, 100e3]})
+    convertido = converter_df_pu(df, 13.8)
+    assert convertido["hour"].tolist() == [1.0, 2.0]
+    assert convertido["V1"].tolist() == pytest.approx([1.0, 0.92])
+    assert convertido["P1 (kW)"].tolist() == pytest.approx([0.5, 1.0])
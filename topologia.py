@@ -0,0 +1,123 @@
+# ============================================================================
+# CARREGAMENTO PARALELO DAS BARRAS DA TOPOLOGIA (COMPARATIVO 3D)
+# ============================================================================
+# Com centenas de barras no config_circuito.json, ler um monitor por vez deixa
+# a página "Topologia (3D)" parada por muito tempo antes do primeiro gráfico.
+# Aqui leitura e escolha da coluna de todas as barras rodam em um pool de
+# threads limitado (a leitura vem do cache colunar em disco e o NumPy/pandas
+# liberam o GIL na maior parte do trabalho), a matriz Z (barras × tempo) é
+# montada de uma vez e a conversão para pu (por_unidade) é uma só operação
+# sobre a matriz inteira.
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+
+import numpy as np
+
+from por_unidade import converter_matriz_pu
+
+# Threads simultâneas (leitura de disco + NumPy)
+MAX_THREADS_TOPOLOGIA = min(16, 2 * (os.cpu_count() or 1))
+
+COLUNAS_TEMPO = ["hour", "time", "t(h)"]
+
+
+@lru_cache(maxsize=1024)
+def resolver_coluna(colunas, candidatas):
+    """
+    Primeira coluna que contém algum dos nomes candidatos (ex.: "V1", " V1").
+
+    Memorizada pelo cabeçalho: monitores do mesmo tipo têm as mesmas colunas,
+    então a varredura acontece uma vez por tipo de monitor, não por barra.
+    """
+    return next((col for col in colunas if any(x in col for x in candidatas)), None)
+
+
+@lru_cache(maxsize=1024)
+def resolver_coluna_tempo(colunas):
+    return next((c for c in colunas if c.lower() in COLUNAS_TEMPO), None)
+
+
+def carregar_barra(caminho, candidatas, carregar):
+    """
+    Lê o monitor de uma barra e devolve (eixo_tempo, valores, coluna) ou None.
+
+    carregar: função caminho -> DataFrame (None se o arquivo não existir)
+    """
+    df = carregar(caminho)
+    if df is None:
+        return None
+
+    colunas = tuple(df.columns)
+    coluna_alvo = resolver_coluna(colunas, tuple(candidatas))
+    if coluna_alvo is None:
+        return None
+
+    col_tempo = resolver_coluna_tempo(colunas)
+    eixo_tempo = df[col_tempo].to_numpy() if col_tempo else np.arange(len(df))
+
+    return eixo_tempo, df[coluna_alvo].to_numpy(dtype=float), coluna_alvo
+
+
+def carregar_topologia(itens, tipo_arquivo, candidatas, grandeza, usar_pu, s_base_mva,
+                       carregar, max_threads=MAX_THREADS_TOPOLOGIA, ao_progredir=None):
+    """
+    Carrega as barras selecionadas em paralelo e monta a matriz Z.
+
+    Parâmetros:
+        itens: elementos da topologia (monitores.montar_topologia)
+        tipo_arquivo: "VI" (arquivo_vi) ou "PQ" (arquivo_pq)
+        candidatas: nomes aceitos para a coluna (ex.: ["V1", " V1"])
+        grandeza: "Tensão", "Corrente" ou "Potência"; a unidade vem do
+                  cabeçalho de cada coluna e a grandeza só vale para colunas
+                  sem unidade reconhecível
+        usar_pu: converte Z com o kv_base de cada barra e s_base_mva
+        carregar: função caminho -> DataFrame
+        ao_progredir: função opcional (concluídas, total, nome_da_barra),
+                      chamada na thread de quem chamou, na ordem de conclusão
+
+    Retorna:
+        (Z barras × tempo, eixo_tempo, nomes) - barras sem dados ficam de fora;
+        séries mais curtas são completadas com NaN.
+    """
+    chave_arquivo = "arquivo_vi" if tipo_arquivo == "VI" else "arquivo_pq"
+    resultados = [None] * len(itens)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_threads, len(itens)))) as executor:
+        futuros = {
+            executor.submit(carregar_barra, item[chave_arquivo], candidatas, carregar): i
+            for i, item in enumerate(itens)
+        }
+        for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+            i = futuros[futuro]
+            resultados[i] = futuro.result()
+            if ao_progredir is not None:
+                ao_progredir(concluidas, len(itens), itens[i]["nome"])
+
+    validos = [(item, r) for item, r in zip(itens, resultados) if r is not None]
+    if not validos:
+        return None, None, []
+
+    nomes = [item["nome"] for item, _ in validos]
+    series = [valores for _, (_, valores, _) in validos]
+    # Eixo de tempo da primeira barra válida (na ordem da topologia)
+    eixo_tempo = validos[0][1][0]
+
+    tamanhos = np.fromiter((len(s) for s in series), dtype=np.int64, count=len(series))
+    if (tamanhos == tamanhos[0]).all():
+        Z = np.vstack(series)
+    else:
+        Z = np.full((len(series), tamanhos.max()), np.nan)
+        mascara = np.arange(tamanhos.max()) < tamanhos[:, None]
+        Z[mascara] = np.concatenate(series)
+
+    if usar_pu:
+        Z = converter_matriz_pu(
+            Z, [coluna for _, (_, _, coluna) in validos], [item["kv_base"] for item, _ in validos],
+            s_base_mva, grandeza_padrao=grandeza
+        )
+
+    if len(eixo_tempo) != Z.shape[1]:
+        # Fallback se tamanhos diferem
+        eixo_tempo = np.arange(Z.shape[1])
+    return Z, eixo_tempo, nomes